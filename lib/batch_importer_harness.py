@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Headless test of the parallel, resumable Batch Importer.
+
+Runs ``streambim.batch_runner`` end to end without Revit: the orchestrator
+starts real worker processes (this file with ``--worker``), and the workers
+run :class:`~streambim.batch_runner.BatchWorker` with stubbed open /
+download / write / sync functions that sleep instead of working and fail at
+a random stage for a share of the attempts.
+
+The batch is resumed with its manifest until every model is synced, then
+the event log of all workers is checked:
+
+- every model was synced exactly once,
+- no model was opened again after it was synced,
+- the manifest records every model as synced,
+
+and the real ``pyrevit run`` command line of a worker is checked: one
+script, its models passed through a ``--models`` list file.
+
+Checklist downloads go through a stand-in disk cache in the shared cache
+folder, so the hit / miss counts show how much the workers share. A
+sequential run (one worker, same failures) is timed for comparison.
+
+Usage, from the extension's ``lib`` folder::
+
+    python batch_importer_harness.py --models 12 --workers 4 --failure-rate 0.3
+
+The exit code is 1 when a check fails.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from streambim.batch_manifest import BatchManifest, SYNCED
+from streambim.batch_runner import (BatchOrchestrator, BatchWorker, split_models, build_worker_command,
+                                    write_models_file, MANIFEST_ENV, WORKER_ENV, CACHE_DIR_ENV)
+
+EVENTS_FILE = 'events.log'
+STAGES = ('open', 'downloaded', 'written', 'synced')
+
+
+# --- worker process ---
+
+def _record_event(state_dir, event, model):
+    line = json.dumps({'time': time.time(), 'worker': os.environ.get(WORKER_ENV),
+                       'event': event, 'model': model}) + '\n'
+    fd = os.open(os.path.join(state_dir, EVENTS_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+class StubModelFunctions(object):
+    """Stand-ins for opening, importing and syncing a model."""
+
+    def __init__(self, args, manifest):
+        self.args = args
+        self.manifest = manifest
+        self.cache_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(args.state, 'cache')
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def _maybe_fail(self, model, stage):
+        attempt = self.manifest.get(model)['attempts']
+        rng = random.Random('{}|{}|{}'.format(self.args.seed, model, attempt))
+        if rng.random() < self.args.failure_rate and rng.choice(STAGES) == stage:
+            raise RuntimeError("Injected failure")
+
+    def open_model(self, model):
+        self._maybe_fail(model, 'open')
+        time.sleep(self.args.step_seconds)
+        _record_event(self.args.state, 'open', model)
+        return {'path': model}
+
+    def download(self, doc):
+        self._maybe_fail(doc['path'], 'downloaded')
+        hits = misses = 0
+        for checklist in range(self.args.checklists):
+            path = os.path.join(self.cache_dir, 'checklist-{}.json'.format(checklist))
+            if os.path.exists(path):
+                hits += 1
+                continue
+            misses += 1
+            time.sleep(self.args.step_seconds)
+            temp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(temp_path, 'w') as f:
+                json.dump({'checklist': checklist}, f)
+            if not os.path.exists(path):
+                os.rename(temp_path, path)
+            else:
+                os.remove(temp_path)
+        _record_event(self.args.state, 'downloaded', doc['path'])
+        return None, {'cache_hits': hits, 'cache_misses': misses}
+
+    def write(self, doc, plan):
+        self._maybe_fail(doc['path'], 'written')
+        time.sleep(self.args.step_seconds)
+        _record_event(self.args.state, 'written', doc['path'])
+        return {'updated': 1}
+
+    def sync(self, doc):
+        self._maybe_fail(doc['path'], 'synced')
+        time.sleep(self.args.step_seconds)
+        _record_event(self.args.state, 'synced', doc['path'])
+
+
+class _QuietLog(object):
+    def debug(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+
+def read_models_file(path):
+    """Read a models file the way ``pyrevit run --models`` does."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_worker(args):
+    manifest = BatchManifest(os.environ[MANIFEST_ENV])
+    stubs = StubModelFunctions(args, manifest)
+    worker = BatchWorker(manifest, stubs.open_model, stubs.download, stubs.write, stubs.sync,
+                         worker_id=os.environ.get(WORKER_ENV), log=_QuietLog())
+    result = worker.process(read_models_file(args.models_file))
+    return 1 if result['failed'] else 0
+
+
+# --- orchestration and checks ---
+
+def run_batch(args, state_dir, workers):
+    """Resume the batch with its manifest until all models are synced (or --max-runs).
+
+    Returns:
+        dict: 'models', 'runs', 'seconds', the final 'summary' and the 'manifest'
+    """
+    models = ['C:\\Models\\Model{:03d}.rvt'.format(i) for i in range(args.model_count)]
+    manifest_path = os.path.join(state_dir, 'manifest.json')
+    cache_dir = os.path.join(state_dir, 'cache')
+
+    def command_builder(models_file):
+        return [sys.executable, os.path.abspath(__file__), '--worker', '--state', state_dir,
+                '--seed', str(args.seed), '--failure-rate', str(args.failure_rate),
+                '--step-seconds', str(args.step_seconds), '--checklists', str(args.checklists),
+                '--models-file', models_file]
+
+    start_time = time.time()
+    runs = 0
+    summary = {}
+    while runs < args.max_runs:
+        runs += 1
+        orchestrator = BatchOrchestrator(models, manifest_path, workers, cache_dir,
+                                         command_builder=command_builder)
+        summary = orchestrator.run()
+        if summary[SYNCED] == len(models):
+            break
+    return {'models': models, 'runs': runs, 'seconds': time.time() - start_time,
+            'summary': summary, 'manifest': BatchManifest(manifest_path)}
+
+
+def check_events(state_dir, models, manifest):
+    """Return a list of problems found in the event log and manifest."""
+    problems = []
+    events = []
+    with open(os.path.join(state_dir, EVENTS_FILE), 'r') as f:
+        for line in f:
+            events.append(json.loads(line))
+    events.sort(key=lambda event: event['time'])
+    synced = {}
+    for event in events:
+        model = event['model']
+        if event['event'] == 'synced':
+            synced[model] = synced.get(model, 0) + 1
+        elif event['event'] == 'open' and model in synced:
+            problems.append("{} was opened again after it was synced".format(model))
+    entries = manifest.load()
+    for model in models:
+        if synced.get(model, 0) != 1:
+            problems.append("{} was synced {} times".format(model, synced.get(model, 0)))
+        if (entries.get(model) or {}).get('stage') != SYNCED:
+            problems.append("{} is not synced in the manifest".format(model))
+    return problems
+
+
+def check_worker_command(root):
+    """Return a list of problems with the ``pyrevit run`` command of a worker."""
+    problems = []
+    models = ['C:\\Models\\A.rvt', 'C:\\Models\\B b.rvt', 'C:\\Models\\C.rvt']
+    models_file = write_models_file(models, os.path.join(root, 'command', 'worker1_models.txt'))
+    command = build_worker_command(models_file, script_path='C:\\Scripts\\Worker.py', revit_version='2024')
+    expected = ['pyrevit', 'run', 'C:\\Scripts\\Worker.py', '--models={}'.format(models_file), '--revit=2024']
+    if command != expected:
+        problems.append("worker command is {}, expected {}".format(command, expected))
+    if read_models_file(models_file) != models:
+        problems.append("models file holds {}".format(read_models_file(models_file)))
+    return problems
+
+
+def cache_counts(manifest):
+    hits = misses = 0
+    for entry in manifest.load().values():
+        hits += entry['details'].get('cache_hits', 0)
+        misses += entry['details'].get('cache_misses', 0)
+    return hits, misses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel Batch Importer test")
+    parser.add_argument('--models-file', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--state', help=argparse.SUPPRESS)
+    parser.add_argument('--models', dest='model_count', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--failure-rate', type=float, default=0.3)
+    parser.add_argument('--checklists', type=int, default=5)
+    parser.add_argument('--step-seconds', type=float, default=0.05)
+    parser.add_argument('--max-runs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    root = tempfile.mkdtemp(prefix='pybs_batch_')
+    problems = []
+    try:
+        problems.extend("command: {}".format(problem) for problem in check_worker_command(root))
+        results = {}
+        for label, workers in (('sequential', 1), ('parallel', args.workers)):
+            state_dir = os.path.join(root, label)
+            os.makedirs(state_dir)
+            result = results[label] = run_batch(args, state_dir, workers)
+            problems.extend("{}: {}".format(label, problem)
+                            for problem in check_events(state_dir, result['models'], result['manifest']))
+            hits, misses = cache_counts(result['manifest'])
+            print("{} ({} worker{}): {} models in {} run{}, {:.2f}s; checklist cache {} hits, {} misses".format(
+                label, workers, "" if workers == 1 else "s", args.model_count, result['runs'],
+                "" if result['runs'] == 1 else "s", result['seconds'], hits, misses))
+        print("  worker split: {}".format([len(chunk) for chunk in split_models(results['parallel']['models'],
+                                                                               args.workers)]))
+        print("  speedup: {:.1f}x".format(results['sequential']['seconds'] / results['parallel']['seconds']))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    for problem in problems:
+        print("  PROBLEM: {}".format(problem))
+    print("  checks: {}".format("failed" if problems else "passed"))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
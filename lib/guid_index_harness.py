@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""Headless benchmark of the IFC GUID index.
+
+Compares the element walk the StreamBIM importers used to repeat for every
+import and every Run Everything configuration - three ``LookupParameter``
+calls per element - with ``revit.guid_index``: one build per document,
+per-configuration lookups and incremental DocumentChanged updates.
+
+Every 25th element is a copy that carries the GUID of an earlier one, as
+copy-pasted elements do. The copies are modified again in one delta, and
+the updated index is compared with a rebuilt one: same GUID of every
+element, an owner carrying each GUID and the same sets of elements sharing
+a GUID.
+
+Runs on plain CPython against the stand-in Revit API of ``mmi_harness``.
+Stand-in elements carry a list of parameters that ``LookupParameter``
+scans by name, as Revit does, while ``get_Parameter(definition)`` is a
+direct lookup.
+
+Usage, from the extension's ``lib`` folder::
+
+    python guid_index_harness.py --elements 500000 --configs 5
+
+The exit code is 1 when the index and the element walk disagree.
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+
+import mmi_harness
+from mmi_harness import StubCategory, StubDocument, StorageType
+
+# Parameters per stand-in element besides the GUID
+FILLER_PARAMETERS = 40
+
+GUID_CHARACTERS = string.digits + string.ascii_letters + '_$'
+
+
+class StubDefinition(object):
+    __slots__ = ('Name',)
+
+    def __init__(self, name):
+        self.Name = name
+
+
+class StubGuidParameter(object):
+    __slots__ = ('Definition', 'value', 'StorageType')
+
+    def __init__(self, definition, value, storage_type=StorageType.String):
+        self.Definition = definition
+        self.value = value
+        self.StorageType = storage_type
+
+    @property
+    def HasValue(self):
+        return self.value is not None
+
+    def AsString(self):
+        return self.value
+
+
+class StubGuidElement(object):
+    def __init__(self, id_value, category, parameters):
+        self.Id = mmi_harness.ElementId(id_value)
+        self.Category = category
+        self.parameters = parameters
+        self._by_definition = dict((param.Definition, param) for param in parameters)
+
+    def LookupParameter(self, name):
+        for param in self.parameters:
+            if param.Definition.Name == name:
+                return param
+        return None
+
+    def get_Parameter(self, definition):
+        return self._by_definition.get(definition)
+
+
+_CATEGORIES = (
+    StubCategory(-2000011, "Walls"),
+    StubCategory(-2000032, "Floors"),
+    StubCategory(-2001320, "Structural Framing"),
+    StubCategory(-2000023, "Doors"),
+    StubCategory(-2008044, "Pipes"),
+    StubCategory(-2001140, "Mechanical Equipment"),
+)
+
+# GUID parameter spelling per category (imported IFC models use "IFC GUID")
+_GUID_NAMES = {-2008044: "IFC GUID", -2001140: "IFCGuid"}
+
+
+def new_guid(rng):
+    return ''.join(rng.choice(GUID_CHARACTERS) for _ in range(22))
+
+
+def build_model(element_count, seed=1):
+    """Build a :class:`StubDocument` of ``element_count`` elements.
+
+    Returns:
+        tuple: (doc, list of the GUIDs in the model)
+    """
+    rng = random.Random(seed)
+    doc = StubDocument("GuidHarness")
+    fillers = [StubDefinition("Parameter {}".format(i)) for i in range(FILLER_PARAMETERS)]
+    guid_definitions = dict((category.Id.Value, StubDefinition(_GUID_NAMES.get(category.Id.Value, "IfcGUID")))
+                            for category in _CATEGORIES)
+    guids = []
+    for i in range(element_count):
+        category = _CATEGORIES[i % len(_CATEGORIES)]
+        parameters = [StubGuidParameter(definition, "x") for definition in fillers]
+        if i % 20:
+            if guids and i % 25 == 0:
+                # Copy-pasted element
+                guid = rng.choice(guids)
+            else:
+                guid = new_guid(rng)
+                guids.append(guid)
+            # The GUID parameter sits somewhere among the others
+            parameters.insert(rng.randint(0, FILLER_PARAMETERS),
+                              StubGuidParameter(guid_definitions[category.Id.Value], guid))
+        doc.add(StubGuidElement(doc.new_id(), category, parameters))
+    return doc, guids
+
+
+def walk_lookup(doc, guids):
+    """The previous per-configuration lookup: walk all elements by parameter name."""
+    wanted = set(guids)
+    result = {}
+    for element in mmi_harness.FilteredElementCollector(doc).WhereElementIsNotElementType():
+        param = element.LookupParameter("IFCGuid")
+        if not param:
+            param = element.LookupParameter("IfcGUID")
+        if not param:
+            param = element.LookupParameter("IFC GUID")
+        if param and param.HasValue and param.StorageType == StorageType.String:
+            guid_value = param.AsString()
+            if guid_value in wanted:
+                result[guid_value] = element
+    return result
+
+
+def generate_changes(doc, count, rng):
+    """Edit ``count`` elements: new GUIDs, deletions and added elements.
+
+    Returns:
+        tuple: (added ids, modified ids, deleted ids)
+    """
+    added, modified, deleted = [], [], []
+    ids = list(doc.elements.keys())
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.2:
+            element = doc.add(StubGuidElement(doc.new_id(), _CATEGORIES[0], [
+                StubGuidParameter(StubDefinition("IfcGUID"), new_guid(rng))]))
+            added.append(element.Id)
+            continue
+        element = doc.elements.get(rng.choice(ids))
+        if element is None:
+            continue
+        if roll < 0.3:
+            doc.remove(element.Id)
+            deleted.append(element.Id)
+            continue
+        param = element.LookupParameter(_GUID_NAMES.get(element.Category.Id.Value, "IfcGUID"))
+        if param is not None:
+            param.value = new_guid(rng)
+        modified.append(element.Id)
+    return added, modified, deleted
+
+
+def run_benchmark(element_count, configs, checklist_items, changes, seed=1):
+    """Time the element walk against the index.
+
+    Returns:
+        dict: timings in seconds and a 'mismatches' count (0 when both agree)
+    """
+    from revit import guid_index
+
+    rng = random.Random(seed + 1)
+    start_time = time.time()
+    doc, guids = build_model(element_count, seed)
+    model_seconds = time.time() - start_time
+    checklists = [rng.sample(guids, min(checklist_items, len(guids))) + [new_guid(rng)]
+                  for _ in range(configs)]
+
+    start_time = time.time()
+    walk_results = [walk_lookup(doc, checklist) for checklist in checklists]
+    walk_seconds = time.time() - start_time
+
+    guid_index.invalidate()
+    start_time = time.time()
+    index = guid_index.IfcGuidIndex(doc)
+    index.build()
+    build_seconds = time.time() - start_time
+
+    start_time = time.time()
+    index_results = [index.get_elements(checklist) for checklist in checklists]
+    lookup_seconds = time.time() - start_time
+
+    mismatches = 0
+    for walk_result, index_result in zip(walk_results, index_results):
+        if set(walk_result) != set(index_result):
+            mismatches += 1
+
+    added, modified, deleted = generate_changes(doc, changes, rng)
+    start_time = time.time()
+    index.apply_changes(added, modified, deleted)
+    update_seconds = time.time() - start_time
+
+    # Modifying elements that share a GUID hands their GUIDs to other owners
+    shared_ids = [doc.elements[element_id].Id for element_ids in index.duplicates.values()
+                  for element_id in element_ids]
+    start_time = time.time()
+    index.apply_changes([], shared_ids, [])
+    duplicate_update_seconds = time.time() - start_time
+
+    # Elements sharing a GUID may resolve to either one; compare per element
+    rebuilt = guid_index.IfcGuidIndex(doc)
+    rebuilt.build()
+    if (rebuilt.id_to_guid != index.id_to_guid
+            or rebuilt.duplicates != index.duplicates
+            or any(index.id_to_guid.get(element_id) != guid for guid, element_id in index.guid_to_id.items())):
+        mismatches += 1
+
+    return {
+        'elements': element_count,
+        'configs': configs,
+        'checklist_items': checklist_items,
+        'changes': len(added) + len(modified) + len(deleted),
+        'model_seconds': model_seconds,
+        'walk_seconds': walk_seconds,
+        'build_seconds': build_seconds,
+        'lookup_seconds': lookup_seconds,
+        'update_seconds': update_seconds,
+        'shared_changes': len(shared_ids),
+        'duplicate_update_seconds': duplicate_update_seconds,
+        'guids': len(index),
+        'mismatches': mismatches,
+    }
+
+
+def format_results(results):
+    index_seconds = results['build_seconds'] + results['lookup_seconds']
+    lines = [
+        "{elements} elements ({guids} GUIDs), {configs} configurations of {checklist_items} items".format(**results),
+        "  element walk per configuration: {:.2f}s total".format(results['walk_seconds']),
+        "  index build once:               {:.2f}s".format(results['build_seconds']),
+        "  index lookups:                  {:.3f}s total".format(results['lookup_seconds']),
+        "  speedup for the batch:          {:.1f}x".format(
+            results['walk_seconds'] / index_seconds if index_seconds else 0.0),
+        "  incremental update of {} changes: {:.1f} ms".format(
+            results['changes'], results['update_seconds'] * 1000.0),
+        "  update of {} elements sharing GUIDs: {:.1f} ms".format(
+            results['shared_changes'], results['duplicate_update_seconds'] * 1000.0),
+        "  mismatches: {}".format(results['mismatches']),
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IFC GUID index benchmark")
+    parser.add_argument('--elements', type=int, default=500000)
+    parser.add_argument('--configs', type=int, default=5)
+    parser.add_argument('--checklist-items', type=int, default=20000)
+    parser.add_argument('--changes', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    mmi_harness.install_stubs()
+    results = run_benchmark(args.elements, args.configs, args.checklist_items, args.changes)
+    print(format_results(results))
+    return 1 if results['mismatches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the StreamBIM response decoding paths.
+
+Compares, on a synthetic checklist payload of ``--items`` items with
+non-ASCII values:
+
+- ``recursive``: ``json.loads`` of the raw body followed by the recursive
+  ``_decode_utf8`` the API client used to run on every response (copied
+  here unchanged),
+- ``in_place``: ``json.loads`` followed by
+  ``streambim.json_decode.decode_utf8_in_place``,
+- ``parse_time``: ``streambim.json_decode.parse_json``, which decodes the
+  body before parsing so no walk is needed.
+
+The body is built once and each path decodes it in a fresh child process,
+so peak memory covers decoding only. Peak memory is the ``tracemalloc``
+peak where available (Python 3) and the growth of the process's maximum
+resident set size otherwise; time is always taken without tracemalloc.
+Run it under Python 2 as well, whose ``str`` / ``unicode`` split is the
+one IronPython code is written for.
+
+Usage, from the extension's ``lib`` folder::
+
+    python json_decode_harness.py --items 100000
+
+The exit code is 1 when the paths produce different data.
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from streambim.json_decode import parse_json, decode_utf8_in_place
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+VARIANTS = ('recursive', 'in_place', 'parse_time')
+
+_WORDS = (u'Vegg', u'Dør', u'Påstøp', u'Bæresystem', u'Sjakt', u'Etasjeskiller', u'Gulv', u'Tak')
+
+
+def recursive_decode_utf8(data):
+    """The previous StreamBIMClient._decode_utf8."""
+    if isinstance(data, dict):
+        return {recursive_decode_utf8(key): recursive_decode_utf8(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [recursive_decode_utf8(item) for item in data]
+    elif isinstance(data, tuple):
+        return tuple(recursive_decode_utf8(item) for item in data)
+    elif isinstance(data, set):
+        return {recursive_decode_utf8(item) for item in data}
+    elif isinstance(data, str):
+        try:
+            return data.decode('utf-8')
+        except (UnicodeError, AttributeError):
+            return data
+    elif isinstance(data, unicode):
+        return data
+    else:
+        return data
+
+
+def build_body(item_count):
+    """Return the UTF-8 body of a checklist page with ``item_count`` items."""
+    parts = []
+    for i in range(item_count):
+        word = _WORDS[i % len(_WORDS)]
+        item = {
+            'id': 'item-{}'.format(i),
+            'object': '{:022d}'.format(i),
+            'attributes': {
+                'elementId': '{:022d}'.format(i),
+                'properties': {
+                    u'Bygningsdel': u'{} {}'.format(word, i % 97),
+                    u'Status': u'Godkjent' if i % 3 else u'Ikke påbegynt',
+                    u'Ansvarlig fag': u'RIB',
+                    u'Kommentar': u'Kontrollert på byggeplass, merknad nr. {}'.format(i),
+                    u'MMI': 300 + (i % 5) * 50,
+                },
+            },
+            'items': {u'Sjekkpunkt {}'.format(n): n % 2 == 0 for n in range(3)},
+        }
+        parts.append(json.dumps(item, ensure_ascii=False))
+    text = u'{"data": [' + u', '.join(parts) + u']}'
+    return text.encode('utf-8')
+
+
+def decode(variant, body):
+    if variant == 'recursive':
+        return recursive_decode_utf8(json.loads(body))
+    if variant == 'in_place':
+        return decode_utf8_in_place(json.loads(body))
+    return parse_json(body)
+
+
+def _max_rss_kb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(variant, body_path):
+    """Decode the body in ``body_path``. Returns {'seconds', 'peak_kb', 'metric'}.
+
+    Time is taken from a run without tracemalloc, which slows allocation.
+    """
+    with open(body_path, 'rb') as f:
+        body = f.read()
+    gc.collect()
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    try:
+        baseline = _max_rss_kb()
+    except ImportError:
+        baseline = None
+    start_time = time.time()
+    result = decode(variant, body)
+    seconds = time.time() - start_time
+    if tracemalloc is None:
+        peak_kb = _max_rss_kb() - baseline if baseline is not None else None
+        return {'seconds': seconds, 'peak_kb': peak_kb, 'metric': 'max RSS growth'}
+    result = None
+    gc.collect()
+    tracemalloc.start()
+    result = decode(variant, body)
+    peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_kb': peak_kb, 'metric': 'tracemalloc peak'}
+
+
+def _all_text(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if not isinstance(key, unicode):
+                    return False
+                stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, bytes) and bytes is not unicode:
+            return False
+    return True
+
+
+def verify(item_count):
+    """Return a list of problems when the paths disagree on a small payload."""
+    body = build_body(item_count)
+    expected = decode('recursive', body)
+    problems = []
+    for variant in VARIANTS[1:]:
+        result = decode(variant, body)
+        if result != expected:
+            problems.append("{} differs from recursive".format(variant))
+        if not _all_text(result):
+            problems.append("{} left byte strings".format(variant))
+    return problems
+
+
+def run_child(variant, body_path):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', variant,
+                                      '--body', body_path])
+    return json.loads(output.decode('utf-8'))
+
+
+def format_results(item_count, results):
+    baseline = results['recursive']
+    lines = ["{} checklist items ({})".format(item_count, baseline['metric'])]
+    for variant in VARIANTS:
+        result = results[variant]
+        peak = "{:.1f} MB".format(result['peak_kb'] / 1024.0) if result['peak_kb'] is not None else "n/a"
+        lines.append("  {:<11} {:6.2f}s  peak {:>9}  ({:.1f}x time)".format(
+            variant, result['seconds'], peak,
+            baseline['seconds'] / result['seconds'] if result['seconds'] else 0.0))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StreamBIM JSON decoding benchmark")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--verify-items', type=int, default=2000)
+    parser.add_argument('--child', choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument('--body', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.body)))
+        return 0
+
+    problems = verify(args.verify_items)
+    # The body is built once so the children's memory only covers decoding
+    handle, body_path = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(build_body(args.items))
+        results = dict((variant, run_child(variant, body_path)) for variant in VARIANTS)
+    finally:
+        os.remove(body_path)
+    print(format_results(args.items, results))
+    for problem in problems:
+        print("  PROBLEM: {}".format(problem))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,9 @@
 
 from .core import (
     get_mmi_parameter_name,
+    get_mmi_settings,
     set_mmi_value,
+    set_mmi_value_bulk,
     set_selection_mmi_value,
     get_or_create_mmi_storage,
     load_monitor_config,
@@ -15,6 +17,7 @@ from .utils import (
     find_mmi_parameters,
     validate_mmi_value,
     get_elements_by_mmi_value,
+    get_element_ids_by_mmi_value,
     get_mmi_statistics,
     get_element_mmi_value,
     select_elements_by_mmi
@@ -23,19 +26,27 @@ from .utils import (
 from .colorizer import (
     MMI_COLOR_RANGES,
     get_color_for_mmi,
+    get_mmi_bucket,
     is_colorer_active,
     set_colorer_active,
     get_colored_view_id,
     set_colored_view_id,
     get_colored_element_ids,
     set_colored_element_ids,
-    clear_colorizer_state
+    get_colored_element_buckets,
+    clear_colorizer_state,
+    save_colorizer_state,
+    plan_color_refresh,
+    apply_color_refresh,
+    refresh_view_colors
 )
 
 __all__ = [
     # Core functions
     'get_mmi_parameter_name',
+    'get_mmi_settings',
     'set_mmi_value', 
+    'set_mmi_value_bulk',
     'set_selection_mmi_value',
     'get_or_create_mmi_storage',
     'save_mmi_parameter',
@@ -45,17 +56,24 @@ __all__ = [
     'find_mmi_parameters',
     'validate_mmi_value',
     'get_elements_by_mmi_value',
+    'get_element_ids_by_mmi_value',
     'get_mmi_statistics',
     'get_element_mmi_value',
     'select_elements_by_mmi',
     # Colorizer functions
     'MMI_COLOR_RANGES',
     'get_color_for_mmi',
+    'get_mmi_bucket',
     'is_colorer_active',
     'set_colorer_active',
     'get_colored_view_id',
     'set_colored_view_id',
     'get_colored_element_ids',
     'set_colored_element_ids',
-    'clear_colorizer_state'
+    'get_colored_element_buckets',
+    'clear_colorizer_state',
+    'save_colorizer_state',
+    'plan_color_refresh',
+    'apply_color_refresh',
+    'refresh_view_colors'
 ]
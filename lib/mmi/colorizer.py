@@ -1,10 +1,29 @@
 # -*- coding: utf-8 -*-
-"""Configuration and utilities for MMI Colorizer."""
+"""Configuration and utilities for MMI Colorizer.
 
-from Autodesk.Revit.DB import Color, ElementId
+The colorizer keeps the colour bucket (MMI level) it applied to each element
+of the colored view in memory. :func:`refresh_view_colors` recomputes buckets
+for the whole view or for a set of changed elements and only touches
+overrides whose bucket changed or whose element left the view. The colored
+view and element ids are written to user config only when the colorizer is
+toggled, not on every monitor refresh.
+"""
+
+import sys
+import time
+
+from Autodesk.Revit.DB import (
+    Color,
+    ElementId,
+    FilteredElementCollector,
+    FillPatternElement,
+    OverrideGraphicSettings,
+)
 from pyrevit import script
 from pyrevit.userconfig import user_config
 
+from mmi.utils import get_element_mmi_value
+
 try:
     from revit.compat import get_element_id_value, make_element_id
 except ImportError:
@@ -31,6 +50,8 @@ CONFIG_KEY_ACTIVE = 'isActive'
 CONFIG_KEY_VIEW_ID = 'coloredViewId'
 CONFIG_KEY_ELEMENT_IDS = 'coloredElementIds'
 
+_STATE_SYS_KEY = '_pyBS_mmi_colorizer_state'
+
 # Official MMI Color codes from https://mmi-veilederen.no/?page_id=85
 # RGB values as defined in the MMI guide
 MMI_COLOR_RANGES = [
@@ -86,6 +107,25 @@ def get_color_for_mmi(mmi_value):
     
     return Color(128, 128, 128), "Unknown"  # Gray fallback
 
+def get_mmi_bucket(mmi_value):
+    """Return the MMI level whose colour ``mmi_value`` uses (see get_color_for_mmi)."""
+    bucket = None
+    for range_def in MMI_COLOR_RANGES:
+        if range_def["value"] <= mmi_value:
+            bucket = range_def["value"]
+        else:
+            break
+    if bucket is None and MMI_COLOR_RANGES:
+        bucket = MMI_COLOR_RANGES[0]["value"]
+    return bucket
+
+def get_bucket_color(bucket):
+    """Return the Color of an MMI level bucket."""
+    for range_def in MMI_COLOR_RANGES:
+        if range_def["value"] == bucket:
+            return range_def["color"]
+    return Color(128, 128, 128)
+
 def is_colorer_active():
     """Check if the MMI colorizer is currently active."""
     try:
@@ -113,80 +153,319 @@ def set_colorer_active(is_active):
     except Exception as ex:
         logger.error("Error setting colorizer state: {}".format(ex))
 
-def get_colored_view_id():
-    """Get the ID of the view that was colored."""
-    try:
-        if not hasattr(user_config, CONFIG_SECTION):
+def _get_config_section(create=False):
+    if not hasattr(user_config, CONFIG_SECTION):
+        if not create:
             return None
-        
-        section = getattr(user_config, CONFIG_SECTION)
+        user_config.add_section(CONFIG_SECTION)
+    return getattr(user_config, CONFIG_SECTION)
+
+def _parse_colored_entries(ids_str):
+    """Parse "id" or "id:bucket" entries into an {id int: bucket or None} map."""
+    buckets = {}
+    for entry in ids_str.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if ":" in entry:
+            id_str, bucket_str = entry.split(":", 1)
+            buckets[int(id_str)] = int(bucket_str) if bucket_str else None
+        else:
+            buckets[int(entry)] = None
+    return buckets
+
+def _load_state():
+    """Read the colored view id and element ids stored at the last toggle."""
+    state = {'view_id': None, 'buckets': {}}
+    try:
+        section = _get_config_section()
+        if section is None:
+            return state
         view_id_str = section.get_option(CONFIG_KEY_VIEW_ID, default_value="")
-        
         if view_id_str:
-            try:
-                return make_element_id(int(view_id_str))
-            except:
-                return None
-        return None
+            state['view_id'] = int(view_id_str)
+        ids_str = section.get_option(CONFIG_KEY_ELEMENT_IDS, default_value="")
+        if ids_str:
+            # Monitor refreshes after the last toggle were never stored, so the
+            # stored buckets may be stale; only the ids are trusted
+            state['buckets'] = dict.fromkeys(_parse_colored_entries(ids_str))
     except Exception as ex:
-        logger.debug("Error getting colored view ID: {}".format(ex))
-        return None
+        logger.debug("Error reading colorizer state: {}".format(ex))
+    return state
 
-def set_colored_view_id(view_id):
-    """Store the ID of the colored view."""
+def _get_state():
+    """Return the in-memory colorizer state, loading it from user config once.
+    
+    Lives on ``sys`` so the Colorize button and the monitor's persistent
+    engine share it.
+    """
+    state = getattr(sys, _STATE_SYS_KEY, None)
+    if state is None:
+        state = _load_state()
+        setattr(sys, _STATE_SYS_KEY, state)
+    return state
+
+def save_colorizer_state():
+    """Write the in-memory colored view and element ids to user config."""
+    state = _get_state()
     try:
-        if not hasattr(user_config, CONFIG_SECTION):
-            user_config.add_section(CONFIG_SECTION)
-        
-        section = getattr(user_config, CONFIG_SECTION)
-        section.set_option(CONFIG_KEY_VIEW_ID, str(get_element_id_value(view_id)))
+        section = _get_config_section(create=True)
+        view_id = state['view_id']
+        section.set_option(CONFIG_KEY_VIEW_ID, str(view_id) if view_id is not None else "")
+        entries = []
+        for id_value, bucket in state['buckets'].items():
+            if bucket is None:
+                entries.append(str(id_value))
+            else:
+                entries.append("{}:{}".format(id_value, bucket))
+        section.set_option(CONFIG_KEY_ELEMENT_IDS, ",".join(entries))
         user_config.save_changes()
     except Exception as ex:
-        logger.error("Error setting colored view ID: {}".format(ex))
+        logger.error("Error saving colorizer state: {}".format(ex))
+
+def get_colored_view_id():
+    """Get the ID of the view that was colored."""
+    view_id = _get_state()['view_id']
+    if view_id is None:
+        return None
+    try:
+        return make_element_id(view_id)
+    except Exception:
+        return None
+
+def set_colored_view_id(view_id, persist=True):
+    """Store the ID of the colored view (in user config too unless ``persist`` is False)."""
+    _get_state()['view_id'] = get_element_id_value(view_id)
+    if persist:
+        save_colorizer_state()
+
+def get_colored_element_buckets():
+    """Get the {element id int: MMI bucket} map of the colored view.
+    
+    Ids whose bucket is unknown (stored by an earlier session) map to None.
+    """
+    return dict(_get_state()['buckets'])
 
 def get_colored_element_ids():
     """Get the list of element IDs that were colored."""
-    try:
-        if not hasattr(user_config, CONFIG_SECTION):
-            return []
-        
-        section = getattr(user_config, CONFIG_SECTION)
-        ids_str = section.get_option(CONFIG_KEY_ELEMENT_IDS, default_value="")
-        
-        if ids_str:
-            try:
-                id_list = [make_element_id(int(x)) for x in ids_str.split(",") if x.strip()]
-                return id_list
-            except Exception as ex:
-                logger.debug("Error parsing colored element IDs: {}".format(ex))
-                return []
-        return []
-    except Exception as ex:
-        logger.debug("Error getting colored element IDs: {}".format(ex))
-        return []
+    return [make_element_id(x) for x in _get_state()['buckets']]
 
-def set_colored_element_ids(element_ids):
-    """Store the list of colored element IDs."""
-    try:
-        if not hasattr(user_config, CONFIG_SECTION):
-            user_config.add_section(CONFIG_SECTION)
-        
-        section = getattr(user_config, CONFIG_SECTION)
-        ids_str = ",".join([str(get_element_id_value(eid)) for eid in element_ids])
-        section.set_option(CONFIG_KEY_ELEMENT_IDS, ids_str)
-        user_config.save_changes()
-    except Exception as ex:
-        logger.error("Error setting colored element IDs: {}".format(ex))
+def set_colored_element_ids(element_ids, buckets=None, persist=True):
+    """Store the list of colored element IDs.
+    
+    Args:
+        element_ids: ElementIds (or id ints) that carry a colorizer override
+        buckets: Optional {id int: MMI bucket} map; kept with the ids so a
+            later refresh can skip elements whose bucket did not change
+        persist: Also write the ids to user config
+    """
+    colored = {}
+    for eid in element_ids:
+        id_value = get_element_id_value(eid) if isinstance(eid, ElementId) else eid
+        colored[id_value] = buckets.get(id_value) if buckets else None
+    _get_state()['buckets'] = colored
+    if persist:
+        save_colorizer_state()
 
 def clear_colorizer_state():
     """Clear all colorizer state (view ID and element IDs)."""
     try:
-        set_colored_view_id(ElementId.InvalidElementId)
+        set_colored_view_id(ElementId.InvalidElementId, persist=False)
         set_colored_element_ids([])
         logger.debug("Cleared colorizer state")
     except Exception as ex:
         logger.error("Error clearing colorizer state: {}".format(ex))
 
 
+_solid_fill_pattern_cache = {}
+
+def get_solid_fill_pattern_id(doc):
+    """Get solid fill pattern ID with caching."""
+    if doc not in _solid_fill_pattern_cache:
+        patterns = FilteredElementCollector(doc).OfClass(FillPatternElement)
+        for pat in patterns:
+            fill_pattern = pat.GetFillPattern()
+            if fill_pattern.IsSolidFill:
+                _solid_fill_pattern_cache[doc] = pat.Id
+                break
+        else:
+            _solid_fill_pattern_cache[doc] = None
+    return _solid_fill_pattern_cache[doc]
+
+def create_color_overrides(color, solid_fill_id):
+    """Create the override settings used for one MMI colour."""
+    ogs = OverrideGraphicSettings()
+    ogs.SetProjectionLineColor(color)
+    ogs.SetCutLineColor(color)
+    ogs.SetSurfaceForegroundPatternColor(color)
+    ogs.SetCutForegroundPatternColor(color)
+    
+    if solid_fill_id:
+        ogs.SetSurfaceForegroundPatternId(solid_fill_id)
+        ogs.SetCutForegroundPatternId(solid_fill_id)
+    return ogs
+
+def _view_element_collector(doc, view):
+    return FilteredElementCollector(doc, view.Id) \
+        .WhereElementIsNotElementType() \
+        .WhereElementIsViewIndependent()
 
+def collect_view_buckets(doc, view, mmi_param_name, element_ids=None):
+    """Compute the MMI bucket of elements in ``view``.
+    
+    Args:
+        doc: The Revit document
+        view: The view to colour
+        mmi_param_name: Name of the MMI parameter
+        element_ids: Optional iterable of id ints to restrict the read to;
+            ids no longer in the view are left out of the result
+    
+    Returns:
+        dict: {element id int: MMI bucket} for elements with an MMI value
+    """
+    buckets = {}
+    if element_ids is None:
+        elements = _view_element_collector(doc, view)
+    else:
+        # Membership via ids only; elements are fetched just for the changed ids
+        in_view = set(get_element_id_value(eid)
+                      for eid in _view_element_collector(doc, view).ToElementIds())
+        elements = []
+        for id_value in element_ids:
+            if id_value in in_view:
+                element = doc.GetElement(make_element_id(id_value))
+                if element is not None:
+                    elements.append(element)
+    
+    for element in elements:
+        mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
+        if mmi_value is not None:
+            buckets[get_element_id_value(element.Id)] = get_mmi_bucket(mmi_value)
+    return buckets
 
+def apply_bucket_changes(doc, view, old_buckets, new_buckets, scope_ids=None):
+    """Apply overrides for changed buckets and clear those that left.
+    
+    Must run inside a transaction.
+    
+    Args:
+        doc: The Revit document
+        view: The colored view
+        old_buckets: {id int: bucket} currently applied in the view
+        new_buckets: {id int: bucket} wanted for the ids in scope
+        scope_ids: Ids that were recomputed; None means the whole view
+    
+    Returns:
+        tuple: (merged {id int: bucket} map, overridden count, reset count)
+    """
+    merged = dict(old_buckets)
+    by_bucket = {}
+    for id_value, bucket in new_buckets.items():
+        if old_buckets.get(id_value) != bucket:
+            by_bucket.setdefault(bucket, []).append(id_value)
+        merged[id_value] = bucket
+    
+    if scope_ids is None:
+        scope_ids = old_buckets.keys()
+    left_ids = [id_value for id_value in scope_ids
+                if id_value in old_buckets and id_value not in new_buckets]
+    
+    solid_fill_id = get_solid_fill_pattern_id(doc) if by_bucket else None
+    overridden = 0
+    for bucket, id_values in by_bucket.items():
+        # OverrideGraphicSettings is reused for all elements in this group
+        ogs = create_color_overrides(get_bucket_color(bucket), solid_fill_id)
+        for id_value in id_values:
+            try:
+                view.SetElementOverrides(make_element_id(id_value), ogs)
+                overridden += 1
+            except Exception as ex:
+                logger.debug("Could not apply override to element {}: {}".format(id_value, ex))
+    
+    if left_ids:
+        # Create default override settings once (resets to defaults)
+        default_ogs = OverrideGraphicSettings()
+        for id_value in left_ids:
+            merged.pop(id_value, None)
+            element_id = make_element_id(id_value)
+            if doc.GetElement(element_id) is None:
+                continue
+            try:
+                view.SetElementOverrides(element_id, default_ogs)
+            except Exception as ex:
+                logger.debug("Could not reset override for element {}: {}".format(id_value, ex))
+    
+    return merged, overridden, len(left_ids)
+
+def plan_color_refresh(doc, view, mmi_param_name, changed_ids=None):
+    """Compute the bucket changes of the colored view. Needs no transaction.
+    
+    Args:
+        doc: The Revit document
+        view: The colored view
+        mmi_param_name: Name of the MMI parameter
+        changed_ids: Optional iterable of id ints to recompute (e.g. the
+            monitor's change feed); None recomputes the whole view
+    
+    Returns:
+        dict: Plan for apply_color_refresh; 'has_changes' is False when no
+            override would be set or reset
+    """
+    state = _get_state()
+    stored_view_id = state['view_id']
+    same_view = stored_view_id is not None and stored_view_id == get_element_id_value(view.Id)
+    old_buckets = state['buckets'] if same_view else {}
+    
+    if changed_ids is not None:
+        changed_ids = list(changed_ids)
+    new_buckets = collect_view_buckets(doc, view, mmi_param_name, changed_ids)
+    
+    scope_ids = old_buckets.keys() if changed_ids is None else changed_ids
+    has_changes = (not same_view
+                   or any(old_buckets.get(id_value) != bucket for id_value, bucket in new_buckets.items())
+                   or any(id_value in old_buckets and id_value not in new_buckets for id_value in scope_ids))
+    return {'view': view, 'same_view': same_view, 'old': old_buckets, 'new': new_buckets,
+            'scope': changed_ids, 'has_changes': has_changes}
+
+def apply_color_refresh(doc, plan, persist=False):
+    """Apply a plan_color_refresh plan. Must run inside a transaction.
+    
+    Args:
+        doc: The Revit document
+        plan: Result of plan_color_refresh
+        persist: Also write the colored ids to user config (on toggle)
+    
+    Returns:
+        dict: {'colored': int, 'overridden': int, 'reset': int}
+    """
+    view = plan['view']
+    merged, overridden, reset = apply_bucket_changes(
+        doc, view, plan['old'], plan['new'], plan['scope'])
+    
+    if overridden or reset or not plan['same_view']:
+        set_colored_view_id(view.Id, persist=False)
+        set_colored_element_ids(list(merged.keys()), merged, persist=False)
+    if persist:
+        save_colorizer_state()
+    return {'colored': len(merged), 'overridden': overridden, 'reset': reset}
+
+def refresh_view_colors(doc, view, mmi_param_name, changed_ids=None, persist=False):
+    """Bring the colored view's overrides up to date. Must run inside a transaction.
+    
+    Args:
+        doc: The Revit document
+        view: The colored view
+        mmi_param_name: Name of the MMI parameter
+        changed_ids: Optional iterable of id ints to recompute (e.g. the
+            monitor's change feed); None recomputes the whole view
+        persist: Also write the colored ids to user config (on toggle)
+    
+    Returns:
+        dict: {'colored': int, 'overridden': int, 'reset': int}
+    """
+    start_time = time.time()
+    result = apply_color_refresh(
+        doc, plan_color_refresh(doc, view, mmi_param_name, changed_ids), persist)
+    logger.debug("[PERF] MMI colors refreshed: {} colored, {} overridden, {} reset in {:.2f}s".format(
+        result['colored'], result['overridden'], result['reset'], time.time() - start_time))
+    return result
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 """Core functions for MMI parameter operations."""
 
-from Autodesk.Revit.DB import Transaction, ElementId, FilteredElementCollector, BuiltInCategory
+from Autodesk.Revit.DB import Transaction, ElementId, BuiltInCategory
 from Autodesk.Revit.DB import ExtensibleStorage, StorageType
+from Autodesk.Revit.DB import FilteredElementCollector, LogicalOrFilter, ElementIsElementTypeFilter
+from System.Collections.Generic import List
 from pyrevit import revit, forms, script
 import datetime
 import System
@@ -10,6 +12,7 @@ import System
 # Import the MMI schema
 from mmi.schema import MMIParameterSchema
 from mmi.config import CONFIG_KEYS
+from revit import storage_registry
 try:
     from revit.compat import get_element_id_value
 except ImportError:
@@ -28,6 +31,62 @@ EXCLUDED_CATEGORIES = [
     2451555,                                 # Wall Sweeps (no BuiltInCategory enum available)
 ]
 
+# Failed elements listed in the output window after a quick-set; the rest are counted
+FAILURE_REPORT_LIMIT = 100
+
+def _read_mmi_settings(storages):
+    """Registry loader: build the MMI settings snapshot from the found storages."""
+    settings = {"mmi_parameter_name": None, "default_mmi": ""}
+    for schema_key in CONFIG_KEYS.values():
+        settings[schema_key] = False
+
+    first = True
+    for ds in storages:
+        try:
+            schema = MMIParameterSchema(ds)
+            if not schema.is_valid:
+                continue
+            if first:
+                for schema_key in CONFIG_KEYS.values():
+                    try:
+                        settings[schema_key] = bool(schema.get(schema_key) or False)
+                    except Exception as field_error:
+                        logger.debug("Field '{}' not found, using default: {}".format(schema_key, field_error))
+                try:
+                    raw = schema.get("default_mmi")
+                    settings["default_mmi"] = "" if raw is None else str(raw).strip()
+                except Exception:
+                    settings["default_mmi"] = ""
+                first = False
+            if not settings["mmi_parameter_name"]:
+                settings["mmi_parameter_name"] = schema.get("mmi_parameter_name") or None
+        except Exception as e:
+            logger.debug("Error checking storage entity: {}".format(str(e)))
+    return settings
+
+
+def get_mmi_settings(doc):
+    """Get the cached MMI settings snapshot for a document.
+
+    Resolved through the shared storage registry, so repeated calls (e.g. from
+    the monitor's DocumentChanged handler) do not collect DataStorage elements.
+    The snapshot is refreshed whenever a DataStorage element changes.
+
+    Args:
+        doc: The active Revit document
+
+    Returns:
+        dict: Copy of the settings keyed by schema field name
+    """
+    try:
+        settings = storage_registry.get_cached_settings(
+            doc, MMIParameterSchema.schema.GUID, _read_mmi_settings)
+        return dict(settings)
+    except Exception as e:
+        logger.error("Error reading MMI settings: {}".format(str(e)))
+        return _read_mmi_settings([])
+
+
 def get_mmi_parameter_name(doc):
     """Get the configured MMI parameter name from extensible storage.
     
@@ -37,30 +96,43 @@ def get_mmi_parameter_name(doc):
     Returns:
         str: The MMI parameter name or 'MMI' as fallback
     """
-    try:
-        # Look for existing storage with our schema
-        data_storage = FilteredElementCollector(doc) \
-            .OfClass(ExtensibleStorage.DataStorage) \
-            .ToElements()
-        
-        for ds in data_storage:
-            try:
-                entity = ds.GetEntity(MMIParameterSchema.schema)
-                if entity.IsValid():
-                    param_name = entity.Get[str]("mmi_parameter_name")
-                    if param_name:
-                        return param_name
-            except Exception as e:
-                logger.debug("Error checking storage entity: {}".format(str(e)))
-                continue
-        
-        return "MMI"  # Default fallback if no stored value
-    except Exception as e:
-        logger.error("Error getting MMI parameter name: {}".format(str(e)))
-        return "MMI"  # Default fallback
+    return get_mmi_settings(doc).get("mmi_parameter_name") or "MMI"
 
-def set_mmi_value(doc, elements, value, param_name=None):
-    """Set MMI parameter value on the given elements.
+def _collect_elements(doc, elements):
+    """Resolve a mix of elements and ElementIds with one collector call for the ids."""
+    element_list = []
+    element_ids = List[ElementId]()
+    for elem in elements:
+        if isinstance(elem, ElementId):
+            element_ids.Add(elem)
+        else:
+            element_list.append(elem)
+    if element_ids.Count:
+        any_element = LogicalOrFilter(ElementIsElementTypeFilter(False), ElementIsElementTypeFilter(True))
+        element_list.extend(FilteredElementCollector(doc, element_ids).WherePasses(any_element))
+    return element_list
+
+def _write_mmi_parameter(param, value_str):
+    """Write ``value_str`` to ``param``.
+    
+    Returns:
+        str: "set", "unchanged" or "failed"
+    """
+    if param is None or param.IsReadOnly or param.StorageType != StorageType.String:
+        return "failed"
+    if param.HasValue and param.AsString() == value_str:
+        return "unchanged"
+    param.Set(value_str)
+    return "set"
+
+def set_mmi_value_bulk(doc, elements, value, param_name=None):
+    """Set MMI parameter value on many elements. Must run inside a transaction.
+    
+    Elements are grouped by category and type. The parameter definition is
+    resolved once per group and looked up by definition for the rest of the
+    group; elements without an instance parameter fall back to the type
+    parameter, written once per type. Values that already match are not
+    written.
     
     Args:
         doc: The active Revit document
@@ -69,56 +141,90 @@ def set_mmi_value(doc, elements, value, param_name=None):
         param_name: Optional parameter name, will use stored value or fallback if None
         
     Returns:
-        tuple: (success_count, failed_elements_ids)
+        dict: {'set': int, 'unchanged': int, 'excluded': int, 'types_set': int,
+               'failed': list of ElementIds}
     """
+    result = {"set": 0, "unchanged": 0, "excluded": 0, "types_set": 0, "failed": []}
     if not elements:
-        return 0, []
+        return result
     
     # Get parameter name if not provided
     if not param_name:
         param_name = get_mmi_parameter_name(doc)
     
-    # Process elements if they're element_ids
-    element_list = []
-    for elem in elements:
-        if isinstance(elem, ElementId):
-            element = doc.GetElement(elem)
-            if element:
-                element_list.append(element)
-        else:
-            element_list.append(elem)
-    
-    if not element_list:
-        return 0, []
-    
-    # Set MMI parameter on each element
-    success_count = 0
-    failed_elements = []
+    start_time = datetime.datetime.now()
+    value_str = str(value)
+    excluded_categories = set(EXCLUDED_CATEGORIES)
+    groups = {}
+    type_results = {}
     
-    for element in element_list:
+    for element in _collect_elements(doc, elements):
         try:
-            # Skip excluded categories
-            if element.Category and element.Category.Id:
-                category_id = get_element_id_value(element.Category.Id)
-                if category_id in EXCLUDED_CATEGORIES:
-                    # Silently skip excluded categories (don't add to failed_elements)
-                    logger.debug("Skipping excluded category: {} ({})".format(
-                        element.Category.Name, category_id))
-                    continue
+            category = element.Category
+            category_id = get_element_id_value(category.Id) if category else None
+            # Silently skip excluded categories (don't add to failed)
+            if category_id in excluded_categories:
+                result["excluded"] += 1
+                continue
+            
+            type_id = element.GetTypeId()
+            type_key = get_element_id_value(type_id) if type_id else -1
+            group_key = (category_id, type_key)
+            definition = groups.get(group_key)
+            
+            param = element.get_Parameter(definition) if definition is not None else None
+            if param is None:
+                param = element.LookupParameter(param_name)
+                if param is not None and definition is None:
+                    groups[group_key] = param.Definition
             
-            # Try to set the parameter value
-            param = element.LookupParameter(param_name)
-            if param and not param.IsReadOnly and param.StorageType == StorageType.String:
-                param.Set(str(value))
-                success_count += 1
+            if param is not None:
+                outcome = _write_mmi_parameter(param, value_str)
             else:
-                failed_elements.append(element.Id)
+                # Type-level fallback, written once per type
+                outcome = type_results.get(type_key)
+                if outcome is None:
+                    outcome = "failed"
+                    if type_id and type_id != ElementId.InvalidElementId:
+                        element_type = doc.GetElement(type_id)
+                        if element_type:
+                            outcome = _write_mmi_parameter(
+                                element_type.LookupParameter(param_name), value_str)
+                    if outcome == "set":
+                        result["types_set"] += 1
+                    type_results[type_key] = outcome
+            
+            if outcome == "failed":
+                result["failed"].append(element.Id)
+            else:
+                result[outcome] += 1
         except Exception as ex:
             # Catch any Revit API exceptions during parameter setting
             logger.debug("Error setting MMI parameter on element {}: {}".format(element.Id, ex))
-            failed_elements.append(element.Id)
+            result["failed"].append(element.Id)
+    
+    logger.debug("[PERF] MMI bulk set to {}: {} set, {} unchanged, {} excluded, {} failed, "
+                 "{} types written, {} groups in {:.2f}s".format(
+                     value_str, result["set"], result["unchanged"], result["excluded"],
+                     len(result["failed"]), result["types_set"], len(groups),
+                     (datetime.datetime.now() - start_time).total_seconds()))
+    return result
+
+def set_mmi_value(doc, elements, value, param_name=None):
+    """Set MMI parameter value on the given elements.
     
-    return success_count, failed_elements
+    Args:
+        doc: The active Revit document
+        elements: A list of elements or element_ids
+        value: The MMI value to set
+        param_name: Optional parameter name, will use stored value or fallback if None
+        
+    Returns:
+        tuple: (success_count, failed_elements_ids); elements that already
+        had the value count as successful
+    """
+    result = set_mmi_value_bulk(doc, elements, value, param_name)
+    return result["set"] + result["unchanged"], result["failed"]
 
 def set_selection_mmi_value(doc, value, show_results=False):
     """Set MMI parameter value on the current selection.
@@ -144,13 +250,15 @@ def set_selection_mmi_value(doc, value, show_results=False):
     
     try:
         # Set MMI parameter for selected elements
-        success_count, failed_elements = set_mmi_value(doc, selection.element_ids, value)
+        result = set_mmi_value_bulk(doc, selection.element_ids, value)
+        success_count = result["set"] + result["unchanged"]
+        failed_elements = result["failed"]
         
         # Show results if requested
         if show_results and success_count > 0:
             forms.alert(
-                'Successfully set MMI parameter to {} on {} elements.'.format(
-                    value, success_count
+                'Successfully set MMI parameter to {} on {} elements ({} already had it).'.format(
+                    value, success_count, result["unchanged"]
                 ),
                 title='Success'
             )
@@ -159,7 +267,7 @@ def set_selection_mmi_value(doc, value, show_results=False):
         if failed_elements:
             output = script.get_output()
             output.print_md("**⚠️ Could not set MMI parameter on {} element(s):**".format(len(failed_elements)))
-            for element_id in failed_elements:
+            for element_id in failed_elements[:FAILURE_REPORT_LIMIT]:
                 element = doc.GetElement(element_id)
                 if element:
                     element_link = output.linkify(element_id)
@@ -169,6 +277,8 @@ def set_selection_mmi_value(doc, value, show_results=False):
                 else:
                     element_link = output.linkify(element_id)
                     output.print_md("- Element {}".format(element_link))
+            if len(failed_elements) > FAILURE_REPORT_LIMIT:
+                output.print_md("- ... and {} more".format(len(failed_elements) - FAILURE_REPORT_LIMIT))
         
         return success_count > 0
         
@@ -188,37 +298,19 @@ def get_or_create_mmi_storage(doc):
             logger.error("Could not get MMIParameterSchema definition.")
             return None
             
-        # Look for existing storage with our schema
-        data_storage_elements = FilteredElementCollector(doc)\
-            .OfClass(ExtensibleStorage.DataStorage)\
-            .ToElements()
-        
-        # Check for current schema version first
-        for ds in data_storage_elements:
-            try:
-                entity = ds.GetEntity(schema)
-                # Check both validity and matching schema GUID to be safe
-                if entity.IsValid() and entity.Schema.GUID == schema.GUID:
-                    logger.debug("Found existing MMI settings storage with current schema (ElementId: {})".format(ds.Id))
-                    return ds
-            except Exception as e:
-                # Log potential errors during checking but continue searching
-                logger.debug("Error checking storage entity (ElementId: {}): {}".format(ds.Id if ds else 'None', str(e)))
-                continue
+        # Look for existing storage with our schema (registry-backed, no collector scan)
+        existing = storage_registry.find_storage(doc, schema.GUID)
+        if existing:
+            logger.debug("Found existing MMI settings storage with current schema (ElementId: {})".format(existing.Id))
+            return existing
         
         # Check for old schema version and migrate if found
         old_schema_guid = System.Guid("8844cb2d-4234-4bf0-8361-b3da4d64234c")  # Previous version GUID
-        for ds in data_storage_elements:
-            try:
-                # Try to get entity with old schema GUID
-                old_schemas = ds.GetEntitySchemaGuids()
-                if old_schema_guid in old_schemas:
-                    logger.debug("Found old schema storage, migrating to new version (ElementId: {})".format(ds.Id))
-                    # Migrate the data
-                    return migrate_mmi_storage(doc, ds, schema)
-            except Exception as e:
-                logger.debug("Error checking for old schema (ElementId: {}): {}".format(ds.Id if ds else 'None', str(e)))
-                continue
+        old_storage = storage_registry.find_storage(doc, old_schema_guid)
+        if old_storage:
+            logger.debug("Found old schema storage, migrating to new version (ElementId: {})".format(old_storage.Id))
+            # Migrate the data
+            return migrate_mmi_storage(doc, old_storage, schema)
         
         # If not found, create a new one and initialize it
         logger.debug("No existing MMI storage found. Creating and initializing new one...")
@@ -228,7 +320,8 @@ def get_or_create_mmi_storage(doc):
             initial_entity = MMIParameterSchema.entity # Creates a new Entity(schema)
             new_storage.SetEntity(initial_entity) 
             logger.debug("Created and initialized new MMI settings storage (ElementId: {})".format(new_storage.Id))
-            return new_storage
+        storage_registry.invalidate(doc)
+        return new_storage
             
     except Exception as e:
         logger.error("Error in get_or_create_mmi_storage: {}".format(str(e)))
@@ -304,6 +397,7 @@ def migrate_mmi_storage(doc, old_storage, new_schema):
                 entity.set("default_mmi", "")
                 entity.set("default_on_new_instances", False)
                 
+            storage_registry.invalidate(doc)
             logger.debug("Successfully migrated MMI storage to new schema (ElementId: {})".format(new_storage.Id))
             return new_storage
             
@@ -333,6 +427,7 @@ def save_mmi_parameter(doc, parameter_name):
                     entity.set("mmi_parameter_name", parameter_name)
                     entity.set("last_used_date", timestamp)
                     entity.set("is_validated", True)
+            storage_registry.invalidate(doc)
             
             logger.debug("Saved MMI parameter name: {}".format(parameter_name))
             return True
@@ -349,24 +444,7 @@ def get_default_mmi(doc):
     Returns:
         str: Stored value or \"\" if unset / invalid.
     """
-    try:
-        data_storage = get_or_create_mmi_storage(doc)
-        if not data_storage:
-            return ""
-        schema = MMIParameterSchema(data_storage)
-        if not schema.is_valid:
-            return ""
-        try:
-            raw = schema.get("default_mmi")
-        except Exception:
-            return ""
-        if raw is None:
-            return ""
-        s = str(raw).strip()
-        return s
-    except Exception as e:
-        logger.error("Error reading default_mmi: {}".format(str(e)))
-        return ""
+    return get_mmi_settings(doc).get("default_mmi") or ""
 
 
 def save_default_mmi(doc, value):
@@ -397,6 +475,7 @@ def save_default_mmi(doc, value):
             with MMIParameterSchema(data_storage) as entity:
                 entity.set("default_mmi", normalized)
                 entity.set("last_used_date", timestamp)
+        storage_registry.invalidate(doc)
         logger.debug("Saved default_mmi: {}".format(repr(normalized)))
         return True
     except Exception as e:
@@ -462,6 +541,9 @@ def save_monitor_config(doc, selected_config):
             
             logger.debug("Exiting MMIParameterSchema context manager. Changes made flag: {}".format(changes_made))
         
+        if changes_made:
+            storage_registry.invalidate(doc)
+        
         # Log message based on whether changes were made
         if changes_made:
              logger.debug("MMI Monitor configuration changes saved.")
@@ -473,46 +555,18 @@ def save_monitor_config(doc, selected_config):
         return False
 
 def load_monitor_config(doc, use_display_names=False):
-    """Load the MMI monitor configuration from extensible storage."""
+    """Load the MMI monitor configuration from extensible storage.
+
+    Reads the cached settings snapshot (see get_mmi_settings); a missing
+    storage yields all-False defaults without creating one.
+    """
+    settings = get_mmi_settings(doc)
     config = {}
-    try:
-        data_storage = get_or_create_mmi_storage(doc)
-        if not data_storage:
-            # Return defaults with appropriate keys based on use_display_names
-            if use_display_names:
-                return {key: False for key in CONFIG_KEYS}
-            else:
-                return {schema_key: False for _, schema_key in CONFIG_KEYS.items()}
-            
-        schema = MMIParameterSchema(data_storage)
-        if schema.is_valid:
-            for display_name, schema_key in CONFIG_KEYS.items():
-                try:
-                    value = schema.get(schema_key) or False  # Default to False if None
-                except Exception as field_error:
-                    # Handle missing fields gracefully (e.g., new fields in updated schema)
-                    logger.debug("Field '{}' not found, using default: {}".format(schema_key, field_error))
-                    value = False
-                    
-                # Store with either display name or schema key based on parameter
-                if use_display_names:
-                    config[display_name] = value
-                else:
-                    config[schema_key] = value
-                logger.debug("Loaded config for '{}': {}".format(display_name, value))
-            return config
-        else:
-            # Return defaults with appropriate keys based on use_display_names
-            if use_display_names:
-                return {key: False for key in CONFIG_KEYS}
-            else:
-                return {schema_key: False for _, schema_key in CONFIG_KEYS.items()}
-            
-    except Exception as e:
-        logger.error("Failed to load MMI monitor config: {}".format(str(e)))
-        # Return defaults with appropriate keys based on use_display_names
+    for display_name, schema_key in CONFIG_KEYS.items():
+        value = settings.get(schema_key) or False
+        # Store with either display name or schema key based on parameter
         if use_display_names:
-            return {key: False for key in CONFIG_KEYS}
+            config[display_name] = value
         else:
-            return {schema_key: False for _, schema_key in CONFIG_KEYS.items()}
-    
\ No newline at end of file
+            config[schema_key] = value
+    return config
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""Reusable MMI view filter set.
+
+The MMI colour scheme is materialised once per document as one
+``ParameterFilterElement`` per MMI level ("MMI_000" ... "MMI_600"). Existing
+filters are recognised by their rule signature (parameter, rule value and
+categories) rather than by name alone, so re-running never duplicates
+them. A filter whose name matches but whose signature drifted (other
+parameter or categories) is updated in place.
+
+Applying the set to views and templates only adds missing filters and
+rewrites overrides that differ, so colouring many views costs O(filters)
+per view instead of O(elements) per view.
+
+The resolved filter ids are cached per document on ``sys`` (shared across
+pyRevit engines) and keyed by :data:`FILTER_SET_VERSION` plus the colour
+scheme, so a scheme change resolves the set again.
+"""
+
+import sys
+
+from Autodesk.Revit.DB import (
+    BuiltInCategory,
+    Category,
+    CategoryType,
+    Color,
+    ElementId,
+    ElementParameterFilter,
+    FilteredElementCollector,
+    FilterStringEquals,
+    FilterStringRule,
+    ParameterFilterElement,
+)
+from pyrevit import script
+from pyrevit.framework import List
+
+from mmi.colorizer import create_color_overrides, get_solid_fill_pattern_id
+from revit.compat import get_element_id_value, create_equals_rule
+
+logger = script.get_logger()
+
+# Bump when the filter definition (naming, rule type) changes
+FILTER_SET_VERSION = 1
+
+_CACHE_SYS_KEY = '_pyBS_mmi_filter_sets'
+
+# Official MMI Color codes from https://mmi-veilederen.no/?page_id=85
+# Each filter matches exact MMI values (e.g., "000", "100", "125", etc.)
+MMI_FILTER_RANGES = [
+    {"value": "000", "name": "MMI_000_Tidligfase", "display_name": "000 - Tidligfase",
+     "color": Color(215, 50, 150)},
+    {"value": "100", "name": "MMI_100_Grunnlagsinformasjon", "display_name": "100 - Grunnlagsinformasjon",
+     "color": Color(190, 40, 35)},
+    {"value": "125", "name": "MMI_125_Etablert_konsept", "display_name": "125 - Etablert konsept",
+     "color": Color(210, 75, 70)},
+    {"value": "150", "name": "MMI_150_Tverrfaglig_kontrollert_konsept", "display_name": "150 - Tverrfaglig kontrollert konsept",
+     "color": Color(225, 120, 115)},
+    {"value": "175", "name": "MMI_175_Valgt_konsept", "display_name": "175 - Valgt konsept",
+     "color": Color(240, 170, 170)},
+    {"value": "200", "name": "MMI_200_Ferdig_konsept", "display_name": "200 - Ferdig konsept",
+     "color": Color(230, 150, 55)},
+    {"value": "225", "name": "MMI_225_Etablert_prinsipielle", "display_name": "225 - Etablert prinsipielle løsninger",
+     "color": Color(235, 175, 100)},
+    {"value": "250", "name": "MMI_250_Tverrfaglig_kontrollert_prinsipielle", "display_name": "250 - Tverrfaglig kontrollert prinsipielle løsninger",
+     "color": Color(240, 200, 140)},
+    {"value": "275", "name": "MMI_275_Valgt_prinsipielle", "display_name": "275 - Valgt prinsipielle løsninger",
+     "color": Color(245, 230, 215)},
+    {"value": "300", "name": "MMI_300_Underlag_for_detaljering", "display_name": "300 - Underlag for detaljering",
+     "color": Color(250, 240, 80)},
+    {"value": "325", "name": "MMI_325_Etablert_detaljerte", "display_name": "325 - Etablert detaljerte løsninger",
+     "color": Color(215, 205, 65)},
+    {"value": "350", "name": "MMI_350_Tverrfaglig_kontrollert_detaljerte", "display_name": "350 - Tverrfaglig kontrollert detaljerte løsninger",
+     "color": Color(185, 175, 60)},
+    {"value": "375", "name": "MMI_375_Detaljerte_anbud", "display_name": "375 - Detaljerte løsninger (anbud/bestilling)",
+     "color": Color(150, 150, 50)},
+    {"value": "400", "name": "MMI_400_Arbeidsgrunnlag", "display_name": "400 - Arbeidsgrunnlag",
+     "color": Color(55, 130, 70)},
+    {"value": "425", "name": "MMI_425_Etablert_utfort", "display_name": "425 - Etablert/utført",
+     "color": Color(75, 170, 90)},
+    {"value": "450", "name": "MMI_450_Kontrollert_utforelse", "display_name": "450 - Kontrollert utførelse",
+     "color": Color(100, 195, 125)},
+    {"value": "475", "name": "MMI_475_Godkjent_utforelse", "display_name": "475 - Godkjent utførelse",
+     "color": Color(155, 215, 165)},
+    {"value": "500", "name": "MMI_500_Som_bygget", "display_name": "500 - Som bygget",
+     "color": Color(30, 70, 175)},
+    {"value": "600", "name": "MMI_600_I_drift", "display_name": "600 - I drift",
+     "color": Color(175, 50, 205)},
+]
+
+# Categories that shouldn't be in filters
+EXCLUDED_CATEGORY_IDS = set([
+    int(BuiltInCategory.OST_Materials),
+    int(BuiltInCategory.OST_Areas),
+    int(BuiltInCategory.OST_Rooms),
+    int(BuiltInCategory.OST_HVAC_Zones),
+])
+
+
+def get_filter_name(filter_range):
+    """Filter name is just "MMI_xxx" (e.g. "MMI_000"), not "MMI_000_Tidligfase"."""
+    return "MMI_{}".format(filter_range["value"])
+
+
+def get_scheme_key():
+    """Return a key identifying the filter set version and colour scheme."""
+    return (FILTER_SET_VERSION,) + tuple(
+        (r["value"], r["color"].Red, r["color"].Green, r["color"].Blue)
+        for r in MMI_FILTER_RANGES)
+
+
+def _get_cache():
+    if not hasattr(sys, _CACHE_SYS_KEY):
+        setattr(sys, _CACHE_SYS_KEY, {})
+    return getattr(sys, _CACHE_SYS_KEY)
+
+
+def _document_key(doc):
+    try:
+        if doc.PathName:
+            return doc.PathName
+    except Exception:
+        pass
+    try:
+        return doc.Title or 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+def find_mmi_parameter_id(doc, mmi_param_name, max_checks=200):
+    """Find the ElementId of the MMI parameter from elements in the model.
+
+    Reads the id from an element's Parameter object, which works for
+    project/shared parameters and built-in parameters alike.
+
+    Returns:
+        ElementId or None
+    """
+    collector = FilteredElementCollector(doc) \
+        .WhereElementIsNotElementType() \
+        .WhereElementIsViewIndependent()
+
+    checked_count = 0
+    for elem in collector:
+        if checked_count >= max_checks:
+            break
+        checked_count += 1
+        try:
+            # Works for project/shared parameters
+            param = elem.LookupParameter(mmi_param_name)
+            if param and param.Id:
+                return param.Id
+            # Works for built-in parameters too
+            for pr in elem.Parameters:
+                if pr.Definition.Name == mmi_param_name and pr.Id:
+                    return pr.Id
+        except Exception as ex:
+            logger.debug("Error reading parameters of {}: {}".format(elem.Id, ex))
+    return None
+
+
+def _is_filterable_category(category):
+    return (category is not None
+            and category.CategoryType == CategoryType.Model
+            and category.AllowsBoundParameters
+            and get_element_id_value(category.Id) not in EXCLUDED_CATEGORY_IDS)
+
+
+def get_categories_with_parameter(doc, mmi_param_id, mmi_param_name, max_checks=1000):
+    """Get categories where the MMI parameter exists and can be used in filters.
+
+    Checks ParameterBindings first (project/shared parameters), then falls
+    back to sampling elements that carry the parameter.
+
+    Returns:
+        List[ElementId]: Category ids (may be empty)
+    """
+    valid_categories = List[ElementId]()
+    seen = set()
+
+    def add_category(category):
+        cat_id_int = get_element_id_value(category.Id)
+        if cat_id_int not in seen and _is_filterable_category(category):
+            seen.add(cat_id_int)
+            valid_categories.Add(category.Id)
+
+    try:
+        iterator = doc.ParameterBindings.ForwardIterator()
+        iterator.Reset()
+        while iterator.MoveNext():
+            param_def = iterator.Key
+            if param_def.Id == mmi_param_id or param_def.Name == mmi_param_name:
+                for category in iterator.Current.Categories:
+                    add_category(category)
+        if valid_categories.Count > 0:
+            return valid_categories
+    except Exception as ex:
+        logger.debug("Error reading parameter bindings: {}".format(ex))
+
+    # Built-in parameters are not in the bindings: sample elements instead
+    collector = FilteredElementCollector(doc).WhereElementIsNotElementType()
+    checked_count = 0
+    for elem in collector:
+        if checked_count >= max_checks:
+            break
+        checked_count += 1
+        try:
+            category = elem.Category
+            if category is None or get_element_id_value(category.Id) in seen:
+                continue
+            if category.CategoryType != CategoryType.Model:
+                continue
+            param = elem.LookupParameter(mmi_param_name)
+            param_found = bool(param and param.Id == mmi_param_id)
+            if not param_found:
+                param_found = any(pr.Id == mmi_param_id for pr in elem.Parameters)
+            if param_found:
+                add_category(Category.GetCategory(doc, category.Id))
+        except Exception as ex:
+            logger.debug("Error checking category of {}: {}".format(elem.Id, ex))
+
+    return valid_categories
+
+
+def _make_signature(param_id, rule_value, category_ids):
+    return (get_element_id_value(param_id), rule_value,
+            frozenset(get_element_id_value(c) for c in category_ids))
+
+
+def get_filter_signature(param_filter):
+    """Return (param id int, rule value, frozenset of category id ints) or None.
+
+    None means the filter is not a single string-equals rule (i.e. not one of
+    ours, or edited by hand beyond recognition).
+    """
+    try:
+        element_filter = param_filter.GetElementFilter()
+        if not isinstance(element_filter, ElementParameterFilter):
+            return None
+        rules = list(element_filter.GetRules())
+        if len(rules) != 1 or not isinstance(rules[0], FilterStringRule):
+            return None
+        rule = rules[0]
+        if not isinstance(rule.GetEvaluator(), FilterStringEquals):
+            return None
+        return _make_signature(rule.GetRuleParameter(), rule.RuleString,
+                               param_filter.GetCategories())
+    except Exception as ex:
+        logger.debug("Could not read signature of filter {}: {}".format(param_filter.Id, ex))
+        return None
+
+
+def _get_cached_filter_set(doc, mmi_param_id, categories):
+    entry = _get_cache().get(_document_key(doc))
+    if entry is None:
+        return None
+    if (entry["scheme"] != get_scheme_key()
+            or entry["param_id"] != get_element_id_value(mmi_param_id)
+            or entry["categories"] != frozenset(get_element_id_value(c) for c in categories)):
+        return None
+    filter_set = []
+    for filter_id, filter_range in zip(entry["filter_ids"], MMI_FILTER_RANGES):
+        param_filter = doc.GetElement(filter_id)
+        if param_filter is None or not param_filter.IsValidObject:
+            return None
+        filter_set.append((param_filter, filter_range))
+    return filter_set
+
+
+def get_mmi_filter_set(doc, mmi_param_id, categories):
+    """Return the MMI filter set, creating or updating filters as needed.
+
+    Must run inside a transaction.
+
+    Args:
+        doc: Revit document
+        mmi_param_id: ElementId of the MMI parameter
+        categories: List[ElementId] of categories to filter
+
+    Returns:
+        list: [(ParameterFilterElement, filter_range)] in MMI_FILTER_RANGES order
+    """
+    filter_set = _get_cached_filter_set(doc, mmi_param_id, categories)
+    if filter_set is not None:
+        logger.debug("Reusing cached MMI filter set")
+        return filter_set
+
+    # One pass over the existing filters, indexed by signature and name
+    by_signature = {}
+    by_name = {}
+    for existing_filter in FilteredElementCollector(doc).OfClass(ParameterFilterElement):
+        by_name[existing_filter.Name] = existing_filter
+        signature = get_filter_signature(existing_filter)
+        if signature is not None:
+            by_signature.setdefault(signature, existing_filter)
+
+    filter_set = []
+    created = updated = reused = 0
+    for filter_range in MMI_FILTER_RANGES:
+        filter_name = get_filter_name(filter_range)
+        mmi_value = filter_range["value"]
+        signature = _make_signature(mmi_param_id, mmi_value, categories)
+        try:
+            param_filter = by_signature.get(signature)
+            if param_filter is not None:
+                reused += 1
+            else:
+                # CreateEqualsRule dropped its caseSensitive parameter in Revit 2024.
+                # revit.compat.create_equals_rule hides the difference.
+                rule = create_equals_rule(mmi_param_id, mmi_value, case_sensitive=True)
+                element_filter = ElementParameterFilter(rule)
+                param_filter = by_name.get(filter_name)
+                if param_filter is not None:
+                    # Same name, different definition: bring it up to date in place
+                    param_filter.SetCategories(categories)
+                    param_filter.SetElementFilter(element_filter)
+                    updated += 1
+                else:
+                    param_filter = ParameterFilterElement.Create(
+                        doc, filter_name, categories, element_filter)
+                    created += 1
+            filter_set.append((param_filter, filter_range))
+        except Exception as ex:
+            logger.error("Error creating filter '{}': {}".format(filter_range["name"], ex))
+
+    logger.debug("MMI filter set: {} reused, {} updated, {} created".format(reused, updated, created))
+
+    if len(filter_set) == len(MMI_FILTER_RANGES):
+        _get_cache()[_document_key(doc)] = {
+            "scheme": get_scheme_key(),
+            "param_id": get_element_id_value(mmi_param_id),
+            "categories": frozenset(get_element_id_value(c) for c in categories),
+            "filter_ids": [param_filter.Id for param_filter, _ in filter_set],
+        }
+    return filter_set
+
+
+def _overrides_match(current, wanted):
+    try:
+        return (current.ProjectionLineColor.IsValid
+                and current.ProjectionLineColor.Red == wanted.ProjectionLineColor.Red
+                and current.ProjectionLineColor.Green == wanted.ProjectionLineColor.Green
+                and current.ProjectionLineColor.Blue == wanted.ProjectionLineColor.Blue
+                and current.SurfaceForegroundPatternColor.IsValid
+                and current.SurfaceForegroundPatternColor.Red == wanted.SurfaceForegroundPatternColor.Red
+                and current.SurfaceForegroundPatternColor.Green == wanted.SurfaceForegroundPatternColor.Green
+                and current.SurfaceForegroundPatternColor.Blue == wanted.SurfaceForegroundPatternColor.Blue
+                and current.SurfaceForegroundPatternId == wanted.SurfaceForegroundPatternId)
+    except Exception:
+        return False
+
+
+def apply_filter_set_to_views(doc, views, filter_set):
+    """Apply the MMI filter set to views and/or view templates.
+
+    Must run inside a transaction. Override settings are built once per
+    filter and shared across views; filters already present with matching
+    overrides are left alone.
+
+    Returns:
+        dict: {'views': int, 'filters_added': int, 'overrides_set': int, 'failed': [(view, error)]}
+    """
+    solid_fill_id = get_solid_fill_pattern_id(doc)
+    overrides = [(param_filter, create_color_overrides(filter_range["color"], solid_fill_id))
+                 for param_filter, filter_range in filter_set]
+
+    result = {'views': 0, 'filters_added': 0, 'overrides_set': 0, 'failed': []}
+    for view in views:
+        try:
+            view_filters = set(get_element_id_value(fid) for fid in view.GetFilters())
+            for param_filter, ogs in overrides:
+                if get_element_id_value(param_filter.Id) not in view_filters:
+                    view.AddFilter(param_filter.Id)
+                    result['filters_added'] += 1
+                elif _overrides_match(view.GetFilterOverrides(param_filter.Id), ogs):
+                    continue
+                view.SetFilterOverrides(param_filter.Id, ogs)
+                result['overrides_set'] += 1
+            result['views'] += 1
+        except Exception as ex:
+            logger.error("Error applying MMI filters to view '{}': {}".format(view.Name, ex))
+            result['failed'].append((view, ex))
+
+    logger.debug("MMI filters applied to {} views: {} filters added, {} overrides set".format(
+        result['views'], result['filters_added'], result['overrides_set']))
+    return result
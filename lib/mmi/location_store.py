@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Compact store of last known element locations for move detection.
+
+Warn-on-move compares an element's current location with the one recorded
+at activation or at its last change. The monitor used to keep a dict of
+``{id: {"location": XYZ, "timestamp": datetime}}`` and rebuilt it on every
+change event to drop entries older than five minutes.
+
+:class:`LocationStore` keeps one ``__slots__`` record (x, y, z, bucket) per
+element id and expires entries through a time wheel: ids are filed in the
+bucket of their last update and whole buckets are dropped once they fall
+out of the time-to-live, so cleanup only touches entries that actually
+expire.
+"""
+
+import math
+import time
+
+# Keep entries not older than 5 minutes
+DEFAULT_TTL_SECONDS = 300
+
+# Width of one wheel bucket; entries expire with this granularity
+DEFAULT_BUCKET_SECONDS = 30
+
+
+class _LocationRecord(object):
+    __slots__ = ('x', 'y', 'z', 'bucket')
+
+    def __init__(self, x, y, z, bucket):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.bucket = bucket
+
+
+class LocationStore(object):
+    """Last known locations keyed by integer element id, with amortised expiry."""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, bucket_seconds=DEFAULT_BUCKET_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        self._records = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, element_id):
+        return element_id in self._records
+
+    def _bucket_of(self, now):
+        return int(now // self.bucket_seconds)
+
+    def update(self, element_id, location, now=None):
+        """Record ``location`` (an XYZ) as the last known location of ``element_id``."""
+        if now is None:
+            now = time.time()
+        bucket = self._bucket_of(now)
+        record = self._records.get(element_id)
+        if record is None:
+            self._records[element_id] = _LocationRecord(location.X, location.Y, location.Z, bucket)
+        else:
+            record.x = location.X
+            record.y = location.Y
+            record.z = location.Z
+            if record.bucket == bucket:
+                return
+            # The old bucket keeps a stale reference; expire() skips it
+            record.bucket = bucket
+        ids = self._buckets.get(bucket)
+        if ids is None:
+            ids = self._buckets[bucket] = set()
+        ids.add(element_id)
+
+    def distance_to(self, element_id, location):
+        """Return the distance between the stored location and ``location``, None if unknown."""
+        record = self._records.get(element_id)
+        if record is None:
+            return None
+        dx = location.X - record.x
+        dy = location.Y - record.y
+        dz = location.Z - record.z
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+    def expire(self, now=None):
+        """Drop entries not updated within the time-to-live.
+
+        Only buckets that have fallen out of the window are visited, so the
+        cost is proportional to the expiring entries, not the store size.
+
+        Returns:
+            int: Number of entries removed
+        """
+        if now is None:
+            now = time.time()
+        cutoff = self._bucket_of(now - self.ttl_seconds)
+        expired_buckets = [bucket for bucket in self._buckets if bucket < cutoff]
+        removed = 0
+        for bucket in expired_buckets:
+            for element_id in self._buckets.pop(bucket):
+                record = self._records.get(element_id)
+                if record is not None and record.bucket == bucket:
+                    del self._records[element_id]
+                    removed += 1
+        return removed
+
+    def clear(self):
+        """Forget all locations."""
+        self._records.clear()
+        self._buckets.clear()
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Change analysis behind the MMI Monitor's DocumentChanged handling.
+
+The Monitor's DocumentChanged handler runs :func:`record_document_changes`,
+which keeps the value index and session change set current and records
+changed element ids in :class:`PendingChanges`. Once a burst of edits has
+settled, the Monitor runs
+:func:`collect_monitor_actions` over the merged batch to decide which MMI
+values to correct or default and which elements to pin or warn about. The
+caches the analysis keeps between batches live in :class:`MonitorState`.
+
+Nothing here opens a transaction or touches the UI, so the same code runs
+in the Monitor and in the headless harness (see ``mmi_harness``).
+"""
+
+import time
+
+from Autodesk.Revit.DB import CategoryType
+from pyrevit import script
+
+from mmi import sync_checker, value_index
+from mmi.config import MMI_THRESHOLD
+from mmi.location_store import LocationStore
+from mmi.utils import (
+    get_element_location,
+    get_element_mmi_value,
+    validate_mmi_value,
+    is_mmi_value_blank_for_default,
+)
+from revit.compat import get_element_id_value
+
+logger = script.get_logger()
+
+# Minimum distance (in feet) counted as a move of a high MMI element
+MOVE_TOLERANCE = 0.1
+
+
+def get_document_key(doc):
+    """Return a key identifying a document in the pending change queue."""
+    try:
+        if doc.PathName:
+            return doc.PathName
+    except Exception:
+        pass
+    try:
+        return doc.Title or "unknown"
+    except Exception:
+        return "unknown"
+
+
+class PendingChanges(object):
+    """Changed element ids merged per document until they are processed.
+
+    Each batch is ``{"doc", "added": {int: ElementId}, "modified": {int: ElementId}}``.
+    """
+
+    def __init__(self):
+        self.batches = {}
+        self.last_change_time = 0.0
+
+    def __len__(self):
+        return len(self.batches)
+
+    def record(self, doc, added_element_ids, modified_element_ids, now=None):
+        """Merge changed ids of ``doc`` into its pending batch."""
+        key = get_document_key(doc)
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = {"doc": doc, "added": {}, "modified": {}}
+        batch["doc"] = doc
+        for element_id in added_element_ids:
+            batch["added"][get_element_id_value(element_id)] = element_id
+        for element_id in modified_element_ids:
+            batch["modified"][get_element_id_value(element_id)] = element_id
+        self.last_change_time = time.time() if now is None else now
+
+    def is_settled(self, debounce_seconds, now=None):
+        """True if no change was recorded during the last ``debounce_seconds``."""
+        if now is None:
+            now = time.time()
+        return now - self.last_change_time >= debounce_seconds
+
+    def take(self):
+        """Return the pending batches and start a new, empty queue."""
+        batches = list(self.batches.values())
+        self.batches = {}
+        return batches
+
+    def clear(self):
+        """Drop all recorded changes."""
+        self.batches = {}
+
+
+class MonitorState(object):
+    """Caches kept by the monitor between change batches.
+
+    Attributes:
+        location_store: Last known locations for move detection
+        mmi_cache: {element id int: last seen MMI value} to detect MMI changes
+        baseline_ids: Element id ints present at activation; ids outside it
+            are new instances for "default on new instances"
+    """
+
+    def __init__(self):
+        self.location_store = LocationStore()
+        self.mmi_cache = {}
+        self.baseline_ids = set()
+
+    def clear(self):
+        """Forget all cached locations, MMI values and baseline ids."""
+        self.location_store.clear()
+        self.mmi_cache = {}
+        self.baseline_ids = set()
+
+
+def _count(element_ids):
+    if not element_ids:
+        return 0
+    return element_ids.Count if hasattr(element_ids, "Count") else len(element_ids)
+
+
+def record_document_changes(doc, added_element_ids, modified_element_ids, deleted_element_ids,
+                            pending=None):
+    """Handle one DocumentChanged event: the body of the Monitor's handler.
+
+    Keeps the MMI value index current for selection/statistics queries and
+    the session change set that lets the pre-sync check skip the full
+    ownership scan, then merges added and modified ids into ``pending``.
+
+    Args:
+        pending: The Monitor's :class:`PendingChanges`, or None to only
+            update the index and change set
+
+    Returns:
+        bool: True if ids were recorded and the batch needs processing
+    """
+    value_index.apply_changes(doc, added_element_ids, modified_element_ids, deleted_element_ids)
+    sync_checker.record_session_changes(doc, added_element_ids, modified_element_ids, deleted_element_ids)
+    if pending is None:
+        return False
+    if _count(added_element_ids) == 0 and _count(modified_element_ids) == 0:
+        return False
+    pending.record(doc, added_element_ids, modified_element_ids)
+    return True
+
+
+def _is_model_instance(element):
+    return (element is not None
+            and hasattr(element, "Pinned")
+            and element.Category
+            and element.Category.CategoryType == CategoryType.Model)
+
+
+def _default_correction(default_mmi, mmi_param_name):
+    return {
+        "original": "(empty)",
+        "fixed": str(default_mmi).strip(),
+        "param": mmi_param_name,
+    }
+
+
+def collect_monitor_actions(doc, added_element_ids, modified_element_ids, state,
+                            mmi_param_name, monitor_settings, default_mmi=None):
+    """Decide what the monitor does for a batch of added and modified elements.
+
+    Updates the location, MMI and baseline caches in ``state`` as a side effect.
+
+    Args:
+        doc: The changed document
+        added_element_ids: Added ElementIds of the batch
+        modified_element_ids: Modified ElementIds of the batch
+        state: The monitor's :class:`MonitorState`
+        mmi_param_name: Name of the MMI parameter
+        monitor_settings: Monitor config dict (see mmi.core.load_monitor_config)
+        default_mmi: MMI value for new instances, or None
+
+    Returns:
+        dict or None: {
+            'validation_corrections': {ElementId: {'original', 'fixed', 'param'}},
+            'elements_to_pin': list of ElementId,
+            'moved_high_mmi_elements': list of {'id', 'mmi', 'distance'}
+        }, None when no monitor feature applies
+    """
+    mod_count = len(modified_element_ids)
+    add_count = len(added_element_ids)
+
+    validate_enabled = monitor_settings["validate_mmi"]
+    warn_on_move_enabled = monitor_settings["warn_on_move"]
+    pin_elements_enabled = monitor_settings["pin_elements"]
+
+    has_modified_features = validate_enabled or warn_on_move_enabled or pin_elements_enabled
+    toggle_default_on_new = bool(monitor_settings.get("default_on_new_instances", False))
+    has_default_on_new = toggle_default_on_new and bool(default_mmi and str(default_mmi).strip())
+
+    if not has_modified_features and not has_default_on_new:
+        logger.debug("No MMI monitor features enabled and no default on new instances. Skipping.")
+        return None
+
+    validation_corrections = {}
+    elements_to_pin = []
+    moved_high_mmi_elements = []
+    baseline_ids = state.baseline_ids
+
+    # ----- Added elements: Default on new instances (GetAddedElementIds) -----
+    if has_default_on_new and add_count > 0:
+        logger.debug(
+            "Processing {} added elements for default MMI (param: {})".format(
+                add_count, mmi_param_name))
+        for element_id in added_element_ids:
+            element = doc.GetElement(element_id)
+            if not _is_model_instance(element):
+                continue
+            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
+            if param is None or mmi_value is not None:
+                continue
+            if not is_mmi_value_blank_for_default(mmi_value, value_str):
+                continue
+            if element_id in validation_corrections:
+                continue
+            validation_corrections[element_id] = _default_correction(default_mmi, mmi_param_name)
+            logger.debug(
+                "New instance (added) {} queued for default MMI {}".format(element_id, default_mmi))
+        for element_id in added_element_ids:
+            baseline_ids.add(get_element_id_value(element_id))
+
+    # ----- Modified elements: new ids not in baseline (e.g. some walls only in modified set) -----
+    if has_default_on_new and mod_count > 0:
+        for element_id in modified_element_ids:
+            eid_i = get_element_id_value(element_id)
+            if eid_i in baseline_ids:
+                continue
+            element = doc.GetElement(element_id)
+            if _is_model_instance(element):
+                mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
+                if (param
+                        and mmi_value is None
+                        and is_mmi_value_blank_for_default(mmi_value, value_str)
+                        and element_id not in validation_corrections):
+                    validation_corrections[element_id] = _default_correction(default_mmi, mmi_param_name)
+                    logger.debug(
+                        "New instance (modified) {} queued for default MMI {}".format(
+                            element_id, default_mmi))
+            baseline_ids.add(eid_i)
+
+    # ----- Modified elements: validate / warn / pin -----
+    if has_modified_features and mod_count > 0:
+        logger.debug("Processing {} modified elements with MMI parameter: {}".format(
+            mod_count, mmi_param_name))
+        location_store = state.location_store
+        mmi_cache = state.mmi_cache
+        now = time.time()
+        location_store.expire(now)
+        for element_id in modified_element_ids:
+            element = doc.GetElement(element_id)
+
+            if element is None or not hasattr(element, "Pinned"):
+                continue
+
+            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
+            if mmi_value is None:
+                continue
+
+            if validate_enabled and param:
+                orig_value, fixed_value = validate_mmi_value(value_str)
+                if orig_value and fixed_value:
+                    validation_corrections[element_id] = {
+                        "original": orig_value,
+                        "fixed": fixed_value,
+                        "param": mmi_param_name
+                    }
+                    logger.debug("Element {} needs MMI value correction: '{}' to '{}'".format(
+                        element_id, orig_value, fixed_value))
+
+            element_id_int = get_element_id_value(element_id)
+
+            if warn_on_move_enabled and mmi_value > MMI_THRESHOLD:
+                current_location = get_element_location(element)
+                if current_location:
+                    distance = location_store.distance_to(element_id_int, current_location)
+                    if distance is not None and distance > MOVE_TOLERANCE:
+                        moved_high_mmi_elements.append({
+                            "id": element_id,
+                            "mmi": mmi_value,
+                            "distance": distance
+                        })
+                        logger.debug("High MMI Element {} moved {:.2f} meters".format(
+                            element_id, distance))
+                    location_store.update(element_id_int, current_location, now)
+
+            if pin_elements_enabled and mmi_value >= MMI_THRESHOLD:
+                prev_mmi = mmi_cache.get(element_id_int)
+
+                if not element.Pinned:
+                    if prev_mmi is None:
+                        elements_to_pin.append(element_id)
+                        logger.debug("Element {} newly detected with MMI {} - queuing for pin".format(
+                            element_id, mmi_value))
+                    elif prev_mmi < MMI_THRESHOLD:
+                        elements_to_pin.append(element_id)
+                        logger.debug("Element {} MMI changed from {} to {} - queuing for pin".format(
+                            element_id, prev_mmi, mmi_value))
+
+            mmi_cache[element_id_int] = mmi_value
+
+    return {
+        "validation_corrections": validation_corrections,
+        "elements_to_pin": elements_to_pin,
+        "moved_high_mmi_elements": moved_high_mmi_elements,
+    }
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Single-pass model scan used when the MMI Monitor is switched on.
+
+Activation needs four things from the model: locations of high MMI elements
+(move warnings), MMI values of all elements (change detection), the ids that
+exist at activation (default MMI on new instances) and the unpinned high MMI
+elements (proactive pinning). They used to come from four full-model
+collectors; :func:`scan_model` walks the model categories once and fills all
+of them.
+"""
+
+import time
+
+from Autodesk.Revit.DB import (
+    FilteredElementCollector,
+    ElementMulticategoryFilter,
+    CategoryType,
+    ElementId,
+)
+from System.Collections.Generic import List
+from pyrevit import script
+
+from mmi.config import MMI_THRESHOLD
+from mmi.utils import get_element_location, get_element_mmi_value
+from revit.compat import get_element_id_value
+
+logger = script.get_logger()
+
+
+def get_model_category_filter(doc):
+    """Build a filter matching every model category of ``doc``.
+
+    Args:
+        doc: The Revit document
+
+    Returns:
+        ElementMulticategoryFilter or None if no model categories were found
+    """
+    category_ids = List[ElementId]()
+    for category in doc.Settings.Categories:
+        try:
+            if category.CategoryType == CategoryType.Model:
+                category_ids.Add(category.Id)
+        except Exception:
+            continue
+    if category_ids.Count == 0:
+        return None
+    return ElementMulticategoryFilter(category_ids)
+
+
+def scan_model(doc, mmi_param_name, collect_locations=False, collect_mmi=False,
+               collect_pin_candidates=False):
+    """Walk the model elements once and collect the monitor activation data.
+
+    Only pinnable elements (those with a ``Pinned`` property) in model
+    categories are visited; the category filter is applied in the collector
+    so annotation and internal elements never reach Python.
+
+    Args:
+        doc: The Revit document
+        mmi_param_name: Name of the MMI parameter (may be None; then only
+            baseline ids are collected)
+        collect_locations: Collect locations of elements with MMI > threshold
+        collect_mmi: Collect MMI values of all elements that have one
+        collect_pin_candidates: Collect unpinned elements with MMI >= threshold
+
+    Returns:
+        dict: {
+            'locations': {id int: XYZ},
+            'mmi_values': {id int: int},
+            'baseline_ids': set of id ints,
+            'pin_candidates': list of elements,
+            'element_count': int,
+            'elapsed': float seconds
+        }
+    """
+    start_time = time.time()
+    result = {
+        'locations': {},
+        'mmi_values': {},
+        'baseline_ids': set(),
+        'pin_candidates': [],
+        'element_count': 0,
+        'elapsed': 0.0,
+    }
+
+    collector = FilteredElementCollector(doc).WhereElementIsNotElementType()
+    category_filter = get_model_category_filter(doc)
+    if category_filter is not None:
+        collector = collector.WherePasses(category_filter)
+
+    read_mmi = bool(mmi_param_name) and (
+        collect_locations or collect_mmi or collect_pin_candidates)
+    locations = result['locations']
+    mmi_values = result['mmi_values']
+    baseline_ids = result['baseline_ids']
+    pin_candidates = result['pin_candidates']
+
+    for element in collector:
+        if not hasattr(element, "Pinned"):
+            continue
+        element_id = get_element_id_value(element.Id)
+        baseline_ids.add(element_id)
+        result['element_count'] += 1
+
+        if not read_mmi:
+            continue
+
+        mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
+        if mmi_value is None:
+            continue
+
+        if collect_mmi:
+            mmi_values[element_id] = mmi_value
+
+        if mmi_value < MMI_THRESHOLD:
+            continue
+
+        if collect_pin_candidates and not element.Pinned:
+            pin_candidates.append(element)
+
+        if collect_locations and mmi_value > MMI_THRESHOLD:
+            location = get_element_location(element)
+            if location:
+                locations[element_id] = location
+
+    result['elapsed'] = time.time() - start_time
+    logger.debug(
+        "[PERF] Monitor activation scan: {} elements in {:.2f}s "
+        "({} locations, {} MMI values, {} to pin)".format(
+            result['element_count'], result['elapsed'], len(locations),
+            len(mmi_values), len(pin_candidates)))
+    return result
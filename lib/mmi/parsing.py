@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Memoised parsing of raw MMI parameter strings.
+
+A model holds hundreds of thousands of MMI reads but only a few dozen
+distinct MMI strings ("300", "MMI-425", " 40", ...). Every read used to run
+``re.findall`` and every validation repeated the work. :func:`parse_mmi_string`
+parses each distinct string once with a precompiled pattern and keeps the
+result in a bounded memo table shared by the monitor, the colorizer, the
+statistics/selection index and the post-sync check.
+"""
+
+import re
+import time
+
+from pyrevit import script
+
+logger = script.get_logger()
+
+# Upper bound on memoised strings; the table is cleared when it is reached.
+# Real models stay far below this, it only guards against free-text values.
+MEMO_MAX_SIZE = 4096
+
+_DIGITS_RE = re.compile(r'\d+')
+
+_memo = {}
+
+
+def _parse_uncached(value_str):
+    """Parse ``value_str`` without the memo table.
+
+    Returns:
+        tuple: (int value or None, normalised string, (original, fixed))
+        where (original, fixed) is (None, None) when no correction is needed
+    """
+    normalised = value_str.strip()
+    match = _DIGITS_RE.search(value_str)
+    if not match:
+        return None, normalised, (None, None)
+
+    digits = match.group(0)
+    value = int(digits)
+
+    # Rule: Should be a 3-digit number between 100-999
+    if value < 100:
+        # If less than 3 digits, e.g. "40" -> "400"
+        fixed_value = str(value) + "0" * (3 - len(str(value)))
+        return value, normalised, (normalised, fixed_value)
+    if value > 999:
+        # If more than 3 digits, e.g. "2500" -> "250", "1000" -> "100"
+        return value, normalised, (normalised, str(value)[:3])
+    return value, normalised, (None, None)
+
+
+def parse_mmi_string(value_str):
+    """Parse a raw MMI parameter string.
+
+    Args:
+        value_str: Raw parameter string (may be None or empty)
+
+    Returns:
+        tuple: (int value or None, normalised string, (original, fixed)).
+        The correction pair is (None, None) if the value is valid or has no
+        digits, matching :func:`mmi.utils.validate_mmi_value`.
+    """
+    if not value_str:
+        return None, value_str, (None, None)
+    result = _memo.get(value_str)
+    if result is None:
+        result = _parse_uncached(value_str)
+        if len(_memo) >= MEMO_MAX_SIZE:
+            _memo.clear()
+        _memo[value_str] = result
+    return result
+
+
+def parse_mmi_value(value_str):
+    """Return the numeric MMI value of ``value_str`` (first digit run) or None."""
+    return parse_mmi_string(value_str)[0]
+
+
+def get_mmi_correction(value_str):
+    """Return (original, fixed) if ``value_str`` needs correcting, else (None, None)."""
+    return parse_mmi_string(value_str)[2]
+
+
+def clear_memo():
+    """Forget all memoised strings."""
+    _memo.clear()
+
+
+def benchmark_parsing(count=1000000, distinct=40):
+    """Micro-benchmark the memoised parser against per-call regex parsing.
+
+    Parses ``count`` synthetic values drawn from ``distinct`` MMI strings,
+    once the old way (``re.findall`` plus the validation rules on every
+    call) and once through :func:`parse_mmi_string`.
+
+    Returns:
+        dict: {'count', 'distinct', 'uncached_seconds', 'memoised_seconds', 'speedup'}
+    """
+    variants = ["{}", "MMI-{}", " {} ", "{}0", "MMI {}"]
+    samples = []
+    for i in range(distinct):
+        level = (i * 25) % 1000 or 25
+        samples.append(variants[i % len(variants)].format(level))
+    values = [samples[i % distinct] for i in range(count)]
+
+    def parse_per_call(value_str):
+        # What a monitor read plus validation cost before: two findall passes
+        numbers = re.findall(r'\d+', value_str)
+        value = int(numbers[0]) if numbers else None
+        digits = re.findall(r'\d+', value_str)
+        if not digits:
+            return value, None, None
+        extracted_value = int(digits[0])
+        if extracted_value < 100:
+            return value, value_str.strip(), str(extracted_value) + "0" * (3 - len(str(extracted_value)))
+        if extracted_value > 999:
+            return value, value_str.strip(), str(extracted_value)[:3]
+        return value, None, None
+
+    start_time = time.time()
+    for value_str in values:
+        parse_per_call(value_str)
+    uncached_seconds = time.time() - start_time
+
+    clear_memo()
+    start_time = time.time()
+    for value_str in values:
+        parse_mmi_string(value_str)
+    memoised_seconds = time.time() - start_time
+
+    result = {
+        'count': count,
+        'distinct': distinct,
+        'uncached_seconds': uncached_seconds,
+        'memoised_seconds': memoised_seconds,
+        'speedup': uncached_seconds / memoised_seconds if memoised_seconds else 0.0,
+    }
+    logger.debug("[PERF] MMI parsing of {} values ({} distinct): {:.2f}s uncached, "
+                 "{:.2f}s memoised ({:.1f}x)".format(
+                     count, distinct, uncached_seconds, memoised_seconds, result['speedup']))
+    return result
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""Periodic MMI histogram snapshots per project.
+
+Each snapshot is a compact histogram of MMI values overall
+(``mmi_values``), per category, per workset and per building level,
+taken from the MMI value index (no model scan while the monitor keeps the
+index live). Snapshots are appended as one JSON line to a
+small per-project file under ``%LOCALAPPDATA%\\pyBS\\mmi_snapshots`` so MMI
+progress can be charted across weeks.
+
+A snapshot is only written when :data:`SNAPSHOT_INTERVAL_SECONDS` has passed
+since the last one and the histogram actually changed. Snapshots written
+before the level histogram existed stored the MMI value counts under
+``levels``; read them through :func:`get_mmi_values`.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import time
+
+from Autodesk.Revit.DB import Category, ModelPathUtils, WorksetId
+from pyrevit import script
+
+from mmi import value_index
+from mmi.core import get_mmi_parameter_name
+from revit.compat import make_element_id
+
+logger = script.get_logger()
+
+SNAPSHOT_DIR_NAME = 'mmi_snapshots'
+
+# Minimum time between two written snapshots of one project
+SNAPSHOT_INTERVAL_SECONDS = 3600
+
+# Project file -> {'time': last written epoch, 'signature': histogram signature}
+_last_snapshots = {}
+
+
+def _get_snapshot_dir():
+    localappdata = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    path = os.path.join(localappdata, 'pyBS', SNAPSHOT_DIR_NAME)
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except Exception:
+            pass
+    return path
+
+
+def _get_project_path(doc):
+    """Central model path for workshared documents, else the file path or title."""
+    try:
+        if doc.IsWorkshared:
+            central_path = doc.GetWorksharingCentralModelPath()
+            if central_path:
+                return ModelPathUtils.ConvertModelPathToUserVisiblePath(central_path)
+    except Exception:
+        pass
+    return doc.PathName or doc.Title
+
+
+def get_snapshot_file(doc):
+    """Return the snapshot file of the project ``doc`` belongs to."""
+    project_path = _get_project_path(doc)
+    digest = hashlib.md5(project_path.encode('utf-8')).hexdigest()[:10]
+    title = re.sub(r'[^A-Za-z0-9_-]+', '_', doc.Title)[:40]
+    return os.path.join(_get_snapshot_dir(), '{}_{}.jsonl'.format(title, digest))
+
+
+def _name_counts(counts):
+    return dict((str(value), count) for value, count in counts.items())
+
+
+def _get_element_name(doc, element_id):
+    if element_id is None:
+        return "Unknown"
+    try:
+        element = doc.GetElement(make_element_id(element_id))
+        if element is not None:
+            return element.Name
+    except Exception:
+        pass
+    return "Unknown"
+
+
+def get_mmi_values(snapshot):
+    """Return the {MMI value: count} histogram of a snapshot, old or new format."""
+    if 'mmi_values' in snapshot:
+        return snapshot['mmi_values']
+    return snapshot.get('levels') or {}
+
+
+def build_snapshot(doc, param_name=None, index=None):
+    """Build a snapshot dict from the MMI value index of ``doc``.
+
+    Args:
+        doc: The Revit document
+        param_name: MMI parameter name (default: the project's)
+        index: MMIValueIndex to read; built from the model when omitted
+    """
+    if not param_name:
+        param_name = index.param_name if index is not None else get_mmi_parameter_name(doc)
+    if index is None:
+        index = value_index.get_index(doc, param_name)
+    histogram = index.histogram()
+
+    categories = {}
+    for category_id, counts in histogram['categories'].items():
+        name = "Unknown"
+        if category_id is not None:
+            try:
+                category = Category.GetCategory(doc, make_element_id(category_id))
+                if category is not None:
+                    name = category.Name
+            except Exception:
+                pass
+        categories[name] = _name_counts(counts)
+
+    worksets = {}
+    if doc.IsWorkshared:
+        workset_table = doc.GetWorksetTable()
+        for workset_id, counts in histogram['worksets'].items():
+            name = "Unknown"
+            if workset_id is not None:
+                try:
+                    name = workset_table.GetWorkset(WorksetId(workset_id)).Name
+                except Exception:
+                    pass
+            worksets[name] = _name_counts(counts)
+
+    levels = {}
+    for level_id, counts in histogram['levels'].items():
+        name = _get_element_name(doc, level_id)
+        merged = levels.setdefault(name, {})
+        for value, count in _name_counts(counts).items():
+            merged[value] = merged.get(value, 0) + count
+
+    now = time.time()
+    return {
+        'time': int(now),
+        'date': datetime.datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M'),
+        'parameter': param_name,
+        'total_elements': len(index.all_ids),
+        'elements_with_mmi': len(index.strings),
+        'mmi_values': _name_counts(histogram['mmi_values']),
+        'categories': categories,
+        'worksets': worksets,
+        'levels': levels,
+    }
+
+
+def _signature(snapshot):
+    # Old snapshots have no level histogram ('levels' held the MMI values)
+    levels = snapshot.get('levels') if 'mmi_values' in snapshot else None
+    return json.dumps([snapshot.get('parameter'), snapshot.get('total_elements'),
+                       get_mmi_values(snapshot), snapshot.get('categories'),
+                       snapshot.get('worksets'), levels], sort_keys=True)
+
+
+def load_snapshots(doc):
+    """Return all stored snapshots of the project, oldest first."""
+    path = get_snapshot_file(doc)
+    snapshots = []
+    if not os.path.exists(path):
+        return snapshots
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                snapshots.append(json.loads(line))
+            except ValueError:
+                logger.debug("Skipping unreadable MMI snapshot line in {}".format(path))
+    return snapshots
+
+
+def _get_last(path, doc):
+    last = _last_snapshots.get(path)
+    if last is None:
+        last = {'time': 0, 'signature': None}
+        stored = load_snapshots(doc)
+        if stored:
+            last = {'time': stored[-1].get('time', 0), 'signature': _signature(stored[-1])}
+        _last_snapshots[path] = last
+    return last
+
+
+def is_snapshot_due(doc):
+    """True if :data:`SNAPSHOT_INTERVAL_SECONDS` passed since the last snapshot check."""
+    if doc is None or doc.IsFamilyDocument:
+        return False
+    last = _get_last(get_snapshot_file(doc), doc)
+    return time.time() - last['time'] >= SNAPSHOT_INTERVAL_SECONDS
+
+
+def take_snapshot(doc, force=False, index=None):
+    """Append a snapshot if one is due and the histogram changed.
+
+    Args:
+        doc: The Revit document
+        force: Ignore the interval (still skips unchanged histograms)
+        index: MMIValueIndex to read; built from the model when omitted
+
+    Returns:
+        dict or None: The written snapshot, None if nothing was written
+    """
+    if doc is None or doc.IsFamilyDocument:
+        return None
+    path = get_snapshot_file(doc)
+    last = _get_last(path, doc)
+    now = time.time()
+    if not force and now - last['time'] < SNAPSHOT_INTERVAL_SECONDS:
+        return None
+
+    snapshot = build_snapshot(doc, index=index)
+    signature = _signature(snapshot)
+    # Checked either way; an unchanged model waits another interval
+    last['time'] = now
+    if signature == last['signature']:
+        logger.debug("MMI snapshot unchanged, not written")
+        return None
+
+    with open(path, 'a') as f:
+        f.write(json.dumps(snapshot, sort_keys=True) + '\n')
+    last['signature'] = signature
+    logger.debug("MMI snapshot written to {} ({} elements with MMI)".format(
+        path, snapshot['elements_with_mmi']))
+    return snapshot
@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
-"""Sync checker module for MMI parameter validation after document synchronization."""
+"""Sync checker module for MMI parameter validation after document synchronization.
+
+The MMI Monitor's DocumentChanged handler feeds :func:`record_session_changes`
+so the pre-sync tracker only has to check ownership of elements changed in
+this session instead of querying every element in the model.
+"""
 
 import datetime
 from Autodesk.Revit.DB import *
@@ -9,13 +14,17 @@ from pyrevit import script, forms, revit
 from System.Collections.Generic import List
 
 try:
-    from revit.compat import get_element_id_value
+    from revit.compat import get_element_id_value, make_element_id
 except ImportError:
     def get_element_id_value(item):
         if hasattr(item, 'Value'):
             return item.Value
         return item.IntegerValue
 
+    def make_element_id(value):
+        from System import Int64
+        return ElementId(Int64(value))
+
 # Initialize logger
 logger = script.get_logger()
 
@@ -23,9 +32,96 @@ logger = script.get_logger()
 _user_modified_elements = {}
 _sync_in_progress = False
 
+# Integer ids of elements added or modified since the last sync, per document
+_session_changed_ids = {}
+
+def _document_key(doc):
+    try:
+        if doc.PathName:
+            return doc.PathName
+    except Exception:
+        pass
+    try:
+        return doc.Title or 'unknown'
+    except Exception:
+        return 'unknown'
+
+def record_session_changes(doc, added_ids, modified_ids, deleted_ids=None):
+    """Remember elements changed in this session (called from DocumentChanged).
+    
+    Args:
+        doc: The changed document
+        added_ids: Added ElementIds
+        modified_ids: Modified ElementIds
+        deleted_ids: Deleted ElementIds, forgotten again
+    """
+    changed = _session_changed_ids.setdefault(_document_key(doc), set())
+    for element_id in added_ids:
+        changed.add(get_element_id_value(element_id))
+    for element_id in modified_ids:
+        changed.add(get_element_id_value(element_id))
+    if deleted_ids:
+        for element_id in deleted_ids:
+            changed.discard(get_element_id_value(element_id))
+
+def get_session_changed_ids(doc):
+    """Return the integer ids of elements changed in this session (may be empty)."""
+    return _session_changed_ids.get(_document_key(doc), set())
+
+def clear_session_changes(doc=None):
+    """Forget the session changes of ``doc`` (or of every document)."""
+    if doc is None:
+        _session_changed_ids.clear()
+        return
+    _session_changed_ids.pop(_document_key(doc), None)
+
+def get_user_owned_changed_elements(doc):
+    """Get elements changed in this session that the current user owns.
+    
+    Checks the checkout status of the session's changed ids only, in one pass,
+    instead of the worksharing tooltip of every element in the model.
+    
+    Args:
+        doc: The active Revit document
+        
+    Returns:
+        list: List of element IDs owned by current user
+    """
+    try:
+        if not doc.IsWorkshared:
+            logger.debug("Document is not workshared, returning empty list")
+            return []
+        
+        changed_ids = list(get_session_changed_ids(doc))
+        user_owned_elements = []
+        for element_int_id in changed_ids:
+            try:
+                element_id = make_element_id(element_int_id)
+                element = doc.GetElement(element_id)
+                if element is None:
+                    continue
+                if not element.Category or element.Category.CategoryType != CategoryType.Model:
+                    continue
+                status = WorksharingUtils.GetCheckoutStatus(doc, element_id)
+                if status == CheckoutStatus.OwnedByCurrentUser:
+                    user_owned_elements.append(element_id)
+            except Exception as e:
+                logger.debug("Error checking ownership for element {}: {}".format(element_int_id, e))
+        
+        logger.debug("Found {} user-owned elements among {} changed in session".format(
+            len(user_owned_elements), len(changed_ids)))
+        return user_owned_elements
+        
+    except Exception as e:
+        logger.error("Error getting user owned changed elements: {}".format(e))
+        return []
+
 def get_user_owned_elements(doc):
     """Get elements owned by current user using WorksharingUtils.
     
+    Scans the whole model; the pre-sync tracker uses
+    :func:`get_user_owned_changed_elements` instead.
+    
     Args:
         doc: The active Revit document
         
@@ -78,8 +174,8 @@ def track_modified_elements_before_sync(doc):
     try:
         _sync_in_progress = True
         
-        # Get user-owned elements
-        user_owned_ids = get_user_owned_elements(doc)
+        # Get user-owned elements among those changed in this session
+        user_owned_ids = get_user_owned_changed_elements(doc)
         
         # Store current state of user-owned elements
         _user_modified_elements = {}
@@ -130,6 +226,9 @@ def validate_post_sync_mmi(doc):
     try:
         if not _sync_in_progress or not _user_modified_elements:
             logger.debug("No sync in progress or no tracked elements")
+            if _sync_in_progress:
+                _sync_in_progress = False
+                clear_session_changes(doc)
             return {"elements_missing_mmi": [], "elements_invalid_mmi": [], "total_checked": 0}
             
         # Reset sync flag
@@ -146,7 +245,7 @@ def validate_post_sync_mmi(doc):
         
         for element_int_id, pre_sync_data in _user_modified_elements.items():
             try:
-                element_id = ElementId(element_int_id)
+                element_id = make_element_id(element_int_id)
                 element = doc.GetElement(element_id)
                 
                 if not element:
@@ -199,8 +298,9 @@ def validate_post_sync_mmi(doc):
             "total_checked": len(_user_modified_elements)
         }
         
-        # Clear tracked elements
+        # Clear tracked elements; the synced changes are no longer pending
         _user_modified_elements = {}
+        clear_session_changes(doc)
         
         logger.debug("Post-sync validation complete: {} missing, {} invalid out of {} checked".format(
             len(elements_missing_mmi), len(elements_invalid_mmi), results["total_checked"]))
@@ -1,14 +1,15 @@
 # -*- coding: utf-8 -*-
 """Utility functions for MMI parameter operations."""
 
-import re
 from Autodesk.Revit.DB import FilteredElementCollector, ParameterElement, BuiltInParameter
 from Autodesk.Revit.DB import ElementId, StorageType, LocationPoint, LocationCurve
 
 from pyrevit import revit, script
 
+from mmi.parsing import parse_mmi_value, get_mmi_correction
+
 try:
-    from revit.compat import get_element_id_value, is_param_text
+    from revit.compat import get_element_id_value, is_param_text, make_element_id
 except ImportError:
     from Autodesk.Revit.DB import StorageType as _StorageType
 
@@ -17,6 +18,11 @@ except ImportError:
             return item.Value
         return item.IntegerValue
 
+    def make_element_id(value):
+        if isinstance(value, ElementId):
+            return value
+        return ElementId(value)
+
     def is_param_text(definition):
         try:
             return definition.StorageType == _StorageType.String
@@ -71,33 +77,7 @@ def validate_mmi_value(value_str):
     Returns:
         tuple: (original, fixed_value) if correction needed, (None, None) if valid
     """
-    if not value_str:
-        return None, None
-        
-    # Extract digits from string
-    digits = re.findall(r'\d+', value_str)
-    if not digits:
-        return None, None
-        
-    # Extract the numeric value
-    extracted_value = int(digits[0])
-    
-    # Get the original raw value for comparison
-    original = value_str.strip()
-    
-    # Apply validation rules
-    # Rule: Should be a 3-digit number between 100-999
-    if extracted_value < 100:
-        # If less than 3 digits, e.g. "40" -> "400"
-        fixed_value = str(extracted_value) + "0" * (3 - len(str(extracted_value)))
-        return original, fixed_value
-    elif extracted_value > 999:
-        # If more than 3 digits, e.g. "2500" -> "250", "1000" -> "100"
-        fixed_value = str(extracted_value)[:3]
-        return original, fixed_value
-    else:
-        # Value is already valid, no correction needed
-        return None, None
+    return get_mmi_correction(value_str)
 
 
 def is_mmi_value_blank_for_default(mmi_value, value_str):
@@ -119,6 +99,8 @@ def is_mmi_value_blank_for_default(mmi_value, value_str):
 def get_elements_by_mmi_value(doc, mmi_value, param_name=None, comparison="equal"):
     """Get elements with a specific MMI value.
     
+    Answered from the per-document MMI index (see mmi.value_index).
+    
     Args:
         doc: The active Revit document
         mmi_value: The MMI value to search for
@@ -128,75 +110,32 @@ def get_elements_by_mmi_value(doc, mmi_value, param_name=None, comparison="equal
     Returns:
         list: List of matching elements
     """
+    result_elements = []
+    for element_id in get_element_ids_by_mmi_value(doc, mmi_value, param_name, comparison):
+        element = doc.GetElement(make_element_id(element_id))
+        if element is not None:
+            result_elements.append(element)
+    return result_elements
+
+def get_element_ids_by_mmi_value(doc, mmi_value, param_name=None, comparison="equal"):
+    """Get integer ids of elements with a specific MMI value (no element lookups).
+    
+    Args:
+        doc: The active Revit document
+        mmi_value: The MMI value to search for
+        param_name: Optional parameter name, will use 'MMI' if None
+        comparison: Type of comparison ('equal', 'greater', 'less', 'greater_equal', 'less_equal')
+        
+    Returns:
+        list: Sorted list of element id ints
+    """
     if not param_name:
         from mmi.core import get_mmi_parameter_name
         param_name = get_mmi_parameter_name(doc)
     
-    result_elements = []
-    
-    # Convert input to int for comparison
-    try:
-        target_value = int(mmi_value)
-    except (ValueError, TypeError):
-        # If conversion fails, use string comparison
-        target_value = str(mmi_value)
-    
-    # Get all elements in the model
-    all_elements = FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements()
-    
-    for element in all_elements:
-        try:
-            param = element.LookupParameter(param_name)
-            
-            # If parameter not found on element, try element type
-            if not param:
-                type_id = element.GetTypeId()
-                if type_id and type_id != ElementId.InvalidElementId:
-                    element_type = doc.GetElement(type_id)
-                    if element_type:
-                        param = element_type.LookupParameter(param_name)
-            
-            # Check if parameter exists and has a value
-            if param and param.HasValue and param.StorageType == StorageType.String:
-                value_str = param.AsString()
-                
-                # Try to extract numeric value from string
-                match_found = False
-                
-                if isinstance(target_value, int):
-                    # Numeric comparison
-                    try:
-                        numbers = re.findall(r'\d+', value_str)
-                        if numbers:
-                            param_value = int(numbers[0])
-                            
-                            # Compare based on specified comparison type
-                            if comparison == "equal" and param_value == target_value:
-                                match_found = True
-                            elif comparison == "greater" and param_value > target_value:
-                                match_found = True
-                            elif comparison == "less" and param_value < target_value:
-                                match_found = True
-                            elif comparison == "greater_equal" and param_value >= target_value:
-                                match_found = True
-                            elif comparison == "less_equal" and param_value <= target_value:
-                                match_found = True
-                    except (ValueError, TypeError):
-                        # Fall back to string comparison if numeric conversion fails
-                        if value_str == str(target_value):
-                            match_found = True
-                else:
-                    # String comparison
-                    if value_str == target_value:
-                        match_found = True
-                
-                if match_found:
-                    result_elements.append(element)
-                    
-        except Exception as e:
-            logger.debug("Error checking element MMI value: {}".format(str(e)))
-    
-    return result_elements
+    from mmi import value_index
+    index = value_index.get_index(doc, param_name)
+    return sorted(index.ids_matching(mmi_value, comparison))
 
 def get_mmi_statistics(doc, param_name=None):
     """Get statistics on MMI values in the model.
@@ -212,66 +151,42 @@ def get_mmi_statistics(doc, param_name=None):
         from mmi.core import get_mmi_parameter_name
         param_name = get_mmi_parameter_name(doc)
     
-    # Initialize statistics
-    stats = {
-        "total_elements": 0,
-        "elements_with_mmi": 0,
-        "mmi_values": {},
-        "invalid_values": [],
-    }
+    from mmi import value_index
+    return value_index.get_index(doc, param_name).statistics()
+
+
+def select_elements_by_mmi(doc, uidoc, mmi_value, param_name=None):
+    """Select all elements with a specific MMI value.
+    
+    Args:
+        doc: The active Revit document
+        uidoc: The active UI document
+        mmi_value: The MMI value to select elements for
+        param_name: Optional parameter name, will use 'MMI' if None
+        
+    Returns:
+        int: Number of elements selected
+    """
+    from System.Collections.Generic import List
+    
+    # Get ids with the specified MMI value straight from the index
+    id_values = get_element_ids_by_mmi_value(doc, mmi_value, param_name, comparison="equal")
     
-    # Get all elements in the model
-    all_elements = FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements()
-    stats["total_elements"] = len(all_elements)
+    if not id_values:
+        logger.debug("No elements found with MMI value: {}".format(mmi_value))
+        return 0
     
-    for element in all_elements:
-        try:
-            param = element.LookupParameter(param_name)
-            
-            # If parameter not found on element, try element type
-            if not param:
-                type_id = element.GetTypeId()
-                if type_id and type_id != ElementId.InvalidElementId:
-                    element_type = doc.GetElement(type_id)
-                    if element_type:
-                        param = element_type.LookupParameter(param_name)
-            
-            # Check if parameter exists and has a value
-            if param and param.HasValue and param.StorageType == StorageType.String:
-                value_str = param.AsString()
-                stats["elements_with_mmi"] += 1
-                
-                # Try to extract numeric value from string
-                try:
-                    numbers = re.findall(r'\d+', value_str)
-                    if numbers:
-                        mmi_value = int(numbers[0])
-                        
-                        # Add to statistics
-                        if mmi_value in stats["mmi_values"]:
-                            stats["mmi_values"][mmi_value] += 1
-                        else:
-                            stats["mmi_values"][mmi_value] = 1
-                    else:
-                        # No numeric value found
-                        stats["invalid_values"].append({
-                            "element_id": get_element_id_value(element.Id),
-                            "value": value_str,
-                            "reason": "No numeric value found"
-                        })
-                except Exception as ex:
-                    # Error extracting numeric value
-                    stats["invalid_values"].append({
-                        "element_id": get_element_id_value(element.Id),
-                        "value": value_str,
-                        "reason": str(ex)
-                    })
-                    
-        except Exception as e:
-            logger.debug("Error checking element MMI value: {}".format(str(e)))
+    # Convert to ElementId list
+    element_ids = List[ElementId]([make_element_id(id_value) for id_value in id_values])
     
-    return stats
-
+    # Set selection
+    try:
+        uidoc.Selection.SetElementIds(element_ids)
+        logger.debug("Selected {} elements with MMI value: {}".format(len(id_values), mmi_value))
+        return len(id_values)
+    except Exception as ex:
+        logger.error("Error selecting elements: {}".format(ex))
+        return 0
 
 def get_element_location(element):
     """Get the location point of an element.
@@ -335,14 +250,10 @@ def get_element_mmi_value(element, mmi_param_name, doc):
             
             # Try to extract numeric value from string
             if value_str:
-                try:
-                    # Extract numbers from string (e.g., "MMI-425" -> 425)
-                    numbers = re.findall(r'\d+', value_str)
-                    if numbers:
-                        return int(numbers[0]), value_str, param
-                except Exception as ex:
-                    logger.warning("Couldn't parse MMI value from '{}': {}".format(
-                        value_str, ex))
+                # Extract numbers from string (e.g., "MMI-425" -> 425)
+                mmi_value = parse_mmi_value(value_str)
+                if mmi_value is not None:
+                    return mmi_value, value_str, param
             
             # Parameter exists but has no valid numeric value
             return None, value_str, param
@@ -351,37 +262,3 @@ def get_element_mmi_value(element, mmi_param_name, doc):
     except Exception as ex:
         logger.debug("Error getting MMI value: {}".format(ex))
         return None, None, None
-
-def select_elements_by_mmi(doc, uidoc, mmi_value, param_name=None):
-    """Select all elements with a specific MMI value.
-    
-    Args:
-        doc: The active Revit document
-        uidoc: The active UI document
-        mmi_value: The MMI value to select elements for
-        param_name: Optional parameter name, will use 'MMI' if None
-        
-    Returns:
-        int: Number of elements selected
-    """
-    from System.Collections.Generic import List
-    from Autodesk.Revit.DB import ElementId
-    
-    # Get elements with the specified MMI value
-    elements = get_elements_by_mmi_value(doc, mmi_value, param_name, comparison="equal")
-    
-    if not elements:
-        logger.debug("No elements found with MMI value: {}".format(mmi_value))
-        return 0
-    
-    # Convert to ElementId list
-    element_ids = List[ElementId]([elem.Id for elem in elements])
-    
-    # Set selection
-    try:
-        uidoc.Selection.SetElementIds(element_ids)
-        logger.debug("Selected {} elements with MMI value: {}".format(len(elements), mmi_value))
-        return len(elements)
-    except Exception as ex:
-        logger.error("Error selecting elements: {}".format(ex))
-        return 0 
\ No newline at end of file
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""Per-document in-memory index of MMI values.
+
+Selection and statistics used to walk every element, look up the MMI
+parameter (with a type fallback) and regex-parse it on every call. The index
+does that walk once per document and keeps, per element id, the raw string
+and the parsed MMI int, plus value -> id-set buckets and a sorted list of
+distinct values for range queries. Counts per (category, workset, level,
+value) are kept alongside so MMI histograms (see mmi.snapshots) never rescan the model.
+
+While the MMI Monitor is on, its DocumentChanged handler feeds
+:func:`apply_changes` and the index stays live between queries. Without a
+maintainer nothing keeps it current, so each query rebuilds it.
+
+State lives on ``sys`` so the monitor's persistent engine and the selection
+buttons share one index, same as the storage registry.
+"""
+
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from Autodesk.Revit.DB import (
+    FilteredElementCollector,
+    ElementId,
+    ElementType,
+    StorageType,
+)
+from pyrevit import script
+
+from mmi.parsing import parse_mmi_value
+
+try:
+    from revit.compat import get_element_id_value
+except ImportError:
+    def get_element_id_value(item):
+        if hasattr(item, 'Value'):
+            return item.Value
+        return item.IntegerValue
+
+logger = script.get_logger()
+
+_INDEX_SYS_KEY = '_pyBS_mmi_value_index'
+_MAINTAINED_SYS_KEY = '_pyBS_mmi_value_index_maintained'
+
+def _get_indexes():
+    if not hasattr(sys, _INDEX_SYS_KEY):
+        setattr(sys, _INDEX_SYS_KEY, {})
+    return getattr(sys, _INDEX_SYS_KEY)
+
+
+def _document_key(doc):
+    try:
+        path = doc.PathName
+        if path:
+            return path
+    except Exception:
+        pass
+    try:
+        return doc.Title or 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+def _get_placement(element):
+    """Return (category id, workset id, level id) of ``element``; each an int or None."""
+    category_id = None
+    workset_id = None
+    level_id = None
+    try:
+        category = element.Category
+        if category is not None:
+            category_id = get_element_id_value(category.Id)
+    except Exception:
+        pass
+    try:
+        workset_id = element.WorksetId.IntegerValue
+    except Exception:
+        pass
+    try:
+        element_level_id = element.LevelId
+        if element_level_id is not None and element_level_id != ElementId.InvalidElementId:
+            level_id = get_element_id_value(element_level_id)
+    except Exception:
+        pass
+    return (category_id, workset_id, level_id)
+
+
+class MMIValueIndex(object):
+    """MMI values of one document for one parameter name."""
+
+    def __init__(self, doc, param_name):
+        self.doc = doc
+        self.param_name = param_name
+        self.all_ids = set()
+        self.strings = {}
+        self.values = {}
+        self.buckets = {}
+        self.sorted_values = []
+        self.placements = {}
+        self.histogram_counts = {}
+        self.build_time = 0.0
+
+    # --- maintenance ---
+
+    def _read_string(self, element, type_strings=None):
+        """Return the MMI string of ``element`` (or its type), None if unset."""
+        param = element.LookupParameter(self.param_name)
+        if not param:
+            type_id = element.GetTypeId()
+            if not type_id or type_id == ElementId.InvalidElementId:
+                return None
+            type_key = get_element_id_value(type_id)
+            if type_strings is not None and type_key in type_strings:
+                return type_strings[type_key]
+            value_str = None
+            element_type = self.doc.GetElement(type_id)
+            if element_type:
+                type_param = element_type.LookupParameter(self.param_name)
+                if type_param and type_param.HasValue and type_param.StorageType == StorageType.String:
+                    value_str = type_param.AsString()
+            if type_strings is not None:
+                type_strings[type_key] = value_str
+            return value_str
+        if param.HasValue and param.StorageType == StorageType.String:
+            return param.AsString()
+        return None
+
+    def _add_value(self, element_id, value, placement):
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            bucket = self.buckets[value] = set()
+            insort(self.sorted_values, value)
+        bucket.add(element_id)
+        self.placements[element_id] = placement
+        key = placement + (value,)
+        self.histogram_counts[key] = self.histogram_counts.get(key, 0) + 1
+
+    def _remove(self, element_id):
+        self.all_ids.discard(element_id)
+        self.strings.pop(element_id, None)
+        value = self.values.pop(element_id, None)
+        if value is None:
+            return
+        placement = self.placements.pop(element_id, None)
+        if placement is not None:
+            key = placement + (value,)
+            count = self.histogram_counts.get(key, 0) - 1
+            if count > 0:
+                self.histogram_counts[key] = count
+            else:
+                self.histogram_counts.pop(key, None)
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            return
+        bucket.discard(element_id)
+        if not bucket:
+            del self.buckets[value]
+            position = bisect_left(self.sorted_values, value)
+            if position < len(self.sorted_values) and self.sorted_values[position] == value:
+                del self.sorted_values[position]
+
+    def _store(self, element, type_strings=None):
+        element_id = get_element_id_value(element.Id)
+        self._remove(element_id)
+        self.all_ids.add(element_id)
+        try:
+            value_str = self._read_string(element, type_strings)
+        except Exception as e:
+            logger.debug("Error reading MMI value of {}: {}".format(element_id, e))
+            return
+        if value_str is None:
+            return
+        self.strings[element_id] = value_str
+        value = parse_mmi_value(value_str)
+        if value is not None:
+            self.values[element_id] = value
+            self._add_value(element_id, value, _get_placement(element))
+
+    def build(self):
+        start_time = time.time()
+        type_strings = {}
+        for element in FilteredElementCollector(self.doc).WhereElementIsNotElementType():
+            self._store(element, type_strings)
+        self.build_time = time.time() - start_time
+        logger.debug("[PERF] MMI index built: {} elements, {} with MMI, {} values in {:.2f}s".format(
+            len(self.all_ids), len(self.strings), len(self.buckets), self.build_time))
+
+    def apply_changes(self, added_ids, modified_ids, deleted_ids):
+        """Update entries for changed ids.
+
+        Returns:
+            bool: False if the change cannot be applied incrementally (a type
+            was modified, so instances inheriting its value may have changed)
+        """
+        for element_id in deleted_ids:
+            self._remove(get_element_id_value(element_id))
+        for element_id in list(added_ids) + list(modified_ids):
+            element = self.doc.GetElement(element_id)
+            if element is None:
+                self._remove(get_element_id_value(element_id))
+                continue
+            if isinstance(element, ElementType):
+                return False
+            self._store(element)
+        return True
+
+    # --- queries ---
+
+    def ids_matching(self, mmi_value, comparison="equal"):
+        """Return the set of element ids matching ``mmi_value`` under ``comparison``.
+
+        Non-numeric ``mmi_value`` compares against the raw parameter string.
+        """
+        try:
+            target = int(mmi_value)
+        except (ValueError, TypeError):
+            target = str(mmi_value)
+            return set(eid for eid, value_str in self.strings.items() if value_str == target)
+
+        if comparison == "equal":
+            return set(self.buckets.get(target, ()))
+
+        if comparison == "greater":
+            start, stop = bisect_right(self.sorted_values, target), len(self.sorted_values)
+        elif comparison == "greater_equal":
+            start, stop = bisect_left(self.sorted_values, target), len(self.sorted_values)
+        elif comparison == "less":
+            start, stop = 0, bisect_left(self.sorted_values, target)
+        elif comparison == "less_equal":
+            start, stop = 0, bisect_right(self.sorted_values, target)
+        else:
+            return set()
+
+        result = set()
+        for value in self.sorted_values[start:stop]:
+            result.update(self.buckets[value])
+        return result
+
+    def histogram(self):
+        """Return MMI value counts overall and per category, workset and level id.
+
+        Returns:
+            dict: {'mmi_values': {value: n}, 'categories': {category id: {value: n}},
+                   'worksets': {workset id: {value: n}}, 'levels': {level id: {value: n}}}
+        """
+        mmi_values = {}
+        categories = {}
+        worksets = {}
+        levels = {}
+        for (category_id, workset_id, level_id, value), count in self.histogram_counts.items():
+            mmi_values[value] = mmi_values.get(value, 0) + count
+            for groups, group_id in ((categories, category_id), (worksets, workset_id), (levels, level_id)):
+                per_group = groups.setdefault(group_id, {})
+                per_group[value] = per_group.get(value, 0) + count
+        return {'mmi_values': mmi_values, 'categories': categories, 'worksets': worksets,
+                'levels': levels}
+
+    def statistics(self):
+        """Return statistics in the format of mmi.utils.get_mmi_statistics."""
+        invalid_values = []
+        for element_id, value_str in self.strings.items():
+            if element_id not in self.values:
+                invalid_values.append({
+                    "element_id": element_id,
+                    "value": value_str,
+                    "reason": "No numeric value found"
+                })
+        return {
+            "total_elements": len(self.all_ids),
+            "elements_with_mmi": len(self.strings),
+            "mmi_values": dict((value, len(ids)) for value, ids in self.buckets.items()),
+            "invalid_values": invalid_values,
+        }
+
+
+def is_maintained():
+    """True while a DocumentChanged handler keeps the index current."""
+    return bool(getattr(sys, _MAINTAINED_SYS_KEY, False))
+
+
+def set_maintained(maintained):
+    """Mark whether a DocumentChanged handler (the MMI Monitor) keeps the index current.
+
+    Switching maintenance off drops all indexes since they can no longer be trusted.
+    """
+    setattr(sys, _MAINTAINED_SYS_KEY, bool(maintained))
+    if not maintained:
+        invalidate()
+
+
+def invalidate(doc=None):
+    """Drop the index of ``doc`` (or of every document)."""
+    indexes = _get_indexes()
+    if doc is None:
+        indexes.clear()
+        return
+    indexes.pop(_document_key(doc), None)
+
+
+def get_current_index(doc, param_name):
+    """Return the maintained MMI index of ``doc`` for ``param_name``, None if there is none.
+
+    Never scans the model, so it is safe on paths that must stay cheap.
+    """
+    index = _get_indexes().get(_document_key(doc))
+    if index is None:
+        return None
+    try:
+        if (not is_maintained()
+                or index.param_name != param_name
+                or not index.doc.IsValidObject):
+            return None
+    except Exception:
+        return None
+    return index
+
+
+def get_index(doc, param_name):
+    """Return the MMI index of ``doc`` for ``param_name``, building it if needed."""
+    index = get_current_index(doc, param_name)
+    if index is None:
+        index = MMIValueIndex(doc, param_name)
+        index.build()
+        _get_indexes()[_document_key(doc)] = index
+    return index
+
+
+def apply_changes(doc, added_ids, modified_ids, deleted_ids):
+    """Feed a DocumentChanged delta into the index of ``doc`` (if one exists)."""
+    indexes = _get_indexes()
+    key = _document_key(doc)
+    index = indexes.get(key)
+    if index is None:
+        return
+    try:
+        if not index.apply_changes(added_ids, modified_ids, deleted_ids):
+            logger.debug("MMI index dropped: element type modified")
+            indexes.pop(key, None)
+    except Exception as e:
+        logger.debug("MMI index update failed, dropping index: {}".format(e))
+        indexes.pop(key, None)
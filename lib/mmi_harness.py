@@ -0,0 +1,702 @@
+# -*- coding: utf-8 -*-
+"""Headless harness for the MMI engine.
+
+Drives the MMI code that normally only runs inside Revit -
+``mmi.utils.get_element_mmi_value``, the validation/correction flow, the
+MMI value index and the Monitor's DocumentChanged handling
+(``mmi.monitor_actions``) - against a stand-in element/parameter model, so
+the monitor's hot path can be measured on plain CPython (Linux CI).
+
+:func:`install_stubs` registers minimal stand-ins for the Revit API,
+``System`` and pyRevit modules. The ``mmi`` and ``revit`` packages are
+registered without running their ``__init__`` (which loads extensible
+storage), so only the engine modules themselves are imported.
+
+Usage, from the extension's ``lib`` folder::
+
+    python mmi_harness.py --elements 100000 --bursts 200
+    python mmi_harness.py --max-event-p95-ms 1.0 --max-batch-p95-ms 250
+
+Before the benchmark, :func:`check_monitor_outcomes` runs one hand-built
+change event through the Monitor's own handler body
+(``monitor_actions.record_document_changes``) and analysis, and checks the
+corrections, defaults, pins and move warnings that come out. During the
+benchmark every applied batch is checked as well: corrected values must
+validate, and only unpinned elements at or above the threshold are pinned.
+
+The exit code is 1 when a check fails or a latency budget given on the
+command line is exceeded.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+import types
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MMI_PARAM_NAME = "MMI"
+
+# Monitor settings used by the benchmark: every feature on
+DEFAULT_MONITOR_SETTINGS = {
+    "validate_mmi": True,
+    "pin_elements": True,
+    "warn_on_move": True,
+    "check_mmi_after_sync": True,
+    "default_on_new_instances": True,
+}
+
+# Raw MMI strings of the synthetic model with their relative weights;
+# includes values needing correction ("40", "2500") and blanks
+MMI_STRING_WEIGHTS = (
+    ("100", 4), ("200", 10), ("300", 14), ("350", 8), ("400", 12), ("425", 6),
+    ("450", 4), ("500", 2), ("MMI-300", 3), ("MMI 425", 2), (" 200 ", 2),
+    ("40", 1), ("2500", 1), ("", 5),
+)
+
+
+# --- stand-in Revit API ---
+
+class _StubModule(types.ModuleType):
+    """Module returning a placeholder class for any name it does not define."""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        placeholder = type(str(name), (object,), {})
+        setattr(self, name, placeholder)
+        return placeholder
+
+
+class ElementId(object):
+    __slots__ = ('Value',)
+
+    def __init__(self, value):
+        self.Value = int(value)
+
+    @property
+    def IntegerValue(self):
+        return self.Value
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.Value == self.Value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.Value)
+
+    def __repr__(self):
+        return "ElementId({})".format(self.Value)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class StorageType(object):
+    String = "String"
+    Integer = "Integer"
+    Double = "Double"
+    ElementId = "ElementId"
+
+
+class CategoryType(object):
+    Model = "Model"
+    Annotation = "Annotation"
+
+
+class XYZ(object):
+    __slots__ = ('X', 'Y', 'Z')
+
+    def __init__(self, x, y, z):
+        self.X = x
+        self.Y = y
+        self.Z = z
+
+
+class LocationPoint(object):
+    def __init__(self, point):
+        self.Point = point
+
+
+class LocationCurve(object):
+    pass
+
+
+class ElementType(object):
+    pass
+
+
+class FilteredElementCollector(object):
+    """Collector over a :class:`StubDocument`; only instance iteration is supported."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._instances_only = False
+
+    def WhereElementIsNotElementType(self):
+        self._instances_only = True
+        return self
+
+    def __iter__(self):
+        for element in list(self.doc.elements.values()):
+            if self._instances_only and isinstance(element, ElementType):
+                continue
+            yield element
+
+
+class _UserConfig(object):
+    pass
+
+
+class _StubHostApp(object):
+    version = "2024"
+
+
+def _register_package(name):
+    package = types.ModuleType(name)
+    package.__path__ = [os.path.join(LIB_DIR, name)]
+    sys.modules[name] = package
+
+
+def install_stubs():
+    """Register the stand-in Revit, System and pyRevit modules.
+
+    Raises:
+        RuntimeError: If the real Revit API is already loaded
+    """
+    if 'Autodesk.Revit.DB' in sys.modules and not isinstance(sys.modules['Autodesk.Revit.DB'], _StubModule):
+        raise RuntimeError("The MMI harness runs outside Revit only")
+    if isinstance(sys.modules.get('Autodesk.Revit.DB'), _StubModule):
+        return
+
+    db = _StubModule('Autodesk.Revit.DB')
+    for cls in (ElementId, StorageType, CategoryType, XYZ, LocationPoint, LocationCurve,
+                ElementType, FilteredElementCollector):
+        setattr(db, cls.__name__, cls)
+    autodesk = _StubModule('Autodesk')
+    autodesk_revit = _StubModule('Autodesk.Revit')
+    autodesk.Revit = autodesk_revit
+    autodesk_revit.DB = db
+    autodesk_revit.UI = _StubModule('Autodesk.Revit.UI')
+
+    system = _StubModule('System')
+    system.Int64 = int
+    system_collections = _StubModule('System.Collections')
+    system_generic = _StubModule('System.Collections.Generic')
+    system.Collections = system_collections
+    system_collections.Generic = system_generic
+
+    pyrevit = _StubModule('pyrevit')
+    pyrevit_script = _StubModule('pyrevit.script')
+    pyrevit_script.get_logger = lambda: logging.getLogger('mmi_harness')
+    pyrevit_userconfig = _StubModule('pyrevit.userconfig')
+    pyrevit_userconfig.user_config = _UserConfig()
+    pyrevit.script = pyrevit_script
+    pyrevit.userconfig = pyrevit_userconfig
+    pyrevit.revit = _StubModule('pyrevit.revit')
+    pyrevit.forms = _StubModule('pyrevit.forms')
+    pyrevit.DB = db
+    pyrevit.HOST_APP = _StubHostApp()
+
+    for module in (autodesk, autodesk_revit, db, autodesk_revit.UI, system, system_collections,
+                   system_generic, pyrevit, pyrevit_script, pyrevit_userconfig,
+                   pyrevit.revit, pyrevit.forms):
+        sys.modules[module.__name__] = module
+
+    if LIB_DIR not in sys.path:
+        sys.path.insert(0, LIB_DIR)
+    for name in ('mmi', 'revit'):
+        if name not in sys.modules:
+            _register_package(name)
+
+
+# --- stand-in element/parameter model ---
+
+class StubParameter(object):
+    __slots__ = ('value', 'StorageType', 'IsReadOnly')
+
+    def __init__(self, value, storage_type=StorageType.String):
+        self.value = value
+        self.StorageType = storage_type
+        self.IsReadOnly = False
+
+    @property
+    def HasValue(self):
+        return self.value is not None
+
+    def AsString(self):
+        return self.value
+
+    def Set(self, value):
+        self.value = value
+        return True
+
+
+class StubCategory(object):
+    def __init__(self, id_value, name, category_type=CategoryType.Model):
+        self.Id = ElementId(id_value)
+        self.Name = name
+        self.CategoryType = category_type
+
+
+class StubElement(object):
+    def __init__(self, id_value, category, parameters=None, type_id=None, location=None, workset=0):
+        self.Id = ElementId(id_value)
+        self.Category = category
+        self.parameters = parameters or {}
+        self.type_id = type_id or ElementId.InvalidElementId
+        self.Location = location
+        self.WorksetId = ElementId(workset)
+        self.Pinned = False
+
+    def LookupParameter(self, name):
+        return self.parameters.get(name)
+
+    def GetTypeId(self):
+        return self.type_id
+
+
+class StubElementType(ElementType, StubElement):
+    pass
+
+
+class StubDocument(object):
+    def __init__(self, title="Harness"):
+        self.Title = title
+        self.PathName = "/harness/{}.rvt".format(title)
+        self.IsValidObject = True
+        self.IsWorkshared = False
+        self.IsFamilyDocument = False
+        self.elements = {}
+        self._next_id = 1000
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def add(self, element):
+        self.elements[element.Id.Value] = element
+        return element
+
+    def remove(self, element_id):
+        self.elements.pop(element_id.Value, None)
+
+    def GetElement(self, element_id):
+        return self.elements.get(element_id.Value)
+
+
+_MODEL_CATEGORIES = (
+    StubCategory(-2000011, "Walls"),
+    StubCategory(-2000032, "Floors"),
+    StubCategory(-2001320, "Structural Framing"),
+    StubCategory(-2000023, "Doors"),
+    StubCategory(-2008044, "Pipes"),
+)
+_ANNOTATION_CATEGORY = StubCategory(-2000300, "Text Notes", CategoryType.Annotation)
+
+
+def _weighted_choices(weights):
+    choices = []
+    for value, weight in weights:
+        choices.extend([value] * weight)
+    return choices
+
+
+def build_model(element_count, param_name=MMI_PARAM_NAME, seed=1):
+    """Build a :class:`StubDocument` with ``element_count`` instances.
+
+    Most instances carry the MMI parameter; about one in ten inherits it from
+    its type and a few are annotation elements without it.
+    """
+    rng = random.Random(seed)
+    mmi_strings = _weighted_choices(MMI_STRING_WEIGHTS)
+    doc = StubDocument()
+
+    type_ids = []
+    for _ in range(50):
+        category = rng.choice(_MODEL_CATEGORIES)
+        element_type = StubElementType(doc.new_id(), category,
+                                       {param_name: StubParameter(rng.choice(mmi_strings))})
+        doc.add(element_type)
+        type_ids.append(element_type.Id)
+
+    for i in range(element_count):
+        if i % 50 == 49:
+            doc.add(StubElement(doc.new_id(), _ANNOTATION_CATEGORY))
+            continue
+        category = rng.choice(_MODEL_CATEGORIES)
+        parameters = {}
+        if i % 10:
+            parameters[param_name] = StubParameter(rng.choice(mmi_strings))
+        location = LocationPoint(XYZ(rng.uniform(0, 500), rng.uniform(0, 500), 0.0))
+        doc.add(StubElement(doc.new_id(), category, parameters, rng.choice(type_ids),
+                            location, workset=rng.randint(0, 4)))
+    return doc
+
+
+def generate_bursts(doc, bursts, seed=2, param_name=MMI_PARAM_NAME):
+    """Yield bursts of edits to ``doc``, each a list of (added, modified, deleted) events.
+
+    Most bursts are a handful of single-element edits; every tenth is an
+    array/paste-like burst of one large event. Edits change MMI strings,
+    move elements, add blank new instances and delete elements. The model
+    is changed as each burst is generated.
+    """
+    rng = random.Random(seed)
+    mmi_strings = _weighted_choices(MMI_STRING_WEIGHTS)
+    instance_ids = [element.Id for element in doc.elements.values()
+                    if not isinstance(element, ElementType)]
+
+    for burst_number in range(bursts):
+        events = []
+        if burst_number % 10 == 9:
+            event_sizes = [rng.randint(200, 1000)]
+        else:
+            event_sizes = [rng.randint(1, 5) for _ in range(rng.randint(1, 8))]
+
+        for size in event_sizes:
+            added, modified, deleted = [], [], []
+            for _ in range(size):
+                roll = rng.random()
+                if roll < 0.1:
+                    category = rng.choice(_MODEL_CATEGORIES)
+                    element = doc.add(StubElement(
+                        doc.new_id(), category, {param_name: StubParameter("")},
+                        location=LocationPoint(XYZ(rng.uniform(0, 500), rng.uniform(0, 500), 0.0))))
+                    instance_ids.append(element.Id)
+                    added.append(element.Id)
+                    continue
+                if not instance_ids:
+                    continue
+                position = rng.randrange(len(instance_ids))
+                element_id = instance_ids[position]
+                if roll < 0.13:
+                    instance_ids[position] = instance_ids[-1]
+                    instance_ids.pop()
+                    doc.remove(element_id)
+                    deleted.append(element_id)
+                    continue
+                element = doc.GetElement(element_id)
+                param = element.LookupParameter(param_name)
+                if roll < 0.6 and param is not None:
+                    param.Set(rng.choice(mmi_strings))
+                elif isinstance(element.Location, LocationPoint):
+                    point = element.Location.Point
+                    element.Location = LocationPoint(XYZ(point.X + rng.uniform(-2, 2), point.Y, point.Z))
+                modified.append(element_id)
+            events.append((added, modified, deleted))
+        yield events
+
+
+# --- measurements ---
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def _latency_summary(seconds):
+    values = sorted(value * 1000.0 for value in seconds)
+    return {
+        'count': len(values),
+        'mean_ms': sum(values) / len(values) if values else 0.0,
+        'p50_ms': _percentile(values, 0.5),
+        'p95_ms': _percentile(values, 0.95),
+        'max_ms': values[-1] if values else 0.0,
+    }
+
+
+def _apply_actions(doc, actions):
+    """Write corrections and pins the way the monitor's transaction does.
+
+    Returns:
+        list: ElementIds changed, fed back as the monitor's own change event
+    """
+    changed = []
+    for element_id, correction in actions["validation_corrections"].items():
+        element = doc.GetElement(element_id)
+        param = element.LookupParameter(correction["param"]) if element else None
+        if param is not None and param.Set(correction["fixed"]):
+            changed.append(element_id)
+    for element_id in actions["elements_to_pin"]:
+        element = doc.GetElement(element_id)
+        if element is not None and not element.Pinned:
+            element.Pinned = True
+            changed.append(element_id)
+    return changed
+
+
+def _pin_candidates(doc, actions):
+    """Return {element id int: (pinned, MMI value)} of a batch's pins before they are applied."""
+    from mmi.utils import get_element_mmi_value
+
+    candidates = {}
+    for element_id in actions["elements_to_pin"]:
+        element = doc.GetElement(element_id)
+        candidates[element_id.Value] = (element.Pinned,
+                                        get_element_mmi_value(element, MMI_PARAM_NAME, doc)[0])
+    return candidates
+
+
+def _check_applied_actions(doc, actions, pin_candidates):
+    """Return problems with a batch's applied corrections and pins.
+
+    Pins are decided on the MMI value the element had when the batch was
+    analysed, before any correction of the same batch.
+    """
+    from mmi.config import MMI_THRESHOLD
+    from mmi.utils import validate_mmi_value
+
+    problems = []
+    for element_id, correction in actions["validation_corrections"].items():
+        param = doc.GetElement(element_id).LookupParameter(correction["param"])
+        if param.AsString() != correction["fixed"] or validate_mmi_value(param.AsString())[0]:
+            problems.append("{} was corrected to '{}'".format(element_id, param.AsString()))
+    for element_id_int, (was_pinned, mmi_value) in pin_candidates.items():
+        if was_pinned or mmi_value is None or mmi_value < MMI_THRESHOLD:
+            problems.append("{} with MMI {} was pinned".format(element_id_int, mmi_value))
+        elif not doc.GetElement(ElementId(element_id_int)).Pinned:
+            problems.append("{} was not pinned".format(element_id_int))
+    return problems
+
+
+def check_monitor_outcomes(monitor_settings=None, default_mmi="200"):
+    """Run one hand-built change event through the Monitor and check the outcome.
+
+    Returns:
+        list: Problems found (empty when every outcome is as expected)
+    """
+    install_stubs()
+    from mmi import monitor_actions
+
+    if monitor_settings is None:
+        monitor_settings = DEFAULT_MONITOR_SETTINGS
+    doc = StubDocument("Outcomes")
+    category = _MODEL_CATEGORIES[0]
+
+    def add(value, pinned=False, x=0.0):
+        element = doc.add(StubElement(doc.new_id(), category, {MMI_PARAM_NAME: StubParameter(value)},
+                                      location=LocationPoint(XYZ(x, 0.0, 0.0))))
+        element.Pinned = pinned
+        return element
+
+    short = add("40")
+    low = add("300")
+    high = add("450")
+    high_pinned = add("450", pinned=True)
+    moved = add("425", x=10.0)
+    nudged = add("425", pinned=True, x=20.0)
+
+    state = monitor_actions.MonitorState()
+    for element in list(doc.elements.values()):
+        state.baseline_ids.add(element.Id.Value)
+        state.location_store.update(element.Id.Value, element.Location.Point)
+    blank_new = add("")
+    valued_new = add("350")
+    moved.Location = LocationPoint(XYZ(15.0, 0.0, 0.0))
+    nudged.Location = LocationPoint(XYZ(20.05, 0.0, 0.0))
+
+    problems = []
+    pending = monitor_actions.PendingChanges()
+    if monitor_actions.record_document_changes(doc, [], [], [ElementId(doc.new_id())], pending):
+        problems.append("a deletion alone was queued for processing")
+    if not monitor_actions.record_document_changes(
+            doc, [blank_new.Id, valued_new.Id],
+            [short.Id, low.Id, high.Id, high_pinned.Id, moved.Id, nudged.Id], [], pending):
+        problems.append("the change event was not queued for processing")
+    batches = pending.take()
+    if len(batches) != 1:
+        return problems + ["{} batches queued for one document".format(len(batches))]
+    actions = monitor_actions.collect_monitor_actions(
+        doc, list(batches[0]["added"].values()), list(batches[0]["modified"].values()), state,
+        MMI_PARAM_NAME, monitor_settings, default_mmi)
+    _apply_actions(doc, actions)
+
+    # "40" is corrected to "400" but not pinned: pins go by the value before correction
+    expected_values = ((short, "400"), (low, "300"), (blank_new, default_mmi), (valued_new, "350"))
+    for element, expected in expected_values:
+        value = element.LookupParameter(MMI_PARAM_NAME).AsString()
+        if value != expected:
+            problems.append("{} has MMI '{}', expected '{}'".format(element.Id, value, expected))
+    pins = set(element_id.Value for element_id in actions["elements_to_pin"])
+    if pins != set([high.Id.Value, moved.Id.Value]):
+        problems.append("pinned {}, expected {}".format(sorted(pins), sorted([high.Id.Value, moved.Id.Value])))
+    for element in (short, low, blank_new, valued_new):
+        if element.Pinned:
+            problems.append("{} below the threshold is pinned".format(element.Id))
+    if not high_pinned.Pinned or not nudged.Pinned:
+        problems.append("an element pinned before was unpinned")
+    moves = set(item["id"].Value for item in actions["moved_high_mmi_elements"])
+    if moves != set([moved.Id.Value]):
+        problems.append("moves {}, expected {}".format(sorted(moves), [moved.Id.Value]))
+    return problems
+
+
+def run_benchmark(element_count=100000, bursts=200, seed=1, monitor_settings=None,
+                  default_mmi="200"):
+    """Benchmark MMI reads, validation and the monitor's change handling.
+
+    Args:
+        element_count: Instances in the synthetic model
+        bursts: Number of edit bursts fed through the DocumentChanged path
+        seed: Seed of the synthetic model and edit stream
+        monitor_settings: Monitor config dict, defaults to every feature on
+        default_mmi: MMI value for new instances
+
+    Returns:
+        dict: Read/validate timings, per-event and per-batch latency summaries,
+        action counts, 'problems' found in the applied batches and the traced
+        peak memory in KB (None without tracemalloc)
+    """
+    install_stubs()
+    from mmi import monitor_actions, value_index
+    from mmi.utils import get_element_mmi_value, validate_mmi_value
+
+    if monitor_settings is None:
+        monitor_settings = DEFAULT_MONITOR_SETTINGS
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    build_start = time.time()
+    doc = build_model(element_count, seed=seed)
+    build_seconds = time.time() - build_start
+
+    # Full read and validation pass, as on activation and in the post-sync check
+    start_time = time.time()
+    needs_correction = 0
+    for element in doc.elements.values():
+        mmi_value, value_str, param = get_element_mmi_value(element, MMI_PARAM_NAME, doc)
+        if mmi_value is not None and validate_mmi_value(value_str)[0]:
+            needs_correction += 1
+    read_seconds = time.time() - start_time
+
+    value_index.set_maintained(True)
+    start_time = time.time()
+    value_index.get_index(doc, MMI_PARAM_NAME)
+    index_seconds = time.time() - start_time
+
+    state = monitor_actions.MonitorState()
+    pending = monitor_actions.PendingChanges()
+    for element in doc.elements.values():
+        state.baseline_ids.add(element.Id.Value)
+        if isinstance(element.Location, LocationPoint):
+            state.location_store.update(element.Id.Value, element.Location.Point)
+
+    event_seconds = []
+    batch_seconds = []
+    totals = {'corrections': 0, 'pins': 0, 'moves': 0}
+    problems = []
+
+    def handle_event(added, modified, deleted):
+        # The Monitor's DocumentChanged handler body
+        start = time.time()
+        monitor_actions.record_document_changes(doc, added, modified, deleted, pending)
+        event_seconds.append(time.time() - start)
+
+    for events in generate_bursts(doc, bursts, seed=seed + 1):
+        for added, modified, deleted in events:
+            handle_event(added, modified, deleted)
+
+        # The burst has settled: the ExternalEvent processes the merged batch
+        for batch in pending.take():
+            start = time.time()
+            actions = monitor_actions.collect_monitor_actions(
+                doc, list(batch["added"].values()), list(batch["modified"].values()), state,
+                MMI_PARAM_NAME, monitor_settings, default_mmi)
+            batch_seconds.append(time.time() - start)
+            if actions is None:
+                continue
+            totals['corrections'] += len(actions["validation_corrections"])
+            totals['pins'] += len(actions["elements_to_pin"])
+            totals['moves'] += len(actions["moved_high_mmi_elements"])
+            pin_candidates = _pin_candidates(doc, actions)
+            corrected = _apply_actions(doc, actions)
+            problems.extend(_check_applied_actions(doc, actions, pin_candidates))
+            if corrected:
+                handle_event([], corrected, [])
+        pending.take()
+
+    peak_memory_kb = None
+    if tracemalloc is not None:
+        peak_memory_kb = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+
+    return {
+        'elements': element_count,
+        'bursts': bursts,
+        'build_seconds': build_seconds,
+        'read_seconds': read_seconds,
+        'read_us_per_element': read_seconds * 1e6 / max(1, len(doc.elements)),
+        'needs_correction': needs_correction,
+        'index_seconds': index_seconds,
+        'event_latency': _latency_summary(event_seconds),
+        'batch_latency': _latency_summary(batch_seconds),
+        'corrections': totals['corrections'],
+        'pins': totals['pins'],
+        'moves': totals['moves'],
+        'problems': problems,
+        'peak_memory_kb': peak_memory_kb,
+    }
+
+
+def format_results(result):
+    """Return the benchmark result as printable lines."""
+    lines = [
+        "Elements: {elements}, bursts: {bursts}".format(**result),
+        "Model build: {:.2f}s".format(result['build_seconds']),
+        "MMI read + validate: {:.2f}s ({:.2f} us/element, {} need correction)".format(
+            result['read_seconds'], result['read_us_per_element'], result['needs_correction']),
+        "Value index build: {:.2f}s".format(result['index_seconds']),
+    ]
+    for title, key in (("Event", 'event_latency'), ("Batch", 'batch_latency')):
+        lines.append("{} latency: n={count} mean={mean_ms:.3f}ms p50={p50_ms:.3f}ms "
+                     "p95={p95_ms:.3f}ms max={max_ms:.3f}ms".format(title, **result[key]))
+    lines.append("Actions: {corrections} corrections, {pins} pins, {moves} moves".format(**result))
+    if result['peak_memory_kb'] is not None:
+        lines.append("Peak traced memory: {} KB".format(result['peak_memory_kb']))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless MMI engine benchmark")
+    parser.add_argument('--elements', type=int, default=100000)
+    parser.add_argument('--bursts', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-event-p95-ms', type=float, default=None,
+                        help="Fail if the p95 DocumentChanged event latency exceeds this")
+    parser.add_argument('--max-batch-p95-ms', type=float, default=None,
+                        help="Fail if the p95 batch analysis latency exceeds this")
+    args = parser.parse_args(argv)
+
+    problems = check_monitor_outcomes()
+    result = run_benchmark(args.elements, args.bursts, args.seed)
+    for line in format_results(result):
+        print(line)
+
+    problems.extend(result['problems'])
+    for problem in problems[:20]:
+        print("PROBLEM: {}".format(problem))
+    failed = bool(problems)
+    if args.max_event_p95_ms is not None and result['event_latency']['p95_ms'] > args.max_event_p95_ms:
+        print("FAIL: event p95 above {} ms".format(args.max_event_p95_ms))
+        failed = True
+    if args.max_batch_p95_ms is not None and result['batch_latency']['p95_ms'] > args.max_batch_p95_ms:
+        print("FAIL: batch p95 above {} ms".format(args.max_batch_p95_ms))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
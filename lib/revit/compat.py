@@ -28,6 +28,10 @@ Covered deprecations:
 * ``ParameterFilterRuleFactory.CreateEqualsRule`` signature changed in Revit
   2024 (dropped ``caseSensitive`` argument). Use :func:`create_equals_rule`.
 
+* ``FamilyManager.AddParameter`` with ``BuiltInParameterGroup`` /
+  ``ParameterType`` (replaced by ``ForgeTypeId`` overloads in Revit 2022,
+  removed in 2024/2025). Use :func:`add_family_parameter`.
+
 * ``ElementId(Int32)`` constructor removed in Revit 2026; only the Int64
   overload remains. IronPython usually widens Python ``int`` automatically
   but passing ``System.Int64`` explicitly makes overload resolution
@@ -211,6 +215,19 @@ def is_param_acceptable_for_mapping(definition):
         return False
 
 
+def add_family_parameter(family_manager, name, kind, is_instance=True):
+    """Version-safe ``FamilyManager.AddParameter`` for ``'yesno'`` and
+    ``'integer'`` parameters in the Constraints group.
+    """
+    if HAS_FORGE_PARAM_TYPE:
+        from Autodesk.Revit.DB import GroupTypeId, SpecTypeId
+        spec = SpecTypeId.Boolean.YesNo if kind == 'yesno' else SpecTypeId.Int.Integer
+        return family_manager.AddParameter(name, GroupTypeId.Constraints, spec, is_instance)
+    from Autodesk.Revit.DB import BuiltInParameterGroup, ParameterType
+    param_type = ParameterType.YesNo if kind == 'yesno' else ParameterType.Integer
+    return family_manager.AddParameter(name, BuiltInParameterGroup.PG_CONSTRAINTS, param_type, is_instance)
+
+
 if HAS_FORGE_UNITS:
     try:
         from Autodesk.Revit.DB import UnitTypeId, UnitUtils
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""Per-document index of IFC GUID -> element id.
+
+The Checklist Importer, Edit Configs and Run Everything matched checklist
+items to elements by walking every element and trying ``LookupParameter``
+with three spellings of the GUID parameter name - once per import, and
+Run Everything once per configuration.
+
+The index does that walk once per document. The GUID parameter is found by
+name only for the first element of each category; its ``Definition`` is
+kept and used for every other element of the category, falling back to the
+names if an element does not carry it.
+
+:func:`register_invalidation_handlers` (called from ``startup.py``) feeds
+DocumentChanged deltas into the index so it stays current between runs.
+Without the handlers each :func:`get_index` call rebuilds it, and callers
+keep the instance for the length of one run.
+
+State lives on ``sys`` so every pyRevit engine shares one index, same as
+the storage registry.
+"""
+
+import sys
+import time
+
+from Autodesk.Revit.DB import (
+    FilteredElementCollector,
+    ElementClassFilter,
+    ElementType,
+    ParameterElement,
+    StorageType,
+)
+from pyrevit import script
+
+from revit.compat import get_element_id_value, make_element_id
+
+logger = script.get_logger()
+
+# Spellings of the IFC GUID parameter, in order of preference
+GUID_PARAMETER_NAMES = ("IFCGuid", "IfcGUID", "IFC GUID")
+
+# Larger DocumentChanged deltas drop the index instead of updating it
+MAX_INCREMENTAL_CHANGES = 20000
+
+_INDEX_SYS_KEY = '_pyBS_ifc_guid_index'
+_HANDLERS_SYS_KEY = '_pyBS_ifc_guid_index_handlers'
+
+
+def _get_indexes():
+    if not hasattr(sys, _INDEX_SYS_KEY):
+        setattr(sys, _INDEX_SYS_KEY, {})
+    return getattr(sys, _INDEX_SYS_KEY)
+
+
+def _document_key(doc):
+    try:
+        path = doc.PathName
+        if path:
+            return path
+    except Exception:
+        pass
+    try:
+        return doc.Title or 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+class IfcGuidIndex(object):
+    """IFC GUIDs of the instance elements of one document."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.guid_to_id = {}
+        self.id_to_guid = {}
+        # GUID carried by several elements -> set of their ids
+        self.duplicates = {}
+        self.definitions = {}
+        self.build_time = 0.0
+
+    # --- maintenance ---
+
+    def _find_parameter(self, element):
+        """Return the GUID parameter of ``element`` or None."""
+        try:
+            category = element.Category
+            category_key = get_element_id_value(category.Id) if category is not None else None
+        except Exception:
+            category_key = None
+        definition = self.definitions.get(category_key)
+        if definition is not None:
+            param = element.get_Parameter(definition)
+            if param is not None:
+                return param
+        for name in GUID_PARAMETER_NAMES:
+            param = element.LookupParameter(name)
+            if param:
+                if definition is None:
+                    self.definitions[category_key] = param.Definition
+                return param
+        return None
+
+    def _read_guid(self, element):
+        param = self._find_parameter(element)
+        if param and param.HasValue and param.StorageType == StorageType.String:
+            return param.AsString() or None
+        return None
+
+    def _remove(self, element_id):
+        guid = self.id_to_guid.pop(element_id, None)
+        if guid is None:
+            return
+        sharing_ids = self.duplicates.get(guid)
+        if sharing_ids is None:
+            if self.guid_to_id.get(guid) == element_id:
+                del self.guid_to_id[guid]
+            return
+        sharing_ids.discard(element_id)
+        if self.guid_to_id.get(guid) == element_id:
+            # Another element carries the same GUID; let it take over
+            self.guid_to_id[guid] = next(iter(sharing_ids))
+        if len(sharing_ids) < 2:
+            del self.duplicates[guid]
+
+    def _store(self, element):
+        element_id = get_element_id_value(element.Id)
+        self._remove(element_id)
+        try:
+            guid = self._read_guid(element)
+        except Exception as e:
+            logger.debug("Error reading IFC GUID of {}: {}".format(element_id, e))
+            return
+        if guid is None:
+            return
+        self.id_to_guid[element_id] = guid
+        owner_id = self.guid_to_id.get(guid)
+        if owner_id is not None:
+            self.duplicates.setdefault(guid, set([owner_id])).add(element_id)
+        self.guid_to_id[guid] = element_id
+
+    def build(self):
+        start_time = time.time()
+        for element in FilteredElementCollector(self.doc).WhereElementIsNotElementType():
+            self._store(element)
+        self.build_time = time.time() - start_time
+        logger.debug("[PERF] IFC GUID index built: {} GUIDs, {} categories in {:.2f}s".format(
+            len(self.guid_to_id), len(self.definitions), self.build_time))
+
+    def apply_changes(self, added_ids, modified_ids, deleted_ids):
+        """Update entries for changed ids."""
+        for element_id in deleted_ids:
+            self._remove(get_element_id_value(element_id))
+        for element_id in list(added_ids) + list(modified_ids):
+            element = self.doc.GetElement(element_id)
+            if element is None:
+                self._remove(get_element_id_value(element_id))
+            elif not isinstance(element, ElementType):
+                self._store(element)
+
+    # --- queries ---
+
+    def __len__(self):
+        return len(self.guid_to_id)
+
+    def get_element_id(self, guid):
+        """Return the element id int carrying ``guid`` or None."""
+        return self.guid_to_id.get(guid)
+
+    def get_element(self, guid):
+        """Return the element carrying ``guid`` or None."""
+        element_id = self.guid_to_id.get(guid)
+        if element_id is None:
+            return None
+        return self.doc.GetElement(make_element_id(element_id))
+
+    def get_elements(self, guids, element_ids=None):
+        """Return {guid: element} for the given GUIDs found in the document.
+
+        Args:
+            guids: Iterable of IFC GUIDs
+            element_ids: Optional set of element id ints to restrict the
+                result to (e.g. the elements visible in a view)
+        """
+        elements = {}
+        for guid in guids:
+            element_id = self.guid_to_id.get(guid)
+            if element_id is None or (element_ids is not None and element_id not in element_ids):
+                continue
+            element = self.doc.GetElement(make_element_id(element_id))
+            if element is not None:
+                elements[guid] = element
+        return elements
+
+
+def is_maintained():
+    """True while the DocumentChanged handlers keep the index current."""
+    return bool(getattr(sys, _HANDLERS_SYS_KEY, None))
+
+
+def invalidate(doc=None):
+    """Drop the index of ``doc`` (or of every document)."""
+    indexes = _get_indexes()
+    if doc is None:
+        indexes.clear()
+        return
+    indexes.pop(_document_key(doc), None)
+
+
+def get_index(doc):
+    """Return the IFC GUID index of ``doc``, building it if needed."""
+    indexes = _get_indexes()
+    key = _document_key(doc)
+    index = indexes.get(key)
+    if index is not None:
+        try:
+            stale = not is_maintained() or not index.doc.IsValidObject
+        except Exception:
+            stale = True
+        if stale:
+            index = None
+    if index is None:
+        index = IfcGuidIndex(doc)
+        index.build()
+        indexes[key] = index
+    return index
+
+
+def document_changed_handler(sender, args):
+    """Apply a DocumentChanged delta to the index of its document."""
+    try:
+        doc = args.GetDocument()
+        key = _document_key(doc)
+        indexes = _get_indexes()
+        index = indexes.get(key)
+        if index is None:
+            return
+        # New or changed parameters can change which definition holds the GUID
+        parameter_filter = ElementClassFilter(ParameterElement)
+        if args.GetAddedElementIds(parameter_filter).Count or args.GetModifiedElementIds(parameter_filter).Count:
+            indexes.pop(key, None)
+            return
+        added_ids = args.GetAddedElementIds()
+        modified_ids = args.GetModifiedElementIds()
+        deleted_ids = args.GetDeletedElementIds()
+        if added_ids.Count + modified_ids.Count + deleted_ids.Count > MAX_INCREMENTAL_CHANGES:
+            indexes.pop(key, None)
+            return
+        index.apply_changes(added_ids, modified_ids, deleted_ids)
+    except Exception as e:
+        logger.debug("IFC GUID index update failed: {}".format(e))
+        invalidate()
+
+
+def document_closing_handler(sender, args):
+    """Forget a document's index when it closes."""
+    try:
+        invalidate(args.Document)
+    except Exception:
+        invalidate()
+
+
+def register_invalidation_handlers(app):
+    """Subscribe the index to DocumentChanged / DocumentClosing on ``app``.
+
+    Safe to call on every extension reload: delegates from a previous load are
+    removed first so only one set stays subscribed.
+    """
+    from System import EventHandler
+    from Autodesk.Revit.DB.Events import DocumentChangedEventArgs, DocumentClosingEventArgs
+
+    deregister_invalidation_handlers(app)
+    changed = EventHandler[DocumentChangedEventArgs](document_changed_handler)
+    closing = EventHandler[DocumentClosingEventArgs](document_closing_handler)
+    app.DocumentChanged += changed
+    app.DocumentClosing += closing
+    setattr(sys, _HANDLERS_SYS_KEY, (changed, closing))
+    invalidate()
+    return True
+
+
+def deregister_invalidation_handlers(app):
+    """Remove the index's event subscriptions, if any."""
+    handlers = getattr(sys, _HANDLERS_SYS_KEY, None)
+    if not handlers:
+        return False
+    changed, closing = handlers
+    try:
+        app.DocumentChanged -= changed
+        app.DocumentClosing -= closing
+    except Exception as e:
+        logger.debug("Error removing IFC GUID index handlers: {}".format(e))
+    setattr(sys, _HANDLERS_SYS_KEY, None)
+    invalidate()
+    return True
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Compare-before-write of parameter values.
+
+Setting a parameter to the value it already holds still adds to the undo
+stack and, in a workshared model, checks the element out to the current
+user, which makes every later sync slower. The StreamBIM importers used to
+write every matched value.
+
+:class:`ParameterWriter` splits a write in two stages. :meth:`check` reads
+the parameter outside any transaction and normalises both the current and
+the new value by the parameter's ``StorageType``; only values that differ
+(and elements no other user owns) come back as a :class:`PendingWrite`.
+:meth:`apply` then sets the pending values inside the caller's transaction,
+so a run where nothing changed does not need to open one at all.
+
+Normalisation:
+
+- ``String``: None and empty are the same value
+- ``Integer``: ``"3"``, ``"3.0"`` and ``True`` are accepted as 3 and 1
+- ``Double``: decimal commas are accepted and values within
+  :data:`DOUBLE_TOLERANCE` (relative) are equal; values are in internal
+  units, as the importers have always written them
+- ``ElementId``: compared as id integers and written through
+  :func:`revit.compat.make_element_id`, as Run Everything always has
+"""
+
+from collections import namedtuple
+
+from Autodesk.Revit.DB import StorageType
+from pyrevit import script
+
+from revit.compat import get_element_id_value, make_element_id
+
+logger = script.get_logger()
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+WRITTEN = 'written'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# Relative difference below which two doubles are the same value
+DOUBLE_TOLERANCE = 1e-9
+
+PendingWrite = namedtuple('PendingWrite', ['element', 'param', 'value'])
+
+
+def normalize_value(value, storage_type):
+    """Return ``value`` converted to what a parameter of ``storage_type`` holds.
+
+    Raises:
+        ValueError, TypeError: If the value cannot be stored in the parameter
+    """
+    if storage_type == StorageType.String:
+        if value is None:
+            return u''
+        return text_type(value)
+    if value is None:
+        raise ValueError("No value")
+    if storage_type == StorageType.Integer:
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            number = float(text_type(value).strip().replace(',', '.'))
+            if number != int(number):
+                raise ValueError("'{}' is not an integer".format(value))
+            return int(number)
+    if storage_type == StorageType.Double:
+        if isinstance(value, (int, float)):
+            return float(value)
+        return float(text_type(value).strip().replace(',', '.'))
+    if storage_type == StorageType.ElementId:
+        return int(value)
+    raise ValueError("Unsupported storage type {}".format(storage_type))
+
+
+def read_value(param):
+    """Return the current value of ``param`` normalised like :func:`normalize_value`."""
+    storage_type = param.StorageType
+    if storage_type == StorageType.String:
+        return param.AsString() or u''
+    if not param.HasValue:
+        return None
+    if storage_type == StorageType.Integer:
+        return param.AsInteger()
+    if storage_type == StorageType.Double:
+        return param.AsDouble()
+    if storage_type == StorageType.ElementId:
+        return get_element_id_value(param.AsElementId())
+    return None
+
+
+def values_equal(current, value, storage_type):
+    """True if the normalised ``current`` and ``value`` are the same."""
+    if current is None:
+        return False
+    if storage_type == StorageType.Double:
+        return abs(current - value) <= DOUBLE_TOLERANCE * max(1.0, abs(current), abs(value))
+    return current == value
+
+
+class WriteCounts(object):
+    """Outcome counters of a series of writes.
+
+    Attributes:
+        written: Values set on the element
+        unchanged: Values the parameter already held
+        failed: Values that could not be converted or set, or elements
+            owned by another user
+        skipped: Elements without the parameter or with a read-only one
+    """
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def add(self, status):
+        setattr(self, status, getattr(self, status) + 1)
+
+    def get_summary_text(self):
+        return "{} written, {} unchanged, {} failed".format(self.written, self.unchanged, self.failed)
+
+
+class ParameterWriter(object):
+    """Writes parameter values of one document only where they change.
+
+    Attributes:
+        counts: :class:`WriteCounts` of every checked and applied value
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.counts = WriteCounts()
+        try:
+            self._workshared = bool(doc.IsWorkshared)
+        except Exception:
+            self._workshared = False
+
+    def _owned_by_other(self, element):
+        from Autodesk.Revit.DB import CheckoutStatus, WorksharingUtils
+        try:
+            status = WorksharingUtils.GetCheckoutStatus(self.doc, element.Id)
+        except Exception as e:
+            logger.debug("Error checking ownership of element {}: {}".format(
+                get_element_id_value(element.Id), e))
+            return False
+        return status == CheckoutStatus.OwnedByOtherUser
+
+    def check(self, element, parameter_name, value):
+        """Compare ``value`` with the parameter's current value. Needs no transaction.
+
+        Returns:
+            tuple: (status, PendingWrite) - the status is None and the write
+                is set when the value differs; otherwise the write is None
+                and the status is already counted
+        """
+        status, pending = self._check(element, parameter_name, value)
+        if status is not None:
+            self.counts.add(status)
+        return status, pending
+
+    def _check(self, element, parameter_name, value):
+        param = element.LookupParameter(parameter_name)
+        if not param or param.IsReadOnly:
+            return SKIPPED, None
+        storage_type = param.StorageType
+        try:
+            normalized = normalize_value(value, storage_type)
+        except (ValueError, TypeError) as e:
+            logger.debug("Cannot write '{}' to {} of element {}: {}".format(
+                value, parameter_name, get_element_id_value(element.Id), e))
+            return FAILED, None
+        if values_equal(read_value(param), normalized, storage_type):
+            return UNCHANGED, None
+        if self._workshared and self._owned_by_other(element):
+            logger.debug("Element {} is owned by another user; not writing {}".format(
+                get_element_id_value(element.Id), parameter_name))
+            return FAILED, None
+        return None, PendingWrite(element, param, normalized)
+
+    def apply(self, pending):
+        """Set a value returned by :meth:`check`. Call inside a transaction.
+
+        Returns:
+            str: WRITTEN or FAILED
+        """
+        try:
+            value = pending.value
+            if pending.param.StorageType == StorageType.ElementId:
+                value = make_element_id(value)
+            status = WRITTEN if pending.param.Set(value) is not False else FAILED
+        except Exception as e:
+            logger.error("Error setting parameter value for element {}: {}".format(
+                get_element_id_value(pending.element.Id), str(e)))
+            status = FAILED
+        self.counts.add(status)
+        return status
@@ -43,30 +43,17 @@ def get_visible_elements():
     
     return elements
 
-def get_element_by_ifc_guid(ifc_guid):
-    """Get Revit element by IFC GUID"""
+def get_visible_element_ids():
+    """Get the id values of all visible elements in the current view"""
     doc = revit.doc
-    
-    # Create a filtered element collector for the document
-    collector = FilteredElementCollector(doc)
-    elements = collector.WhereElementIsNotElementType().ToElements()
-    
-    # Find elements with matching IFC GUID
-    for element in elements:
-        try:
-            # Try to get IFC GUID parameter - can be named different ways
-            param = element.LookupParameter("IFCGuid")
-            if not param:
-                param = element.LookupParameter("IfcGUID")
-            if not param:
-                param = element.LookupParameter("IFC GUID")
-                
-            if param and param.AsString() == ifc_guid:
-                return element
-        except:
-            continue
-    
-    return None
+    collector = FilteredElementCollector(doc, doc.ActiveView.Id)
+    return set(get_element_id_value(element_id)
+               for element_id in collector.WhereElementIsNotElementType().ToElementIds())
+
+def get_element_by_ifc_guid(ifc_guid):
+    """Get Revit element by IFC GUID (see revit.guid_index)"""
+    from revit import guid_index
+    return guid_index.get_index(revit.doc).get_element(ifc_guid)
 
 def get_available_parameters():
     """Get all available parameters in the document."""
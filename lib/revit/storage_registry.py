@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Per-document registry of settings DataStorage elements.
+
+The MMI, 3D Zone and StreamBIM settings each live on a DataStorage element.
+Finding one used to mean collecting every DataStorage in the model and probing
+its entity on every call, which the MMI monitor did several times per edit.
+
+The registry maps schema GUID -> DataStorage ids once per document and keeps
+a cached value snapshot per schema (see :func:`get_cached_settings`). Both are
+dropped when a DocumentChanged adds, modifies or deletes a DataStorage element,
+when the document closes, or when a writer calls :func:`invalidate`.
+
+State lives on ``sys`` so every pyRevit engine (startup, buttons, persistent
+monitor engine) shares one registry, same as the view marker sessions.
+"""
+
+import sys
+
+from Autodesk.Revit.DB import (
+    FilteredElementCollector,
+    ElementClassFilter,
+    ExtensibleStorage,
+)
+from pyrevit import script
+
+try:
+    from revit.compat import get_element_id_value
+except ImportError:
+    def get_element_id_value(item):
+        if hasattr(item, 'Value'):
+            return item.Value
+        return item.IntegerValue
+
+logger = script.get_logger()
+
+_REGISTRY_SYS_KEY = '_pyBS_storage_registry'
+_HANDLERS_SYS_KEY = '_pyBS_storage_registry_handlers'
+
+
+def _get_registry():
+    if not hasattr(sys, _REGISTRY_SYS_KEY):
+        setattr(sys, _REGISTRY_SYS_KEY, {})
+    return getattr(sys, _REGISTRY_SYS_KEY)
+
+
+def _document_key(document):
+    try:
+        path = document.PathName
+        if path:
+            return path
+    except Exception:
+        pass
+    try:
+        title = document.Title
+        if title:
+            return title
+    except Exception:
+        pass
+    return 'unknown'
+
+
+def _guid_key(schema_guid):
+    return str(schema_guid).lower()
+
+
+def _build_entry(doc):
+    """Collect every DataStorage once and index it by attached schema GUID."""
+    storage_ids = {}
+    known_ids = set()
+    collector = FilteredElementCollector(doc).OfClass(ExtensibleStorage.DataStorage)
+    for ds in collector:
+        try:
+            guids = ds.GetEntitySchemaGuids()
+        except Exception as e:
+            logger.debug("Error reading schema guids of storage {}: {}".format(ds.Id, e))
+            continue
+        known_ids.add(get_element_id_value(ds.Id))
+        for guid in guids:
+            storage_ids.setdefault(_guid_key(guid), []).append(ds.Id)
+    logger.debug("Storage registry built for '{}': {} storages, {} schemas".format(
+        _document_key(doc), len(known_ids), len(storage_ids)))
+    return {
+        'storage_ids': storage_ids,
+        'known_ids': known_ids,
+        'values': {},
+    }
+
+
+def _get_entry(doc):
+    reg = _get_registry()
+    key = _document_key(doc)
+    entry = reg.get(key)
+    if entry is None:
+        entry = _build_entry(doc)
+        reg[key] = entry
+    return entry
+
+
+def invalidate(doc=None):
+    """Drop the cached storage map and settings of ``doc`` (or of every document)."""
+    reg = _get_registry()
+    if doc is None:
+        reg.clear()
+        return
+    reg.pop(_document_key(doc), None)
+
+
+def find_storages(doc, schema_guid):
+    """Return all DataStorage elements carrying an entity of ``schema_guid``.
+
+    Ids are resolved against the document on each call; a stale id (element
+    gone or schema removed without a DocumentChanged reaching us) triggers a
+    single rebuild of the document entry.
+    """
+    if not doc:
+        return []
+    guid_key = _guid_key(schema_guid)
+    for attempt in range(2):
+        entry = _get_entry(doc)
+        storages = []
+        stale = False
+        for storage_id in entry['storage_ids'].get(guid_key, []):
+            ds = doc.GetElement(storage_id)
+            if ds is None or not ds.IsValidObject:
+                stale = True
+                break
+            try:
+                if not any(_guid_key(g) == guid_key for g in ds.GetEntitySchemaGuids()):
+                    stale = True
+                    break
+            except Exception:
+                stale = True
+                break
+            storages.append(ds)
+        if not stale:
+            return storages
+        invalidate(doc)
+    return []
+
+
+def find_storage(doc, schema_guid):
+    """Return the first DataStorage carrying ``schema_guid`` or None."""
+    storages = find_storages(doc, schema_guid)
+    return storages[0] if storages else None
+
+
+def get_cached_settings(doc, schema_guid, loader):
+    """Return the cached settings snapshot for a schema, loading it if needed.
+
+    Args:
+        doc: The Revit document
+        schema_guid: GUID (or string) of the settings schema
+        loader: Callable ``loader(storages)`` receiving the DataStorage elements
+            found for the schema (possibly empty) and returning the snapshot
+
+    Returns:
+        The loader's result, cached until the next invalidation. Callers must
+        treat it as read-only.
+    """
+    if not doc:
+        return loader([])
+    guid_key = _guid_key(schema_guid)
+    storages = find_storages(doc, schema_guid)
+    entry = _get_entry(doc)
+    values = entry['values']
+    if guid_key not in values:
+        values[guid_key] = loader(storages)
+    return values[guid_key]
+
+
+def document_changed_handler(sender, args):
+    """Invalidate a document's entry when any DataStorage was touched."""
+    try:
+        doc = args.GetDocument()
+        key = _document_key(doc)
+        reg = _get_registry()
+        entry = reg.get(key)
+        if entry is None:
+            return
+        ds_filter = ElementClassFilter(ExtensibleStorage.DataStorage)
+        if args.GetAddedElementIds(ds_filter).Count or args.GetModifiedElementIds(ds_filter).Count:
+            reg.pop(key, None)
+            return
+        known_ids = entry['known_ids']
+        for element_id in args.GetDeletedElementIds():
+            if get_element_id_value(element_id) in known_ids:
+                reg.pop(key, None)
+                return
+    except Exception as e:
+        logger.debug("Storage registry invalidation failed: {}".format(e))
+        invalidate()
+
+
+def document_closing_handler(sender, args):
+    """Forget a document's entry when it closes."""
+    try:
+        invalidate(args.Document)
+    except Exception:
+        invalidate()
+
+
+def register_invalidation_handlers(app):
+    """Subscribe the registry to DocumentChanged / DocumentClosing on ``app``.
+
+    Safe to call on every extension reload: delegates from a previous load are
+    removed first so only one set stays subscribed.
+    """
+    from System import EventHandler
+    from Autodesk.Revit.DB.Events import DocumentChangedEventArgs, DocumentClosingEventArgs
+
+    deregister_invalidation_handlers(app)
+    changed = EventHandler[DocumentChangedEventArgs](document_changed_handler)
+    closing = EventHandler[DocumentClosingEventArgs](document_closing_handler)
+    app.DocumentChanged += changed
+    app.DocumentClosing += closing
+    setattr(sys, _HANDLERS_SYS_KEY, (changed, closing))
+    invalidate()
+    return True
+
+
+def deregister_invalidation_handlers(app):
+    """Remove the registry's event subscriptions, if any."""
+    handlers = getattr(sys, _HANDLERS_SYS_KEY, None)
+    if not handlers:
+        return False
+    changed, closing = handlers
+    try:
+        app.DocumentChanged -= changed
+        app.DocumentClosing -= closing
+    except Exception as e:
+        logger.debug("Error removing storage registry handlers: {}".format(e))
+    setattr(sys, _HANDLERS_SYS_KEY, None)
+    return True
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Resumable progress of a multi-model batch import.
+
+The Batch Importer records every model's progress in one JSON manifest::
+
+    {"models": {"C:\\\\Models\\\\A.rvt": {
+        "stage": "written",
+        "downloaded": 1700000000.0, "written": 1700000042.0, "synced": null,
+        "worker": "2", "attempts": 1, "error": null, "details": {...}}}}
+
+``stage`` is the last completed of :data:`STAGES`. A model counts as done
+once it is ``synced``; a batch resumed with the same manifest skips done
+models and processes the rest again. Every new batch starts a new manifest. Writes that were never synced are lost with the
+Revit session, so an unfinished model always starts from its download,
+which the shared checklist cache and diff-only writes keep cheap.
+
+Several worker processes update the manifest at once. Every update takes a
+lock file next to the manifest, re-reads it, changes one model entry and
+replaces the file, so workers never overwrite each other's progress.
+
+Only the standard library is used: the module runs inside Revit workers as
+well as in the orchestrator outside Revit.
+"""
+
+import json
+import os
+import time
+
+DOWNLOADED = 'downloaded'
+WRITTEN = 'written'
+SYNCED = 'synced'
+
+# Stages in the order a model completes them
+STAGES = (DOWNLOADED, WRITTEN, SYNCED)
+
+# Seconds to wait for the manifest lock, and age after which a lock left by
+# a crashed process is broken
+LOCK_TIMEOUT = 60.0
+STALE_LOCK_SECONDS = 120.0
+
+
+class ManifestLockError(Exception):
+    """Raised when the manifest lock cannot be taken in time."""
+
+
+class _FileLock(object):
+    """Inter-process lock held through an exclusively created file."""
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                self._fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(self._fd, str(os.getpid()).encode('ascii'))
+                return self
+            except OSError:
+                pass
+            try:
+                if time.time() - os.path.getmtime(self.path) > STALE_LOCK_SECONDS:
+                    os.remove(self.path)
+                    continue
+            except OSError:
+                # Released in the meantime
+                continue
+            if time.time() > deadline:
+                raise ManifestLockError("Timed out waiting for {}".format(self.path))
+            time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            os.close(self._fd)
+            os.remove(self.path)
+        except OSError:
+            pass
+        self._fd = None
+        return False
+
+
+def _new_entry():
+    entry = dict((stage, None) for stage in STAGES)
+    entry.update({'stage': None, 'worker': None, 'attempts': 0, 'error': None, 'details': {}})
+    return entry
+
+
+class BatchManifest(object):
+    """JSON manifest of the models of a batch.
+
+    Args:
+        path: Manifest file; created on the first update
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.lock_path = self.path + '.lock'
+
+    # --- file access ---
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {'models': {}}
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        data.setdefault('models', {})
+        return data
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        # os.rename does not replace existing files on Windows
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+    def _update(self, model, change):
+        """Apply ``change(entry)`` to the entry of ``model`` under the lock."""
+        with _FileLock(self.lock_path):
+            data = self._read()
+            entry = data['models'].setdefault(model, _new_entry())
+            change(entry)
+            self._write(data)
+            return dict(entry)
+
+    # --- queries ---
+
+    def load(self):
+        """Return {model: entry} of every model in the manifest."""
+        with _FileLock(self.lock_path):
+            return self._read()['models']
+
+    def get(self, model):
+        """Return the entry of ``model`` (an empty one if unknown)."""
+        return self.load().get(model) or _new_entry()
+
+    def is_done(self, model):
+        return self.get(model).get('stage') == SYNCED
+
+    def pending(self, models):
+        """Return the models of ``models`` that are not synced yet, in order."""
+        entries = self.load()
+        return [model for model in models if (entries.get(model) or {}).get('stage') != SYNCED]
+
+    def get_summary(self, models=None):
+        """Return {stage or 'new': model count} of ``models`` (default: all)."""
+        entries = self.load()
+        if models is None:
+            models = list(entries.keys())
+        summary = dict((stage, 0) for stage in STAGES)
+        summary['new'] = 0
+        summary['failed'] = 0
+        for model in models:
+            entry = entries.get(model) or {}
+            summary[entry.get('stage') or 'new'] += 1
+            if entry.get('error'):
+                summary['failed'] += 1
+        return summary
+
+    # --- progress ---
+
+    def start(self, model, worker=None):
+        """Record a new attempt at ``model``; its stages start over."""
+        def change(entry):
+            entry['stage'] = None
+            for stage in STAGES:
+                entry[stage] = None
+            entry['worker'] = worker
+            entry['attempts'] += 1
+            entry['error'] = None
+        return self._update(model, change)
+
+    def record_stage(self, model, stage, **details):
+        """Mark ``stage`` of ``model`` complete, merging ``details`` into its entry."""
+        if stage not in STAGES:
+            raise ValueError("Unknown stage '{}'".format(stage))
+
+        def change(entry):
+            entry['stage'] = stage
+            entry[stage] = time.time()
+            entry['error'] = None
+            entry['details'].update(details)
+        return self._update(model, change)
+
+    def record_failure(self, model, error):
+        """Record why the current attempt at ``model`` stopped."""
+        def change(entry):
+            entry['error'] = error
+        return self._update(model, change)
+
+    def reset(self, model):
+        """Forget the progress of ``model`` so it is processed again."""
+        def change(entry):
+            entry.clear()
+            entry.update(_new_entry())
+        return self._update(model, change)
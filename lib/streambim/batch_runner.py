@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""Parallel, resumable batch import of several Revit models.
+
+The Batch Importer used to open, import, sync and save every model of
+``__models__`` one after another in a single Revit session, and a failure
+midway meant starting the whole list over.
+
+:class:`BatchOrchestrator` runs outside Revit. Every batch gets a new
+:class:`~streambim.batch_manifest.BatchManifest`; only ``--resume`` with
+the manifest of an earlier batch drops the models it records as synced.
+The models are split across ``workers`` lists, and one independent
+``pyrevit run`` process (one headless Revit) is started per list. ``pyrevit
+run`` takes a single model as argument, so every list is written to a models
+file next to the manifest and passed with ``--models``. The workers receive
+the manifest and a shared cache folder through :data:`MANIFEST_ENV` and
+:data:`CACHE_DIR_ENV`, so checklists downloaded by one worker are
+revalidated, not downloaded again, by the others.
+
+:class:`BatchWorker` runs inside each Revit process. Opening, downloading,
+writing and syncing a model are passed in as functions, so the worker and
+the orchestrator run headless with stubs (see ``batch_importer_harness``).
+
+Usage, from the extension's ``lib`` folder::
+
+    python -m streambim.batch_runner --workers 3 --revit 2024 A.rvt B.rvt C.rvt
+    python -m streambim.batch_runner --resume <manifest printed by the first run> A.rvt B.rvt C.rvt
+
+Only the standard library is used outside the injected functions.
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+import traceback
+
+from streambim.batch_manifest import BatchManifest, DOWNLOADED, WRITTEN, SYNCED
+
+# Environment variables passed from the orchestrator to its workers
+MANIFEST_ENV = 'PYBS_BATCH_MANIFEST'
+WORKER_ENV = 'PYBS_BATCH_WORKER'
+# Same as streambim.checklist_cache.CACHE_ROOT_ENV, which needs pyRevit to import
+CACHE_DIR_ENV = 'PYBS_CACHE_DIR'
+
+# Worker script run by ``pyrevit run``
+WORKER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'pyBS.tab', 'StreamBIM.panel', 'Batch Importer Tool', 'Batch Importer Tool.py')
+
+LOG_DIR = os.path.join(os.path.dirname(WORKER_SCRIPT), 'log')
+
+logger = logging.getLogger('pyBS.batch')
+
+
+def new_manifest_path(suffix=''):
+    """Return the path of a new manifest for a batch started now."""
+    return os.path.join(LOG_DIR, 'batch_manifest_{}_{}{}.json'.format(
+        time.strftime('%Y%m%d_%H%M%S'), os.getpid(), suffix))
+
+
+def split_models(models, worker_count):
+    """Split ``models`` into at most ``worker_count`` non-empty lists, round-robin."""
+    worker_count = max(1, min(worker_count, len(models)))
+    chunks = [[] for _ in range(worker_count)]
+    for i, model in enumerate(models):
+        chunks[i % worker_count].append(model)
+    return [chunk for chunk in chunks if chunk]
+
+
+class BatchWorker(object):
+    """Processes models one at a time, recording each stage in the manifest.
+
+    Args:
+        manifest: BatchManifest shared by all workers
+        open_model: Callable(model path) -> document
+        download: Callable(doc) -> (plan, details dict); downloads the
+            checklists and plans the writes
+        write: Callable(doc, plan) -> details dict; raises if nothing was
+            committed
+        sync: Callable(doc) -> None; synchronizes with central or saves
+        close_model: Optional callable(doc), called after every attempt
+        worker_id: Name recorded in the manifest
+        log: Logger with debug() and error() (default: the module logger)
+    """
+
+    def __init__(self, manifest, open_model, download, write, sync, close_model=None,
+                 worker_id=None, log=None):
+        self.manifest = manifest
+        self.open_model = open_model
+        self.download = download
+        self.write = write
+        self.sync = sync
+        self.close_model = close_model
+        self.worker_id = worker_id
+        self.log = log or logger
+
+    def process(self, models):
+        """Process every model the manifest does not record as synced.
+
+        Returns:
+            dict: {'synced': [models], 'failed': [models], 'skipped': [models]}
+        """
+        result = {'synced': [], 'failed': [], 'skipped': []}
+        pending = set(self.manifest.pending(models))
+        for model in models:
+            if model not in pending:
+                self.log.debug("Skipping synced model: {}".format(model))
+                result['skipped'].append(model)
+                continue
+            if self.process_model(model):
+                result['synced'].append(model)
+            else:
+                result['failed'].append(model)
+        return result
+
+    def process_model(self, model):
+        """Run all stages of one model. Returns True once it is synced."""
+        self.manifest.start(model, self.worker_id)
+        stage = 'open'
+        doc = None
+        start_time = time.time()
+        try:
+            self.log.debug("Opening model: {}".format(model))
+            doc = self.open_model(model)
+
+            stage = DOWNLOADED
+            plan, details = self.download(doc)
+            self.manifest.record_stage(model, DOWNLOADED, **(details or {}))
+
+            stage = WRITTEN
+            details = self.write(doc, plan)
+            self.manifest.record_stage(model, WRITTEN, **(details or {}))
+
+            stage = SYNCED
+            self.sync(doc)
+            self.manifest.record_stage(model, SYNCED, seconds=round(time.time() - start_time, 2))
+            self.log.debug("Synced model: {} in {:.2f}s".format(model, time.time() - start_time))
+            return True
+        except Exception as e:
+            self.log.error("Failed at stage '{}' of {}: {}".format(stage, model, e))
+            self.log.error("Trace: {}".format(traceback.format_exc()))
+            try:
+                self.manifest.record_failure(model, "{}: {}".format(stage, e))
+            except Exception as manifest_error:
+                self.log.error("Could not record failure of {}: {}".format(model, manifest_error))
+            return False
+        finally:
+            if doc is not None and self.close_model is not None:
+                try:
+                    self.close_model(doc)
+                except Exception as e:
+                    self.log.error("Error closing {}: {}".format(model, e))
+
+
+def write_models_file(models, path):
+    """Write ``models`` to ``path``, one per line, as ``pyrevit run --models`` reads them."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as f:
+        for model in models:
+            f.write(model + '\n')
+    return path
+
+
+def build_worker_command(models_file, script_path=WORKER_SCRIPT, revit_version=None):
+    """Return the ``pyrevit run`` command processing the models of ``models_file`` in one Revit."""
+    command = ['pyrevit', 'run', script_path, '--models={}'.format(models_file)]
+    if revit_version:
+        command.append('--revit={}'.format(revit_version))
+    return command
+
+
+class BatchOrchestrator(object):
+    """Splits the unfinished models of a batch across worker processes.
+
+    Args:
+        models: Model paths, in processing order
+        manifest_path: JSON manifest shared with the workers; models it
+            records as synced are skipped. Defaults to a new manifest
+        workers: Number of concurrent worker processes
+        cache_dir: Optional cache folder shared by the workers
+        command_builder: Callable(models file) -> command list of one worker
+        launcher: Callable(command, env) -> process with wait(); defaults to
+            subprocess.Popen
+    """
+
+    def __init__(self, models, manifest_path=None, workers=2, cache_dir=None,
+                 command_builder=build_worker_command, launcher=None):
+        self.models = list(models)
+        self.manifest = BatchManifest(manifest_path or new_manifest_path())
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.command_builder = command_builder
+        self.launcher = launcher or (lambda command, env: subprocess.Popen(command, env=env))
+
+    def models_file_path(self, worker_id):
+        """Return the models file of worker ``worker_id``, next to the manifest."""
+        return '{}_worker{}_models.txt'.format(os.path.splitext(self.manifest.path)[0], worker_id)
+
+    def worker_env(self, worker_id):
+        env = dict(os.environ)
+        env[MANIFEST_ENV] = self.manifest.path
+        env[WORKER_ENV] = str(worker_id)
+        if self.cache_dir:
+            env[CACHE_DIR_ENV] = os.path.abspath(self.cache_dir)
+        return env
+
+    def run(self):
+        """Run the workers and wait for all of them.
+
+        Returns:
+            dict: manifest summary of the batch's models, plus
+                'exit_codes' of the workers
+        """
+        pending = self.manifest.pending(self.models)
+        logger.info("{} of {} models to process".format(len(pending), len(self.models)))
+        processes = []
+        for worker_id, chunk in enumerate(split_models(pending, self.workers), 1):
+            models_file = write_models_file(chunk, self.models_file_path(worker_id))
+            command = self.command_builder(models_file)
+            logger.info("Worker {}: {} models".format(worker_id, len(chunk)))
+            processes.append(self.launcher(command, self.worker_env(worker_id)))
+        exit_codes = [process.wait() for process in processes]
+        summary = self.manifest.get_summary(self.models)
+        summary['exit_codes'] = exit_codes
+        return summary
+
+
+def format_summary(summary):
+    return "synced {synced}, written {written}, downloaded {downloaded}, not started {new}; " \
+           "{failed} with errors".format(**summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel StreamBIM batch import")
+    parser.add_argument('models', nargs='*', help="Model paths")
+    parser.add_argument('--models-file', help="Text file with one model path per line")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--resume', metavar='MANIFEST',
+                        help="Manifest of an earlier batch; its synced models are skipped")
+    parser.add_argument('--cache-dir', help="Cache folder shared by the workers")
+    parser.add_argument('--revit', help="Revit version for pyrevit run, e.g. 2024")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    models = list(args.models)
+    if args.models_file:
+        with open(args.models_file, 'r') as f:
+            models.extend(line.strip() for line in f if line.strip())
+    if not models:
+        parser.error("No models given")
+
+    if args.resume and not os.path.exists(args.resume):
+        parser.error("Manifest not found: {}".format(args.resume))
+    orchestrator = BatchOrchestrator(
+        models, args.resume, args.workers, args.cache_dir,
+        command_builder=lambda models_file: build_worker_command(models_file, revit_version=args.revit))
+    logger.info("Manifest: {}".format(orchestrator.manifest.path))
+    summary = orchestrator.run()
+    logger.info(format_summary(summary))
+    return 0 if summary[SYNCED] == len(models) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
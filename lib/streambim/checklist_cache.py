@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Local cache of downloaded checklist items, revalidated on every use.
+
+Each page of checklist items is stored per project under
+``%LOCALAPPDATA%\\pyBS\\streambim_checklists\\project-<id>`` together with
+its ``ETag`` / ``Last-Modified`` validators and a hash of the raw response
+body. When a checklist is requested again every page is revalidated:
+
+- with ``If-None-Match`` / ``If-Modified-Since`` when the server sent
+  validators; a ``304 Not Modified`` reuses the cached page without a body,
+- otherwise by comparing the hash of the new body with the cached one, in
+  which case the already-decoded cached items are reused and JSON parsing
+  and UTF-8 decoding are skipped.
+
+A checklist counts as a hit when every page was reused and as a miss when
+any page changed or nothing was cached. Only complete downloads are stored.
+
+Files are replaced whole, so several Revit processes (the workers of the
+Batch Importer) can share one cache; :data:`CACHE_ROOT_ENV` points them at
+a common folder.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from pyrevit import script
+
+logger = script.get_logger()
+
+CACHE_DIR_NAME = 'streambim_checklists'
+
+# Overrides the %LOCALAPPDATA%\pyBS cache root, e.g. so the workers of a
+# parallel batch import share one cache
+CACHE_ROOT_ENV = 'PYBS_CACHE_DIR'
+
+
+def get_cache_root():
+    """Return the folder holding the StreamBIM caches."""
+    root = os.environ.get(CACHE_ROOT_ENV)
+    if root:
+        return root
+    localappdata = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    return os.path.join(localappdata, 'pyBS')
+
+
+def _get_cache_dir(project_id):
+    path = os.path.join(get_cache_root(), CACHE_DIR_NAME,
+                        'project-{}'.format(re.sub(r'[^A-Za-z0-9_-]+', '_', str(project_id))))
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except Exception:
+            pass
+    return path
+
+
+def hash_body(body):
+    """Return the hash used to compare raw page bodies."""
+    return hashlib.sha1(body or b'').hexdigest()
+
+
+class _PageWriter(object):
+    """Writes the pages of one download to a temporary file.
+
+    The cache file is only replaced by :meth:`commit`, so an interrupted
+    download never leaves a partial checklist behind.
+    """
+
+    def __init__(self, path, page_size):
+        self.path = path
+        # Unique per process: several batch workers may download the same checklist
+        self.temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        self._file = None
+        try:
+            self._file = open(self.temp_path, 'w')
+            self._file.write(json.dumps({'page_size': page_size}) + '\n')
+        except Exception as e:
+            logger.debug("Could not write checklist cache {}: {}".format(self.temp_path, e))
+            self.discard()
+
+    def write(self, page):
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(page) + '\n')
+        except Exception as e:
+            logger.debug("Could not write checklist cache {}: {}".format(self.temp_path, e))
+            self.discard()
+
+    def commit(self):
+        """Replace the cache file with the written pages."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(self.temp_path, self.path)
+        except Exception as e:
+            logger.debug("Could not replace checklist cache {}: {}".format(self.path, e))
+
+    def discard(self):
+        """Drop the written pages."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+        except Exception:
+            pass
+
+
+class ChecklistCache(object):
+    """Cached checklist pages of one StreamBIM project.
+
+    A cache file holds a ``{"page_size": int}`` header line followed by one
+    ``{"etag", "last_modified", "hash", "items"}`` line per page, so pages are
+    read and written one at a time while a checklist is streamed.
+
+    Attributes:
+        hits: Checklists served from the cache since creation
+        misses: Checklists (re)downloaded since creation
+    """
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.cache_dir = _get_cache_dir(project_id)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, checklist_id, checklist_item):
+        key = json.dumps([checklist_id, checklist_item])
+        return os.path.join(self.cache_dir, '{}.jsonl'.format(hashlib.sha1(key.encode('utf-8')).hexdigest()))
+
+    def iter_pages(self, checklist_id, checklist_item, page_size):
+        """Yield the cached page records of a checklist (nothing if uncached)."""
+        path = self._path(checklist_id, checklist_item)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('page_size') != page_size:
+                    return
+                for line in f:
+                    yield json.loads(line)
+        except Exception as e:
+            logger.debug("Ignoring unreadable checklist cache {}: {}".format(path, e))
+
+    def begin(self, checklist_id, checklist_item, page_size):
+        """Return a writer for a new download of a checklist."""
+        return _PageWriter(self._path(checklist_id, checklist_item), page_size)
+
+    def record(self, hit):
+        """Count a checklist request as a hit or a miss."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        """Delete all cached checklists of the project."""
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except Exception:
+                pass
+
+    def get_status_text(self):
+        """Return the hit/miss counter for status displays."""
+        return "Checklist cache: {} hit{}, {} miss{}".format(
+            self.hits, "" if self.hits == 1 else "s",
+            self.misses, "" if self.misses == 1 else "es")
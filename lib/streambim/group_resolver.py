@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Concurrent, cached resolution of grouped checklist keys to IFC GUIDs.
+
+Each group key of a grouped checklist needs two StreamBIM calls (create an
+IFC search, then read its object refs). Importing used to do them one key at
+a time and forgot the results when the window closed.
+
+:class:`GroupKeyResolver` resolves many keys through a bounded pool of
+worker threads, lets concurrent requests for the same
+(checklist, building, key) share one API round trip, and keeps results in a
+per-project JSON file under ``%LOCALAPPDATA%\\pyBS\\streambim_groups`` for
+:data:`CACHE_TTL_SECONDS`, so reruns skip the API entirely. Failed lookups
+are handed to the requests waiting on them but never remembered, so the
+next request for the key tries the API again.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from pyrevit import script
+
+from streambim.checklist_cache import get_cache_root
+
+logger = script.get_logger()
+
+CACHE_DIR_NAME = 'streambim_groups'
+
+# Resolved group keys are reused from disk for one day
+CACHE_TTL_SECONDS = 24 * 3600
+
+# Concurrent group key lookups against StreamBIM
+DEFAULT_MAX_WORKERS = 6
+
+# Object refs requested per IFC search
+OBJECT_REFS_LIMIT = 10000
+
+
+def _get_cache_dir():
+    path = os.path.join(get_cache_root(), CACHE_DIR_NAME)
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except Exception:
+            pass
+    return path
+
+
+def _cache_key(checklist_id, building_id, group_key):
+    return json.dumps([checklist_id, building_id, group_key])
+
+
+class _InFlight(object):
+    """A lookup in progress; waiters read ``guids`` once ``event`` is set."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.guids = []
+
+
+class GroupKeyResolver(object):
+    """Resolves group keys of one StreamBIM project.
+
+    Args:
+        client: Authenticated StreamBIMClient
+        project_id: StreamBIM project id the cache file belongs to
+        max_workers: Upper bound on concurrent lookups
+        ttl_seconds: How long results stay valid on disk
+    """
+
+    def __init__(self, client, project_id, max_workers=DEFAULT_MAX_WORKERS,
+                 ttl_seconds=CACHE_TTL_SECONDS):
+        self.client = client
+        self.project_id = project_id
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self.cache_file = os.path.join(
+            _get_cache_dir(), 'project-{}.json'.format(re.sub(r'[^A-Za-z0-9_-]+', '_', str(project_id))))
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._results = {}
+        self._stored = None
+        self._dirty = False
+
+    # --- disk cache ---
+
+    def _load(self):
+        """Load unexpired results from the cache file (once)."""
+        if self._stored is not None:
+            return
+        self._stored = {}
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                entries = json.load(f)
+            now = time.time()
+            for key, entry in entries.items():
+                if now - entry.get('time', 0) < self.ttl_seconds:
+                    self._stored[key] = entry
+        except Exception as e:
+            logger.debug("Ignoring unreadable group key cache {}: {}".format(self.cache_file, e))
+
+    def save(self):
+        """Write new results to the cache file."""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._stored)
+            self._dirty = False
+        # Write a temporary file first so other processes never read a partial file
+        temp_path = '{}.{}.tmp'.format(self.cache_file, os.getpid())
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(entries, f)
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+            os.rename(temp_path, self.cache_file)
+        except Exception as e:
+            logger.debug("Could not write group key cache {}: {}".format(self.cache_file, e))
+
+    def clear_cache(self):
+        """Forget all results, in memory and on disk."""
+        with self._lock:
+            self._results = {}
+            self._stored = {}
+            self._dirty = False
+        try:
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+        except Exception:
+            pass
+
+    # --- resolution ---
+
+    def _lookup(self, key):
+        """Return cached GUIDs for ``key`` or None. Call with the lock held."""
+        guids = self._results.get(key)
+        if guids is None:
+            entry = self._stored.get(key)
+            if entry is not None:
+                guids = entry['guids']
+                self._results[key] = guids
+        return guids
+
+    def _fetch(self, checklist_id, building_id, group_key):
+        """Run the two API calls for one key.
+
+        Returns:
+            tuple: (list of IFC GUIDs, True if the answer may be stored on disk)
+        """
+        try:
+            search_id = self.client._request_ifc_search(checklist_id, building_id, group_key)
+            if not search_id:
+                return [], True
+            object_refs = self.client._request_ifc_object_refs(search_id, limit=OBJECT_REFS_LIMIT)
+        except Exception as e:
+            self.client.last_error = str(e)
+            logger.error("Error resolving group key '{}': {}".format(group_key, e))
+            return [], False
+        # IDs of the refs match Revit IfcGUID parameter values
+        return [ref.get('id') for ref in object_refs if ref.get('id')], True
+
+    def resolve(self, checklist_id, building_id, group_key):
+        """Return the IFC GUIDs of one group key, waiting for an in-flight lookup."""
+        key = _cache_key(checklist_id, building_id, group_key)
+        with self._lock:
+            self._load()
+            guids = self._lookup(key)
+            if guids is not None:
+                return guids
+            flight = self._in_flight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._in_flight[key] = _InFlight()
+
+        if not owner:
+            flight.event.wait()
+            return flight.guids
+
+        guids, storable = [], False
+        try:
+            guids, storable = self._fetch(checklist_id, building_id, group_key)
+        finally:
+            flight.guids = guids
+            with self._lock:
+                # Failures are not remembered, so a later resolve retries them
+                if storable:
+                    self._results[key] = guids
+                    self._stored[key] = {'guids': guids, 'time': time.time()}
+                    self._dirty = True
+                del self._in_flight[key]
+            flight.event.set()
+        return guids
+
+    def resolve_many(self, checklist_id, building_id, group_keys, progress_callback=None):
+        """Resolve many group keys concurrently.
+
+        Args:
+            checklist_id: ID of the checklist
+            building_id: ID of the building
+            group_keys: Iterable of group keys (duplicates are resolved once)
+            progress_callback: Optional callable(done, total), called on the
+                calling thread
+
+        Returns:
+            dict: {group_key: list of IFC GUIDs}
+        """
+        start_time = time.time()
+        unique_keys = list(dict.fromkeys(group_keys))
+        total = len(unique_keys)
+        results = {}
+        pending = []
+        with self._lock:
+            self._load()
+            for group_key in unique_keys:
+                guids = self._lookup(_cache_key(checklist_id, building_id, group_key))
+                if guids is None:
+                    pending.append(group_key)
+                else:
+                    results[group_key] = guids
+        cached_count = total - len(pending)
+
+        if pending:
+            position = [0]
+
+            def worker():
+                while True:
+                    with self._lock:
+                        if position[0] >= len(pending):
+                            return
+                        group_key = pending[position[0]]
+                        position[0] += 1
+                    guids = self.resolve(checklist_id, building_id, group_key)
+                    with self._lock:
+                        results[group_key] = guids
+
+            threads = [threading.Thread(target=worker) for _ in range(min(self.max_workers, len(pending)))]
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.2)
+                    if progress_callback is not None:
+                        progress_callback(len(results), total)
+            self.save()
+
+        if progress_callback is not None:
+            progress_callback(len(results), total)
+        logger.debug("[PERF] Resolved {} group keys ({} cached, {} fetched) in {:.2f}s".format(
+            total, cached_count, len(pending), time.time() - start_time))
+        return results
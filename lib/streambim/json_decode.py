@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Decoding of StreamBIM JSON responses to unicode.
+
+Responses used to be parsed from the raw body and then passed through a
+recursive ``_decode_utf8`` that rebuilt every dict and list to turn ``str``
+into ``unicode``. For a large checklist that holds two full copies of the
+payload at the peak and costs a Python call per value under IronPython.
+
+:func:`parse_json` has the ``json`` module produce unicode strings directly
+instead (under IronPython by decoding the body as UTF-8 before parsing), so
+nothing has to be walked afterwards. :func:`decode_utf8_in_place` remains
+for data that was parsed elsewhere; it walks the structure iteratively with
+an explicit stack and converts strings where they are, without copying
+containers.
+
+Only the standard library is used, so ``json_decode_harness`` can compare
+the paths on plain CPython.
+"""
+
+import json
+import sys
+
+if sys.platform == 'cli':
+    # IronPython reads HTTP bodies as str holding one byte per character,
+    # which json would take for text; decode the bytes first
+    def _body_to_text(body):
+        return body.decode('utf-8')
+else:
+    # CPython's json decodes UTF-8 bytes itself and returns unicode strings
+    def _body_to_text(body):
+        return body
+
+# str has no decode() on Python 3, where parsed strings are text already
+_DECODES_STR = hasattr(str, 'decode')
+
+
+def parse_json(body):
+    """Parse a raw UTF-8 response body; every string in the result is unicode."""
+    return json.loads(_body_to_text(body))
+
+
+def _decode_str(value):
+    try:
+        return value.decode('utf-8')
+    except (UnicodeError, AttributeError):
+        return value
+
+
+def decode_utf8_in_place(data):
+    """Decode the UTF-8 ``str`` values and keys of parsed JSON in place.
+
+    Dicts and lists are updated where they are; tuples and sets (which JSON
+    never produces) are replaced by decoded copies. Strings that are not
+    valid UTF-8 are left as they are.
+
+    Returns:
+        The decoded data (``data`` itself unless it is a str, tuple or set)
+    """
+    if not _DECODES_STR:
+        return data
+    if isinstance(data, str):
+        return _decode_str(data)
+    if isinstance(data, (tuple, set)):
+        return type(data)(decode_utf8_in_place(list(data)))
+    stack = [data]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            renamed = None
+            for key, value in container.items():
+                if isinstance(value, str):
+                    container[key] = _decode_str(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+                elif isinstance(value, (tuple, set)):
+                    container[key] = type(value)(decode_utf8_in_place(list(value)))
+                if isinstance(key, str):
+                    renamed = renamed or []
+                    renamed.append(key)
+            for key in renamed or ():
+                decoded = _decode_str(key)
+                if decoded is not key:
+                    container[decoded] = container.pop(key)
+        elif isinstance(container, list):
+            for i, value in enumerate(container):
+                if isinstance(value, str):
+                    container[i] = _decode_str(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+                elif isinstance(value, (tuple, set)):
+                    container[i] = type(value)(decode_utf8_in_place(list(value)))
+    return data
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Fused planning of StreamBIM checklist configurations.
+
+Run Everything used to download, index and write every configuration on its
+own, in its own transaction, so a checklist feeding five properties was
+downloaded five times. :class:`RunPlanner` groups the configurations by
+checklist, streams each checklist once while extracting the values of all
+of its configurations, and merges every (element, parameter, value) write
+into one :class:`WritePlan` that the caller executes in a single
+transaction.
+
+When two configurations write the same parameter of the same element the
+later one wins, as it did when the configurations ran one after another.
+Per-configuration timings are kept in :class:`ConfigPlan.timings`.
+"""
+
+import json
+import time
+from collections import OrderedDict
+
+from pyrevit import script
+
+from revit.compat import get_element_id_value
+from revit.param_writes import WriteCounts
+
+logger = script.get_logger()
+
+
+def get_property_value(checklist_item, property_name):
+    """Get a property value from a checklist item.
+
+    Checks both the attributes.properties and the items paths of the item.
+    """
+    props = checklist_item.get('attributes', {}).get('properties', {})
+    if props and property_name in props:
+        return props.get(property_name)
+    items = checklist_item.get('items')
+    if items and property_name in items:
+        return items[property_name]
+    return None
+
+
+def get_item_guid(checklist_item):
+    """Return the IFC GUID (or group key) a checklist item refers to."""
+    return checklist_item.get('object') or checklist_item.get('attributes', {}).get('elementId')
+
+
+def parse_value_mapping(config):
+    """Return the {checklist value: Revit value} mapping of a configuration."""
+    value_mapping = {}
+    if not (config.mapping_enabled and config.mapping_config):
+        return value_mapping
+    try:
+        for mapping in json.loads(config.mapping_config):
+            checklist_value = mapping.get('ChecklistValue')
+            revit_value = mapping.get('RevitValue')
+            if checklist_value and revit_value:
+                value_mapping[checklist_value] = revit_value
+    except Exception as e:
+        logger.error("Error parsing mapping config: {}".format(str(e)))
+    return value_mapping
+
+
+def group_by_checklist(configs):
+    """Return an OrderedDict {checklist id: [configs]} in configuration order."""
+    groups = OrderedDict()
+    for config in configs:
+        groups.setdefault(config.checklist_id, []).append(config)
+    return groups
+
+
+class ConfigPlan(object):
+    """Values extracted for one configuration.
+
+    Attributes:
+        guid_to_value: {IFC GUID (or group key when grouped): value}
+        item_count: Checklist items read for the configuration
+        planned: Writes this configuration added to the plan
+        write_counts: revit.param_writes.WriteCounts of executing its writes
+        timings: {'download', 'extract', 'resolve', 'lookup', 'write'} seconds;
+            'download' is the checklist's total, shared by its configurations
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.value_mapping = parse_value_mapping(config)
+        self.guid_to_value = {}
+        self.item_count = 0
+        self.planned = 0
+        self.write_counts = WriteCounts()
+        self.timings = {'download': 0.0, 'extract': 0.0, 'resolve': 0.0, 'lookup': 0.0, 'write': 0.0}
+
+    def extract(self, item):
+        """Record the value ``item`` holds for this configuration."""
+        key = get_item_guid(item)
+        if not key:
+            return
+        property_value = get_property_value(item, self.config.streambim_property)
+        if property_value is None:
+            return
+        if self.config.mapping_enabled:
+            if property_value not in self.value_mapping:
+                # Skip if mapping enabled but value not in mapping
+                return
+            property_value = self.value_mapping[property_value]
+        self.guid_to_value[key] = property_value
+
+
+class WritePlan(object):
+    """Parameter writes keyed by (element id, parameter name); the last add wins."""
+
+    def __init__(self):
+        self.writes = OrderedDict()
+
+    def __len__(self):
+        return len(self.writes)
+
+    def add(self, element, parameter_name, value, config_plan):
+        key = (get_element_id_value(element.Id), parameter_name)
+        previous = self.writes.pop(key, None)
+        if previous is not None:
+            previous[3].planned -= 1
+        self.writes[key] = (element, parameter_name, value, config_plan)
+        config_plan.planned += 1
+
+    def __iter__(self):
+        """Yield (element, parameter name, value, ConfigPlan) tuples."""
+        return iter(self.writes.values())
+
+
+class RunPlanner(object):
+    """Builds one write plan for many configurations.
+
+    Args:
+        client: Authenticated StreamBIMClient
+        ifc_guid_index: revit.guid_index.IfcGuidIndex of the document
+        get_checklist_metadata: Callable(checklist id) -> (group-by, building id)
+    """
+
+    def __init__(self, client, ifc_guid_index, get_checklist_metadata):
+        self.client = client
+        self.ifc_guid_index = ifc_guid_index
+        self.get_checklist_metadata = get_checklist_metadata
+
+    def plan(self, configs):
+        """Plan the writes of ``configs``.
+
+        Returns:
+            tuple: (WritePlan, list of ConfigPlan in configuration order)
+        """
+        write_plan = WritePlan()
+        config_plans = OrderedDict((id(config), ConfigPlan(config)) for config in configs)
+        for checklist_id, group in group_by_checklist(configs).items():
+            plans = [config_plans[id(config)] for config in group]
+            if not checklist_id:
+                logger.info("Skipping {} configuration(s) without checklist ID".format(len(plans)))
+                continue
+            try:
+                self._plan_checklist(checklist_id, plans, write_plan)
+            except Exception as e:
+                # A failed download plans nothing for its configurations
+                logger.error("Error planning checklist {}: {}".format(checklist_id, str(e)))
+        return write_plan, list(config_plans.values())
+
+    def _read_checklist(self, checklist_id, plans):
+        """Stream the checklist once, extracting the values of every configuration."""
+        download_seconds = 0.0
+        start_time = time.time()
+        for page in self.client.iter_checklist_item_pages(checklist_id):
+            download_seconds += time.time() - start_time
+            for config_plan in plans:
+                extract_start = time.time()
+                for item in page:
+                    config_plan.extract(item)
+                config_plan.item_count += len(page)
+                config_plan.timings['extract'] += time.time() - extract_start
+            start_time = time.time()
+        download_seconds += time.time() - start_time
+        for config_plan in plans:
+            config_plan.timings['download'] = download_seconds
+        return download_seconds
+
+    def _plan_checklist(self, checklist_id, plans, write_plan):
+        group_by, building_id = self.get_checklist_metadata(checklist_id)
+        is_grouped = bool(group_by)
+        if is_grouped and not building_id:
+            logger.warning("Cannot process grouped checklist {}: no building ID found".format(checklist_id))
+            return
+
+        download_seconds = self._read_checklist(checklist_id, plans)
+        item_count = plans[0].item_count
+        if not item_count:
+            logger.info("No checklist items found for checklist ID: {} ({})".format(
+                checklist_id, self.client.last_error or "empty"))
+            return
+        logger.info("Retrieved {} checklist items for {} configuration(s) in {:.2f}s".format(
+            item_count, len(plans), download_seconds))
+
+        if is_grouped:
+            # Resolve the group keys of all configurations in one go
+            start_time = time.time()
+            group_keys = set()
+            for config_plan in plans:
+                group_keys.update(config_plan.guid_to_value.keys())
+            try:
+                resolved = self.client.get_group_resolver().resolve_many(
+                    checklist_id, building_id, group_keys)
+            except Exception as e:
+                logger.error("Error resolving group keys: {}".format(str(e)))
+                resolved = {}
+            resolve_seconds = time.time() - start_time
+            for config_plan in plans:
+                guid_to_value = {}
+                for group_key, property_value in config_plan.guid_to_value.items():
+                    for guid in resolved.get(group_key, []):
+                        guid_to_value[guid] = property_value
+                config_plan.guid_to_value = guid_to_value
+                config_plan.timings['resolve'] = resolve_seconds
+            logger.info("Resolved {} groups of checklist {}".format(len(group_keys), checklist_id))
+
+        # Writes join the plan only once the whole checklist is planned
+        writes = []
+        for config_plan in plans:
+            start_time = time.time()
+            elements = self.ifc_guid_index.get_elements(config_plan.guid_to_value)
+            parameter_name = config_plan.config.revit_parameter
+            for guid, property_value in config_plan.guid_to_value.items():
+                element = elements.get(guid)
+                if element is not None:
+                    writes.append((element, parameter_name, property_value, config_plan))
+            config_plan.timings['lookup'] = time.time() - start_time
+        for write in writes:
+            write_plan.add(*write)
@@ -33,9 +33,23 @@ except ImportError:
             return func
         return decorator
 
+from revit import storage_registry
+from streambim.transport import HttpTransport
+from streambim.group_resolver import GroupKeyResolver
+from streambim.checklist_cache import ChecklistCache, hash_body
+from streambim.json_decode import parse_json, decode_utf8_in_place
+
 # Initialize logger
 logger = script.get_logger()
 
+# Checklist items fetched per request when paging through a checklist
+CHECKLIST_PAGE_SIZE = 2000
+
+
+class ChecklistPagingError(Exception):
+    """Raised when a checklist page repeats items of an earlier page."""
+
+
 # Define the StreamBIMSettingsSchema
 class StreamBIMSettingsSchema(BaseSchema):
     """Schema for storing StreamBIM settings and configurations using pickle serialization"""
@@ -58,29 +72,50 @@ def get_or_create_settings_storage(doc):
         return None
         
     try:
-        data_storages = FilteredElementCollector(doc)\
-            .OfClass(ExtensibleStorage.DataStorage)\
-            .ToElements()
-        
-        # Look for our storage with the schema
-        for ds in data_storages:
-            try:
-                # Check if this storage has our schema
-                entity = ds.GetEntity(StreamBIMSettingsSchema.schema)
-                if entity.IsValid():
-                    return ds
-            except Exception as e:
-                continue
+        # Look for our storage with the schema (registry-backed, no collector scan)
+        storage = storage_registry.find_storage(doc, StreamBIMSettingsSchema.schema.GUID)
+        if storage:
+            return storage
         
         # If not found, create a new one
         with revit.Transaction("Create StreamBIM Settings Storage", doc):
             new_storage = ExtensibleStorage.DataStorage.Create(doc)
-            return new_storage
+        storage_registry.invalidate(doc)
+        return new_storage
             
     except Exception as e:
         logger.error("Error in get_or_create_settings_storage: {}".format(str(e)))
         return None
 
+def _read_streambim_settings(storages):
+    """Registry loader: snapshot the stored StreamBIM schema fields."""
+    settings = {"project_id": None, "pickled_configs": None}
+    for ds in storages:
+        try:
+            schema = StreamBIMSettingsSchema(ds)
+            if not schema.is_valid:
+                continue
+            if settings["pickled_configs"] is None:
+                settings["pickled_configs"] = schema.get("pickled_configs")
+            if not settings["project_id"]:
+                settings["project_id"] = schema.get("project_id") or None
+        except Exception as e:
+            continue
+    return settings
+
+def get_streambim_settings(doc):
+    """Get the cached StreamBIM settings snapshot for a document.
+    
+    Returns:
+        dict: Copy with 'project_id' and 'pickled_configs'
+    """
+    try:
+        return dict(storage_registry.get_cached_settings(
+            doc, StreamBIMSettingsSchema.schema.GUID, _read_streambim_settings))
+    except Exception as e:
+        logger.error("Error reading StreamBIM settings: {}".format(str(e)))
+        return _read_streambim_settings([])
+
 def load_configs_with_pickle(doc):
     """Load configurations from StreamBIM storage using pickle serialization."""
     if not doc:
@@ -88,18 +123,8 @@ def load_configs_with_pickle(doc):
         return []
         
     try:
-        # Get storage
-        storage = get_or_create_settings_storage(doc)
-        if not storage:
-            logger.error("Failed to get or create StreamBIM storage")
-            return []
-            
-        # Load configurations
-        schema = StreamBIMSettingsSchema(storage)
-        if not schema.is_valid:
-            return []
-            
-        pickled_configs = schema.get("pickled_configs")
+        # Read the cached settings snapshot (no storage is created on read)
+        pickled_configs = get_streambim_settings(doc)["pickled_configs"]
         if not pickled_configs:
             return []
             
@@ -145,6 +170,7 @@ def save_configs_with_pickle(doc, config_dicts):
                             
                     # Save configurations
                     entity.set("pickled_configs", encoded_data)
+            storage_registry.invalidate(doc)
                     
             return True
         except Exception as e:
@@ -161,32 +187,17 @@ def get_saved_project_id(doc):
         return None
         
     try:
-        data_storages = FilteredElementCollector(doc)\
-            .OfClass(ExtensibleStorage.DataStorage)\
-            .ToElements()
-        
-        for ds in data_storages:
-            try:
-                # Check if this storage has our schema
-                entity = ds.GetEntity(StreamBIMSettingsSchema.schema)
-                if entity.IsValid():
-                    schema = StreamBIMSettingsSchema(ds)
-                    if schema.is_valid:
-                        project_id = schema.get("project_id")
-                        if project_id:
-                            return project_id
-            except Exception as e:
-                continue
-        
-        return None
+        return get_streambim_settings(doc)["project_id"]
     except Exception as e:
         logger.error("Error in get_saved_project_id: {0}".format(str(e)))
         return None
 
 # StreamBIM API client
 class StreamBIMClient:
-    def __init__(self, base_url="https://app.streambim.com"):
+    def __init__(self, base_url="https://app.streambim.com", transport=None):
         self.base_url = base_url
+        # Keep-alive connections, gzip and retry/backoff shared by all calls
+        self.transport = transport or HttpTransport()
         self.idToken = None
         self.accessToken = None
         self.username = None
@@ -264,11 +275,7 @@ class StreamBIMClient:
                 "Content-Type": "application/json; charset=utf-8"
             }
             
-            req = urllib2.Request(url, data=data.encode('utf-8'))
-            for key, value in headers.items():
-                req.add_header(key, value)
-            
-            response = urllib2.urlopen(req)
+            response = self.transport.request("POST", url, data.encode('utf-8'), headers)
             result = json.loads(response.read())
 
             # Check for MFA challenge
@@ -370,11 +377,7 @@ class StreamBIMClient:
                 "Content-Type": "application/json; charset=utf-8"
             }
             
-            req = urllib2.Request(url, data=data.encode('utf-8'))
-            for key, value in headers.items():
-                req.add_header(key, value)
-            
-            response = urllib2.urlopen(req)
+            response = self.transport.request("POST", url, data.encode('utf-8'), headers)
             result = json.loads(response.read())
 
             if 'idToken' in result and 'accessToken' in result:
@@ -423,24 +426,12 @@ class StreamBIMClient:
             }
     
     def _decode_utf8(self, data):
-        """Recursively decode UTF-8 strings in the API response."""
-        if isinstance(data, dict):
-            return {self._decode_utf8(key): self._decode_utf8(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self._decode_utf8(item) for item in data]
-        elif isinstance(data, tuple):
-            return tuple(self._decode_utf8(item) for item in data)
-        elif isinstance(data, set):
-            return {self._decode_utf8(item) for item in data}
-        elif isinstance(data, str):
-            try:
-                return data.decode('utf-8')
-            except (UnicodeError, AttributeError):
-                return data
-        elif isinstance(data, unicode):
-            return data
-        else:
-            return data
+        """Decode UTF-8 strings in already parsed data, in place.
+        
+        Responses are decoded at parse time by parse_json; this is kept for
+        values obtained elsewhere.
+        """
+        return decode_utf8_in_place(data)
         
     def get_projects(self):
         """Get list of available projects"""
@@ -450,15 +441,12 @@ class StreamBIMClient:
             
         try:
             url = "{}/mgw/api/v3/project-links?filter%5Bactive%5D=true".format(self.base_url)
-            req = urllib2.Request(url)
-            req.add_header('Authorization', 'Bearer {}'.format(self.idToken))
-            req.add_header('Accept', 'application/vnd.api+json')
-            
-            response = urllib2.urlopen(req)
-            result = json.loads(response.read())
-            
-            # Decode UTF-8 strings in the response
-            result = self._decode_utf8(result)
+            response = self.transport.request("GET", url, headers={
+                'Authorization': 'Bearer {}'.format(self.idToken),
+                'Accept': 'application/vnd.api+json'
+            })
+            # Strings are decoded to unicode while parsing
+            result = parse_json(response.read())
             
             self.projects = result.get('data', [])
             return self.projects
@@ -488,15 +476,12 @@ class StreamBIMClient:
                 self.base_url, self.current_project
             )
             
-            req = urllib2.Request(url)
-            req.add_header('Authorization', 'Bearer {}'.format(self.idToken))
-            req.add_header('Accept', 'application/vnd.api+json')
-            
-            response = urllib2.urlopen(req)
-            result = json.loads(response.read())
-            
-            # Decode UTF-8 strings in the response
-            result = self._decode_utf8(result)
+            response = self.transport.request("GET", url, headers={
+                'Authorization': 'Bearer {}'.format(self.idToken),
+                'Accept': 'application/vnd.api+json'
+            })
+            # Strings are decoded to unicode while parsing
+            result = parse_json(response.read())
             
             return result.get('data', [])
         except urllib2.HTTPError as e:
@@ -510,79 +495,287 @@ class StreamBIMClient:
             self.last_error = str(e)
             return []
     
-    def get_checklist_items(self, checklist_id, checklist_item=None, limit=10000):
-        """Get checklist items for a specific checklist
+    def _build_checklist_query(self, checklist_id, checklist_item, skip, limit):
+        """Build the export query for one page of checklist items."""
+        query = {
+            "key": "object",
+            "sort": {"field": "title", "descending": False},
+            "page": {"skip": skip, "limit": limit},
+            "filter": {
+                "checklist": checklist_id
+            },
+            "timeZone": "Europe/Stockholm",
+            "format": "json",
+            "filename": ""
+        }
+
+        # Add checklist item filter if specified
+        if checklist_item:
+            # Convert checklist_item to UTF-8 if it's not already
+            if isinstance(checklist_item, str):
+                checklist_item = checklist_item.decode('utf-8') if not isinstance(checklist_item, unicode) else checklist_item
+            
+            # Add to filter but don't override existing checklist filter
+            query["filter"].update({
+                "properties": {checklist_item: {"$exists": True}}
+            })
+        return query
+    
+    def _fetch_checklist_page(self, checklist_id, checklist_item, skip, limit, cached_page=None):
+        """Fetch and decode one page of checklist items. Raises on errors.
+        
+        A cached page is revalidated with its ETag / Last-Modified, or by
+        the hash of the response body when the server sends neither, and
+        its decoded items are reused if the page is unchanged.
+        
+        Returns:
+            tuple: (page record {'etag', 'last_modified', 'hash', 'items'},
+                    True if the cached page was reused)
+        """
+        query = self._build_checklist_query(checklist_id, checklist_item, skip, limit)
+
+        # Convert the entire query to UTF-8 JSON
+        query_json = json.dumps(query, ensure_ascii=False).encode('utf-8')
+        
+        # Encode the query as a base64 string
+        encoded_query = base64.b64encode(query_json)
+        
+        url = "{}/project-{}/api/v1/checklists/export/json/?query={}".format(
+            self.base_url, self.current_project, encoded_query
+        )
+        
+        headers = {
+            'Authorization': 'Bearer {}'.format(self.idToken),
+            'Accept': '*/*'
+        }
+        if cached_page:
+            if cached_page.get('etag'):
+                headers['If-None-Match'] = cached_page['etag']
+            if cached_page.get('last_modified'):
+                headers['If-Modified-Since'] = cached_page['last_modified']
+        
+        response = self.transport.request("GET", url, headers=headers)
+        if cached_page and response.status == 304:
+            return cached_page, True
+        
+        body = response.read()
+        body_hash = hash_body(body)
+        if cached_page and cached_page.get('hash') == body_hash:
+            items, reused = cached_page['items'], True
+        else:
+            # Strings are decoded to unicode while parsing
+            items, reused = parse_json(body).get('data', []), False
+        
+        return {
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'hash': body_hash,
+            'items': items
+        }, reused
+    
+    def _set_checklist_error(self, error):
+        """Set last_error for a failed checklist item request."""
+        if isinstance(error, urllib2.HTTPError):
+            error_message = "HTTP Error: {} - {}".format(error.code, error.reason)
+            if error.code == 401:
+                error_message = "Authentication failed. Please log in again."
+            elif error.code == 500:
+                error_message = "Server error. The query might be malformed: {}".format(error.read())
+            self.last_error = error_message
+        elif isinstance(error, UnicodeError):
+            self.last_error = "Unicode error: {}".format(str(error))
+        else:
+            self.last_error = str(error)
+    
+    def _check_page_overlap(self, page, seen_keys, skip):
+        """Add the keys of a page's items to seen_keys.
+        
+        Raises:
+            ChecklistPagingError: If an item was already on an earlier page
+        """
+        repeated = 0
+        for item in page:
+            key = item.get('id') or item.get('object')
+            if key is None:
+                continue
+            if key in seen_keys:
+                repeated += 1
+            seen_keys.add(key)
+        if repeated:
+            raise ChecklistPagingError(
+                "Checklist page at offset {} repeats {} items of earlier pages; "
+                "the checklist changed order during the download, please try again".format(skip, repeated))
+    
+    def get_checklist_cache(self):
+        """Return the checklist item cache of the current project."""
+        cache = getattr(self, '_checklist_cache', None)
+        if cache is None or cache.project_id != self.current_project:
+            cache = ChecklistCache(self.current_project)
+            self._checklist_cache = cache
+        return cache
+    
+    def iter_checklist_item_pages(self, checklist_id, checklist_item=None, limit=0,
+                                  page_size=CHECKLIST_PAGE_SIZE, use_cache=True):
+        """Yield the items of a checklist one page (list) at a time.
+        
+        Each page is a separate request of at most ``page_size`` items and is
+        decoded on its own, so memory stays bounded by the page size and
+        callers can process a page while the rest is still to be fetched.
+        
+        Complete downloads (``limit`` 0) go through the project's checklist
+        cache (see streambim.checklist_cache): cached pages are revalidated
+        and reused when unchanged, and the cache counts a hit or a miss.
+        
+        If the first page fails nothing is yielded and last_error is set, as
+        with get_checklist_items. A failure on a later page sets last_error
+        and re-raises, so a truncated download is never taken as complete.
+        
+        The title order used for paging is not unique, so rows with equal
+        titles can move between pages from one request to the next. A page
+        repeating an earlier page's items means others were never returned;
+        it fails the download like a failed page (ChecklistPagingError).
         
         Args:
             checklist_id: ID of the checklist to fetch items from
             checklist_item: Optional specific checklist item/property to filter by
             limit: Maximum number of items to fetch. Use 0 for no limit.
+            page_size: Items per request
+            use_cache: Revalidate and update the local checklist cache
         """
         if not self.idToken or not self.current_project:
             self.last_error = "Not authenticated or no project selected"
-            return []
+            return
+        
+        cache = self.get_checklist_cache() if use_cache and limit <= 0 else None
+        if cache is not None:
+            cached_pages = cache.iter_pages(checklist_id, checklist_item, page_size)
+            writer = cache.begin(checklist_id, checklist_item, page_size)
+        else:
+            cached_pages, writer = iter(()), None
         
+        all_reused = True
+        completed = False
+        skip = 0
+        seen_keys = set()
         try:
-            # Create base query object
-            query = {
-                "key": "object",
-                "sort": {"field": "title", "descending": False},
-                "page": {"skip": 0, "limit": limit if limit > 0 else 100000},
-                "filter": {
-                    "checklist": checklist_id
-                },
-                "timeZone": "Europe/Stockholm",
-                "format": "json",
-                "filename": ""
-            }
-
-            # Add checklist item filter if specified
-            if checklist_item:
-                # Convert checklist_item to UTF-8 if it's not already
-                if isinstance(checklist_item, str):
-                    checklist_item = checklist_item.decode('utf-8') if not isinstance(checklist_item, unicode) else checklist_item
-                
-                # Add to filter but don't override existing checklist filter
-                query["filter"].update({
-                    "properties": {checklist_item: {"$exists": True}}
-                })
-
-            # Convert the entire query to UTF-8 JSON
-            query_json = json.dumps(query, ensure_ascii=False).encode('utf-8')
-            
-            # Encode the query as a base64 string
-            encoded_query = base64.b64encode(query_json)
-            
-            url = "{}/project-{}/api/v1/checklists/export/json/?query={}".format(
-                self.base_url, self.current_project, encoded_query
-            )
-            
-            req = urllib2.Request(url)
-            req.add_header('Authorization', 'Bearer {}'.format(self.idToken))
-            req.add_header('Accept', '*/*')
-            
-            response = urllib2.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
-            
-            # Decode UTF-8 strings in the response
-            result = self._decode_utf8(result)
-
-            return result.get('data', [])
-        except urllib2.HTTPError as e:
-            error_message = "HTTP Error: {} - {}".format(e.code, e.reason)
-            if e.code == 401:
-                error_message = "Authentication failed. Please log in again."
-            elif e.code == 500:
-                error_message = "Server error. The query might be malformed: {}".format(e.read())
-                
-            self.last_error = error_message
-            return []
-        except UnicodeError as e:
-            self.last_error = "Unicode error: {}".format(str(e))
-            return []
-        except Exception as e:
-            self.last_error = str(e)
+            while True:
+                page_limit = page_size
+                if limit > 0:
+                    page_limit = min(page_size, limit - skip)
+                    if page_limit <= 0:
+                        return
+                cached_page = next(cached_pages, None)
+                try:
+                    record, reused = self._fetch_checklist_page(
+                        checklist_id, checklist_item, skip, page_limit, cached_page)
+                except Exception as e:
+                    self._set_checklist_error(e)
+                    if skip == 0:
+                        return
+                    logger.error("Checklist download failed after {} items: {}".format(skip, self.last_error))
+                    raise
+                page = record['items']
+                try:
+                    self._check_page_overlap(page, seen_keys, skip)
+                except ChecklistPagingError as e:
+                    self.last_error = str(e)
+                    logger.error("Checklist download failed after {} items: {}".format(skip, self.last_error))
+                    raise
+                all_reused = all_reused and reused
+                if writer is not None:
+                    writer.write(record)
+                if page:
+                    yield page
+                if len(page) < page_limit:
+                    completed = True
+                    return
+                skip += len(page)
+        finally:
+            if cache is not None:
+                # A hit also needs the cached checklist to have no extra pages
+                hit = completed and all_reused and next(cached_pages, None) is None
+                cached_pages.close()
+                if completed:
+                    cache.record(hit)
+                    logger.debug("[PERF] Checklist {} {} cache ({})".format(
+                        checklist_id, "served from" if hit else "refreshed", cache.get_status_text()))
+                if completed and not hit:
+                    writer.commit()
+                else:
+                    writer.discard()
+    
+    def iter_checklist_items(self, checklist_id, checklist_item=None, limit=0,
+                             page_size=CHECKLIST_PAGE_SIZE):
+        """Yield checklist items one by one, fetched page by page.
+        
+        See iter_checklist_item_pages for paging and error behaviour.
+        """
+        for page in self.iter_checklist_item_pages(checklist_id, checklist_item, limit, page_size):
+            for item in page:
+                yield item
+    
+    def get_checklist_items(self, checklist_id, checklist_item=None, limit=10000):
+        """Get checklist items for a specific checklist
+        
+        Items are fetched in pages; use iter_checklist_items to process them
+        while downloading instead of holding the whole checklist.
+        
+        Args:
+            checklist_id: ID of the checklist to fetch items from
+            checklist_item: Optional specific checklist item/property to filter by
+            limit: Maximum number of items to fetch. Use 0 for no limit.
+        """
+        items = []
+        try:
+            for page in self.iter_checklist_item_pages(checklist_id, checklist_item, limit):
+                items.extend(page)
+        except Exception:
             return []
+        return items
+    
+    def _request_ifc_search(self, checklist_id, building_id, checklist_value):
+        """Create an IFC search; returns the searchId or None. Raises on HTTP errors."""
+        url = "{}/project-{}/api/v1/ifc-searches".format(
+            self.base_url, self.current_project
+        )
+        
+        # Build rules with only checklistValue (no @kind or @Document Id needed)
+        rules = [[{
+            "propKey": "checklistValue",
+            "propValue": checklist_value,
+            "buildingId": building_id,
+            "checklistId": checklist_id
+        }]]
+        
+        data = json.dumps({"rules": rules}, ensure_ascii=False).encode('utf-8')
+        
+        response = self.transport.request("POST", url, data, {
+            'Authorization': 'Bearer {}'.format(self.idToken),
+            'Content-Type': 'application/json',
+            'Accept': '*/*'
+        })
+        # Strings are decoded to unicode while parsing
+        result = parse_json(response.read())
+        
+        search_id = result.get('searchId')
+        if search_id:
+            return str(search_id)
+        return None
+    
+    def _request_ifc_object_refs(self, search_id, limit=500):
+        """Get the IFC object refs of a search. Raises on HTTP errors."""
+        url = "{}/project-{}/api/v1/v2/ifc-object-refs-sets?page[limit]={}&searchId={}".format(
+            self.base_url, self.current_project, limit, search_id
+        )
+        
+        response = self.transport.request("GET", url, headers={
+            'Authorization': 'Bearer {}'.format(self.idToken),
+            'Accept': 'application/vnd.api+json'
+        })
+        # Strings are decoded to unicode while parsing
+        result = parse_json(response.read())
+        
+        return result.get('data', [])
     
     def create_ifc_search(self, checklist_id, building_id, checklist_value):
         """Create an IFC search for a grouped checklist value.
@@ -600,37 +793,10 @@ class StreamBIMClient:
             return None
         
         try:
-            url = "{}/project-{}/api/v1/ifc-searches".format(
-                self.base_url, self.current_project
-            )
-            
-            # Build rules with only checklistValue (no @kind or @Document Id needed)
-            rules = [[{
-                "propKey": "checklistValue",
-                "propValue": checklist_value,
-                "buildingId": building_id,
-                "checklistId": checklist_id
-            }]]
-            
-            data = json.dumps({"rules": rules}, ensure_ascii=False).encode('utf-8')
-            
-            req = urllib2.Request(url, data=data)
-            req.add_header('Authorization', 'Bearer {}'.format(self.idToken))
-            req.add_header('Content-Type', 'application/json')
-            req.add_header('Accept', '*/*')
-            
-            response = urllib2.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
-            
-            # Decode UTF-8 strings in the response
-            result = self._decode_utf8(result)
-            
-            search_id = result.get('searchId')
-            if search_id:
-                return str(search_id)
-            else:
+            search_id = self._request_ifc_search(checklist_id, building_id, checklist_value)
+            if not search_id:
                 self.last_error = "No searchId in response"
-                return None
+            return search_id
                 
         except urllib2.HTTPError as e:
             error_message = "HTTP Error: {} - {}".format(e.code, e.reason)
@@ -662,22 +828,7 @@ class StreamBIMClient:
             return []
         
         try:
-            url = "{}/project-{}/api/v1/v2/ifc-object-refs-sets?page[limit]={}&searchId={}".format(
-                self.base_url, self.current_project, limit, search_id
-            )
-            
-            req = urllib2.Request(url)
-            req.add_header('Authorization', 'Bearer {}'.format(self.idToken))
-            req.add_header('Accept', 'application/vnd.api+json')
-            
-            response = urllib2.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
-            
-            # Decode UTF-8 strings in the response
-            result = self._decode_utf8(result)
-            
-            data = result.get('data', [])
-            return data
+            return self._request_ifc_object_refs(search_id, limit)
             
         except urllib2.HTTPError as e:
             error_message = "HTTP Error: {} - {}".format(e.code, e.reason)
@@ -692,11 +843,24 @@ class StreamBIMClient:
             logger.error("Error getting IFC object refs: {}".format(str(e)))
             return []
     
+    def get_group_resolver(self):
+        """Return the group key resolver of the current project.
+        
+        The resolver keeps its results in memory and in a per-project cache
+        file, so it is reused for as long as the project stays selected.
+        """
+        resolver = getattr(self, '_group_resolver', None)
+        if resolver is None or resolver.project_id != self.current_project:
+            resolver = GroupKeyResolver(self, self.current_project)
+            self._group_resolver = resolver
+        return resolver
+    
     def resolve_group_key_to_ifc_guids(self, checklist_id, building_id, group_key):
         """Resolve a grouped checklist group key to a list of IFC GUIDs.
         
-        This method caches results per (checklist_id, building_id, group_key) to avoid
-        redundant API calls during a single import run.
+        Results are cached per (checklist_id, building_id, group_key) in memory
+        and on disk (see streambim.group_resolver). Use
+        get_group_resolver().resolve_many to resolve many keys concurrently.
         
         Args:
             checklist_id: ID of the checklist
@@ -706,33 +870,7 @@ class StreamBIMClient:
         Returns:
             List of IFC GUID strings (matching Revit IfcGUID parameter values)
         """
-        # Initialize cache if it doesn't exist
-        if not hasattr(self, '_group_key_cache'):
-            self._group_key_cache = {}
-        
-        # Check cache first
-        cache_key = (checklist_id, building_id, group_key)
-        if cache_key in self._group_key_cache:
-            return self._group_key_cache[cache_key]
-        
-        # Resolve via API
-        search_id = self.create_ifc_search(checklist_id, building_id, group_key)
-        
-        if not search_id:
-            self._group_key_cache[cache_key] = []
+        if not self.idToken or not self.current_project:
+            self.last_error = "Not authenticated or no project selected"
             return []
-        
-        # Get IFC object refs (use high limit to get all results)
-        object_refs = self.get_ifc_object_refs(search_id, limit=10000)
-        
-        # Extract IDs (these match Revit IfcGUID parameter values)
-        ifc_guids = []
-        for ref in object_refs:
-            ref_id = ref.get('id')
-            if ref_id:
-                ifc_guids.append(ref_id)
-        
-        # Cache the result
-        self._group_key_cache[cache_key] = ifc_guids
-        
-        return ifc_guids 
\ No newline at end of file
+        return self.get_group_resolver().resolve(checklist_id, building_id, group_key)
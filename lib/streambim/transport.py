@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""HTTP transport for the StreamBIM client.
+
+StreamBIMClient used to build a fresh ``urllib2`` request, and with it a new
+TCP/TLS connection, for every API call. :class:`HttpTransport` keeps a small
+pool of persistent (keep-alive) connections per host, asks for gzip
+responses, retries rate-limited (429) and failing (5xx) requests with
+bounded exponential backoff, and records the latency of every request.
+
+Errors are raised as ``urllib2.HTTPError`` so callers keep handling
+``e.code`` / ``e.reason`` / ``e.read()`` exactly as with ``urllib2.urlopen``.
+
+Any object with a compatible ``request(method, url, body=None, headers=None)``
+method can be passed to ``StreamBIMClient(transport=...)`` instead.
+"""
+
+import random
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from io import BytesIO
+
+try:
+    import httplib
+    import urllib2
+    from urllib import getproxies, proxy_bypass
+    from urlparse import urlsplit
+except ImportError:
+    import http.client as httplib
+    import urllib.request as urllib2
+    from urllib.request import getproxies, proxy_bypass
+    from urllib.parse import urlsplit
+
+from pyrevit import script
+
+logger = script.get_logger()
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Statuses that mean the request was not processed, retried for any method
+NOT_PROCESSED_STATUS_CODES = (429, 503)
+
+# Other retries are limited to methods that are safe to repeat
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+
+# Idle connections kept per host
+MAX_IDLE_CONNECTIONS = 4
+
+# Latency records kept for get_metrics_summary()
+METRICS_MAX_RECORDS = 500
+
+_CONNECTION_ERRORS = (socket.error, httplib.HTTPException)
+
+
+class TransportResponse(object):
+    """A fully read HTTP response with a decoded (decompressed) body."""
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.code = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def getcode(self):
+        return self.status
+
+
+def _decode_body(body, content_encoding):
+    if not body or not content_encoding:
+        return body
+    content_encoding = content_encoding.lower()
+    if content_encoding == 'gzip':
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if content_encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpTransport(object):
+    """Keep-alive HTTP(S) transport with gzip, retry/backoff and latency metrics.
+
+    Args:
+        timeout: Socket timeout in seconds
+        max_retries: Retries after the first attempt for retryable failures
+        backoff_base: First backoff delay in seconds, doubled per retry
+        backoff_max: Upper bound of one backoff delay (and of Retry-After)
+        use_gzip: Send ``Accept-Encoding: gzip, deflate``
+        sleep: Sleep function, replaceable for tests
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 use_gzip=True, sleep=time.sleep):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.use_gzip = use_gzip
+        self.sleep = sleep
+        self.metrics = deque(maxlen=METRICS_MAX_RECORDS)
+        self.connections_opened = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    # --- connection pool ---
+
+    def _proxy_for(self, scheme, host):
+        try:
+            proxy = getproxies().get(scheme)
+            if proxy and not proxy_bypass(host):
+                return urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+        except Exception:
+            pass
+        return None
+
+    def _open_connection(self, key):
+        scheme, host, port = key
+        proxy = self._proxy_for(scheme, host)
+        if proxy is not None:
+            proxy_port = proxy.port or 80
+            if scheme == 'https':
+                connection = httplib.HTTPSConnection(proxy.hostname, proxy_port, timeout=self.timeout)
+                connection.set_tunnel(host, port)
+            else:
+                connection = httplib.HTTPConnection(proxy.hostname, proxy_port, timeout=self.timeout)
+        elif scheme == 'https':
+            connection = httplib.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            connection = httplib.HTTPConnection(host, port, timeout=self.timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return connection, proxy is not None and scheme == 'http'
+
+    def _acquire(self, key):
+        """Return (connection, via_http_proxy, reused)."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                connection, via_proxy = idle.pop()
+                return connection, via_proxy, True
+        connection, via_proxy = self._open_connection(key)
+        return connection, via_proxy, False
+
+    def _release(self, key, connection, via_proxy):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_CONNECTIONS:
+                idle.append((connection, via_proxy))
+                return
+        connection.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    # --- requests ---
+
+    def _send_once(self, method, url, parts, body, headers):
+        """Send one attempt on a pooled connection.
+
+        Returns:
+            tuple: (status, reason, headers dict with lower-case names, body, reused)
+        """
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = '{}?{}'.format(path, parts.query)
+
+        # A pooled connection may have been closed by the server while idle;
+        # that surfaces as a connection error and is retried on the next one
+        for _ in range(MAX_IDLE_CONNECTIONS + 1):
+            connection, via_proxy, reused = self._acquire(key)
+            try:
+                connection.request(method, url if via_proxy else path, body, headers)
+                response = connection.getresponse()
+                raw_body = response.read()
+            except _CONNECTION_ERRORS:
+                connection.close()
+                if reused:
+                    continue
+                raise
+            response_headers = dict((name.lower(), value) for name, value in response.getheaders())
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection, via_proxy)
+            return response.status, response.reason, response_headers, raw_body, reused
+        raise httplib.HTTPException("Connection to {} failed".format(parts.hostname))
+
+    def _backoff_delay(self, retry, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** retry))
+        # Full jitter keeps parallel clients from retrying in lockstep
+        return random.uniform(delay / 2.0, delay)
+
+    def request(self, method, url, body=None, headers=None):
+        """Send a request, retrying 429/5xx and connection errors with backoff.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            body: Request body (bytes) or None
+            headers: Dict of request headers
+
+        Returns:
+            TransportResponse: Response with status < 400 and decoded body
+
+        Raises:
+            urllib2.HTTPError: For a status >= 400 once retries are exhausted
+            socket.error / httplib.HTTPException: If the server stays unreachable
+        """
+        parts = urlsplit(url)
+        request_headers = dict(headers or {})
+        if self.use_gzip:
+            request_headers.setdefault('Accept-Encoding', 'gzip, deflate')
+        request_headers.setdefault('Connection', 'keep-alive')
+        may_retry_all = method.upper() in IDEMPOTENT_METHODS
+
+        start_time = time.time()
+        attempt = 0
+        reused = False
+        while True:
+            try:
+                status, reason, response_headers, raw_body, reused = self._send_once(
+                    method, url, parts, body, request_headers)
+            except _CONNECTION_ERRORS as e:
+                if not may_retry_all or attempt >= self.max_retries:
+                    self._record(method, parts.path, None, start_time, attempt + 1, 0, reused)
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.debug("StreamBIM {} {} failed ({}), retrying in {:.2f}s".format(
+                    method, parts.path, e, delay))
+                self.sleep(delay)
+                attempt += 1
+                continue
+
+            retryable = (status in NOT_PROCESSED_STATUS_CODES
+                         or (status in RETRY_STATUS_CODES and may_retry_all))
+            if retryable and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, _parse_retry_after(response_headers.get('retry-after')))
+                logger.debug("StreamBIM {} {} returned {}, retrying in {:.2f}s".format(
+                    method, parts.path, status, delay))
+                self.sleep(delay)
+                attempt += 1
+                continue
+            break
+
+        try:
+            data = _decode_body(raw_body, response_headers.get('content-encoding'))
+        except zlib.error:
+            data = raw_body
+        self._record(method, parts.path, status, start_time, attempt + 1, len(raw_body or b''), reused)
+
+        if status >= 400:
+            raise urllib2.HTTPError(url, status, reason, response_headers, BytesIO(data or b''))
+        return TransportResponse(url, status, reason, response_headers, data)
+
+    # --- metrics ---
+
+    def _record(self, method, path, status, start_time, attempts, size, reused):
+        seconds = time.time() - start_time
+        self.metrics.append({
+            'method': method,
+            'path': path,
+            'status': status,
+            'seconds': seconds,
+            'attempts': attempts,
+            'bytes': size,
+            'reused': reused,
+        })
+        logger.debug("[PERF] StreamBIM {} {}: {} in {:.3f}s ({} attempt(s), {} bytes{})".format(
+            method, path, status, seconds, attempts, size, ", reused connection" if reused else ""))
+
+    def get_metrics_summary(self):
+        """Summarise the recorded requests.
+
+        Returns:
+            dict: {'requests', 'retries', 'errors', 'connections_opened',
+                   'reused', 'bytes', 'mean_seconds', 'p95_seconds', 'max_seconds'}
+        """
+        records = list(self.metrics)
+        latencies = sorted(record['seconds'] for record in records)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'retries': sum(record['attempts'] - 1 for record in records),
+            'errors': sum(1 for record in records if record['status'] is None or record['status'] >= 400),
+            'connections_opened': self.connections_opened,
+            'reused': sum(1 for record in records if record['reused']),
+            'bytes': sum(record['bytes'] for record in records),
+            'mean_seconds': sum(latencies) / count if count else 0.0,
+            'p95_seconds': latencies[min(count - 1, int(0.95 * count))] if count else 0.0,
+            'max_seconds': latencies[-1] if count else 0.0,
+        }
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""End-to-end check of the StreamBIM HTTP transport against a local stand-in server.
+
+Starts a threaded HTTP server on 127.0.0.1 that simulates the StreamBIM API's
+awkward moments - slow responses, flaky 503s, 429 rate limiting with
+``Retry-After``, persistent 500s, gzip bodies and dropped keep-alive
+connections - and runs ``streambim.transport.HttpTransport`` against it.
+It then compares sequential request latency with a new ``urllib2``
+connection per call (the client's previous behaviour).
+
+Runs on plain CPython 2.7/3, from the extension's ``lib`` folder::
+
+    python streambim_harness.py --requests 200
+
+The exit code is 1 when a check fails.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import types
+from io import BytesIO
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    import urllib2
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    import urllib.request as urllib2
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds the /slow endpoint waits before answering
+SLOW_SECONDS = 0.2
+
+# Failures /flaky returns before answering 200 (per flaky key)
+FLAKY_FAILURES = 2
+
+# Default delay per new connection, standing in for the TCP + TLS handshake
+# with the StreamBIM servers (loopback connections are otherwise free)
+DEFAULT_HANDSHAKE_MS = 20
+
+
+def install_stubs():
+    """Register a minimal ``pyrevit.script`` when pyRevit is not importable."""
+    try:
+        import pyrevit.script  # noqa: F401
+        return
+    except ImportError:
+        pass
+    pyrevit = types.ModuleType('pyrevit')
+    pyrevit_script = types.ModuleType('pyrevit.script')
+    pyrevit_script.get_logger = lambda: logging.getLogger('streambim_harness')
+    pyrevit.script = pyrevit_script
+    sys.modules['pyrevit'] = pyrevit
+    sys.modules['pyrevit.script'] = pyrevit_script
+    if LIB_DIR not in sys.path:
+        sys.path.insert(0, LIB_DIR)
+    if 'streambim' not in sys.modules:
+        # Skip streambim/__init__ dependencies; only the transport is loaded
+        package = types.ModuleType('streambim')
+        package.__path__ = [os.path.join(LIB_DIR, 'streambim')]
+        sys.modules['streambim'] = package
+
+
+# --- stand-in server ---
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handshake_seconds=0.0):
+        HTTPServer.__init__(self, address, _StandInHandler)
+        self.handshake_seconds = handshake_seconds
+        self.connections = 0
+        self.flaky_counts = {}
+        self.lock = threading.Lock()
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.handshake_seconds:
+            time.sleep(self.server.handshake_seconds)
+
+    def _send(self, status, payload, headers=None, drop=False):
+        body = json.dumps(payload).encode('utf-8')
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            buffer = BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode='wb') as zipped:
+                zipped.write(body)
+            body = buffer.getvalue()
+            headers = dict(headers or {}, **{'Content-Encoding': 'gzip'})
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if drop:
+            # Close without announcing it, like a server timing out an idle connection
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/ok':
+            self._send(200, {'data': [{'id': i, 'title': u'Sjekkliste {}'.format(i)} for i in range(50)]})
+        elif path == '/slow':
+            time.sleep(SLOW_SECONDS)
+            self._send(200, {'data': 'slow'})
+        elif path == '/flaky':
+            with self.server.lock:
+                count = self.server.flaky_counts.get(query, 0)
+                self.server.flaky_counts[query] = count + 1
+            if count < FLAKY_FAILURES:
+                self._send(503, {'error': 'unavailable'})
+            else:
+                self._send(200, {'data': 'recovered', 'failures': count})
+        elif path == '/ratelimit':
+            with self.server.lock:
+                count = self.server.flaky_counts.get('ratelimit', 0)
+                self.server.flaky_counts['ratelimit'] = count + 1
+            if count == 0:
+                self._send(429, {'error': 'slow down'}, {'Retry-After': '0'})
+            else:
+                self._send(200, {'data': 'allowed'})
+        elif path == '/error':
+            self._send(500, {'error': 'broken'})
+        elif path == '/drop':
+            self._send(200, {'data': 'dropping'}, drop=True)
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length).decode('utf-8')) if length else None
+        if self.path == '/echo':
+            self._send(200, {'echo': payload})
+        else:
+            self._send(500, {'error': 'broken'})
+
+
+def start_server(handshake_seconds=0.0):
+    """Start the stand-in server on a free local port; returns (server, base_url)."""
+    server = _ThreadingServer(('127.0.0.1', 0), handshake_seconds)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+
+# --- checks ---
+
+def run_checks(base_url, server):
+    """Run the transport against the stand-in server.
+
+    Returns:
+        list: (name, passed, detail) tuples
+    """
+    from streambim.transport import HttpTransport
+
+    results = []
+    sleeps = []
+
+    def check(name, passed, detail=""):
+        results.append((name, bool(passed), detail))
+
+    transport = HttpTransport(max_retries=3, backoff_base=0.01, backoff_max=0.05,
+                              sleep=lambda seconds: sleeps.append(seconds) or time.sleep(seconds))
+
+    connections_before = server.connections
+    for _ in range(10):
+        response = transport.request('GET', base_url + '/ok')
+    payload = json.loads(response.read().decode('utf-8'))
+    check("keep-alive reuses one connection", server.connections - connections_before == 1,
+          "{} connections for 10 requests".format(server.connections - connections_before))
+    check("gzip body decoded", response.headers.get('content-encoding') == 'gzip'
+          and len(payload['data']) == 50)
+
+    response = transport.request('GET', base_url + '/flaky?a')
+    check("503 retried until success", json.loads(response.read().decode('utf-8'))['failures'] == FLAKY_FAILURES,
+          "{} backoff sleeps".format(len(sleeps)))
+    check("backoff bounded", all(seconds <= transport.backoff_max for seconds in sleeps))
+
+    del sleeps[:]
+    response = transport.request('GET', base_url + '/ratelimit')
+    check("429 honours Retry-After", response.status == 200 and sleeps == [0.0], "sleeps {}".format(sleeps))
+
+    try:
+        transport.request('GET', base_url + '/error')
+        check("persistent 500 raises HTTPError", False)
+    except urllib2.HTTPError as e:
+        body = json.loads(e.read().decode('utf-8'))
+        check("persistent 500 raises HTTPError", e.code == 500 and body['error'] == 'broken')
+    check("retries recorded", transport.metrics[-1]['attempts'] == transport.max_retries + 1)
+
+    posts_before = len(transport.metrics)
+    try:
+        transport.request('POST', base_url + '/fail', b'{}', {'Content-Type': 'application/json'})
+    except urllib2.HTTPError:
+        pass
+    check("POST not retried on 500", transport.metrics[-1]['attempts'] == 1
+          and len(transport.metrics) == posts_before + 1)
+
+    response = transport.request('POST', base_url + '/echo', json.dumps({'rules': [1]}).encode('utf-8'),
+                                 {'Content-Type': 'application/json'})
+    check("POST body sent", json.loads(response.read().decode('utf-8'))['echo'] == {'rules': [1]})
+
+    transport.request('GET', base_url + '/drop')
+    response = transport.request('GET', base_url + '/ok')
+    check("recovers when the server drops an idle connection",
+          response.status == 200 and transport.metrics[-1]['attempts'] == 1)
+
+    start_time = time.time()
+    response = transport.request('GET', base_url + '/slow')
+    elapsed = time.time() - start_time
+    check("slow response waited for", response.status == 200 and elapsed >= SLOW_SECONDS,
+          "{:.3f}s".format(elapsed))
+
+    summary = transport.get_metrics_summary()
+    check("metrics recorded", summary['requests'] == len(transport.metrics) and summary['reused'] > 0,
+          "{requests} requests, {retries} retries, {connections_opened} connections".format(**summary))
+    transport.close()
+    return results
+
+
+def benchmark(base_url, count):
+    """Time ``count`` sequential GETs with the transport and with urllib2.
+
+    Returns:
+        dict: {'requests', 'transport_seconds', 'urllib2_seconds', 'speedup'}
+    """
+    from streambim.transport import HttpTransport
+
+    transport = HttpTransport()
+    start_time = time.time()
+    for _ in range(count):
+        transport.request('GET', base_url + '/ok').read()
+    transport_seconds = time.time() - start_time
+    transport.close()
+
+    start_time = time.time()
+    for _ in range(count):
+        request = urllib2.Request(base_url + '/ok')
+        request.add_header('Accept', 'application/json')
+        urllib2.urlopen(request).read()
+    urllib2_seconds = time.time() - start_time
+
+    return {
+        'requests': count,
+        'transport_seconds': transport_seconds,
+        'urllib2_seconds': urllib2_seconds,
+        'speedup': urllib2_seconds / transport_seconds if transport_seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StreamBIM transport check and benchmark")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--handshake-ms', type=float, default=DEFAULT_HANDSHAKE_MS,
+                        help="Simulated delay per new connection")
+    args = parser.parse_args(argv)
+
+    install_stubs()
+    server, base_url = start_server(args.handshake_ms / 1000.0)
+    try:
+        results = run_checks(base_url, server)
+        timing = benchmark(base_url, args.requests)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    failed = False
+    for name, passed, detail in results:
+        print("{} {}{}".format("PASS" if passed else "FAIL", name, " ({})".format(detail) if detail else ""))
+        failed = failed or not passed
+    print("{requests} GETs, {handshake} ms per new connection: transport {transport_seconds:.3f}s, "
+          "urllib2 {urllib2_seconds:.3f}s ({speedup:.1f}x)".format(handshake=args.handshake_ms, **timing))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,13 +4,19 @@
 import base64
 import pickle
 import uuid
-from Autodesk.Revit.DB import FilteredElementCollector, ExtensibleStorage, BuiltInCategory
+from Autodesk.Revit.DB import ExtensibleStorage, BuiltInCategory
 from pyrevit import revit, script
+from pyrevit.userconfig import user_config
 from zone3d.schema import Zone3DConfigSchema
+from revit import storage_registry
 
 # Initialize logger
 logger = script.get_logger()
 
+# User config section for the IFC pre-export budget (per user, not per project)
+IFC_EXPORT_CONFIG_SECTION = 'Zone3DIFCExport'
+IFC_EXPORT_KEY_TIME_BUDGET = 'timeBudgetSeconds'
+
 def serialize_config(config_dict):
     """Convert BuiltInCategory enums to integers for pickling.
     
@@ -100,8 +106,90 @@ def deserialize_config(config_dict):
     if "source_sort_descending" not in deserialized:
         deserialized["source_sort_descending"] = False
     
+    # IFC pre-export budget fields (backward compatibility: priority follows order, no budget)
+    if "ifc_export_priority" not in deserialized:
+        deserialized["ifc_export_priority"] = None
+    if "ifc_export_time_budget" not in deserialized:
+        deserialized["ifc_export_time_budget"] = None
+    
     return deserialized
 
+def get_ifc_export_priority(zone_config):
+    """Get the IFC pre-export priority of a configuration (lower runs first).
+    
+    Args:
+        zone_config: Configuration dictionary
+        
+    Returns:
+        int: ifc_export_priority if set, otherwise the configuration order
+    """
+    priority = zone_config.get("ifc_export_priority")
+    if priority is None:
+        priority = zone_config.get("order", 0)
+    try:
+        return int(priority)
+    except (TypeError, ValueError):
+        return 0
+
+def get_ifc_export_config_budget(zone_config):
+    """Get the optional per-configuration IFC pre-export time budget.
+    
+    Args:
+        zone_config: Configuration dictionary
+        
+    Returns:
+        float: Budget in seconds, or None when the configuration has no cap
+    """
+    budget = zone_config.get("ifc_export_time_budget")
+    try:
+        budget = float(budget)
+    except (TypeError, ValueError):
+        return None
+    return budget if budget > 0 else None
+
+def sort_configs_for_ifc_export(configs):
+    """Sort configurations by IFC pre-export priority, then order.
+    
+    Args:
+        configs: List of configuration dictionaries
+        
+    Returns:
+        list: New list in execution order
+    """
+    return sorted(configs, key=lambda c: (get_ifc_export_priority(c), c.get("order", 0)))
+
+def get_ifc_export_time_budget():
+    """Get the overall IFC pre-export time budget from user config.
+    
+    Returns:
+        float: Budget in seconds, or None when unlimited (default)
+    """
+    try:
+        if not hasattr(user_config, IFC_EXPORT_CONFIG_SECTION):
+            return None
+        section = getattr(user_config, IFC_EXPORT_CONFIG_SECTION)
+        budget = float(section.get_option(IFC_EXPORT_KEY_TIME_BUDGET, default_value=0) or 0)
+        return budget if budget > 0 else None
+    except Exception as ex:
+        logger.error("Error reading IFC export time budget: {}".format(ex))
+        return None
+
+def set_ifc_export_time_budget(seconds):
+    """Set the overall IFC pre-export time budget in user config.
+    
+    Args:
+        seconds: Budget in seconds; 0 or None disables the budget
+    """
+    try:
+        if not hasattr(user_config, IFC_EXPORT_CONFIG_SECTION):
+            user_config.add_section(IFC_EXPORT_CONFIG_SECTION)
+        section = getattr(user_config, IFC_EXPORT_CONFIG_SECTION)
+        section.set_option(IFC_EXPORT_KEY_TIME_BUDGET, float(seconds or 0))
+        user_config.save_changes()
+        logger.debug("IFC export time budget set to: {}".format(seconds))
+    except Exception as ex:
+        logger.error("Error setting IFC export time budget: {}".format(ex))
+
 def get_or_create_storage(doc):
     """Get existing or create new 3D Zone settings storage element."""
     if not doc:
@@ -110,33 +198,54 @@ def get_or_create_storage(doc):
         
     try:
         logger.debug("Searching for 3D Zone settings storage...")
-        data_storages = FilteredElementCollector(doc)\
-            .OfClass(ExtensibleStorage.DataStorage)\
-            .ToElements()
-        
-        # Look for our storage with the schema
-        for ds in data_storages:
-            try:
-                # Check if this storage has our schema
-                entity = ds.GetEntity(Zone3DConfigSchema.schema)
-                if entity.IsValid():
-                    logger.debug("Found existing 3D Zone settings storage")
-                    return ds
-            except Exception as e:
-                logger.debug("Error checking storage entity: {}".format(str(e)))
-                continue
+        # Look for our storage with the schema (registry-backed, no collector scan)
+        storage = storage_registry.find_storage(doc, Zone3DConfigSchema.schema.GUID)
+        if storage:
+            logger.debug("Found existing 3D Zone settings storage")
+            return storage
         
         logger.debug("No existing 3D Zone settings storage found, creating new one...")
         # If not found, create a new one
         with revit.Transaction("Create 3D Zone Settings Storage", doc):
             new_storage = ExtensibleStorage.DataStorage.Create(doc)
             logger.debug("Created new 3D Zone settings storage")
-            return new_storage
+        storage_registry.invalidate(doc)
+        return new_storage
             
     except Exception as e:
         logger.error("Error in get_or_create_storage: {}".format(str(e)))
         return None
 
+def _read_zone3d_settings(storages):
+    """Registry loader: snapshot the stored 3D Zone schema fields."""
+    settings = {"storage_id": None, "pickled_configs": None}
+    for ds in storages:
+        try:
+            schema = Zone3DConfigSchema(ds)
+            if schema.is_valid:
+                settings["storage_id"] = ds.Id
+                settings["pickled_configs"] = schema.get("pickled_configs")
+                return settings
+        except Exception as e:
+            logger.debug("Error checking storage entity: {}".format(str(e)))
+    return settings
+
+def get_zone3d_settings(doc):
+    """Get the cached 3D Zone settings snapshot for a document.
+    
+    Args:
+        doc: The Revit document
+        
+    Returns:
+        dict: Copy with 'storage_id' (ElementId or None) and 'pickled_configs'
+    """
+    try:
+        return dict(storage_registry.get_cached_settings(
+            doc, Zone3DConfigSchema.schema.GUID, _read_zone3d_settings))
+    except Exception as e:
+        logger.error("Error reading 3D Zone settings: {}".format(str(e)))
+        return _read_zone3d_settings([])
+
 def load_configs(doc):
     """Load configurations from 3D Zone storage using pickle serialization."""
     if not doc:
@@ -144,19 +253,13 @@ def load_configs(doc):
         return []
         
     try:
-        # Get storage
-        storage = get_or_create_storage(doc)
-        if not storage:
+        # Read the cached settings snapshot (no storage is created on read)
+        settings = get_zone3d_settings(doc)
+        if settings["storage_id"] is None:
             logger.debug("No storage found, returning empty config list")
             return []
             
-        # Load configurations
-        schema = Zone3DConfigSchema(storage)
-        if not schema.is_valid:
-            logger.debug("Invalid 3D Zone schema")
-            return []
-            
-        pickled_configs = schema.get("pickled_configs")
+        pickled_configs = settings["pickled_configs"]
         if not pickled_configs:
             logger.debug("No configurations found in storage")
             return []
@@ -217,9 +320,11 @@ def load_configs(doc):
                 logger.debug("Detected corrupted configuration data with BuiltInCategory objects.")
                 logger.debug("Attempting to clear corrupted configuration data...")
                 try:
+                    storage = doc.GetElement(settings["storage_id"])
                     with revit.Transaction("Clear Corrupted 3D Zone Configurations", doc):
                         with Zone3DConfigSchema(storage) as entity:
                             entity.set("pickled_configs", "")
+                    storage_registry.invalidate(doc)
                     logger.debug("Cleared corrupted configuration data. Please recreate configurations.")
                 except Exception as clear_error:
                     logger.error("Failed to clear corrupted data: {}".format(str(clear_error)))
@@ -271,6 +376,7 @@ def save_configs(doc, config_list):
                 with Zone3DConfigSchema(storage) as entity:
                     # Save configurations
                     entity.set("pickled_configs", encoded_data)
+            storage_registry.invalidate(doc)
                     
             logger.debug("Saved {} configurations to 3D Zone storage".format(len(config_list)))
             return True
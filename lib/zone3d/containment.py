@@ -2300,7 +2300,26 @@ def get_containing_area(element, doc, areas_by_level=None):
         logger.debug("Error getting containing area: {}".format(str(e)))
         return None
 
-def build_source_element_spatial_index(source_elements, doc, cell_size_feet=50.0, sort_property="ElementId", sort_descending=False):
+def _sort_candidates_by_rank(candidates, source_ranks, sort_property="ElementId", sort_descending=False):
+    """Order candidates by precomputed source rank (see core.compute_source_sort_ranks).
+    
+    Falls back to sorting by sort_property when no ranks are given or a candidate
+    was not ranked (e.g. overlap candidates outside the configured source set).
+    """
+    if source_ranks is not None:
+        try:
+            return sorted(candidates, key=lambda el: source_ranks[get_element_id_value(el.Id)])
+        except KeyError:
+            pass
+    if sort_property == "ElementId":
+        return sorted(candidates, key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
+    try:
+        from zone3d.core import sort_source_elements
+        return sort_source_elements(candidates, sort_property, descending=sort_descending)
+    except ImportError:
+        return sorted(candidates, key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
+
+def build_source_element_spatial_index(source_elements, doc, cell_size_feet=50.0, sort_property="ElementId", sort_descending=False, source_ranks=None):
     """Build a spatial hash index for source elements to enable fast containment queries.
     
     Creates a 2D grid (XY plane) where each cell contains a list of source elements
@@ -2313,6 +2332,8 @@ def build_source_element_spatial_index(source_elements, doc, cell_size_feet=50.0
         cell_size_feet: Size of each grid cell in Revit internal units (feet)
         sort_property: Property name to sort by (default: "ElementId")
         sort_descending: If True, sort in descending order (default: False)
+        source_ranks: Optional {element id int: rank} from core.compute_source_sort_ranks;
+            when given, elements are ordered by rank instead of re-reading the sort property
         
     Returns:
         dict: Spatial index mapping (ix, iy) -> sorted list of source elements
@@ -2326,17 +2347,7 @@ def build_source_element_spatial_index(source_elements, doc, cell_size_feet=50.0
     precompute_geometries(source_elements, doc)
     
     # Sort elements by specified property (elements should already be sorted, but ensure consistency)
-    # If sort_property is ElementId, use simple integer value sort
-    if sort_property == "ElementId":
-        sorted_elements = sorted(source_elements, key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
-    else:
-        # Import sort function from core
-        try:
-            from zone3d.core import sort_source_elements
-            sorted_elements = sort_source_elements(source_elements, sort_property, descending=sort_descending)
-        except ImportError:
-            # Fallback to ElementId sorting if import fails
-            sorted_elements = sorted(source_elements, key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
+    sorted_elements = _sort_candidates_by_rank(source_elements, source_ranks, sort_property, sort_descending)
     
     for element in sorted_elements:
         element_id = get_element_id_value(element.Id)
@@ -2377,7 +2388,7 @@ def build_source_element_spatial_index(source_elements, doc, cell_size_feet=50.0
     
     return spatial_index
 
-def get_containing_element_indexed(target_el, doc, element_index, cell_size_feet=50.0, sort_property="ElementId", sort_descending=False, link_instance=None):
+def get_containing_element_indexed(target_el, doc, element_index, cell_size_feet=50.0, sort_property="ElementId", sort_descending=False, link_instance=None, source_ranks=None):
     """Find containing element using pre-built spatial index (fast path).
     
     Uses spatial hash lookup instead of database queries. Checks a 3x3 cell
@@ -2396,6 +2407,7 @@ def get_containing_element_indexed(target_el, doc, element_index, cell_size_feet
         element_index: Spatial index dict from build_source_element_spatial_index
         cell_size_feet: Size of each grid cell (must match index cell size)
         link_instance: Optional RevitLinkInstance when source is linked (for coord transform)
+        source_ranks: Optional {element id int: rank}; candidates are ordered by rank
         
     Returns:
         Element: First containing element matching user's sort order, or None
@@ -2460,18 +2472,8 @@ def get_containing_element_indexed(target_el, doc, element_index, cell_size_feet
                 seen_ids.add(el_id)
                 candidates_dict[el_id] = source_el
         
-        # Convert to list and sort by sort_property to preserve user's configured sort order
-        candidates = list(candidates_dict.values())
-        if sort_property == "ElementId":
-            candidates.sort(key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
-        else:
-            # Use sort_source_elements function to maintain consistency with spatial index sorting
-            try:
-                from zone3d.core import sort_source_elements
-                candidates = sort_source_elements(candidates, sort_property, descending=sort_descending)
-            except ImportError:
-                # Fallback to ElementId sorting if import fails
-                candidates.sort(key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
+        # Order by precomputed rank to preserve user's configured sort order
+        candidates = _sort_candidates_by_rank(list(candidates_dict.values()), source_ranks, sort_property, sort_descending)
         
         if use_vote:
             def _zone_inside(source_el, point):
@@ -3135,7 +3137,7 @@ def _get_overlap_outline_for_target(target_el, link_instance=None):
 def get_containing_element_by_overlap(target_el, source_doc, source_categories,
                                       sort_property="ElementId", sort_descending=False,
                                       link_instance=None, exclude_element_id=None,
-                                      source_coplanar_cache=None):
+                                      source_coplanar_cache=None, source_ranks=None):
     """Find overlapping source element for a target using solid intersection.
     
     Uses element bounding-box pre-filter, then solid intersection. For linked
@@ -3149,6 +3151,7 @@ def get_containing_element_by_overlap(target_el, source_doc, source_categories,
         sort_descending: Sort direction for tie-break
         link_instance: Optional RevitLinkInstance when source is linked
         exclude_element_id: Optional ElementId integer value to skip (same-doc self guard)
+        source_ranks: Optional {element id int: rank}; the lowest-ranked candidate wins
         
     Returns:
         Element: Best matching overlapping source element or None
@@ -3240,16 +3243,11 @@ def get_containing_element_by_overlap(target_el, source_doc, source_categories,
         if not candidate_map:
             return None
         
-        candidates = list(candidate_map.values())
-        if sort_property == "ElementId":
-            candidates.sort(key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
-        else:
-            try:
-                from zone3d.core import sort_source_elements
-                candidates = sort_source_elements(candidates, sort_property, descending=sort_descending)
-            except ImportError:
-                candidates.sort(key=lambda el: get_element_id_value(el.Id), reverse=sort_descending)
-        
+        # Min-rank pick; only unranked candidates need the full property sort
+        if source_ranks is not None and all(el_id in source_ranks for el_id in candidate_map):
+            best_id = min(candidate_map, key=lambda el_id: source_ranks[el_id])
+            return candidate_map[best_id]
+        candidates = _sort_candidates_by_rank(list(candidate_map.values()), None, sort_property, sort_descending)
         return candidates[0]
     except Exception as e:
         logger.debug("Error in get_containing_element_by_overlap: {}".format(str(e)))
@@ -3260,7 +3258,7 @@ def get_containing_element_by_strategy(element, doc, strategy, source_categories
                                      rooms_by_level=None, spaces_by_level=None, areas_by_level=None,
                                      element_index=None, element_index_cell_size=50.0,
                                      sort_property="ElementId", sort_descending=False, link_instance=None,
-                                     exclude_element_id=None, source_coplanar_cache=None):
+                                     exclude_element_id=None, source_coplanar_cache=None, source_ranks=None):
     """Unified function that routes to appropriate containment method.
     
     Args:
@@ -3275,6 +3273,7 @@ def get_containing_element_by_strategy(element, doc, strategy, source_categories
         element_index_cell_size: Cell size for spatial index (feet, default 50.0)
         link_instance: Optional RevitLinkInstance when source is linked (for element strategy coord transform)
         exclude_element_id: Optional ElementId integer value to skip in overlap strategy
+        source_ranks: Optional {element id int: rank} for element/overlap candidate ordering
         
     Returns:
         Element: Containing element or None
@@ -3288,7 +3287,7 @@ def get_containing_element_by_strategy(element, doc, strategy, source_categories
     elif strategy == "element":
         # Use indexed lookup if index is provided (fast path)
         if element_index is not None:
-            return get_containing_element_indexed(element, doc, element_index, element_index_cell_size, sort_property=sort_property, sort_descending=sort_descending, link_instance=link_instance)
+            return get_containing_element_indexed(element, doc, element_index, element_index_cell_size, sort_property=sort_property, sort_descending=sort_descending, link_instance=link_instance, source_ranks=source_ranks)
         else:
             # Fallback to database query method (link not used for fallback - same-doc only)
             return get_containing_element(element, doc, source_categories)
@@ -3297,7 +3296,7 @@ def get_containing_element_by_strategy(element, doc, strategy, source_categories
             element, doc, source_categories,
             sort_property=sort_property, sort_descending=sort_descending,
             link_instance=link_instance, exclude_element_id=exclude_element_id,
-            source_coplanar_cache=source_coplanar_cache
+            source_coplanar_cache=source_coplanar_cache, source_ranks=source_ranks
         )
     else:
         return None
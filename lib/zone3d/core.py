@@ -316,42 +316,28 @@ def sort_source_elements(source_elements, sort_property="ElementId", descending=
     # Elements with empty values (has_value=0) come first, then sorted by value
     # CRITICAL: descending only affects sort_value, not has_value (empty values always first)
     try:
-        # Separate empty and non-empty elements
-        empty_elements = []
-        non_empty_elements = []
+        # Look up each element's sort value exactly once, then sort the decorated tuples
+        empty_keyed = []
+        non_empty_keyed = []
         for element in source_elements:
             has_value, sort_value, element_id = get_sort_value(element)
             if has_value == 0:
-                empty_elements.append(element)
+                empty_keyed.append((element_id, element))
             else:
-                non_empty_elements.append(element)
+                non_empty_keyed.append((sort_value, element_id, element))
         
         # Sort empty elements by element_id (deterministic)
-        empty_elements.sort(key=lambda el: get_element_id_value(el.Id))
+        empty_keyed.sort(key=lambda item: item[0])
         
-        # Sort non-empty elements by sort_value
-        # For descending, we need to handle different types differently
+        # Sort non-empty elements by (sort_value, element_id)
+        # For descending, sort ascending first, then reverse
+        # This ensures proper descending order for all types (strings, numbers, etc.)
+        non_empty_keyed.sort(key=lambda item: (item[0], item[1]))
         if descending:
-            # For descending, sort ascending first, then reverse
-            # This ensures proper descending order for all types (strings, numbers, etc.)
-            def get_non_empty_sort_key(element):
-                """Get sort key for non-empty elements (ascending)."""
-                has_value, sort_value, element_id = get_sort_value(element)
-                return (sort_value, element_id)
-            
-            non_empty_elements.sort(key=get_non_empty_sort_key)
-            non_empty_elements.reverse()
-        else:
-            # For ascending, normal sort
-            def get_non_empty_sort_key(element):
-                """Get sort key for non-empty elements (ascending)."""
-                has_value, sort_value, element_id = get_sort_value(element)
-                return (sort_value, element_id)
-            
-            non_empty_elements.sort(key=get_non_empty_sort_key)
+            non_empty_keyed.reverse()
         
         # Combine: empty elements first, then non-empty elements
-        result = empty_elements + non_empty_elements
+        result = [item[1] for item in empty_keyed] + [item[2] for item in non_empty_keyed]
         
         return result
     except Exception as e:
@@ -359,6 +345,24 @@ def sort_source_elements(source_elements, sort_property="ElementId", descending=
         # Fallback to ElementId sorting
         return sorted(source_elements, key=lambda el: get_element_id_value(el.Id), reverse=descending)
 
+def compute_source_sort_ranks(sorted_elements):
+    """Map each source element id to its position in the configured sort order.
+    
+    Containment picks the first matching source in sort order; with ranks computed
+    once per configuration, candidate selection is a min() over integers instead of
+    re-reading the sort parameter and re-sorting for every target.
+    
+    Args:
+        sorted_elements: Source elements already ordered by sort_source_elements
+        
+    Returns:
+        dict: {element id int: rank int}, lower rank wins
+    """
+    ranks = {}
+    for rank, element in enumerate(sorted_elements):
+        ranks[get_element_id_value(element.Id)] = rank
+    return ranks
+
 def is_3dzone_family(element):
     """Check if an element is a 3DZone family (Generic Model with family name containing "3DZone").
     
@@ -638,7 +642,69 @@ def get_source_document(doc, zone_config):
         logger.error("Error finding linked document '{}': {}".format(linked_doc_name, str(e)))
         return (doc, None)
 
-def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=None, cache_dict=None):
+def build_view_element_scope(doc, view_id):
+    """Collect the ids of all elements visible in a view once, bucketed by category.
+    
+    The IFC export handler builds this once per export and passes it to every
+    configuration, which then intersects against these id sets instead of running
+    its own FilteredElementCollector(doc, view_id) per category.
+    
+    Args:
+        doc: Revit document
+        view_id: ElementId of the exported view
+        
+    Returns:
+        dict: {"view_id": view_id, "all_ids": set of id ints,
+               "by_category": {category id int: set of id ints}}
+    """
+    scope_start_time = time.time()
+    all_ids = set()
+    by_category = defaultdict(set)
+    
+    collector = FilteredElementCollector(doc, view_id).WhereElementIsNotElementType()
+    for el in collector:
+        el_id_val = get_element_id_value(el.Id)
+        all_ids.add(el_id_val)
+        try:
+            category = el.Category
+            if category is not None:
+                by_category[get_element_id_value(category.Id)].add(el_id_val)
+        except Exception:
+            continue
+    
+    logger.debug("[PERF] View element scope: {} elements in {} categories ({:.2f}s)".format(
+        len(all_ids), len(by_category), time.time() - scope_start_time))
+    
+    return {
+        "view_id": view_id,
+        "all_ids": all_ids,
+        "by_category": dict(by_category)
+    }
+
+def get_scoped_elements(doc, element_scope, category=None):
+    """Resolve the ids of a view element scope to elements.
+    
+    Args:
+        doc: Revit document the scope was built from
+        element_scope: Scope dict from build_view_element_scope
+        category: Optional BuiltInCategory to restrict to
+        
+    Returns:
+        list: Elements still present in the document
+    """
+    if category is None:
+        id_values = element_scope["all_ids"]
+    else:
+        id_values = element_scope["by_category"].get(int(category), ())
+    
+    elements = []
+    for id_val in id_values:
+        el = doc.GetElement(make_element_id(id_val))
+        if el is not None:
+            elements.append(el)
+    return elements
+
+def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=None, cache_dict=None, deadline=None, skip_target_ids=None, element_scope=None):
     """Write parameters to elements based on a zone configuration.
     
     Args:
@@ -647,17 +713,28 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         progress_bar: Optional progress bar for tracking progress
         view_id: Optional ElementId of view to filter elements by visibility
         cache_dict: Optional dict to cache parameter values: {element_id: {param_name: value}}
+        deadline: Optional time.time() value; processing stops before the next target
+            element once it is reached and the result is marked incomplete
+        skip_target_ids: Optional set of target element id ints already processed
+            (e.g. by a budgeted pre-export run) that should not be processed again
+        element_scope: Optional precomputed view scope (see build_view_element_scope);
+            used instead of per-category view collectors when given
         
     Returns:
-        dict: Results dictionary with counts and errors
+        dict: Results dictionary with counts and errors. "completed" is False when
+            the deadline cut processing short; "processed_target_ids" then lists the
+            target ids handled so far so a later run can resume via skip_target_ids.
     """
 
     results = {
         "elements_processed": 0,
         "elements_updated": 0,
         "parameters_copied": 0,
-        "errors": []
+        "errors": [],
+        "completed": True,
+        "elements_remaining": 0
     }
+    processed_target_ids = [] if deadline is not None else None
     
     try:
         # Detect containment strategy
@@ -703,6 +780,12 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         # Note: view_id filtering doesn't work with linked documents, so we skip it when using linked doc
         use_view_filter = view_id is not None and link_instance is None
         
+        # A precomputed export scope replaces the view collectors (host document only)
+        if element_scope is not None and view_id is None:
+            view_id = element_scope.get("view_id")
+            use_view_filter = view_id is not None and link_instance is None
+        use_source_scope = element_scope is not None and link_instance is None
+        
         # Get source elements
         # Collect elements from each category separately and combine (OR logic)
         # Multiple OfCategory() calls create AND logic (elements in ALL categories), which is wrong
@@ -717,7 +800,9 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
                 if category == THREE_D_ZONE_MARKER:
                     # Filter Generic Models by family name containing "3DZone"
                     # If view_id is provided and not using linked doc, filter by view visibility
-                    if use_view_filter:
+                    if use_source_scope:
+                        category_elements = get_scoped_elements(source_doc, element_scope, BuiltInCategory.OST_GenericModel)
+                    elif use_view_filter:
                         category_elements = FilteredElementCollector(source_doc, view_id)\
                             .WhereElementIsNotElementType()\
                             .OfCategory(BuiltInCategory.OST_GenericModel)\
@@ -748,7 +833,9 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
                 else:
                     # Regular category
                     # If view_id is provided and not using linked doc, filter by view visibility
-                    if use_view_filter:
+                    if use_source_scope:
+                        category_elements = get_scoped_elements(source_doc, element_scope, category)
+                    elif use_view_filter:
                         category_elements = FilteredElementCollector(source_doc, view_id)\
                             .WhereElementIsNotElementType()\
                             .OfCategory(category)\
@@ -765,7 +852,9 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
                             source_elements.append(el)
         else:
             # If view_id is provided and not using linked doc, filter by view visibility
-            if use_view_filter:
+            if use_source_scope:
+                source_elements = get_scoped_elements(source_doc, element_scope)
+            elif use_view_filter:
                 source_elements = FilteredElementCollector(source_doc, view_id)\
                     .WhereElementIsNotElementType()\
                     .ToElements()
@@ -813,6 +902,7 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         sort_descending = zone_config.get("source_sort_descending", False)
         
         source_elements = sort_source_elements(source_elements, sort_property, descending=sort_descending)
+        source_ranks = compute_source_sort_ranks(source_elements)
         logger.debug("[DEBUG] Sorted {} source elements by property: {} (descending: {})".format(len(source_elements), sort_property, sort_descending))
         
         # Pre-compute geometries for Mass/Generic Model elements and Areas (batch operation)
@@ -827,7 +917,8 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         if strategy == "element":
             index_start_time = time.time()
             element_index = containment.build_source_element_spatial_index(
-                source_elements, source_doc, element_index_cell_size, sort_property=sort_property, sort_descending=sort_descending
+                source_elements, source_doc, element_index_cell_size, sort_property=sort_property, sort_descending=sort_descending,
+                source_ranks=source_ranks
             )
             index_time = time.time() - index_start_time
             logger.debug("[DEBUG] Built spatial index in {:.2f}s".format(index_time))
@@ -851,7 +942,9 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
             element_ids = set()  # Track IDs to avoid duplicates
             for category in target_filter_categories:
                 # If view_id is provided, filter by view visibility
-                if view_id:
+                if element_scope is not None:
+                    category_elements = get_scoped_elements(doc, element_scope, category)
+                elif view_id:
                     category_elements = FilteredElementCollector(doc, view_id)\
                         .WhereElementIsNotElementType()\
                         .OfCategory(category)\
@@ -868,7 +961,9 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
                         target_elements.append(el)
         else:
             # If view_id is provided, filter by view visibility
-            if view_id:
+            if element_scope is not None:
+                target_elements = get_scoped_elements(doc, element_scope)
+            elif view_id:
                 target_elements = FilteredElementCollector(doc, view_id)\
                     .WhereElementIsNotElementType()\
                     .ToElements()
@@ -903,6 +998,14 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         else:
             logger.debug("[DEBUG] Found {} target elements for categories: {}".format(len(target_elements), target_filter_categories))
         
+        if skip_target_ids:
+            target_elements = [
+                el for el in target_elements
+                if get_element_id_value(el.Id) not in skip_target_ids
+            ]
+            logger.debug("[DEBUG] {} target elements left after skipping {} already processed".format(
+                len(target_elements), len(skip_target_ids)))
+        
         if not target_elements:
             logger.warning("[DEBUG] No target elements found for categories: {}".format(target_filter_categories))
             return results
@@ -1054,6 +1157,16 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         logger.debug("[PROGRESS] Starting to process {} target elements...".format(total_elements))
         
         for idx, target_el in enumerate(target_elements):
+            # Budgeted runs stop before the next element once the deadline passes
+            if deadline is not None and time.time() >= deadline:
+                results["completed"] = False
+                results["elements_remaining"] = total_elements - idx
+                logger.debug("[BUDGET] Deadline reached after {}/{} target elements".format(idx, total_elements))
+                break
+            
+            if processed_target_ids is not None:
+                processed_target_ids.append(get_element_id_value(target_el.Id))
+            
             try:
                 results["elements_processed"] += 1
                 
@@ -1123,6 +1236,7 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
                         link_instance=link_instance,  # For element/overlap: transform target geometry to link coords
                         exclude_element_id=overlap_exclude_id,
                         source_coplanar_cache=source_coplanar_cache,
+                        source_ranks=source_ranks,
                     )
                 
                 # Additional check: if using 3D Zone marker, verify family name matches
@@ -1234,6 +1348,8 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         results["parameters_copied"] = total_params_copied
         results["parameters_already_correct"] = total_params_already_correct
         results["updated_element_ids"] = updated_element_ids  # Track IDs for post-write verification
+        if processed_target_ids is not None:
+            results["processed_target_ids"] = processed_target_ids
 
         return results
     
@@ -1243,7 +1359,7 @@ def write_parameters_to_elements(doc, zone_config, progress_bar=None, view_id=No
         results["errors"].append(error_msg)
         return results
 
-def write_cached_parameters(doc, cache_dict, target_param_names, only_empty=False):
+def write_cached_parameters(doc, cache_dict, target_param_names, only_empty=False, element_scope=None):
     """Write cached parameter values directly to elements (no recalculation).
     
     Args:
@@ -1251,6 +1367,8 @@ def write_cached_parameters(doc, cache_dict, target_param_names, only_empty=Fals
         cache_dict: Dict of cached values: {element_id: {param_name: value}}
         target_param_names: List of target parameter names to write
         only_empty: If True, only write to elements where all target parameters are empty
+        element_scope: Optional view scope (see build_view_element_scope); cached
+            entries for elements outside it are skipped
         
     Returns:
         dict: Results dictionary with counts
@@ -1268,7 +1386,11 @@ def write_cached_parameters(doc, cache_dict, target_param_names, only_empty=Fals
     if not cache_dict:
         return results
     
+    scope_ids = element_scope["all_ids"] if element_scope is not None else None
+    
     for element_id, param_values in cache_dict.items():
+        if scope_ids is not None and element_id not in scope_ids:
+            continue
         try:
             element = doc.GetElement(ElementId(element_id))
             if not element:
@@ -1334,7 +1456,7 @@ def write_cached_parameters(doc, cache_dict, target_param_names, only_empty=Fals
     
     return results
 
-def execute_configuration(doc, zone_config, progress_bar=None, view_id=None, force_transaction=False, use_subtransaction=False, cache_dict=None, skip_cache_clear=False):
+def execute_configuration(doc, zone_config, progress_bar=None, view_id=None, force_transaction=False, use_subtransaction=False, cache_dict=None, skip_cache_clear=False, deadline=None, skip_target_ids=None, element_scope=None):
     """Execute a single configuration within a transaction.
     
     Args:
@@ -1346,6 +1468,9 @@ def execute_configuration(doc, zone_config, progress_bar=None, view_id=None, for
         use_subtransaction: If True, use SubTransaction instead of Transaction (for nesting inside parent transactions)
         cache_dict: Optional dict to cache parameter values: {element_id: {param_name: value}}
         skip_cache_clear: If True, skip clearing geometry cache (for batch executions where cache is cleared once at start)
+        deadline: Optional time.time() value at which processing stops (see write_parameters_to_elements)
+        skip_target_ids: Optional set of target element id ints to leave out
+        element_scope: Optional precomputed view scope shared across configurations
         
     Returns:
         dict: Results dictionary
@@ -1399,7 +1524,7 @@ def execute_configuration(doc, zone_config, progress_bar=None, view_id=None, for
         if use_no_transaction_path or (not force_transaction and hasattr(doc, "IsModifiable") and doc.IsModifiable):
             # No-transaction path: write directly (assuming we're inside Revit's internal transaction)
             try:
-                result = write_parameters_to_elements(doc, zone_config, progress_bar, view_id, cache_dict=cache_dict)
+                result = write_parameters_to_elements(doc, zone_config, progress_bar, view_id, cache_dict=cache_dict, deadline=deadline, skip_target_ids=skip_target_ids, element_scope=element_scope)
 
             except Exception as write_error:
 
@@ -1419,7 +1544,7 @@ def execute_configuration(doc, zone_config, progress_bar=None, view_id=None, for
             try:
                 transaction.Start()
 
-                result = write_parameters_to_elements(doc, zone_config, progress_bar, view_id, cache_dict=cache_dict)
+                result = write_parameters_to_elements(doc, zone_config, progress_bar, view_id, cache_dict=cache_dict, deadline=deadline, skip_target_ids=skip_target_ids, element_scope=element_scope)
 
                 # Commit transaction explicitly
                 transaction.Commit()
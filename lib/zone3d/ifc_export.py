@@ -11,8 +11,16 @@ This module implements automatic parameter writing during IFC export using a cac
 
 The caching mechanism avoids duplicate containment calculations - values are calculated once
 in FileExporting and reused in FileExported for direct parameter writes.
+
+Budget mode: configurations run in ifc_export_priority order. When an overall export budget
+(user config, see config.get_ifc_export_time_budget) or a per-configuration
+ifc_export_time_budget is exceeded, the current configuration stops after the element in
+progress and the remaining configurations are skipped. The remainder is written after the
+export by PostExportWriteHandler. Timing and completeness are kept in get_last_export_results().
 """
 
+import time
+
 from pyrevit import script, revit
 try:
     from revit.compat import get_element_id_value
@@ -58,12 +66,34 @@ _post_export_write_event = None
 # This cache is populated in FileExporting and used in FileExported to avoid recalculation
 _parameter_write_cache = {}  # Format: {config_name: {element_id: {param_name: param_value}}}
 
+# Configurations cut short by the export budget: {config_name: [processed target id ints]}
+# An empty list means the configuration was skipped entirely.
+_deferred_export_configs = {}
+
+# Element ids visible in the exported view, built once per export and shared by every
+# configuration and the post-export write (see core.build_view_element_scope)
+_export_element_scope = None
+
+# Summary of the last budgeted pre-export run (timing, completeness, per-config results)
+_last_export_results = None
+
+def get_last_export_results():
+    """Get the summary of the last IFC pre-export run.
+    
+    Returns:
+        dict: Summary with "timing", "complete" and "deferred_configs", or None
+    """
+    return _last_export_results
+
 class PostExportWriteHandler(IExternalEventHandler):
     """Handler for ExternalEvent to write parameters after IFC export transaction completes."""
     
     def __init__(self):
         self.configs_to_execute = []
         self.doc = None
+        self.deferred_configs = {}
+        self.view_id = None
+        self.element_scope = None
     
     def Execute(self, uiapp):
         """Execute parameter writes in a normal transaction after export completes."""
@@ -90,6 +120,8 @@ class PostExportWriteHandler(IExternalEventHandler):
                     global _parameter_write_cache
                     config_cache = _parameter_write_cache.get(config_name, {})
                     
+                    deferred_ids = self.deferred_configs.get(config_name)
+                    
                     if config_cache:
                         # Write cached values directly (no containment calculation)
                         target_params = zone_config.get("target_params", [])
@@ -100,7 +132,7 @@ class PostExportWriteHandler(IExternalEventHandler):
                         transaction = Transaction(self.doc, "3D Zone: {} (Cached)".format(config_name))
                         try:
                             transaction.Start()
-                            result = core.write_cached_parameters(self.doc, config_cache, target_params, only_empty=only_empty)
+                            result = core.write_cached_parameters(self.doc, config_cache, target_params, only_empty=only_empty, element_scope=self.element_scope)
                             transaction.Commit()
                             result["config_name"] = config_name
                             result["config_order"] = config_idx
@@ -109,6 +141,20 @@ class PostExportWriteHandler(IExternalEventHandler):
                             raise
                         finally:
                             transaction.Dispose()
+                        
+                        if deferred_ids is not None:
+                            # Budget ran out during export: finish the elements not reached
+                            cached_result = result
+                            result = core.execute_configuration(self.doc, zone_config, progress_bar=None, view_id=self.view_id, force_transaction=True, use_subtransaction=False, skip_target_ids=set(deferred_ids), element_scope=self.element_scope)
+                            for key in ("elements_updated", "elements_already_correct", "parameters_copied", "parameters_already_correct"):
+                                result[key] = result.get(key, 0) + cached_result.get(key, 0)
+                            result["config_name"] = config_name
+                            result["config_order"] = config_idx
+                    elif deferred_ids is not None:
+                        # Skipped by the export budget: run it now with the exported view
+                        result = core.execute_configuration(self.doc, zone_config, progress_bar=None, view_id=self.view_id, force_transaction=True, use_subtransaction=False, skip_target_ids=set(deferred_ids), element_scope=self.element_scope)
+                        result["config_name"] = config_name
+                        result["config_order"] = config_idx
                     else:
                         # Fallback: full recalculation if cache not available
 
@@ -140,6 +186,9 @@ class PostExportWriteHandler(IExternalEventHandler):
             # Clear configs and doc reference
             self.configs_to_execute = []
             self.doc = None
+            self.deferred_configs = {}
+            self.view_id = None
+            self.element_scope = None
     
     def GetName(self):
         return "Post-Export Parameter Write"
@@ -262,6 +311,8 @@ def file_exporting_handler(sender, args):
             logger.debug("No configurations with write_before_ifc_export enabled")
             return
         
+        # Highest priority first so a budget cut drops the least important work
+        ifc_configs = config.sort_configs_for_ifc_export(ifc_configs)
         logger.debug("Found {} configuration(s) to execute before IFC export".format(len(ifc_configs)))
         
         # Get the view being exported (if available)
@@ -331,6 +382,20 @@ def file_exporting_handler(sender, args):
         # because we're inside Revit's export pipeline. The command hook approach (writing
         # when dialog opens via ExternalEvent) is preferred, but this serves as a fallback.
 
+        # Compute the exported element universe once for all configurations
+        global _export_element_scope
+        _export_element_scope = None
+        if view_id:
+            try:
+                _export_element_scope = core.build_view_element_scope(doc, view_id)
+            except Exception as scope_err:
+                logger.debug("Could not build view element scope, falling back to per-config collectors: {}".format(str(scope_err)))
+
+        # Export-wide budget (None = unlimited, the previous behaviour)
+        export_budget = config.get_ifc_export_time_budget()
+        export_start = time.time()
+        export_deadline = export_start + export_budget if export_budget else None
+
         # Execute configurations
         # Create a summary results dict
         summary = {
@@ -339,12 +404,19 @@ def file_exporting_handler(sender, args):
             "total_elements_updated": 0,
             "total_elements_already_correct": 0,
             "total_parameters_copied": 0,
-            "total_parameters_already_correct": 0
+            "total_parameters_already_correct": 0,
+            "complete": True,
+            "deferred_configs": [],
+            "timing": {
+                "budget": export_budget,
+                "elapsed": 0.0
+            }
         }
 
         # Execute each configuration with caching enabled
         # Note: Progress bars don't display reliably in event handlers, so we use logger output instead
-        global _parameter_write_cache
+        global _parameter_write_cache, _deferred_export_configs, _last_export_results
+        _deferred_export_configs = {}
         
         for config_idx, zone_config in enumerate(ifc_configs):
             config_name = zone_config.get("name", "Unknown")
@@ -355,6 +427,30 @@ def file_exporting_handler(sender, args):
             if config_name not in _parameter_write_cache:
                 _parameter_write_cache[config_name] = {}
             
+            # Out of export budget: leave the whole configuration for after the export
+            if export_deadline is not None and time.time() >= export_deadline:
+                _parameter_write_cache[config_name] = {}
+                _deferred_export_configs[config_name] = []
+                summary["config_results"].append({
+                    "config_name": config_name,
+                    "config_order": config_order,
+                    "elements_updated": 0,
+                    "parameters_copied": 0,
+                    "errors": [],
+                    "completed": False,
+                    "skipped": True,
+                    "elapsed": 0.0
+                })
+                continue
+            
+            config_deadline = export_deadline
+            config_budget = config.get_ifc_export_config_budget(zone_config)
+            if config_budget:
+                budget_deadline = time.time() + config_budget
+                if config_deadline is None or budget_deadline < config_deadline:
+                    config_deadline = budget_deadline
+            config_start = time.time()
+            
             try:
                 # Execute configuration within a transaction WITH CACHING
                 # Pass view_id to filter elements by view visibility
@@ -364,7 +460,7 @@ def file_exporting_handler(sender, args):
                 # Try SubTransaction to nest inside the parent transaction.
                 # Cache parameter values for later use in FileExported (no recalculation needed)
 
-                result = core.execute_configuration(doc, zone_config, progress_bar=None, view_id=view_id, force_transaction=True, use_subtransaction=True, cache_dict=config_cache)
+                result = core.execute_configuration(doc, zone_config, progress_bar=None, view_id=view_id, force_transaction=True, use_subtransaction=True, cache_dict=config_cache, deadline=config_deadline, element_scope=_export_element_scope)
                 
                 # Store cache in global cache dict
                 if config_cache:
@@ -372,6 +468,14 @@ def file_exporting_handler(sender, args):
 
                 result["config_name"] = config_name
                 result["config_order"] = config_order
+                result["elapsed"] = time.time() - config_start
+                
+                if not result.get("completed", True):
+                    # Partial run: cache holds only what was reached, remainder is deferred
+                    _parameter_write_cache[config_name] = config_cache
+                    _deferred_export_configs[config_name] = result.get("processed_target_ids", [])
+                    logger.debug("IFC pre-export budget reached in '{}' ({} elements remaining)".format(
+                        config_name, result.get("elements_remaining", 0)))
 
                 # Check for errors in result and show formatted message
                 errors = result.get("errors", [])
@@ -415,9 +519,15 @@ def file_exporting_handler(sender, args):
                     "config_order": config_order,
                     "elements_updated": 0,
                     "parameters_copied": 0,
-                    "errors": [error_msg]
+                    "errors": [error_msg],
+                    "elapsed": time.time() - config_start
                 })
 
+        summary["timing"]["elapsed"] = time.time() - export_start
+        summary["deferred_configs"] = sorted(_deferred_export_configs.keys())
+        summary["complete"] = not _deferred_export_configs
+        _last_export_results = summary
+
         # Store export info for FileExported event verification
         # We'll verify if parameters persisted after export completes
         global _pending_export_settings
@@ -435,6 +545,12 @@ def file_exporting_handler(sender, args):
             summary["total_elements_already_correct"],
             summary["total_parameters_already_correct"]
         ))
+        logger.debug("IFC pre-export took {:.2f}s (budget: {}), complete: {}, deferred: {}".format(
+            summary["timing"]["elapsed"],
+            export_budget,
+            summary["complete"],
+            ", ".join(summary["deferred_configs"]) or "none"
+        ))
         
     except Exception as ex:
 
@@ -473,10 +589,10 @@ def file_exported_handler(sender, args):
             return
         
         # Filter configurations that have write_before_ifc_export enabled
-        ifc_configs = [
+        ifc_configs = config.sort_configs_for_ifc_export([
             cfg for cfg in all_configs 
             if cfg.get("write_before_ifc_export", False) and cfg.get("enabled", False)
-        ]
+        ])
 
         if not ifc_configs:
             logger.debug("No IFC pre-export configurations enabled.")
@@ -510,6 +626,11 @@ def file_exported_handler(sender, args):
             # Store configs and doc reference for ExternalEvent
             _post_export_write_handler.configs_to_execute = ifc_configs[:]  # Copy list
             _post_export_write_handler.doc = doc
+            # Hand over the remainder left by the export budget, with the exported view
+            _post_export_write_handler.deferred_configs = dict(_deferred_export_configs)
+            if _pending_export_settings:
+                _post_export_write_handler.view_id = _pending_export_settings.get("view_id")
+            _post_export_write_handler.element_scope = _export_element_scope
             
             # Schedule the write via ExternalEvent (executes after transaction completes)
             try:
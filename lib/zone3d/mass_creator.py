@@ -5,9 +5,11 @@ This module is parallel to zone_creator.py but uses the Mass-specific
 family creation API (NewExtrusionForm instead of NewExtrusion).
 """
 
+import hashlib
 import os.path as op
 import tempfile
 import shutil
+import time
 from Autodesk.Revit.DB import (
     FilteredElementCollector, Family, Level
 )
@@ -69,6 +71,71 @@ def report_failed_elements(failed_elements, element_type_name):
         element_type_name.rstrip('s').lower()))
 
 
+def _prepare_spatial_element(spatial_element, doc, adapter, levels_cache_sorted, element_type_name):
+    """Read identity and boundary data of one spatial element.
+    
+    Returns:
+        tuple: (region_data dict or None, failure dict or None)
+    """
+    element_number_str = "Unknown"
+    element_name_str = "Unknown"
+    try:
+        element_id = get_element_id_value(spatial_element.Id)
+        
+        # Get element info
+        element_number_str = adapter.get_number(spatial_element)
+        if not element_number_str or element_number_str == "?":
+            element_number_str = str(element_id)
+        
+        element_name_str = adapter.get_name(spatial_element)
+        
+        logger.debug("Processing {} {}: {} - {}".format(
+            element_type_name.rstrip('s').lower(), element_number_str, element_name_str, element_id))
+        
+        # Extract boundary data
+        curves, insertion_point, height = mfc.extract_boundary_loops_for_mass(
+            spatial_element, doc, adapter, levels_cache_sorted)
+        
+        reason = None
+        if not curves or not insertion_point:
+            reason = 'Invalid boundary data'
+        elif height is not None and height <= 0:
+            reason = 'Invalid height'
+        if reason:
+            logger.warning("{} {} - {}, skipping".format(
+                element_type_name.rstrip('s'), element_number_str, reason.lower()))
+            return None, {
+                'element': spatial_element,
+                'element_number_str': element_number_str,
+                'element_name_str': element_name_str,
+                'reason': reason
+            }
+        
+        return {
+            'spatial_element': spatial_element,
+            'element_id': element_id,
+            'element_number_str': element_number_str,
+            'element_name_str': element_name_str,
+            'curves': curves,
+            'insertion_point': insertion_point,
+            'height': height,
+            'level_id': adapter.get_level_id(spatial_element),
+            'phase_id': adapter.get_phase_id(spatial_element)
+        }, None
+        
+    except Exception as e:
+        logger.error("Error processing {} {}: {}".format(
+            element_type_name.rstrip('s').lower(), element_number_str, str(e)))
+        import traceback
+        logger.error(traceback.format_exc())
+        return None, {
+            'element': spatial_element,
+            'element_number_str': element_number_str,
+            'element_name_str': element_name_str,
+            'reason': 'Error processing: {}'.format(str(e))
+        }
+
+
 def create_masses_from_spatial_elements(
     spatial_elements,
     doc,
@@ -77,7 +144,9 @@ def create_masses_from_spatial_elements(
     pushbutton_dir,
     show_filter_dialog_func,
     element_type_name,
-    template_family_name="MassZone.rfa"
+    template_family_name="MassZone.rfa",
+    bulk_mode=False,
+    max_forms_per_family=mfc.BULK_MAX_FORMS_PER_FAMILY
 ):
     """Main orchestration function for creating Mass elements.
     
@@ -90,11 +159,17 @@ def create_masses_from_spatial_elements(
         show_filter_dialog_func: Function to show filter dialog
         element_type_name: String for progress/error messages (e.g., "Regions")
         template_family_name: Name of Mass template family file
+        bulk_mode: If True, put elements sharing level and phase into shared families
+            with one form per element (still one instance per element, see
+            mass_family_creation.place_mass_instances)
+        max_forms_per_family: Maximum forms per family in bulk mode
         
     Returns:
         tuple: (success_count, fail_count, failed_elements, created_instance_ids)
     """
     app = doc.Application
+    timings = {}
+    run_start = time.time()
     
     # Check if document supports families
     if doc.IsFamilyDocument:
@@ -123,6 +198,8 @@ def create_masses_from_spatial_elements(
     logger.debug("User selected {} {} for Mass creation".format(
         len(selected_elements), element_type_name.lower()))
     
+    phase_start = time.time()
+    
     # Check if template family exists in project
     template_family_name_in_project = op.splitext(template_family_name)[0]
     project_template_family = None
@@ -227,6 +304,8 @@ def create_masses_from_spatial_elements(
         forms.alert("Error opening Mass template: {}\n\nCheck logs for details.".format(str(e)),
                    title="Error", exitscript=True)
     
+    timings['prepare_template'] = time.time() - phase_start
+    
     # Process elements
     success_count = 0
     fail_count = 0
@@ -242,84 +321,59 @@ def create_masses_from_spatial_elements(
     
     # Cache families
     families_cache = FilteredElementCollector(doc).OfClass(Family).ToElements()
+    families_by_name = {}
+    for fam in families_cache:
+        try:
+            families_by_name[fam.Name] = fam
+        except:
+            continue
+    
+    def replace_existing_family(family_name_without_ext):
+        """Delete a family left by a previous run so it can be recreated."""
+        existing_family = families_by_name.pop(family_name_without_ext, None)
+        if existing_family:
+            logger.debug("Family '{}' exists - deleting and recreating".format(
+                family_name_without_ext))
+            success, error_reason = mfc.delete_mass_family_from_project(existing_family, doc)
+            if not success:
+                logger.warning("Failed to delete existing family: {}".format(error_reason))
     
     # Phase 1: Process elements and create Mass families (0-50% progress)
     total_elements = len(selected_elements)
     with forms.ProgressBar(title="Creating Mass Families ({} {})".format(
             total_elements, element_type_name.lower())) as pb:
         
+        phase_start = time.time()
+        prepared_elements = []
         for elem_idx, spatial_element in enumerate(selected_elements):
+            # Bulk mode splits phase 1 into extraction (0-25%) and family creation (25-50%)
+            progress_span = 25 if bulk_mode else 50
+            pb.update_progress(int((elem_idx + 1) / float(total_elements) * progress_span), 100)
+            
+            region_data, failure = _prepare_spatial_element(
+                spatial_element, doc, adapter, levels_cache_sorted, element_type_name)
+            if failure:
+                fail_count += 1
+                failed_elements.append(failure)
+                continue
+            
+            if bulk_mode:
+                prepared_elements.append(region_data)
+                continue
+            
+            element_number_str = region_data['element_number_str']
+            element_name_str = region_data['element_name_str']
             try:
-                element_id = get_element_id_value(spatial_element.Id)
-                
-                # Get element info
-                element_number_str = adapter.get_number(spatial_element)
-                if not element_number_str or element_number_str == "?":
-                    element_number_str = str(element_id)
-                
-                element_name_str = adapter.get_name(spatial_element)
-                
-                logger.debug("Processing {} {} ({}/{}): {} - {}".format(
-                    element_type_name.rstrip('s').lower(), element_number_str, elem_idx + 1,
-                    len(selected_elements), element_name_str, element_id))
-                
-                # Update progress
-                phase1_progress = int((elem_idx + 1) / float(total_elements) * 50)
-                pb.update_progress(phase1_progress, 100)
-                
-                # Extract boundary data
-                curves, insertion_point, height = mfc.extract_boundary_loops_for_mass(
-                    spatial_element, doc, adapter, levels_cache_sorted)
-                
-                if not curves or not insertion_point:
-                    logger.warning("{} {} - invalid boundary data, skipping".format(
-                        element_type_name.rstrip('s'), element_number_str))
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'Invalid boundary data'
-                    })
-                    continue
-                
-                if height is not None and height <= 0:
-                    logger.warning("{} {} - invalid height, skipping".format(
-                        element_type_name.rstrip('s'), element_number_str))
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'Invalid height'
-                    })
-                    continue
-                
                 # Create family path
                 sanitized_number = adapter.sanitize_number(element_number_str)
                 family_name_prefix = "Mass_Region_"
-                output_family_name = "{}{}_{}.rfa".format(family_name_prefix, sanitized_number, element_id)
+                output_family_name = "{}{}_{}.rfa".format(
+                    family_name_prefix, sanitized_number, region_data['element_id'])
                 output_family_path = op.join(temp_dir, output_family_name)
                 family_name_without_ext = op.splitext(output_family_name)[0]
                 
-                # Check if family exists
-                existing_family = None
-                for fam in families_cache:
-                    try:
-                        if fam and fam.Name == family_name_without_ext:
-                            existing_family = fam
-                            break
-                    except:
-                        continue
-                
                 # Delete existing family if found
-                if existing_family:
-                    logger.debug("Family '{}' exists - deleting and recreating".format(
-                        family_name_without_ext))
-                    success, error_reason = mfc.delete_mass_family_from_project(existing_family, doc)
-                    if not success:
-                        logger.warning("Failed to delete existing family: {}".format(error_reason))
-                    existing_family = None
+                replace_existing_family(family_name_without_ext)
                 
                 # Create Mass family
                 success, family_doc, error_reason = mfc.create_mass_family(
@@ -353,48 +407,103 @@ def create_masses_from_spatial_elements(
                     continue
                 
                 # Store data for second pass
-                family_data_list.append({
-                    'spatial_element': spatial_element,
+                region_data.update({
                     'output_family_path': output_family_path,
-                    'insertion_point': insertion_point,
-                    'element_number_str': element_number_str,
-                    'element_name_str': element_name_str,
                     'output_family_name': output_family_name,
                     'family_name_without_ext': family_name_without_ext,
                     'existing_family': None,
                     'family_doc': family_doc,
-                    'height': height,
                     'template_info': template_info
                 })
+                family_data_list.append(region_data)
                 
             except Exception as e:
                 logger.error("Error processing {} {}: {}".format(
-                    element_type_name.rstrip('s').lower(),
-                    element_number_str if 'element_number_str' in locals() else "Unknown",
-                    str(e)))
+                    element_type_name.rstrip('s').lower(), element_number_str, str(e)))
                 import traceback
                 logger.error(traceback.format_exc())
                 fail_count += 1
-                try:
-                    if 'spatial_element' in locals():
-                        failed_elements.append({
-                            'element': spatial_element,
-                            'element_number_str': element_number_str if 'element_number_str' in locals() else "Unknown",
-                            'element_name_str': element_name_str if 'element_name_str' in locals() else "Unknown",
-                            'reason': 'Error processing: {}'.format(str(e))
-                        })
-                except:
-                    pass
+                failed_elements.append({
+                    'element': spatial_element,
+                    'element_number_str': element_number_str,
+                    'element_name_str': element_name_str,
+                    'reason': 'Error processing: {}'.format(str(e))
+                })
+        
+        if bulk_mode:
+            timings['extract_boundaries'] = time.time() - phase_start
+            phase_start = time.time()
+            
+            groups = mfc.group_mass_regions(prepared_elements, max_forms_per_family)
+            logger.debug("Bulk mode: {} {} grouped into {} families".format(
+                len(prepared_elements), element_type_name.lower(), len(groups)))
+            
+            for group_idx, group in enumerate(groups):
+                pb.update_progress(int(25 + (group_idx + 1) / float(len(groups)) * 25), 100)
+                
+                first = group[0]
+                level_id = first.get('level_id')
+                phase_id = first.get('phase_id')
+                # Named after the group's regions, so only a run on the same
+                # regions replaces the family (and its instance)
+                region_ids = sorted(str(region_data['element_id']) for region_data in group)
+                output_family_name = "Mass_Regions_{}_{}_{}.rfa".format(
+                    get_element_id_value(level_id) if level_id else 0,
+                    get_element_id_value(phase_id) if phase_id else 0,
+                    hashlib.sha1(','.join(region_ids).encode('ascii')).hexdigest()[:12])
+                output_family_path = op.join(temp_dir, output_family_name)
+                family_name_without_ext = op.splitext(output_family_name)[0]
+                replace_existing_family(family_name_without_ext)
+                
+                origin = mfc.get_bulk_group_origin(group)
+                success, family_doc, created, failed, error_reason = mfc.create_bulk_mass_family(
+                    group, template_path_to_use, output_family_path, app, origin)
+                
+                for region_data, reason in failed:
+                    fail_count += 1
+                    failed_elements.append({
+                        'element': region_data['spatial_element'],
+                        'element_number_str': region_data['element_number_str'],
+                        'element_name_str': region_data['element_name_str'],
+                        'reason': reason
+                    })
+                
+                if not success:
+                    logger.warning("Failed to create bulk Mass family {}: {}".format(
+                        output_family_name, error_reason))
+                    if family_doc:
+                        try:
+                            family_doc.Close(False)
+                        except:
+                            pass
+                    continue
+                
+                family_data_list.append({
+                    'output_family_path': output_family_path,
+                    'insertion_point': origin,
+                    'output_family_name': output_family_name,
+                    'family_name_without_ext': family_name_without_ext,
+                    'existing_family': None,
+                    'family_doc': family_doc,
+                    'grouped_regions': created,
+                    'template_info': template_info
+                })
+        
+        timings['create_families'] = time.time() - phase_start
         
         # Phase 2: Load families and place instances (50-100% progress)
         if family_data_list:
             def progress_callback(progress):
                 pb.update_progress(progress, 100)
             
+            phase_start = time.time()
             mfc.load_mass_families(family_data_list, doc, app, progress_callback)
+            timings['load_families'] = time.time() - phase_start
             
+            phase_start = time.time()
             place_success, place_fail, place_failed, created_instance_ids = mfc.place_mass_instances(
                 family_data_list, doc, adapter, progress_callback)
+            timings['place_instances'] = time.time() - phase_start
             
             success_count += place_success
             fail_count += place_fail
@@ -415,6 +524,12 @@ def create_masses_from_spatial_elements(
     # Log results
     logger.debug("Created {} Mass elements from {} {} ({} failed)".format(
         success_count, len(selected_elements), element_type_name, fail_count))
+    timings['total'] = time.time() - run_start
+    logger.debug("[PERF] Mass creation ({} mode): {}".format(
+        "bulk" if bulk_mode else "per-element",
+        ", ".join("{} {:.2f}s".format(name, timings[name]) for name in (
+            'prepare_template', 'extract_boundaries', 'create_families',
+            'load_families', 'place_instances', 'total') if name in timings)))
     
     # Report failures
     report_failed_elements(failed_elements, element_type_name)
@@ -5,6 +5,12 @@ This module handles Mass family creation which requires different API than stand
 - Uses NewExtrusionForm() instead of NewExtrusion()
 - Requires ReferenceArray of ModelCurve references instead of CurveArrArray
 - Works with Conceptual Mass family templates
+
+Bulk mode (create_bulk_mass_family) puts one extrusion form per region into a shared
+family per level/phase group, so a site plan of hundreds of regions needs a handful of
+family documents and loads instead of one of each per region. Each form is visible
+only when the instance's Region Index matches its region, so every region still gets
+its own instance with its own properties and phase.
 """
 
 import os.path as op
@@ -14,13 +20,37 @@ from Autodesk.Revit.DB import (
     BuiltInCategory, ElementId, Transaction, TransactionStatus, FailureProcessingResult,
     IFailuresPreprocessor, CurveLoop, XYZ, Transform, Plane, SketchPlane, 
     SaveAsOptions, FamilyInstance, Family, Line, ModelCurve, ReferenceArray,
-    Form, GenericForm
+    Form, GenericForm, SubTransaction
 )
 from Autodesk.Revit.DB.Structure import StructuralType
 from pyrevit import script
+try:
+    from revit.compat import get_element_id_value, add_family_parameter
+except ImportError:
+    def get_element_id_value(item):
+        if hasattr(item, 'Value'):
+            return item.Value
+        return item.IntegerValue
+    add_family_parameter = None
 
 logger = script.get_logger()
 
+# Upper bound on forms in one bulk family (keeps single family documents responsive)
+BULK_MAX_FORMS_PER_FAMILY = 50
+
+# Instance parameter of bulk families selecting the region an instance shows
+REGION_INDEX_PARAM = "Region Index"
+
+
+class MassFailurePreprocessor(IFailuresPreprocessor):
+    """Suppress warnings raised while creating Mass forms."""
+    def PreprocessFailures(self, failuresAccessor):
+        failures = failuresAccessor.GetFailureMessages()
+        for failure in failures:
+            if failure.GetSeverity().ToString() == "Warning":
+                failuresAccessor.DeleteWarning(failure)
+        return FailureProcessingResult.Continue
+
 
 def get_mass_template_path(extension_dir, template_family_name="MassZone.rfa"):
     """Get the path to the Mass family template.
@@ -346,14 +376,6 @@ def create_mass_family(spatial_element, adapter, template_info, template_path, o
             return False, family_doc, "Not enough valid curves after translation (need at least 3)"
         
         # Suppress warnings
-        class MassFailurePreprocessor(IFailuresPreprocessor):
-            def PreprocessFailures(self, failuresAccessor):
-                failures = failuresAccessor.GetFailureMessages()
-                for failure in failures:
-                    if failure.GetSeverity().ToString() == "Warning":
-                        failuresAccessor.DeleteWarning(failure)
-                return FailureProcessingResult.Continue
-        
         t = Transaction(family_doc, "Create Mass Form")
         t.Start()
         failure_options = t.GetFailureHandlingOptions()
@@ -444,6 +466,204 @@ def create_mass_family(spatial_element, adapter, template_info, template_path, o
         return False, None, "Error processing Mass family: {}".format(str(family_error))
 
 
+def group_mass_regions(region_data_list, max_forms_per_family=BULK_MAX_FORMS_PER_FAMILY):
+    """Group prepared regions into bulk families by level and phase.
+    
+    Every region gets its own instance, hosted on the family's level, so regions
+    only share a family when they share the level and phase.
+    
+    Args:
+        region_data_list: List of dicts with 'level_id' and 'phase_id' keys
+        max_forms_per_family: Maximum number of forms per family document
+        
+    Returns:
+        list: List of region dict lists, one per bulk family
+    """
+    groups = {}
+    group_order = []
+    for region_data in region_data_list:
+        level_id = region_data.get('level_id')
+        phase_id = region_data.get('phase_id')
+        key = (
+            get_element_id_value(level_id) if level_id else -1,
+            get_element_id_value(phase_id) if phase_id else -1
+        )
+        if key not in groups:
+            groups[key] = []
+            group_order.append(key)
+        groups[key].append(region_data)
+    
+    chunk_size = max(1, int(max_forms_per_family or BULK_MAX_FORMS_PER_FAMILY))
+    result = []
+    for key in group_order:
+        items = groups[key]
+        for start in range(0, len(items), chunk_size):
+            result.append(items[start:start + chunk_size])
+    return result
+
+
+def get_bulk_group_origin(region_data_list):
+    """Get the family origin for a bulk group (lower-left of the region insertion points).
+    
+    Args:
+        region_data_list: List of dicts with 'insertion_point' keys
+        
+    Returns:
+        XYZ: Origin at Z=0 used both for form translation and instance placement
+    """
+    points = [d['insertion_point'] for d in region_data_list]
+    return XYZ(min(pt.X for pt in points), min(pt.Y for pt in points), 0.0)
+
+
+def _bind_form_visibility(family_doc, region_forms):
+    """Show each form only on instances whose Region Index is its region's index.
+    
+    Adds the integer instance parameter REGION_INDEX_PARAM and, per form, a Yes/No
+    parameter with the formula ``Region Index = <index>`` that drives the form's
+    Visible parameter. Must run inside an open transaction.
+    
+    Args:
+        family_doc: Mass family document
+        region_forms: List of (region dict, form) tuples; each region dict gets
+            its 1-based 'region_index'
+    """
+    if add_family_parameter is None:
+        raise Exception("Family parameters require revit.compat")
+    fm = family_doc.FamilyManager
+    if fm.CurrentType is None:
+        fm.NewType("Default")
+    if fm.get_Parameter(REGION_INDEX_PARAM) is None:
+        add_family_parameter(fm, REGION_INDEX_PARAM, 'integer')
+    
+    for index, (region_data, form) in enumerate(region_forms, 1):
+        visible_param = form.get_Parameter(BuiltInParameter.IS_VISIBLE_PARAM)
+        if visible_param is None or not fm.CanElementParameterBeAssociated(visible_param):
+            raise Exception("Visibility of form {} cannot be controlled by a parameter".format(index))
+        region_visible = add_family_parameter(fm, "Region {} Visible".format(index), 'yesno')
+        fm.SetFormula(region_visible, "{} = {}".format(REGION_INDEX_PARAM, index))
+        fm.AssociateElementParameterToFamilyParameter(visible_param, region_visible)
+        region_data['region_index'] = index
+
+
+def create_bulk_mass_family(region_data_list, template_path, output_path, app, origin):
+    """Create one Mass family with an extrusion form per region.
+    
+    Forms are placed at their region's position relative to ``origin``, so an
+    instance at ``origin`` shows its region in model coordinates. Each form is
+    built in its own SubTransaction so one bad boundary only drops that region,
+    and is bound to a ``region_index`` (stored on its region dict) by
+    _bind_form_visibility.
+    
+    Args:
+        region_data_list: List of dicts with 'curves', 'insertion_point' and 'height'
+        template_path: Path to Mass template family file
+        output_path: Path to save output family file
+        app: Revit application
+        origin: XYZ family origin in project coordinates
+        
+    Returns:
+        tuple: (success: bool, family_doc: Document or None, created: list of region dicts,
+                failed: list of (region dict, reason) tuples, error_reason: str or None)
+    """
+    family_doc = None
+    created = []
+    failed = []
+    
+    try:
+        shutil.copy2(template_path, output_path)
+        
+        family_doc = app.OpenDocumentFile(output_path)
+        if not family_doc:
+            return False, None, [], [(d, "Failed to open Mass family document") for d in region_data_list], \
+                "Failed to open Mass family document"
+        
+        existing_forms = list(FilteredElementCollector(family_doc).OfClass(Form).ToElements())
+        existing_forms.extend(FilteredElementCollector(family_doc).OfClass(GenericForm).ToElements())
+        
+        t = Transaction(family_doc, "Create Mass Forms")
+        t.Start()
+        failure_options = t.GetFailureHandlingOptions()
+        failure_options.SetFailuresPreprocessor(MassFailurePreprocessor())
+        t.SetFailureHandlingOptions(failure_options)
+        
+        try:
+            for existing_form in existing_forms:
+                try:
+                    family_doc.Delete(existing_form.Id)
+                except Exception as del_error:
+                    logger.warning("Could not delete existing Form: {}".format(del_error))
+            
+            region_forms = []
+            for region_data in region_data_list:
+                translated_curves = translate_curves_to_origin(region_data['curves'], origin)
+                if not translated_curves or len(translated_curves) < 3:
+                    failed.append((region_data, "Not enough valid curves after translation (need at least 3)"))
+                    continue
+                
+                st = SubTransaction(family_doc)
+                st.Start()
+                try:
+                    ref_array, model_curves = create_model_curves_and_references(
+                        family_doc, translated_curves
+                    )
+                    if not ref_array or ref_array.Size == 0:
+                        st.RollBack()
+                        failed.append((region_data, "Failed to create ModelCurves with valid references"))
+                        continue
+                    
+                    height = region_data.get('height')
+                    extrusion_height = height if height and height > 0 else 10.0
+                    new_form = family_doc.FamilyCreate.NewExtrusionForm(
+                        True, ref_array, XYZ(0, 0, extrusion_height))
+                    if not new_form:
+                        st.RollBack()
+                        failed.append((region_data, "NewExtrusionForm returned None"))
+                        continue
+                    
+                    st.Commit()
+                    region_forms.append((region_data, new_form))
+                except Exception as form_error:
+                    if st.HasStarted() and not st.HasEnded():
+                        st.RollBack()
+                    failed.append((region_data, "NewExtrusionForm failed: {}".format(str(form_error))))
+            
+            if not region_forms:
+                t.RollBack()
+                return False, family_doc, [], failed, "No forms could be created"
+            
+            _bind_form_visibility(family_doc, region_forms)
+            created = [region_data for region_data, _ in region_forms]
+            family_doc.Regenerate()
+            t.Commit()
+            
+            save_options = SaveAsOptions()
+            save_options.OverwriteExistingFile = True
+            family_doc.SaveAs(output_path, save_options)
+            logger.debug("Saved bulk Mass family {} with {} forms".format(
+                op.basename(output_path), len(created)))
+            
+            return True, family_doc, created, failed, None
+            
+        except Exception as recreate_error:
+            if t.GetStatus() == TransactionStatus.Started:
+                t.RollBack()
+            logger.error("Error creating bulk Mass forms: {}".format(recreate_error))
+            reason = "Error creating Mass Form: {}".format(str(recreate_error))
+            return False, family_doc, [], [(d, reason) for d in region_data_list], reason
+            
+    except Exception as family_error:
+        logger.error("Error processing bulk Mass family {}: {}".format(
+            op.basename(output_path), family_error))
+        if family_doc:
+            try:
+                family_doc.Close(False)
+            except:
+                pass
+            family_doc = None
+        reason = "Error processing Mass family: {}".format(str(family_error))
+        return False, None, [], [(d, reason) for d in region_data_list], reason
+
+
 def delete_mass_family_instances(family, doc):
     """Delete all instances of a Mass family from the project.
     
@@ -571,6 +791,9 @@ def load_mass_families(family_data_list, doc, app, progress_callback=None):
     
     load_options = FamilyLoadOptions()
     
+    # Name -> Family lookup, collected once and only if a load returns a bare bool
+    families_by_name = None
+    
     total_families = len(family_data_list)
     for idx, family_data in enumerate(family_data_list):
         output_family_path = family_data.get('output_family_path')
@@ -612,8 +835,10 @@ def load_mass_families(family_data_list, doc, app, progress_callback=None):
             elif isinstance(load_result, bool):
                 if load_result:
                     family_name = op.splitext(op.basename(output_family_path))[0]
-                    families = FilteredElementCollector(doc).OfClass(Family).ToElements()
-                    loaded_family = next((f for f in families if f.Name == family_name), None)
+                    if families_by_name is None or family_name not in families_by_name:
+                        families_by_name = dict(
+                            (f.Name, f) for f in FilteredElementCollector(doc).OfClass(Family).ToElements())
+                    loaded_family = families_by_name.get(family_name)
             else:
                 loaded_family = load_result
         except:
@@ -624,9 +849,40 @@ def load_mass_families(family_data_list, doc, app, progress_callback=None):
     return family_data_list
 
 
+def _record_placement_failure(failed_elements, region_data, reason):
+    """Add a failure entry for one region; returns 1 for the fail count."""
+    failed_elements.append({
+        'element': region_data['spatial_element'],
+        'element_number_str': region_data['element_number_str'],
+        'element_name_str': region_data['element_name_str'],
+        'reason': reason
+    })
+    return 1
+
+
+def _get_placement_symbol(doc, loaded_family):
+    """Return the active first symbol of a loaded family and a failure reason."""
+    symbol_ids_set = loaded_family.GetFamilySymbolIds()
+    symbol_ids = list(symbol_ids_set) if symbol_ids_set else []
+    if not symbol_ids:
+        return None, 'No symbols found in loaded Mass family'
+    
+    symbol = doc.GetElement(symbol_ids[0])
+    if not symbol:
+        return None, 'No active symbol found'
+    if not symbol.IsActive:
+        symbol.Activate()
+        doc.Regenerate()
+    return symbol, None
+
+
 def place_mass_instances(family_data_list, doc, adapter, progress_callback=None):
     """Place all Mass instances in a single transaction.
     
+    Every region gets its own instance with its own level, phase and properties.
+    Bulk families (entries with 'grouped_regions') get one instance per region at
+    the family origin, with Region Index set so it shows only that region's form.
+    
     Args:
         family_data_list: List of dicts with family data
         doc: Revit document
@@ -646,114 +902,91 @@ def place_mass_instances(family_data_list, doc, adapter, progress_callback=None)
     try:
         total_families = len(family_data_list)
         for idx, family_data in enumerate(family_data_list):
-            spatial_element = family_data['spatial_element']
             insertion_point = family_data['insertion_point']
-            element_number_str = family_data['element_number_str']
-            element_name_str = family_data['element_name_str']
             output_family_name = family_data['output_family_name']
             loaded_family = family_data.get('loaded_family') or family_data.get('existing_family')
+            regions = family_data.get('grouped_regions') or [family_data]
             
             if progress_callback:
                 progress = int(75 + (idx + 1) / float(total_families) * 25)
                 progress_callback(progress)
             
+            if not loaded_family:
+                logger.warning("Failed to load Mass family: {}".format(output_family_name))
+                for region_data in regions:
+                    fail_count += _record_placement_failure(failed_elements, region_data, 'Failed to load Mass family')
+                continue
+            
             try:
-                if not loaded_family:
-                    logger.warning("Failed to load Mass family: {}".format(output_family_name))
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'Failed to load Mass family'
-                    })
-                    continue
-                
-                symbol_ids_set = loaded_family.GetFamilySymbolIds()
-                symbol_ids = list(symbol_ids_set) if symbol_ids_set else []
-                if not symbol_ids:
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'No symbols found in loaded Mass family'
-                    })
-                    continue
-                
-                symbol = doc.GetElement(symbol_ids[0])
-                
-                if symbol and not symbol.IsActive:
-                    symbol.Activate()
-                    doc.Regenerate()
-                
-                if not symbol:
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'No active symbol found'
-                    })
-                    continue
-                
-                # Get level
-                level_id = adapter.get_level_id(spatial_element)
-                level = doc.GetElement(level_id) if level_id else None
-                
-                # Create placement point
-                placement_point = XYZ(
-                    insertion_point.X,
-                    insertion_point.Y,
-                    0.0
-                )
-                
-                # Place instance
-                instance = doc.Create.NewFamilyInstance(
-                    placement_point,
-                    symbol,
-                    level,
-                    StructuralType.NonStructural
-                )
-                
-                if not instance:
-                    fail_count += 1
-                    failed_elements.append({
-                        'element': spatial_element,
-                        'element_number_str': element_number_str,
-                        'element_name_str': element_name_str,
-                        'reason': 'Failed to place Mass instance'
-                    })
-                    continue
-                
-                logger.debug("Placed Mass instance for element {}: {}".format(
-                    element_number_str, instance.Id))
-                
-                # Set phase if applicable
-                phase_id = adapter.get_phase_id(spatial_element)
-                adapter.set_phase_on_instance(instance, phase_id)
-                
-                # Copy properties
-                adapter.copy_properties_to_instance(spatial_element, instance, doc)
-                
-                created_instance_ids.append(instance.Id)
-                success_count += 1
-                
-            except Exception as place_error:
-                logger.error("Error placing Mass for element {}: {}".format(
-                    element_number_str, place_error))
-                fail_count += 1
-                failed_elements.append({
-                    'element': spatial_element,
-                    'element_number_str': element_number_str,
-                    'element_name_str': element_name_str,
-                    'reason': 'Error placing Mass: {}'.format(str(place_error))
-                })
+                symbol, symbol_error = _get_placement_symbol(doc, loaded_family)
+            except Exception as e:
+                symbol, symbol_error = None, 'Error activating Mass symbol: {}'.format(str(e))
+            if not symbol:
+                for region_data in regions:
+                    fail_count += _record_placement_failure(failed_elements, region_data, symbol_error)
+                continue
+            
+            # Create placement point
+            placement_point = XYZ(
+                insertion_point.X,
+                insertion_point.Y,
+                0.0
+            )
+            
+            for region_data in regions:
+                spatial_element = region_data['spatial_element']
+                element_number_str = region_data['element_number_str']
+                try:
+                    # Get level
+                    level_id = adapter.get_level_id(spatial_element)
+                    level = doc.GetElement(level_id) if level_id else None
+                    
+                    # Place instance
+                    instance = doc.Create.NewFamilyInstance(
+                        placement_point,
+                        symbol,
+                        level,
+                        StructuralType.NonStructural
+                    )
+                    
+                    if not instance:
+                        fail_count += _record_placement_failure(failed_elements, region_data, 'Failed to place Mass instance')
+                        continue
+                    
+                    # Show only this region's form of a bulk family
+                    region_index = region_data.get('region_index')
+                    if region_index is not None:
+                        index_param = instance.LookupParameter(REGION_INDEX_PARAM)
+                        if not index_param or not index_param.Set(region_index):
+                            doc.Delete(instance.Id)
+                            fail_count += _record_placement_failure(
+                                failed_elements, region_data, 'Could not set {}'.format(REGION_INDEX_PARAM))
+                            continue
+                    
+                    logger.debug("Placed Mass instance for element {}: {}".format(
+                        element_number_str, instance.Id))
+                    
+                    # Set phase if applicable
+                    phase_id = adapter.get_phase_id(spatial_element)
+                    adapter.set_phase_on_instance(instance, phase_id)
+                    
+                    # Copy properties
+                    adapter.copy_properties_to_instance(spatial_element, instance, doc)
+                    
+                    created_instance_ids.append(instance.Id)
+                    success_count += 1
+                    
+                except Exception as place_error:
+                    logger.error("Error placing Mass for element {}: {}".format(
+                        element_number_str, place_error))
+                    fail_count += _record_placement_failure(
+                        failed_elements, region_data, 'Error placing Mass: {}'.format(str(place_error)))
         
         t.Commit()
     except Exception as tx_error:
         t.RollBack()
         logger.error("Transaction failed: {}".format(tx_error))
-        fail_count += len(family_data_list) - success_count
+        total_regions = sum(len(d.get('grouped_regions') or [d]) for d in family_data_list)
+        fail_count += total_regions - success_count
     
     return success_count, fail_count, failed_elements, created_instance_ids
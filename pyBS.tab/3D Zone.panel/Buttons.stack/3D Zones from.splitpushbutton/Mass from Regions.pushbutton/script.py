@@ -47,6 +47,9 @@ if lib_path not in sys.path:
 # Initialize logger
 logger = script.get_logger()
 
+# Offer bulk mode (shared families per level/phase) from this many regions
+BULK_MODE_THRESHOLD = 20
+
 # Import shared modules
 from zone3d.spatial_adapter import RegionAdapter
 from zone3d.mass_creator import create_masses_from_spatial_elements
@@ -120,6 +123,16 @@ if __name__ == '__main__':
     # Create adapter with view for phase handling
     adapter = RegionAdapter(active_view=active_view)
     
+    # Large selections: offer shared families instead of one family per region
+    bulk_mode = False
+    if len(filled_regions) >= BULK_MODE_THRESHOLD:
+        bulk_mode = forms.alert(
+            "{} regions selected.\n\nUse bulk mode? Regions on the same level and phase are "
+            "created as forms in shared Mass families, with one instance and its own "
+            "properties per region. This is much faster for large site plans.".format(
+                len(filled_regions)),
+            yes=True, no=True, title="Mass from Regions")
+    
     # Create Mass elements using orchestration function
     success_count, fail_count, failed_elements, created_instance_ids = create_masses_from_spatial_elements(
         filled_regions,
@@ -129,7 +142,8 @@ if __name__ == '__main__':
         pushbutton_dir,
         show_region_filter_dialog,
         "Regions",
-        "MassZone.rfa"
+        "MassZone.rfa",
+        bulk_mode=bool(bulk_mode)
     )
     
     # Select newly created instances
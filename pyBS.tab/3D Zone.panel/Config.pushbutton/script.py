@@ -103,6 +103,8 @@ class ConfigItem(INotifyPropertyChanged):
         self.linked_document_name = config_dict.get("linked_document_name", None)
         self.source_sort_property = config_dict.get("source_sort_property", "ElementId")
         self.source_sort_descending = config_dict.get("source_sort_descending", False)
+        self.ifc_export_priority = config_dict.get("ifc_export_priority", None)
+        self.ifc_export_time_budget = config_dict.get("ifc_export_time_budget", None)
         # Initialize the event handler list
         self._property_changed_handlers = []
     
@@ -580,6 +582,40 @@ def autosize_configs_listview_columns(list_view, fill_mappings_column=True):
             columns[index].Width = width
 
 
+def _format_optional_number(value):
+    """Format an optional number for a TextBox (empty when unset)."""
+    if value is None:
+        return ""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return ""
+    return str(int(number)) if number == int(number) else str(number)
+
+
+def _parse_optional_number(text, label, integer=False):
+    """Parse an optional number from a TextBox.
+    
+    Returns:
+        tuple: (value or None when empty, error message or None)
+    """
+    text = (text or "").strip().replace(",", ".")
+    if not text:
+        return None, None
+    try:
+        value = float(text)
+        if integer:
+            if value != int(value):
+                raise ValueError(text)
+            return int(value), None
+        if value < 0:
+            raise ValueError(text)
+        return value, None
+    except ValueError:
+        kind = "a whole number" if integer else "a number of seconds"
+        return None, "{} must be {}".format(label, kind)
+
+
 def format_linked_model_display_name(link_name):
     """Return the link filename from a Revit link instance display name.
     
@@ -1179,7 +1215,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
                         "use_linked_document": config_item.use_linked_document if hasattr(config_item, 'use_linked_document') else False,
                         "linked_document_name": config_item.linked_document_name if hasattr(config_item, 'linked_document_name') else None,
                         "source_sort_property": config_item.source_sort_property if hasattr(config_item, 'source_sort_property') else "ElementId",
-                        "source_sort_descending": config_item.source_sort_descending if hasattr(config_item, 'source_sort_descending') else False
+                        "source_sort_descending": config_item.source_sort_descending if hasattr(config_item, 'source_sort_descending') else False,
+                        "ifc_export_priority": config_item.ifc_export_priority if hasattr(config_item, 'ifc_export_priority') else None,
+                        "ifc_export_time_budget": config_item.ifc_export_time_budget if hasattr(config_item, 'ifc_export_time_budget') else None
                     }
                     break
             
@@ -1505,6 +1543,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
         self.sortAscendingRadioButton.IsChecked = True
         self.sortDescendingRadioButton.IsChecked = False
         
+        # Reset IFC export budget settings
+        self.load_ifc_export_budget_fields(None)
+        
         # Reset validation state
         self._validation_errors = {
             "name": False,
@@ -1644,6 +1685,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
             self.sortAscendingRadioButton.IsChecked = True
             self.sortDescendingRadioButton.IsChecked = False
         
+        # Load IFC export budget settings
+        self.load_ifc_export_budget_fields(selected_config)
+        
         # Switch to edit tab
         self.editConfigTab.IsEnabled = True
         self.tabControl.SelectedItem = self.editConfigTab
@@ -1687,6 +1731,14 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
         for link_name, link_instance in linked_docs:
             self.linkedDocumentComboBox.Items.Add(link_name)
     
+    def load_ifc_export_budget_fields(self, config_item):
+        """Fill the IFC export budget fields from a ConfigItem (None for a new mapping)."""
+        priority = config_item.ifc_export_priority if config_item else None
+        budget = config_item.ifc_export_time_budget if config_item else None
+        self.ifcExportPriorityTextBox.Text = _format_optional_number(priority)
+        self.ifcExportTimeBudgetTextBox.Text = _format_optional_number(budget)
+        self.ifcExportTotalBudgetTextBox.Text = _format_optional_number(config.get_ifc_export_time_budget())
+    
     def save_button_click(self, sender, args):
         """Handle save button click."""
         try:
@@ -1709,6 +1761,21 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
             
             # Get validated inputs
             name = self.nameTextBox.Text.strip()
+            
+            # Get IFC export budget settings (empty fields keep the defaults)
+            ifc_export_priority, priority_error = _parse_optional_number(
+                self.ifcExportPriorityTextBox.Text, "IFC export priority", integer=True)
+            ifc_export_time_budget, budget_error = _parse_optional_number(
+                self.ifcExportTimeBudgetTextBox.Text, "Mapping budget")
+            total_budget, total_budget_error = _parse_optional_number(
+                self.ifcExportTotalBudgetTextBox.Text, "Total export budget")
+            budget_errors = [e for e in (priority_error, budget_error, total_budget_error) if e]
+            if budget_errors:
+                MessageBox.Show("Please fix the following errors:\n\n" + "\n".join("- " + e for e in budget_errors),
+                                "Validation Error", MessageBoxButton.OK)
+                return
+            if total_budget != config.get_ifc_export_time_budget():
+                config.set_ifc_export_time_budget(total_budget)
 
             # Get order - use existing order if editing, otherwise get next order
             if self.is_new_config:
@@ -1807,7 +1874,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
                     "use_linked_document": use_linked_document,
                     "linked_document_name": linked_document_name,
                     "source_sort_property": source_sort_property,
-                    "source_sort_descending": source_sort_descending
+                    "source_sort_descending": source_sort_descending,
+                    "ifc_export_priority": ifc_export_priority,
+                    "ifc_export_time_budget": ifc_export_time_budget
                 }
                 all_configs.append(new_config)
             else:
@@ -1836,7 +1905,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
                                 "use_linked_document": use_linked_document,
                                 "linked_document_name": linked_document_name,
                                 "source_sort_property": source_sort_property,
-                                "source_sort_descending": source_sort_descending
+                                "source_sort_descending": source_sort_descending,
+                                "ifc_export_priority": ifc_export_priority,
+                                "ifc_export_time_budget": ifc_export_time_budget
                             }
                             config_found = True
                             break
@@ -1857,7 +1928,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
                             "use_linked_document": use_linked_document,
                             "linked_document_name": linked_document_name,
                             "source_sort_property": source_sort_property,
-                            "source_sort_descending": source_sort_descending
+                            "source_sort_descending": source_sort_descending,
+                            "ifc_export_priority": ifc_export_priority,
+                            "ifc_export_time_budget": ifc_export_time_budget
                         }
                         all_configs.append(new_config)
                 else:
@@ -1879,7 +1952,9 @@ class Zone3DConfigEditorUI(forms.WPFWindow):
                                 "use_linked_document": use_linked_document,
                                 "linked_document_name": linked_document_name,
                                 "source_sort_property": source_sort_property,
-                                "source_sort_descending": source_sort_descending
+                                "source_sort_descending": source_sort_descending,
+                                "ifc_export_priority": ifc_export_priority,
+                                "ifc_export_time_budget": ifc_export_time_budget
                             }
                             break
             
@@ -3,11 +3,17 @@
 
 When shift-clicking, this creates view filters for MMI ranges and applies them to the active view.
 This provides a more permanent solution compared to direct color overrides.
+
+With views, view templates or sheets selected in the Project Browser, the
+filter set is applied to all of them (sheets: their placed views) in one
+transaction instead. A view whose template controls V/G filters cannot
+take filters itself, so its template is coloured in its place, once per
+template.
 """
 
 __title__ = "Create MMI Filters"
 __author__ = "Byggstyrning AB"
-__doc__ = "Shift-click: Creates view filters for MMI ranges and applies them to the active view"
+__doc__ = "Shift-click: Creates view filters for MMI ranges and applies them to the active view or the views selected in the Project Browser"
 
 # Import standard libraries
 import sys
@@ -52,329 +58,166 @@ logger = script.get_logger()
 
 # Import MMI libraries
 from mmi.core import get_mmi_parameter_name
-from revit.compat import get_element_id_value, create_equals_rule, make_element_id
+from mmi.filters import (
+    MMI_FILTER_RANGES,
+    find_mmi_parameter_id,
+    get_categories_with_parameter,
+    get_mmi_filter_set,
+    apply_filter_set_to_views,
+)
+from revit.compat import get_element_id_value
 
-# Official MMI Color codes from https://mmi-veilederen.no/?page_id=85
-# Each filter matches exact MMI values (e.g., "000", "100", "125", etc.)
-MMI_FILTER_RANGES = [
-    {"value": "000", "name": "MMI_000_Tidligfase", "display_name": "000 - Tidligfase", 
-     "color": Color(215, 50, 150)},
-    {"value": "100", "name": "MMI_100_Grunnlagsinformasjon", "display_name": "100 - Grunnlagsinformasjon", 
-     "color": Color(190, 40, 35)},
-    {"value": "125", "name": "MMI_125_Etablert_konsept", "display_name": "125 - Etablert konsept", 
-     "color": Color(210, 75, 70)},
-    {"value": "150", "name": "MMI_150_Tverrfaglig_kontrollert_konsept", "display_name": "150 - Tverrfaglig kontrollert konsept", 
-     "color": Color(225, 120, 115)},
-    {"value": "175", "name": "MMI_175_Valgt_konsept", "display_name": "175 - Valgt konsept", 
-     "color": Color(240, 170, 170)},
-    {"value": "200", "name": "MMI_200_Ferdig_konsept", "display_name": "200 - Ferdig konsept", 
-     "color": Color(230, 150, 55)},
-    {"value": "225", "name": "MMI_225_Etablert_prinsipielle", "display_name": "225 - Etablert prinsipielle løsninger", 
-     "color": Color(235, 175, 100)},
-    {"value": "250", "name": "MMI_250_Tverrfaglig_kontrollert_prinsipielle", "display_name": "250 - Tverrfaglig kontrollert prinsipielle løsninger", 
-     "color": Color(240, 200, 140)},
-    {"value": "275", "name": "MMI_275_Valgt_prinsipielle", "display_name": "275 - Valgt prinsipielle løsninger", 
-     "color": Color(245, 230, 215)},
-    {"value": "300", "name": "MMI_300_Underlag_for_detaljering", "display_name": "300 - Underlag for detaljering", 
-     "color": Color(250, 240, 80)},
-    {"value": "325", "name": "MMI_325_Etablert_detaljerte", "display_name": "325 - Etablert detaljerte løsninger", 
-     "color": Color(215, 205, 65)},
-    {"value": "350", "name": "MMI_350_Tverrfaglig_kontrollert_detaljerte", "display_name": "350 - Tverrfaglig kontrollert detaljerte løsninger", 
-     "color": Color(185, 175, 60)},
-    {"value": "375", "name": "MMI_375_Detaljerte_anbud", "display_name": "375 - Detaljerte løsninger (anbud/bestilling)", 
-     "color": Color(150, 150, 50)},
-    {"value": "400", "name": "MMI_400_Arbeidsgrunnlag", "display_name": "400 - Arbeidsgrunnlag", 
-     "color": Color(55, 130, 70)},
-    {"value": "425", "name": "MMI_425_Etablert_utfort", "display_name": "425 - Etablert/utført", 
-     "color": Color(75, 170, 90)},
-    {"value": "450", "name": "MMI_450_Kontrollert_utforelse", "display_name": "450 - Kontrollert utførelse", 
-     "color": Color(100, 195, 125)},
-    {"value": "475", "name": "MMI_475_Godkjent_utforelse", "display_name": "475 - Godkjent utførelse", 
-     "color": Color(155, 215, 165)},
-    {"value": "500", "name": "MMI_500_Som_bygget", "display_name": "500 - Som bygget", 
-     "color": Color(30, 70, 175)},
-    {"value": "600", "name": "MMI_600_I_drift", "display_name": "600 - I drift", 
-     "color": Color(175, 50, 205)},
-]
+def get_filter_controlling_template(doc, view):
+    """Return the view template that controls the V/G filters of ``view``, or None."""
+    template_id = view.ViewTemplateId
+    if template_id == ElementId.InvalidElementId:
+        return None
+    template = doc.GetElement(template_id)
+    if not template:
+        return None
+    filters_id = ElementId(BuiltInParameter.VIS_GRAPHICS_FILTERS)
+    if filters_id in template.GetNonControlledTemplateParameterIds():
+        return None
+    return template
 
-def get_categories_with_parameter(doc, mmi_param_id, mmi_param_name):
-    """Get categories where the MMI parameter actually exists.
+def get_selected_target_views(doc):
+    """Return views/templates selected in the Project Browser (sheets: their placed views).
     
-    This checks ParameterBindings first, then verifies by checking elements.
-    Only returns categories where the parameter can be used in filters.
+    Views whose template controls V/G filters are replaced by that template.
     """
-    # Use .NET List[ElementId] like ColorSplasher does (line 489)
-    valid_categories = List[ElementId]()
-    
-    
-    # Method 1: Check ParameterBindings (works for project/shared parameters)
-    try:
-        param_bindings = doc.ParameterBindings
-        iterator = param_bindings.ForwardIterator()
-        iterator.Reset()
-        
-        while iterator.MoveNext():
-            binding = iterator.Current
-            param_def = binding.Key
-            
-            # Check by ID first
-            if param_def.Id == mmi_param_id:
-                # Found the parameter binding - get its categories
-# Exclude certain categories that shouldn't be in filters
-                excluded_category_ids = {
-                    make_element_id(-2000700),  # Materials
-                    make_element_id(-2003200),  # Areas
-                    make_element_id(-2000160),  # Rooms
-                    make_element_id(-2008107),  # HVAC Zones
-                }
-                
-                categories = binding.Categories
-                for cat in categories:
-                    if cat.CategoryType == CategoryType.Model and cat.AllowsBoundParameters:
-                        # Skip excluded categories
-                        if cat.Id in excluded_category_ids:
-continue
-                        
-                        valid_categories.Add(cat.Id)
-if valid_categories.Count > 0:
-                    return valid_categories
-            
-            # Also check by name (for built-in parameters that might not match by ID)
-            if param_def.Name == mmi_param_name:
-# Exclude certain categories that shouldn't be in filters
-                excluded_category_ids = {
-                    make_element_id(-2000700),  # Materials
-                    make_element_id(-2003200),  # Areas
-                    make_element_id(-2000160),  # Rooms
-                    make_element_id(-2008107),  # HVAC Zones
-                }
-                
-                categories = binding.Categories
-                for cat in categories:
-                    if cat.CategoryType == CategoryType.Model and cat.AllowsBoundParameters:
-                        # Skip excluded categories
-                        if cat.Id in excluded_category_ids:
-                            continue
-                        
-                        # Avoid duplicates: compare by integer id to match
-                        # the ElementId values already in valid_categories.
-                        cat_id_int = get_element_id_value(cat.Id)
-                        if cat_id_int not in [get_element_id_value(c) for c in valid_categories]:
-                            valid_categories.Add(cat.Id)
-if valid_categories.Count > 0:
-                    return valid_categories
-    except Exception as ex:
-        pass
+    targets = []
+    seen = set()
     
-    # Method 2: For built-in parameters or if ParameterBindings didn't work,
-    # find categories by checking elements that have the parameter
-# Get unique categories from elements that have this parameter
-    category_ids_found = set()
+    def add_view(view):
+        if not view.IsTemplate:
+            template = get_filter_controlling_template(doc, view)
+            if template is not None:
+                logger.debug("View '{}' takes its filters from template '{}'".format(
+                    view.Name, template.Name))
+                view = template
+        view_id = get_element_id_value(view.Id)
+        if view_id in seen:
+            return
+        seen.add(view_id)
+        try:
+            if view.AreGraphicsOverridesAllowed():
+                targets.append(view)
+        except Exception:
+            pass
     
-    # Check ALL elements, not just view-independent ones, to find all categories
-    collector = FilteredElementCollector(doc) \
-        .WhereElementIsNotElementType() \
-        .ToElements()
+    for element in revit.get_selection().elements:
+        if isinstance(element, ViewSheet):
+            for view_id in element.GetAllPlacedViews():
+                placed_view = doc.GetElement(view_id)
+                if placed_view:
+                    add_view(placed_view)
+        elif isinstance(element, View):
+            add_view(element)
+    return targets
+
+def ask_template_or_view(active_view, template_name, filter_count):
+    """Ask where to apply filters on a view with a template.
     
-    checked_count = 0
-    max_checks = 1000  # Check more elements to find all categories
+    Returns:
+        str or None: "Add to Template", "Add to View", "Both" or None if cancelled
+    """
+    # Ask user where to apply filters using custom WPF dialog
+    xaml_file = op.join(pushbutton_dir, 'FilterSelectionDialog.xaml')
     
-    for elem in collector:
-        if checked_count >= max_checks:
-            break
-        
-        try:
-            # Skip elements without a valid category
-            if not elem.Category or not elem.Category.Id:
-                continue
+    class FilterSelectionDialog(forms.WPFWindow):
+        def __init__(self, xaml_file, view_name, template_name, filter_count):
+            forms.WPFWindow.__init__(self, xaml_file)
             
-            # Skip non-model categories (like Materials, which is -2000700)
-            if elem.Category.CategoryType != CategoryType.Model:
-                continue
+            # Load styles AFTER window initialization (window-scoped, does not affect Revit UI)
+            load_styles_to_window(self)
             
-            # Check if element has the parameter
-            param = None
+            # Ensure options panel is visible
             try:
-                param = elem.LookupParameter(mmi_param_name)
-            except:
-                pass
-            
-            param_found = False
-            if param and param.Id == mmi_param_id:
-                param_found = True
-            
-            # Also check by iterating Parameters (for built-in parameters)
-            if not param_found:
-                for pr in elem.Parameters:
-                    if pr.Id == mmi_param_id:
-                        param_found = True
-                        break
-            
-            if param_found:
-                # Element has the parameter - add its category
-                cat_id = get_element_id_value(elem.Category.Id)
-                category_ids_found.add(cat_id)
-        except Exception as ex:
-pass
-        
-        checked_count += 1
-    
-    # Convert found category IDs to ElementId list
-    # Filter out invalid categories and categories that shouldn't be in filters
-    excluded_category_ids = {
-        -2000700,  # Materials (not an element category)
-        -2003200,  # Areas (special category, not typically filtered)
-        -2000160,  # Rooms (special category, not typically filtered)
-        -2008107,  # HVAC Zones (special category)
-    }
-    
-    for cat_id_int in category_ids_found:
-        try:
-            cat_id = ElementId(cat_id_int)
-            category = Category.GetCategory(doc, cat_id)
-            
-            # Skip excluded categories
-            if cat_id_int in excluded_category_ids:
-continue
+                from System.Windows import Visibility
+                options_panel = self.FindName('optionsPanel')
+                if options_panel:
+                    options_panel.Visibility = Visibility.Visible
+                    for i in range(options_panel.Children.Count):
+                        child = options_panel.Children[i]
+                        if hasattr(child, 'Visibility'):
+                            child.Visibility = Visibility.Visible
+            except Exception as ex:
+                logger.debug("Could not verify options panel: {}".format(str(ex)))
             
-            # Only add model categories that allow bound parameters
-            if category and category.CategoryType == CategoryType.Model and category.AllowsBoundParameters:
-                # Additional validation: ensure category can be used in filters
-                # Some categories like Areas, Rooms, HVAC Zones shouldn't be in element filters
-                try:
-                    # Test if category can be used in a filter by checking if it's filterable
-                    # This is a heuristic - we'll include it if it passes the above checks
-                    valid_categories.Add(cat_id)
-except Exception as ex:
-return valid_categories
-
-def create_mmi_filter(doc, filter_range, mmi_param_id, categories):
-    """Create a single MMI filter for an exact MMI value.
+            self.viewNameRun.Text = view_name
+            self.templateNameRun.Text = template_name
+            self.filterCountRun.Text = str(filter_count)
+            self.selected_option = None
+        
+        def OkButton_Click(self, sender, e):
+            selected_item = self.optionComboBox.SelectedItem
+            if selected_item:
+                self.selected_option = selected_item.Content
+            self.Close()
     
-    Args:
-        doc: Revit document
-        filter_range: Dictionary with filter definition (contains exact value)
-        mmi_param_id: ElementId of the MMI parameter
-        categories: List of category IDs to filter
-        
-    Returns:
-        ParameterFilterElement or None if failed
-    """
     try:
-        # Filter name should be just "MMI_xxx" (e.g., "MMI_000"), not "MMI_000_Tidligfase"
-        filter_name = "MMI_{}".format(filter_range["value"])
-        mmi_value = filter_range["value"]
-        
-        # Check if filter already exists
-        existing_filters = FilteredElementCollector(doc) \
-            .OfClass(ParameterFilterElement) \
-            .ToElements()
-        
-        for existing_filter in existing_filters:
-            if existing_filter.Name == filter_name:
-                logger.debug("Filter '{}' already exists, will reuse".format(filter_name))
-                return existing_filter
-        
-        # Create filter rule for exact MMI value match
-        # MMI values are stored as strings like "000", "100", "125", etc.
-        # Use CreateEqualsRule (same as ColorSplasher does for String parameters)
-        # ColorSplasher uses CreateEqualsRule for all parameter types, including built-in parameters
-        # The key is getting the parameter ID from an element's Parameter object, not from bindings
-        
-        # CreateEqualsRule dropped its caseSensitive parameter in Revit 2024.
-        # revit.compat.create_equals_rule hides the difference.
-        rule = create_equals_rule(mmi_param_id, mmi_value, case_sensitive=True)
-
-        element_filter = ElementParameterFilter(rule)
-        
-# Create the ParameterFilterElement
-        param_filter = ParameterFilterElement.Create(
-            doc,
-            filter_name,
-            categories,
-            element_filter
-        )
-        
-logger.debug("Created filter: {} for MMI value '{}'".format(filter_name, mmi_value))
-        return param_filter
-        
+        dialog = FilterSelectionDialog(xaml_file, active_view.Name, template_name, filter_count)
+        dialog.ShowDialog()
+        return dialog.selected_option
     except Exception as ex:
-        logger.error("Error creating filter '{}': {}".format(filter_range["name"], ex))
+        # Fallback to simple alert if custom dialog fails
+        logger.debug("Custom dialog failed, using fallback: {}".format(str(ex)))
         import traceback
-        logger.error(traceback.format_exc())
-        return None
+        logger.debug(traceback.format_exc())
+        options = ["Add to Template", "Add to View", "Both"]
+        return forms.ask_for_one_item(
+            items=options,
+            default=options[0] if options else None,
+            prompt="Where would you like to apply the {} MMI filters?".format(filter_count),
+            title="Apply Filters to Template or View?"
+        )
 
-def apply_filter_to_view(doc, view, param_filter, filter_range):
-    """Apply a filter to a view with graphics overrides.
+def get_active_view_targets(doc, active_view):
+    """Resolve the active view (and/or its template) as filter targets.
     
-    Args:
-        doc: Revit document
-        view: View to apply filter to
-        param_filter: ParameterFilterElement to apply
-        filter_range: Dictionary with filter definition (for color)
+    Returns:
+        list or None: Target views, None if the view is invalid or the user cancelled
     """
-    try:
-        # Check if filter is already applied
-        existing_filters = view.GetFilters()
-        if param_filter.Id in existing_filters:
-            logger.debug("Filter '{}' already applied to view".format(param_filter.Name))
-            # Update the override anyway
-            pass
-        else:
-            # Add filter to view
-            view.AddFilter(param_filter.Id)
-            logger.debug("Added filter '{}' to view".format(param_filter.Name))
-        
-        # Get solid fill pattern
-        solid_fill_id = None
-        patterns = FilteredElementCollector(doc).OfClass(FillPatternElement)
-        for pat in patterns:
-            fill_pattern = pat.GetFillPattern()
-            if fill_pattern.IsSolidFill:
-                solid_fill_id = pat.Id
-                break
-        
-        # Create graphics override
-        color = filter_range["color"]
-        ogs = OverrideGraphicSettings()
-        ogs.SetProjectionLineColor(color)
-        ogs.SetCutLineColor(color)
-        ogs.SetSurfaceForegroundPatternColor(color)
-        ogs.SetCutForegroundPatternColor(color)
-        
-        if solid_fill_id:
-            ogs.SetSurfaceForegroundPatternId(solid_fill_id)
-            ogs.SetCutForegroundPatternId(solid_fill_id)
-        
-        # Set the filter override
-        view.SetFilterOverrides(param_filter.Id, ogs)
-        logger.debug("Applied graphics override to filter '{}'".format(param_filter.Name))
-        
-    except Exception as ex:
-        logger.error("Error applying filter '{}' to view: {}".format(param_filter.Name, ex))
-        import traceback
-        logger.error(traceback.format_exc())
+    if not active_view:
+        forms.alert("No active view found.", title="Error")
+        return None
+    
+    if active_view.ViewType == ViewType.DrawingSheet:
+        forms.alert("View filters cannot be applied to sheets. Please open a model view.", 
+                   title="Invalid View Type")
+        return None
+    
+    if active_view.IsTemplate:
+        forms.alert("Cannot apply filters to view templates.", 
+                   title="Invalid View Type")
+        return None
+    
+    template_id = active_view.ViewTemplateId
+    if template_id == ElementId.InvalidElementId:
+        # No template - apply to view only
+        return [active_view]
+    
+    template_view = doc.GetElement(template_id)
+    if not template_view:
+        return [active_view]
+    
+    selected_option = ask_template_or_view(active_view, template_view.Name, len(MMI_FILTER_RANGES))
+    if not selected_option:
+        # User cancelled
+        logger.info("User cancelled filter application")
+        return None
+    
+    targets = []
+    if selected_option == "Add to Template" or selected_option == "Both":
+        targets.append(template_view)
+    if selected_option == "Add to View" or selected_option == "Both":
+        targets.append(active_view)
+    return targets
 
 def create_and_apply_mmi_filters():
-    """Main function to create MMI filters and apply them to the active view."""
+    """Main function to create MMI filters and apply them to the target views."""
     try:
         doc = revit.doc
-        active_view = doc.ActiveView
-        
-        # Check if we have a valid view
-        if not active_view:
-            forms.alert("No active view found.", title="Error")
-            return
-        
-        if active_view.ViewType == ViewType.DrawingSheet:
-            forms.alert("View filters cannot be applied to sheets. Please open a model view.", 
-                       title="Invalid View Type")
-            return
-        
-        if active_view.IsTemplate:
-            forms.alert("Cannot apply filters to view templates.", 
-                       title="Invalid View Type")
-            return
         
         # Get MMI parameter name
         mmi_param_name = get_mmi_parameter_name(doc)
@@ -383,48 +226,8 @@ def create_and_apply_mmi_filters():
                        title="MMI Parameter Not Configured")
             return
         
-        # Get parameter ID from an element (ColorSplasher method)
-        # ColorSplasher gets parameter ID directly from element.Parameters, not from ParameterBindings
-        # This works for BOTH project/shared parameters AND built-in parameters
-        # See ColorSplasher line 1413-1414: iterates through elem.Parameters to find matching name
-        mmi_param_id = None
-        
-        collector = FilteredElementCollector(doc) \
-            .WhereElementIsNotElementType() \
-            .WhereElementIsViewIndependent() \
-            .ToElements()
-        
-        # Try up to 200 elements to find the parameter
-        checked_count = 0
-        max_checks = 200
-        
-        for elem in collector:
-            if checked_count >= max_checks:
-                break
-            
-            try:
-                # Method 1: Try LookupParameter first (works for project/shared parameters)
-                param = elem.LookupParameter(mmi_param_name)
-                if param and param.Id:
-                    mmi_param_id = param.Id
-                    break
-                
-                # Method 2: Iterate through Parameters (works for built-in parameters too)
-                # This is how ColorSplasher does it (see line 1413-1414)
-                if not mmi_param_id:
-                    for pr in elem.Parameters:
-                        if pr.Definition.Name == mmi_param_name:
-                            if pr.Id:
-                                mmi_param_id = pr.Id
-                                break
-                    if mmi_param_id:
-                        break
-            except Exception as ex:
-                pass
-            
-            checked_count += 1
-        
         # Note: MMI is always an instance parameter, so we don't need to check element types
+        mmi_param_id = find_mmi_parameter_id(doc, mmi_param_name)
         
         if not mmi_param_id:
             # Build error message
@@ -461,166 +264,51 @@ def create_and_apply_mmi_filters():
         logger.debug("Found {} categories with parameter".format(categories.Count))
         
         
-        # Create filters in a transaction
-        created_filters = []
+        # Views selected in the Project Browser take precedence over the active view
+        target_views = get_selected_target_views(doc)
+        if not target_views:
+            target_views = get_active_view_targets(doc, doc.ActiveView)
+            if not target_views:
+                return
         
-        with Transaction(doc, "Create MMI View Filters") as t:
+        # Resolve the filter set and apply it to every target in one transaction
+        with Transaction(doc, "Apply MMI View Filters") as t:
             t.Start()
-            
-            for filter_range in MMI_FILTER_RANGES:
-                param_filter = create_mmi_filter(doc, filter_range, mmi_param_id, categories)
-                if param_filter:
-                    created_filters.append((param_filter, filter_range))
-            
+            filter_set = get_mmi_filter_set(doc, mmi_param_id, categories)
+            if not filter_set:
+                t.RollBack()
+                forms.alert("Failed to create any view filters.", 
+                           title="Error")
+                return
+            result = apply_filter_set_to_views(doc, target_views, filter_set)
             t.Commit()
         
-        if not created_filters:
-            forms.alert("Failed to create any view filters.", 
-                       title="Error")
-            return
-        
-        # Check if view has a template and ask user where to apply filters
-        template_id = active_view.ViewTemplateId
-        template_view = None
-        template_name = None
-        apply_to_template = False
-        apply_to_view = False
-        
-        if template_id != ElementId.InvalidElementId:
-            # View has a template - ask user where to apply filters
-            template_view = doc.GetElement(template_id)
-            if template_view:
-                template_name = template_view.Name
-# Ask user where to apply filters using custom WPF dialog
-                xaml_file = op.join(pushbutton_dir, 'FilterSelectionDialog.xaml')
-                
-                class FilterSelectionDialog(forms.WPFWindow):
-                    def __init__(self, xaml_file, view_name, template_name, filter_count):
-                        forms.WPFWindow.__init__(self, xaml_file)
-                        
-                        # Load styles AFTER window initialization (window-scoped, does not affect Revit UI)
-                        load_styles_to_window(self)
-                        
-                        # Ensure options panel is visible
-                        try:
-                            from System.Windows import Visibility
-                            options_panel = self.FindName('optionsPanel')
-                            if options_panel:
-                                options_panel.Visibility = Visibility.Visible
-                                for i in range(options_panel.Children.Count):
-                                    child = options_panel.Children[i]
-                                    if hasattr(child, 'Visibility'):
-                                        child.Visibility = Visibility.Visible
-                        except Exception as ex:
-                            logger.debug("Could not verify options panel: {}".format(str(ex)))
-                        
-                        self.viewNameRun.Text = view_name
-                        self.templateNameRun.Text = template_name
-                        self.filterCountRun.Text = str(filter_count)
-                        self.selected_option = None
-                    
-                    def OkButton_Click(self, sender, e):
-                        selected_item = self.optionComboBox.SelectedItem
-                        if selected_item:
-                            self.selected_option = selected_item.Content
-                        self.Close()
-                    
-                
-                try:
-                    dialog = FilterSelectionDialog(xaml_file, active_view.Name, template_name, len(created_filters))
-                    dialog.ShowDialog()
-                    selected_option = dialog.selected_option
-                except Exception as ex:
-                    # Fallback to simple alert if custom dialog fails
-                    logger.debug("Custom dialog failed, using fallback: {}".format(str(ex)))
-                    import traceback
-                    logger.debug(traceback.format_exc())
-                    options = ["Add to Template", "Add to View", "Both"]
-                    selected_option = forms.ask_for_one_item(
-                        items=options,
-                        default=options[0] if options else None,
-                        prompt="Where would you like to apply the {} MMI filters?".format(len(created_filters)),
-                        title="Apply Filters to Template or View?"
-                    )
-                
-                if not selected_option:
-                    # User cancelled
-                    logger.info("User cancelled filter application")
-                    return
-                
-                
-                if selected_option == "Add to Template" or selected_option == "Both":
-                    apply_to_template = True
-                if selected_option == "Add to View" or selected_option == "Both":
-                    apply_to_view = True
+        if result["failed"]:
+            failed_view, error = result["failed"][0]
+            forms.alert(
+                "Error applying filters to {} view(s), e.g. '{}':\n\n{}".format(
+                    len(result["failed"]), failed_view.Name, error),
+                title="Error"
+            )
+        
+        if len(target_views) == 1:
+            location_text = "'{}'".format(target_views[0].Name)
+        elif len(target_views) == 2 and target_views[0].IsTemplate:
+            location_text = "template '{}' and view '{}'".format(target_views[0].Name, target_views[1].Name)
         else:
-            # No template - apply to view only
-            apply_to_view = True
-        
-        # Apply filters to template if requested
-        if apply_to_template and template_view:
-            try:
-                with Transaction(doc, "Apply MMI Filters to View Template") as t:
-                    t.Start()
-                    
-                    for param_filter, filter_range in created_filters:
-                        apply_filter_to_view(doc, template_view, param_filter, filter_range)
-                    
-                    t.Commit()
-                
-                logger.info("Successfully applied {} filters to template '{}'".format(
-                    len(created_filters), template_name))
-            except Exception as ex:
-                logger.error("Error applying filters to template: {}".format(ex))
-                import traceback
-                logger.error(traceback.format_exc())
-                forms.alert(
-                    "Error applying filters to template '{}':\n\n{}".format(template_name, ex),
-                    title="Error"
-                )
-                # Continue to apply to view if that was also requested
+            location_text = "{} views".format(result["views"])
         
-        # Apply filters to the active view if requested
-        if apply_to_view:
-            try:
-                with Transaction(doc, "Apply MMI Filters to View") as t:
-                    t.Start()
-                    
-                    for param_filter, filter_range in created_filters:
-                        apply_filter_to_view(doc, active_view, param_filter, filter_range)
-                    
-                    t.Commit()
-                
-                logger.info("Successfully applied {} filters to view '{}'".format(
-                    len(created_filters), active_view.Name))
-            except Exception as ex:
-                logger.error("Error applying filters to view: {}".format(ex))
-                import traceback
-                logger.error(traceback.format_exc())
-                forms.alert(
-                    "Error applying filters to view '{}':\n\n{}".format(active_view.Name, ex),
-                    title="Error"
-                )
-        
-        # Show success message
-        applied_locations = []
-        if apply_to_template:
-            applied_locations.append("template '{}'".format(template_name))
-        if apply_to_view:
-            applied_locations.append("view '{}'".format(active_view.Name))
-        
-        location_text = " and ".join(applied_locations)
         forms.show_balloon(
             header="MMI View Filters Created",
-            text="Created {} view filters and applied them to {}.".format(
-                len(created_filters),
+            text="Applied {} view filters to {}.".format(
+                len(filter_set),
                 location_text
             ),
             is_new=True
         )
         
-        logger.debug("Successfully created and applied {} MMI filters to {}".format(
-            len(created_filters), location_text))
+        logger.debug("Applied {} MMI filters to {} views ({} filters added, {} overrides set)".format(
+            len(filter_set), result["views"], result["filters_added"], result["overrides_set"]))
         
     except Exception as ex:
         logger.error("Error creating MMI filters: {}".format(ex))
@@ -634,4 +322,3 @@ def create_and_apply_mmi_filters():
 if __name__ == '__main__':
     logger.debug("Shift-click: Creating MMI view filters...")
     create_and_apply_mmi_filters()
-
@@ -58,47 +58,25 @@ logger = script.get_logger()
 # Import MMI libraries - now using centralized colorizer module
 from mmi import (
     get_mmi_parameter_name,
-    get_element_mmi_value,
-    MMI_COLOR_RANGES,
-    get_color_for_mmi,
     is_colorer_active,
     set_colorer_active,
     get_colored_view_id,
     set_colored_view_id,
     get_colored_element_ids,
     set_colored_element_ids,
-    clear_colorizer_state
+    clear_colorizer_state,
+    refresh_view_colors
 )
 
 # All MMI color ranges, state management, and helper functions
 # are now imported from the mmi.colorizer library module
 
-# Performance optimization: Cache for color lookups
-_color_cache = {}
-_solid_fill_pattern_cache = {}
-
-def _get_solid_fill_pattern_id(doc):
-    """Get solid fill pattern ID with caching."""
-    if doc not in _solid_fill_pattern_cache:
-        patterns = FilteredElementCollector(doc).OfClass(FillPatternElement)
-        for pat in patterns:
-            fill_pattern = pat.GetFillPattern()
-            if fill_pattern.IsSolidFill:
-                _solid_fill_pattern_cache[doc] = pat.Id
-                break
-        else:
-            _solid_fill_pattern_cache[doc] = None
-    return _solid_fill_pattern_cache[doc]
-
-def _get_color_for_mmi_cached(mmi_value):
-    """Get color for MMI value with caching."""
-    if mmi_value not in _color_cache:
-        _color_cache[mmi_value] = get_color_for_mmi(mmi_value)
-    return _color_cache[mmi_value]
-
 def apply_mmi_colors(doc, view):
     """Apply colors to elements in the view based on their MMI values.
     
+    Overrides are only set for elements whose MMI colour bucket differs from
+    the stored colorizer state of this view.
+    
     Returns:
         bool: Success status
     """
@@ -112,80 +90,16 @@ def apply_mmi_colors(doc, view):
         
         logger.debug("Using MMI parameter: {}".format(mmi_param_name))
         
-        # Get solid fill pattern (cached)
-        solid_fill_id = _get_solid_fill_pattern_id(doc)
-        
-        # Get all elements in the view
-        collector = FilteredElementCollector(doc, view.Id) \
-                    .WhereElementIsNotElementType() \
-                    .WhereElementIsViewIndependent()
-        
-        # Group elements by color using tuple key (faster than string concatenation)
-        elements_by_color = {}
-        colored_element_ids = []
-        
-        # Process elements
-        for element in collector:
-            # Skip elements that can't have overrides (early check)
-            if not hasattr(element, 'Id'):
-                continue
-            
-            # Get MMI value
-            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-            
-            if mmi_value is not None:
-                # Use cached color lookup
-                color, range_name = _get_color_for_mmi_cached(mmi_value)
-                
-                # Group by color using tuple key (faster than string formatting)
-                color_key = (color.Red, color.Green, color.Blue)
-                if color_key not in elements_by_color:
-                    elements_by_color[color_key] = {
-                        "color": color,
-                        "element_ids": []
-                    }
-                
-                elements_by_color[color_key]["element_ids"].append(element.Id)
-                colored_element_ids.append(element.Id)
-        
-        if not colored_element_ids:
-            forms.alert("No elements with MMI values found in the active view.", 
-                       title="No MMI Elements")
-            return False
-        
         # Apply color overrides in a transaction
-        # Batch operations by creating override settings once per color group
         with Transaction(doc, "Apply MMI Colors") as t:
             t.Start()
-            
-            for color_data in elements_by_color.values():
-                color = color_data["color"]
-                element_ids = color_data["element_ids"]
-                
-                # Create override settings once per color group
-                ogs = OverrideGraphicSettings()
-                ogs.SetProjectionLineColor(color)
-                ogs.SetCutLineColor(color)
-                ogs.SetSurfaceForegroundPatternColor(color)
-                ogs.SetCutForegroundPatternColor(color)
-                
-                if solid_fill_id:
-                    ogs.SetSurfaceForegroundPatternId(solid_fill_id)
-                    ogs.SetCutForegroundPatternId(solid_fill_id)
-                
-                # Apply overrides to all elements with this color
-                # OverrideGraphicSettings is reused for all elements in this group
-                for element_id in element_ids:
-                    try:
-                        view.SetElementOverrides(element_id, ogs)
-                    except Exception as ex:
-                        logger.debug("Could not apply override to element {}: {}".format(element_id, ex))
-            
+            result = refresh_view_colors(doc, view, mmi_param_name, persist=True)
             t.Commit()
         
-        # Store the colored elements and view
-        set_colored_view_id(view.Id)
-        set_colored_element_ids(colored_element_ids)
+        if not result["colored"]:
+            forms.alert("No elements with MMI values found in the active view.", 
+                       title="No MMI Elements")
+            return False
         
         return True
         
@@ -215,7 +129,7 @@ def reset_mmi_colors(doc):
         if not view:
             logger.warning("Previously colored view not found")
             # Clear stored data anyway
-            set_colored_view_id(ElementId.InvalidElementId)
+            set_colored_view_id(ElementId.InvalidElementId, persist=False)
             set_colored_element_ids([])
             return True
         
@@ -236,7 +150,7 @@ def reset_mmi_colors(doc):
             t.Commit()
         
         # Clear stored data
-        set_colored_view_id(ElementId.InvalidElementId)
+        set_colored_view_id(ElementId.InvalidElementId, persist=False)
         set_colored_element_ids([])
         
         return True
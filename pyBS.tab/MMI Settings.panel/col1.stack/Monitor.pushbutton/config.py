@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Shift-click handler for the MMI Monitor.
+
+Shows MMI progress for the current project from the stored MMI snapshots
+(see mmi.snapshots) and records a fresh snapshot first if the model changed.
+"""
+
+__title__ = "MMI Progress"
+__author__ = "Byggstyrning AB"
+__doc__ = "Shift-click: Show MMI progress over time for this project"
+
+# Import standard libraries
+import sys
+import os.path as op
+
+# Import Revit API
+import clr
+clr.AddReference('RevitAPI')
+
+# Import pyRevit modules
+from pyrevit import script
+from pyrevit import forms
+from pyrevit import revit
+
+# Add the extension directory to the path
+script_path = __file__
+pushbutton_dir = op.dirname(script_path)
+splitpushbutton_dir = op.dirname(pushbutton_dir)
+stack_dir = op.dirname(splitpushbutton_dir)
+panel_dir = op.dirname(stack_dir)
+tab_dir = op.dirname(panel_dir)
+extension_dir = op.dirname(tab_dir)
+lib_path = op.join(extension_dir, 'lib')
+
+if lib_path not in sys.path:
+    sys.path.append(lib_path)
+
+# Initialize logger
+logger = script.get_logger()
+
+# Import MMI libraries
+from mmi import snapshots
+from mmi.colorizer import MMI_COLOR_RANGES, get_mmi_bucket
+
+# Most recent snapshots plotted in the progress chart
+MAX_CHART_POINTS = 60
+
+
+def get_bucket_rgb(level):
+    """Return the (r, g, b) of the MMI colour used for ``level``."""
+    bucket = get_mmi_bucket(int(level))
+    for range_def in MMI_COLOR_RANGES:
+        if range_def["value"] == bucket:
+            color = range_def["color"]
+            return color.Red, color.Green, color.Blue
+    return 128, 128, 128
+
+
+def print_latest(output, snapshot):
+    """Print the MMI level, category, workset and building level tables of one snapshot."""
+    levels = sorted(snapshots.get_mmi_values(snapshot).items(), key=lambda item: int(item[0]))
+    output.print_md("## MMI levels ({})".format(snapshot["date"]))
+    output.print_md("{} of {} elements have an MMI value".format(
+        snapshot["elements_with_mmi"], snapshot["total_elements"]))
+    output.print_table(
+        table_data=[[level, count] for level, count in levels],
+        columns=["MMI", "Elements"])
+
+    groups_by_title = [("Categories", "categories"), ("Worksets", "worksets")]
+    # Older snapshots stored the MMI value counts under "levels"
+    if "mmi_values" in snapshot:
+        groups_by_title.append(("Levels", "levels"))
+    for title, key in groups_by_title:
+        groups = snapshot.get(key) or {}
+        if not groups:
+            continue
+        level_names = [level for level, _ in levels]
+        rows = []
+        for name in sorted(groups):
+            counts = groups[name]
+            rows.append([name] + [counts.get(level, 0) for level in level_names])
+        output.print_md("### {}".format(title))
+        output.print_table(table_data=rows, columns=[title[:-1]] + level_names)
+
+
+def draw_progress_chart(output, history):
+    """Draw elements per MMI level over time."""
+    history = history[-MAX_CHART_POINTS:]
+    all_levels = set()
+    for snapshot in history:
+        all_levels.update(snapshots.get_mmi_values(snapshot).keys())
+
+    chart = output.make_line_chart()
+    chart.options.title = {"display": True, "text": "Elements per MMI level"}
+    chart.data.labels = [snapshot["date"] for snapshot in history]
+    for level in sorted(all_levels, key=int):
+        dataset = chart.data.new_dataset(level)
+        dataset.data = [snapshots.get_mmi_values(snapshot).get(level, 0) for snapshot in history]
+        dataset.set_color(*get_bucket_rgb(level))
+        dataset.fill = False
+    chart.draw()
+
+
+if __name__ == '__main__':
+    doc = revit.doc
+    try:
+        snapshots.take_snapshot(doc, force=True)
+        history = snapshots.load_snapshots(doc)
+    except Exception as ex:
+        logger.error("Error reading MMI snapshots: {}".format(ex))
+        history = []
+
+    if not history:
+        forms.alert("No MMI snapshots recorded for this project yet.", title="MMI Progress")
+    else:
+        output = script.get_output()
+        output.set_title("MMI Progress - {}".format(doc.Title))
+        print_latest(output, history[-1])
+        if len(history) > 1:
+            draw_progress_chart(output, history)
+        output.print_md("Snapshots: {} (file: {})".format(
+            len(history), snapshots.get_snapshot_file(doc)))
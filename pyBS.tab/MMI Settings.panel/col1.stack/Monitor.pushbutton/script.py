@@ -19,6 +19,7 @@ import sys
 import os
 import re
 import datetime
+import time
 
 # Import Revit API
 import clr
@@ -28,6 +29,7 @@ from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI import *
 from System import EventHandler
 from Autodesk.Revit.DB.Events import DocumentChangedEventArgs, DocumentSynchronizingWithCentralEventArgs, DocumentSynchronizedWithCentralEventArgs
+from Autodesk.Revit.UI.Events import IdlingEventArgs
 
 # Import pyRevit modules
 from pyrevit import script
@@ -62,12 +64,8 @@ logger = script.get_logger()
 from mmi.config import CONFIG_SECTION, CONFIG_KEY_ACTIVE, MMI_THRESHOLD
 from mmi.config import is_monitor_active, set_monitor_active
 from mmi.core import get_mmi_parameter_name, load_monitor_config, get_default_mmi
-from mmi.utils import (
-    get_element_location,
-    get_element_mmi_value,
-    validate_mmi_value,
-    is_mmi_value_blank_for_default,
-)
+from mmi import monitor_actions, monitor_scan, value_index, sync_checker, snapshots
+from mmi.colorizer import is_colorer_active, get_colored_view_id, plan_color_refresh, apply_color_refresh
 from revit.compat import get_element_id_value
 
 # Import MMI Schema
@@ -76,135 +74,51 @@ try:
 except Exception as ex:
     logger.error("Failed to import MMI Schema: {}".format(ex))
 
+# Seconds without a DocumentChanged before a recorded batch is processed.
+# Array edits, pastes and group edits fire bursts of events; waiting for the
+# burst to settle lets them be handled as one batch in one transaction.
+DEBOUNCE_SECONDS = 0.5
+
+
 # Event Handler for external events
 class MMIEventHandler(IExternalEventHandler):
+    """Processes the changes recorded by the DocumentChanged handler.
+    
+    The DocumentChanged handler only records changed element ids here. Ids
+    are merged per document until no change has arrived for DEBOUNCE_SECONDS;
+    the merged batch is then analysed once and all corrections and pins are
+    applied in a single transaction.
+    """
     def __init__(self):
-        self.elements_to_pin = []
-        self.notify_message = None
         self.mmi_threshold = MMI_THRESHOLD
-        self.elements_to_validate = []
-        self.validate_corrections = {}
+        self.pending_changes = monitor_actions.PendingChanges()
+        self.is_raised = False
+        
+    def clear_pending(self):
+        """Drop all recorded changes."""
+        self.pending_changes.clear()
+        self.is_raised = False
         
     def Execute(self, uiapp):
+        self.is_raised = False
         try:
-            logger.debug("MMI Event Handler Executing")
-            
             # Check if monitor is still active
             if not is_monitor_active():
-                logger.debug("Monitor is not active, clearing queued operations")
-                # Clear any queued operations
-                self.elements_to_pin = []
-                self.elements_to_validate = []
-                self.validate_corrections = {}
-                self.notify_message = None
+                logger.debug("Monitor is not active, clearing queued changes")
+                self.clear_pending()
                 return
             
-            doc = uiapp.ActiveUIDocument.Document
+            if not self.pending_changes:
+                return
             
-            # Process validation corrections if any
-            if self.elements_to_validate and self.validate_corrections:
-                logger.debug("Processing MMI validation for {} elements".format(len(self.elements_to_validate)))
-                with Transaction(doc, "Correct MMI Values") as t:
-                    t.Start()
-                    
-                    corrected_count = 0
-                    correction_details = []
-                    
-                    for element_id, correction in self.validate_corrections.items():
-                        element = doc.GetElement(element_id)
-                        if not element:
-                            continue
-                            
-                        orig_value = correction["original"]
-                        fixed_value = correction["fixed"]
-                        param_name = correction["param"]
-                        
-                        # Get the parameter
-                        param = element.LookupParameter(param_name)
-                        if not param:
-                            # Try element type parameter
-                            try:
-                                type_id = element.GetTypeId()
-                                if type_id and type_id != ElementId.InvalidElementId:
-                                    element_type = doc.GetElement(type_id)
-                                    if element_type:
-                                        param = element_type.LookupParameter(param_name)
-                            except Exception as e:
-                                logger.debug("Error getting type parameter: {}".format(e))
-                        
-                        apply_skip = None
-                        if not param:
-                            apply_skip = "no_param"
-                        elif param.IsReadOnly:
-                            apply_skip = "readonly"
-                        elif param.StorageType != StorageType.String:
-                            apply_skip = "not_string_storage"
-                        # Blank MMI: HasValue is often False; Set is still valid for writable string params.
-                        if apply_skip is None:
-                            try:
-                                param.Set(str(fixed_value))
-                                corrected_count += 1
-                                correction_details.append("'{}' → '{}'".format(orig_value, fixed_value))
-                                logger.debug("Corrected MMI value from '{}' to '{}' for element {}".format(
-                                    orig_value, fixed_value, element_id))
-                            except Exception as set_ex:
-                                logger.debug(
-                                    "MMI correction Set failed for {}: {}".format(element_id, set_ex))
-                    
-                    t.Commit()
-                    
-                    # Notify user of corrections
-                    if corrected_count > 0:
-                        forms.show_balloon(
-                            header="MMI Value Correction",
-                            text="{} MMI values automatically corrected".format(corrected_count),
-                            tooltip="Details:\n" + "\n".join(correction_details[:5]) + 
-                                   ("\n..." if len(correction_details) > 5 else ""),
-                            is_new=True
-                        )
-                
-                # Clear validation data
-                self.elements_to_validate = []
-                self.validate_corrections = {}
+            # Changes are still arriving; look again on the next idle cycle
+            if not self.pending_changes.is_settled(DEBOUNCE_SECONDS):
+                request_change_processing()
+                return
             
-            # Process element pinning
-            if self.elements_to_pin:
-                logger.debug("Processing pin operation for {} elements".format(len(self.elements_to_pin)))
-                
-                # Pin the elements in a transaction
-                with Transaction(doc, "Pin High MMI Elements") as t:
-                    t.Start()
-                    
-                    pin_count = 0
-                    for element in self.elements_to_pin:
-                        element_id = element
-                        
-                        # Get the element from its ID
-                        try:
-                            element = doc.GetElement(element_id)
-                            if element and hasattr(element, "Pinned") and not element.Pinned:
-                                element.Pinned = True
-                                pin_count += 1
-                                logger.debug("Pinned element {}".format(element_id))
-                        except Exception as elem_ex:
-                            logger.error("Error pinning element {}: {}".format(element_id, elem_ex))
-                        
-                    t.Commit()
-                
-                # Show notification if requested
-                if pin_count > 0 and self.notify_message:
-                    # Use show_balloon instead of forms.alert
-                    message = self.notify_message.format(pin_count, self.mmi_threshold)
-                    forms.show_balloon(
-                        header="MMI Monitor",
-                        text=message,
-                        tooltip="Elements with MMI value > {} were automatically pinned".format(self.mmi_threshold),
-                        is_new=True
-                    )
-                
-                # Clear the queue
-                self.elements_to_pin = []
-                self.notify_message = None
+            for batch in self.pending_changes.take():
+                self.process_batch(uiapp, batch)
+                take_due_snapshot(batch["doc"])
             
         except Exception as ex:
             logger.error("Error in MMI Event Handler: {}".format(ex))
@@ -212,172 +126,202 @@ class MMIEventHandler(IExternalEventHandler):
     def GetName(self):
         return "MMI Monitor Event Handler"
         
-    def pin_elements_deferred(self, element_ids, threshold, notify=True):
-        """Queue elements for pinning in a deferred execution"""
-        self.elements_to_pin = element_ids
-        self.mmi_threshold = threshold
+    def process_batch(self, uiapp, batch):
+        """Analyse one document's merged changes and apply the results."""
+        doc = batch["doc"]
+        if doc is None or not doc.IsValidObject:
+            return
         
-        if notify:
-            self.notify_message = "Pinned {} elements with MMI value > {}"
-        else:
-            self.notify_message = None
-            
-    def validate_mmi_values_deferred(self, elements_to_validate, corrections):
-        """Queue elements for MMI value validation and correction"""
-        self.elements_to_validate = elements_to_validate
-        self.validate_corrections = corrections
-
-# Global handlers and events
-mmi_event_handler = None
-external_event = None
-doc_changed_handler = None
-doc_synchronizing_handler = None
-doc_synchronized_handler = None
-element_location_cache = {}  # Cache to store element locations for move detection
-element_mmi_cache = {}  # Cache to store element MMI values to detect changes
-# Integer ElementId values: snapshot at monitor ON; ids not in this set are new post-activation
-baseline_element_ids_for_default = set()
-
-
-def update_element_location_cache(element_id, location):
-    """Update the element location cache."""
-    global element_location_cache
-    element_location_cache[get_element_id_value(element_id)] = {
-        "location": location,
-        "timestamp": datetime.datetime.now()
-    }
-
-def clean_element_location_cache():
-    """Clean old entries from the element location cache."""
-    global element_location_cache
-    now = datetime.datetime.now()
-    # Keep entries not older than 5 minutes
-    element_location_cache = {
-        id: data for id, data in element_location_cache.items()
-        if (now - data["timestamp"]).total_seconds() < 300
-    }
-
-def populate_initial_location_cache(doc):
-    """Populate the location cache with all high MMI elements on monitor activation.
-    This ensures we can detect movement even on the first move."""
-    global element_location_cache
-    try:
-        mmi_param_name = get_mmi_parameter_name(doc)
-        if not mmi_param_name:
+        start_time = time.time()
+        added_element_ids = list(batch["added"].values())
+        modified_element_ids = list(batch["modified"].values())
+        actions = collect_monitor_actions(doc, added_element_ids, modified_element_ids)
+        colored_view = get_colored_view(uiapp, doc)
+        if actions is None and colored_view is None:
             return
         
-        logger.debug("Populating initial location cache for high MMI elements...")
+        validation_corrections = actions["validation_corrections"] if actions else {}
+        elements_to_pin = actions["elements_to_pin"] if actions else []
+        corrected_count = 0
+        correction_details = []
+        pin_count = 0
+        
+        # Re-colour only the changed elements of the colorizer's view, and only
+        # open a transaction when an override actually changes
+        color_plan = None
+        if colored_view is not None:
+            changed_ids = set(batch["added"].keys())
+            changed_ids.update(batch["modified"].keys())
+            color_plan = plan_color_refresh(doc, colored_view, get_mmi_parameter_name(doc), changed_ids)
+        needs_colors = color_plan is not None and color_plan["has_changes"]
+        
+        if validation_corrections or elements_to_pin or needs_colors:
+            with Transaction(doc, "MMI Monitor") as t:
+                t.Start()
+                if validation_corrections:
+                    corrected_count, correction_details = self.apply_corrections(
+                        doc, validation_corrections)
+                if elements_to_pin:
+                    pin_count = self.apply_pins(doc, elements_to_pin)
+                if color_plan is not None and corrected_count:
+                    # Corrected values can change buckets; plan again
+                    color_plan = plan_color_refresh(
+                        doc, colored_view, get_mmi_parameter_name(doc), changed_ids)
+                if color_plan is not None and color_plan["has_changes"]:
+                    apply_color_refresh(doc, color_plan)
+                t.Commit()
         
-        # Get all elements in the model
-        all_elements = FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements()
+        logger.debug(
+            "[PERF] MMI Monitor batch: {} added, {} modified, {} corrected, {} pinned in {:.2f}s".format(
+                len(added_element_ids), len(modified_element_ids), corrected_count, pin_count,
+                time.time() - start_time))
         
-        cache_count = 0
-        for element in all_elements:
-            # Skip elements that can't be pinned
-            if not hasattr(element, "Pinned"):
-                continue
-            
-            # Get the MMI value for the element
-            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-            
-            # Only cache high MMI elements
-            if mmi_value is not None and mmi_value > MMI_THRESHOLD:
-                current_location = get_element_location(element)
-                if current_location:
-                    update_element_location_cache(element.Id, current_location)
-                    cache_count += 1
+        # Notify user of corrections
+        if corrected_count > 0:
+            forms.show_balloon(
+                header="MMI Value Correction",
+                text="{} MMI values automatically corrected".format(corrected_count),
+                tooltip="Details:\n" + "\n".join(correction_details[:5]) + 
+                       ("\n..." if len(correction_details) > 5 else ""),
+                is_new=True
+            )
         
-        logger.debug("Cached locations for {} high MMI elements".format(cache_count))
+        if pin_count > 0:
+            forms.show_balloon(
+                header="MMI Monitor",
+                text="Pinned {} elements with MMI value > {}".format(pin_count, self.mmi_threshold),
+                tooltip="Elements with MMI value > {} were automatically pinned".format(self.mmi_threshold),
+                is_new=True
+            )
         
-    except Exception as ex:
-        logger.error("Error populating initial location cache: {}".format(ex))
-
-def populate_initial_mmi_cache(doc):
-    """Populate the MMI cache with all elements on monitor activation.
-    This allows us to detect MMI value changes."""
-    global element_mmi_cache
-    try:
-        mmi_param_name = get_mmi_parameter_name(doc)
-        if not mmi_param_name:
-            return
+        if actions and actions["moved_high_mmi_elements"]:
+            show_move_warning(actions["moved_high_mmi_elements"])
         
-        logger.debug("Populating initial MMI cache...")
+    def apply_corrections(self, doc, validation_corrections):
+        """Write corrected MMI values. Must run inside a transaction.
         
-        # Get all elements in the model
-        all_elements = FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements()
+        Returns:
+            tuple: (corrected count, list of "'original' → 'fixed'" strings)
+        """
+        corrected_count = 0
+        correction_details = []
         
-        cache_count = 0
-        for element in all_elements:
-            # Skip elements that can't be pinned
-            if not hasattr(element, "Pinned"):
+        for element_id, correction in validation_corrections.items():
+            element = doc.GetElement(element_id)
+            if not element:
                 continue
-            
-            # Get the MMI value for the element
-            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-            
-            # Cache all MMI values (both high and low)
-            if mmi_value is not None:
-                element_mmi_cache[get_element_id_value(element.Id)] = mmi_value
-                cache_count += 1
-        
-        logger.debug("Cached MMI values for {} elements".format(cache_count))
-        
-    except Exception as ex:
-        logger.error("Error populating initial MMI cache: {}".format(ex))
-
+                
+            orig_value = correction["original"]
+            fixed_value = correction["fixed"]
+            param_name = correction["param"]
+            
+            # Get the parameter
+            param = element.LookupParameter(param_name)
+            if not param:
+                # Try element type parameter
+                try:
+                    type_id = element.GetTypeId()
+                    if type_id and type_id != ElementId.InvalidElementId:
+                        element_type = doc.GetElement(type_id)
+                        if element_type:
+                            param = element_type.LookupParameter(param_name)
+                except Exception as e:
+                    logger.debug("Error getting type parameter: {}".format(e))
+            
+            apply_skip = None
+            if not param:
+                apply_skip = "no_param"
+            elif param.IsReadOnly:
+                apply_skip = "readonly"
+            elif param.StorageType != StorageType.String:
+                apply_skip = "not_string_storage"
+            # Blank MMI: HasValue is often False; Set is still valid for writable string params.
+            if apply_skip is None:
+                try:
+                    param.Set(str(fixed_value))
+                    corrected_count += 1
+                    correction_details.append("'{}' → '{}'".format(orig_value, fixed_value))
+                    logger.debug("Corrected MMI value from '{}' to '{}' for element {}".format(
+                        orig_value, fixed_value, element_id))
+                except Exception as set_ex:
+                    logger.debug(
+                        "MMI correction Set failed for {}: {}".format(element_id, set_ex))
+        
+        return corrected_count, correction_details
+        
+    def apply_pins(self, doc, elements_to_pin):
+        """Pin elements by id. Must run inside a transaction."""
+        pin_count = 0
+        for element_id in elements_to_pin:
+            try:
+                element = doc.GetElement(element_id)
+                if element and hasattr(element, "Pinned") and not element.Pinned:
+                    element.Pinned = True
+                    pin_count += 1
+                    logger.debug("Pinned element {}".format(element_id))
+            except Exception as elem_ex:
+                logger.error("Error pinning element {}: {}".format(element_id, elem_ex))
+        return pin_count
 
-def populate_baseline_element_ids_for_default(doc):
-    """Snapshot all current model element ids. New ids after monitor ON get default MMI (if enabled)."""
-    global baseline_element_ids_for_default
-    try:
-        baseline_element_ids_for_default = set()
-        for element in FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements():
-            if not element.Category or element.Category.CategoryType != CategoryType.Model:
-                continue
-            if not hasattr(element, "Pinned"):
-                continue
-            baseline_element_ids_for_default.add(get_element_id_value(element.Id))
-        logger.debug(
-            "Baseline element ids for default MMI: {}".format(
-                len(baseline_element_ids_for_default)))
-    except Exception as ex:
-        logger.error("Error populating baseline for default MMI: {}".format(ex))
+# Global handlers and events
+mmi_event_handler = None
+external_event = None
+doc_changed_handler = None
+doc_synchronizing_handler = None
+doc_synchronized_handler = None
+# One-shot Idling handler taking snapshots that need the MMI index built
+snapshot_idling_handler = None
+pending_snapshot_docs = []
+# Location, MMI and baseline id caches of the change analysis
+monitor_state = monitor_actions.MonitorState()
 
 
-def pin_all_high_mmi_elements(doc):
-    """Proactively pin all high MMI elements when monitor activates.
-    This prevents movement before it happens."""
+def populate_activation_caches(doc, monitor_settings):
+    """Fill location, MMI and baseline caches from a single model scan on activation.
+    
+    Returns:
+        list: Unpinned high MMI elements to pin (empty unless pin_elements is enabled)
+    """
     try:
         mmi_param_name = get_mmi_parameter_name(doc)
-        if not mmi_param_name:
-            return 0
+        warn_on_move = monitor_settings.get("warn_on_move", False)
+        pin_elements = monitor_settings.get("pin_elements", False)
         
-        logger.debug("Scanning for high MMI elements to pin...")
+        logger.debug("Scanning model for MMI Monitor activation...")
+        scan = monitor_scan.scan_model(
+            doc, mmi_param_name,
+            collect_locations=warn_on_move,
+            collect_mmi=pin_elements,
+            collect_pin_candidates=pin_elements)
         
-        # Get all elements in the model
-        all_elements = FilteredElementCollector(doc).WhereElementIsNotElementType().ToElements()
+        # Baseline model element ids: post-activation ids are treated as new for default MMI
+        monitor_state.baseline_ids = scan["baseline_ids"]
         
-        elements_to_pin = []
-        for element in all_elements:
-            # Skip elements that can't be pinned
-            if not hasattr(element, "Pinned"):
-                continue
-            
-            # Skip already pinned elements
-            if element.Pinned:
-                continue
-            
-            # Get the MMI value for the element
-            mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-            
-            # Only pin high MMI elements
-            if mmi_value is not None and mmi_value >= MMI_THRESHOLD:
-                elements_to_pin.append(element)
+        # Location store lets us detect movement even on the first move
+        now = time.time()
+        for element_id, location in scan["locations"].items():
+            monitor_state.location_store.update(element_id, location, now)
+        
+        # MMI cache lets us detect MMI value changes
+        monitor_state.mmi_cache.update(scan["mmi_values"])
         
-        if not elements_to_pin:
-            logger.debug("No unpinned high MMI elements found")
-            return 0
+        logger.debug("Activation caches: {} locations, {} MMI values, {} baseline ids ({:.2f}s)".format(
+            len(scan["locations"]), len(scan["mmi_values"]),
+            len(monitor_state.baseline_ids), scan["elapsed"]))
+        return scan["pin_candidates"]
         
+    except Exception as ex:
+        logger.error("Error populating MMI Monitor activation caches: {}".format(ex))
+        return []
+
+
+def pin_high_mmi_elements(doc, elements_to_pin):
+    """Proactively pin high MMI elements when monitor activates.
+    This prevents movement before it happens."""
+    if not elements_to_pin:
+        logger.debug("No unpinned high MMI elements found")
+        return 0
+    try:
         # Pin all elements in a single transaction
         with Transaction(doc, "Pin High MMI Elements") as t:
             t.Start()
@@ -399,212 +343,147 @@ def pin_all_high_mmi_elements(doc):
         logger.error("Error in proactive pinning: {}".format(ex))
         return 0
 
+def get_colored_view(uiapp, doc):
+    """Return the MMI Colorizer's view if the colorizer is on in ``doc``, else None."""
+    try:
+        if not is_colorer_active():
+            return None
+        # The stored view id carries no document; only trust it for the active one
+        active_uidoc = uiapp.ActiveUIDocument
+        if active_uidoc is None or not active_uidoc.Document.Equals(doc):
+            return None
+        view_id = get_colored_view_id()
+        if view_id is None or view_id == ElementId.InvalidElementId:
+            return None
+        view = doc.GetElement(view_id)
+        if isinstance(view, View) and get_mmi_parameter_name(doc):
+            return view
+    except Exception as ex:
+        logger.debug("Error resolving colored view: {}".format(ex))
+    return None
+
+def take_due_snapshot(doc):
+    """Write an MMI histogram snapshot if the snapshot interval has passed.
+    
+    Reads the MMI index the monitor keeps live. When there is none yet,
+    building it scans the whole model, so the snapshot waits for the next
+    Idling event instead of running in the ExternalEvent or sync handler.
+    """
+    global snapshot_idling_handler
+    try:
+        if doc is None or not doc.IsValidObject or not snapshots.is_snapshot_due(doc):
+            return
+        index = value_index.get_current_index(doc, get_mmi_parameter_name(doc))
+        if index is not None:
+            snapshots.take_snapshot(doc, index=index)
+            return
+        if not any(pending.Equals(doc) for pending in pending_snapshot_docs):
+            pending_snapshot_docs.append(doc)
+        if snapshot_idling_handler is None:
+            snapshot_idling_handler = EventHandler[IdlingEventArgs](snapshot_idling)
+            revit.HOST_APP.uiapp.Idling += snapshot_idling_handler
+    except Exception as ex:
+        logger.debug("Error taking MMI snapshot: {}".format(ex))
+
+def stop_snapshot_idling():
+    """Unsubscribe the snapshot Idling handler and drop pending snapshots."""
+    global snapshot_idling_handler
+    del pending_snapshot_docs[:]
+    if snapshot_idling_handler is not None:
+        try:
+            revit.HOST_APP.uiapp.Idling -= snapshot_idling_handler
+        except Exception as ex:
+            logger.debug("Error removing snapshot Idling handler: {}".format(ex))
+        snapshot_idling_handler = None
+
+def snapshot_idling(sender, args):
+    """Take the snapshots deferred by take_due_snapshot, then unsubscribe."""
+    docs = list(pending_snapshot_docs)
+    stop_snapshot_idling()
+    if not is_monitor_active():
+        return
+    for doc in docs:
+        try:
+            if doc.IsValidObject:
+                snapshots.take_snapshot(doc)
+        except Exception as ex:
+            logger.debug("Error taking MMI snapshot: {}".format(ex))
+
+def request_change_processing():
+    """Raise the monitor's ExternalEvent unless it is already pending."""
+    if mmi_event_handler is None or external_event is None:
+        return
+    if mmi_event_handler.is_raised:
+        return
+    external_event.Raise()
+    mmi_event_handler.is_raised = True
+
+def show_move_warning(moved_high_mmi_elements):
+    """Show one balloon listing the highest MMI elements that were moved."""
+    # Group and limit to top 5 highest MMI elements
+    moved_high_mmi_elements.sort(key=lambda x: x["mmi"], reverse=True)
+    count = len(moved_high_mmi_elements)
+    top_elements = moved_high_mmi_elements[:5]
+    
+    details = []
+    for item in top_elements:
+        details.append("Element ID: {} (MMI: {}, Distance: {:.2f}m)".format(
+            get_element_id_value(item["id"]), item["mmi"], item["distance"]))
+    
+    tooltip = "High MMI elements should be carefully managed:\n" + "\n".join(details)
+    if count > 5:
+        tooltip += "\n... and {} more".format(count - 5)
+    
+    forms.show_balloon(
+        header="High MMI Element Move",
+        text="{} elements with MMI >= 425 were moved".format(count),
+        tooltip=tooltip,
+        is_new=True
+    )
+    logger.debug("Warned about {} moved high MMI elements".format(count))
+
+def collect_monitor_actions(doc, added_element_ids, modified_element_ids):
+    """Decide what the monitor does for a batch of added and modified elements.
+    
+    Reads the MMI parameter and monitor settings of ``doc`` and runs
+    mmi.monitor_actions.collect_monitor_actions with the monitor's caches.
+    
+    Returns:
+        dict or None: See mmi.monitor_actions.collect_monitor_actions
+    """
+    # Get MMI parameter name
+    mmi_param_name = get_mmi_parameter_name(doc)
+    if not mmi_param_name:
+        logger.warning("No MMI parameter name configured. Use MMI Config tool first.")
+        return None
+    
+    # Settings come from the storage registry snapshot, cached until a DataStorage changes
+    default_mmi = get_default_mmi(doc)
+    monitor_settings = load_monitor_config(doc, use_display_names=False)
+    
+    return monitor_actions.collect_monitor_actions(
+        doc, added_element_ids, modified_element_ids, monitor_state,
+        mmi_param_name, monitor_settings, default_mmi)
+
 def document_changed_handler(sender, args):
-    """Handler for document changed event."""
+    """Handler for document changed event.
+    
+    Only records the changed ids; the monitor's ExternalEvent processes the
+    merged batch once the burst of changes has settled.
+    """
     try:
         # Check if we should monitor
         if not is_monitor_active():
             return
         
-        doc = args.GetDocument()
-        modified_element_ids = args.GetModifiedElementIds()
-        added_element_ids = args.GetAddedElementIds()
-        mod_count = modified_element_ids.Count if modified_element_ids else 0
-        add_count = added_element_ids.Count if added_element_ids else 0
-        
-        if mod_count == 0 and add_count == 0:
-            return
-        
-        # Get MMI parameter name
-        mmi_param_name = get_mmi_parameter_name(doc)
-        if not mmi_param_name:
-            logger.warning("No MMI parameter name configured. Use MMI Config tool first.")
-            return
-        
-        default_mmi = get_default_mmi(doc)
-        monitor_settings = load_monitor_config(doc, use_display_names=False)
-        
-        validate_enabled = monitor_settings["validate_mmi"]
-        warn_on_move_enabled = monitor_settings["warn_on_move"]
-        pin_elements_enabled = monitor_settings["pin_elements"]
-        
-        has_modified_features = validate_enabled or warn_on_move_enabled or pin_elements_enabled
-        toggle_default_on_new = bool(monitor_settings.get("default_on_new_instances", False))
-        has_default_on_new = toggle_default_on_new and bool(default_mmi and str(default_mmi).strip())
+        pending = None
+        if mmi_event_handler is not None and external_event is not None:
+            pending = mmi_event_handler.pending_changes
         
-        if not has_modified_features and not has_default_on_new:
-            logger.debug("No MMI monitor features enabled and no default on new instances. Skipping.")
-            return
-        
-        global baseline_element_ids_for_default
-        elements_to_validate = []
-        validation_corrections = {}
-        elements_to_pin = []
-        moved_high_mmi_elements = []
-        
-        # ----- Added elements: Default on new instances (GetAddedElementIds) -----
-        if has_default_on_new and add_count > 0:
-            logger.debug(
-                "Processing {} added elements for default MMI (param: {})".format(
-                    add_count, mmi_param_name))
-            for element_id in added_element_ids:
-                element = doc.GetElement(element_id)
-                if element is None or not hasattr(element, "Pinned"):
-                    continue
-                if not element.Category or element.Category.CategoryType != CategoryType.Model:
-                    continue
-                mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-                if param is None:
-                    continue
-                if mmi_value is not None:
-                    continue
-                if not is_mmi_value_blank_for_default(mmi_value, value_str):
-                    continue
-                if element_id in validation_corrections:
-                    continue
-                elements_to_validate.append(element_id)
-                validation_corrections[element_id] = {
-                    "original": "(empty)",
-                    "fixed": str(default_mmi).strip(),
-                    "param": mmi_param_name,
-                }
-                logger.debug(
-                    "New instance (added) {} queued for default MMI {}".format(element_id, default_mmi))
-            for element_id in added_element_ids:
-                baseline_element_ids_for_default.add(get_element_id_value(element_id))
-        
-        # ----- Modified elements: new ids not in baseline (e.g. some walls only in modified set) -----
-        if has_default_on_new and mod_count > 0:
-            for element_id in modified_element_ids:
-                eid_i = get_element_id_value(element_id)
-                if eid_i in baseline_element_ids_for_default:
-                    continue
-                element = doc.GetElement(element_id)
-                if element and hasattr(element, "Pinned") and element.Category and element.Category.CategoryType == CategoryType.Model:
-                    mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-                    if (param
-                            and mmi_value is None
-                            and is_mmi_value_blank_for_default(mmi_value, value_str)
-                            and element_id not in validation_corrections):
-                        elements_to_validate.append(element_id)
-                        validation_corrections[element_id] = {
-                            "original": "(empty)",
-                            "fixed": str(default_mmi).strip(),
-                            "param": mmi_param_name,
-                        }
-                        logger.debug(
-                            "New instance (modified) {} queued for default MMI {}".format(
-                                element_id, default_mmi))
-                baseline_element_ids_for_default.add(eid_i)
-        
-        # ----- Modified elements: validate / warn / pin (unchanged) -----
-        if has_modified_features and mod_count > 0:
-            logger.debug("Processing {} modified elements with MMI parameter: {}".format(
-                mod_count, mmi_param_name))
-            clean_element_location_cache()
-            for element_id in modified_element_ids:
-                element = doc.GetElement(element_id)
-                
-                if element is None or not hasattr(element, "Pinned"):
-                    continue
-                    
-                mmi_value, value_str, param = get_element_mmi_value(element, mmi_param_name, doc)
-                
-                if mmi_value is not None:
-                    if validate_enabled and param:
-                        orig_value, fixed_value = validate_mmi_value(value_str)
-                        if orig_value and fixed_value:
-                            elements_to_validate.append(element_id)
-                            validation_corrections[element_id] = {
-                                "original": orig_value,
-                                "fixed": fixed_value,
-                                "param": mmi_param_name
-                            }
-                            logger.debug("Element {} needs MMI value correction: '{}' to '{}'".format(
-                                element_id, orig_value, fixed_value))
-                    
-                    if warn_on_move_enabled and mmi_value > MMI_THRESHOLD:
-                        current_location = get_element_location(element)
-                        if current_location:
-                            cache_key = get_element_id_value(element_id)
-                            if cache_key in element_location_cache:
-                                prev_location = element_location_cache[cache_key]["location"]
-                                distance = current_location.DistanceTo(prev_location)
-                                if distance > 0.1:
-                                    moved_high_mmi_elements.append({
-                                        "id": element_id,
-                                        "mmi": mmi_value,
-                                        "distance": distance
-                                    })
-                                    logger.debug("High MMI Element {} moved {:.2f} meters".format(
-                                        element_id, distance))
-                            update_element_location_cache(element_id, current_location)
-                    
-                    if pin_elements_enabled and mmi_value >= MMI_THRESHOLD:
-                        element_id_int = get_element_id_value(element_id)
-                        prev_mmi = element_mmi_cache.get(element_id_int)
-                        
-                        should_pin = False
-                        
-                        if not element.Pinned:
-                            if prev_mmi is None:
-                                should_pin = True
-                                logger.debug("Element {} newly detected with MMI {} - queuing for pin".format(
-                                    element_id, mmi_value))
-                            elif prev_mmi < MMI_THRESHOLD and mmi_value >= MMI_THRESHOLD:
-                                should_pin = True
-                                logger.debug("Element {} MMI changed from {} to {} - queuing for pin".format(
-                                    element_id, prev_mmi, mmi_value))
-                        
-                        if should_pin:
-                            elements_to_pin.append(element_id)
-                        
-                        element_mmi_cache[element_id_int] = mmi_value
-                    elif mmi_value is not None:
-                        element_mmi_cache[get_element_id_value(element_id)] = mmi_value
-        
-        # Process validation if needed
-        if elements_to_validate and validation_corrections and mmi_event_handler and external_event:
-            mmi_event_handler.validate_mmi_values_deferred(elements_to_validate, validation_corrections)
-            external_event.Raise()
-            logger.debug("Queued {} elements for MMI validation correction".format(len(elements_to_validate)))
-        
-        # Process move warnings if needed
-        if moved_high_mmi_elements:
-            # Group and limit to top 5 highest MMI elements
-            moved_high_mmi_elements.sort(key=lambda x: x["mmi"], reverse=True)
-            count = len(moved_high_mmi_elements)
-            top_elements = moved_high_mmi_elements[:5]
-            
-            details = []
-            for item in top_elements:
-                details.append("Element ID: {} (MMI: {}, Distance: {:.2f}m)".format(
-                    get_element_id_value(item["id"]), item["mmi"], item["distance"]))
-            
-            tooltip = "High MMI elements should be carefully managed:\n" + "\n".join(details)
-            if count > 5:
-                tooltip += "\n... and {} more".format(count - 5)
-            
-            forms.show_balloon(
-                header="High MMI Element Move",
-                text="{} elements with MMI >= 425 were moved".format(count),
-                tooltip=tooltip,
-                is_new=True
-            )
-            logger.debug("Warned about {} moved high MMI elements".format(count))
-        
-        # Process pinning if needed
-        if elements_to_pin and mmi_event_handler and external_event:
-            # If already doing validation, avoid raising another external event immediately
-            # The pin operation will be scheduled after validation completes
-            if not elements_to_validate:
-                mmi_event_handler.pin_elements_deferred(elements_to_pin, MMI_THRESHOLD)
-                external_event.Raise()
-                logger.debug("Queued {} elements for pinning using external event".format(len(elements_to_pin)))
-            else:
-                # Store the pinning request - it will be processed after validation
-                mmi_event_handler.pin_elements_deferred(elements_to_pin, MMI_THRESHOLD)
-                logger.debug("Pinning of {} elements will occur after validation".format(len(elements_to_pin)))
+        if monitor_actions.record_document_changes(
+                args.GetDocument(), args.GetAddedElementIds(), args.GetModifiedElementIds(),
+                args.GetDeletedElementIds(), pending):
+            request_change_processing()
     
     except Exception as ex:
         logger.error("Error in document changed handler: {}".format(ex))
@@ -637,9 +516,8 @@ def document_synchronizing_handler(sender, args):
             
         logger.debug("Document synchronizing - tracking user elements for post-sync check")
         
-        # Import sync checker and track elements
-        from mmi.sync_checker import track_modified_elements_before_sync
-        track_modified_elements_before_sync(doc)
+        # Track user-owned elements among those changed this session
+        sync_checker.track_modified_elements_before_sync(doc)
         
     except Exception as ex:
         logger.error("Error in document synchronizing handler: {}".format(ex))
@@ -672,9 +550,8 @@ def document_synchronized_handler(sender, args):
             
         logger.debug("Document synchronized - processing post-sync MMI check")
         
-        # Import sync checker and process check
-        from mmi.sync_checker import process_post_sync_check
-        process_post_sync_check(doc)
+        sync_checker.process_post_sync_check(doc)
+        take_due_snapshot(doc)
         
     except Exception as ex:
         logger.error("Error in document synchronized handler: {}".format(ex))
@@ -708,6 +585,9 @@ def register_event_handlers():
             revit.doc.Application.DocumentSynchronizedWithCentral += doc_synchronized_handler
             logger.debug("Document Synchronized Handler registered.")
         
+        # Our DocumentChanged handler now keeps the MMI value index current
+        value_index.set_maintained(True)
+        
         logger.debug("MMI Monitor event registration completed.")
         return True
     except Exception as e:
@@ -724,6 +604,10 @@ def deregister_event_handlers():
             doc_changed_handler = None
             logger.debug("Document Changed Handler unregistered.")
         
+        # Without the handler the MMI value index would go stale
+        value_index.set_maintained(False)
+        stop_snapshot_idling()
+        
         # Unregister document synchronizing event handler
         if doc_synchronizing_handler is not None:
             revit.doc.Application.DocumentSynchronizingWithCentral -= doc_synchronizing_handler
@@ -738,11 +622,8 @@ def deregister_event_handlers():
         
         # Clear any pending operations and mark handlers as inactive
         if mmi_event_handler is not None:
-            # Clear all queued operations
-            mmi_event_handler.elements_to_pin = []
-            mmi_event_handler.elements_to_validate = []
-            mmi_event_handler.validate_corrections = {}
-            mmi_event_handler.notify_message = None
+            # Clear all recorded changes
+            mmi_event_handler.clear_pending()
             logger.debug("Cleared all queued MMI operations")
         
         # Dispose the external event if created
@@ -791,21 +672,16 @@ if __name__ == '__main__':
             monitor_settings = load_monitor_config(revit.doc, use_display_names=False)
             mmi_param_name = get_mmi_parameter_name(revit.doc) or "Not set"
             
-            # Populate initial location cache if warn_on_move is enabled
-            if monitor_settings["warn_on_move"]:
-                populate_initial_location_cache(revit.doc)
-            
-            # Populate initial MMI cache if pin_elements is enabled (to detect changes)
-            if monitor_settings["pin_elements"]:
-                populate_initial_mmi_cache(revit.doc)
-            
-            # Baseline model element ids: post-activation ids are treated as new for default MMI
-            populate_baseline_element_ids_for_default(revit.doc)
+            # One model scan fills the location, MMI and baseline caches
+            activation_start = datetime.datetime.now()
+            elements_to_pin = populate_activation_caches(revit.doc, monitor_settings)
             
             # Proactively pin all high MMI elements if pin_elements is enabled
             pinned_count = 0
             if monitor_settings["pin_elements"]:
-                pinned_count = pin_all_high_mmi_elements(revit.doc)
+                pinned_count = pin_high_mmi_elements(revit.doc, elements_to_pin)
+            logger.debug("[PERF] MMI Monitor activation took {:.2f}s".format(
+                (datetime.datetime.now() - activation_start).total_seconds()))
             
             # Create a readable list of enabled features
             enabled_features = []
@@ -857,10 +733,9 @@ if __name__ == '__main__':
             script.toggle_icon(new_active_state)  # Toggle icon to inactive state
             
             # Clear caches
-            element_location_cache = {}
-            element_mmi_cache = {}
-            baseline_element_ids_for_default = set()
-            logger.debug("Cleared element location, MMI, and baseline caches")
+            monitor_state.clear()
+            sync_checker.clear_session_changes()
+            logger.debug("Cleared element location, MMI, baseline and session change caches")
             
             success = True
         else:
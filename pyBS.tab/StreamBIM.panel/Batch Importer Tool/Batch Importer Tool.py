@@ -1,5 +1,12 @@
 # -*- coding: utf-8 -*-
-"""Batch processor for StreamBIM 'Run Everything' functionality."""
+"""Batch processor for StreamBIM 'Run Everything' functionality.
+
+Run by ``pyrevit run`` with the models in ``__models__``, directly or as one
+of the workers of ``streambim.batch_runner``. Progress is recorded per model
+in a JSON manifest. A plain ``pyrevit run`` writes a new manifest and
+processes every model; workers of the orchestrator share the manifest of
+their batch, which skips the models a resumed batch already synced.
+"""
 
 import os
 import datetime
@@ -7,7 +14,6 @@ import sys
 import clr
 import imp
 import time
-import traceback
 from pyrevit import HOST_APP
 from Autodesk.Revit.DB import TransactWithCentralOptions, SynchronizeWithCentralOptions, RelinquishOptions
 from Autodesk.Revit.DB import SaveAsOptions
@@ -16,13 +22,26 @@ from Autodesk.Revit.DB import SaveAsOptions
 clr.AddReference('RevitAPI')
 clr.AddReference('System.Windows.Forms')
 
+# Add the extension lib folder to the path
+lib_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))), 'lib')
+if lib_path not in sys.path:
+    sys.path.insert(0, lib_path)
+
+from streambim.batch_manifest import BatchManifest
+from streambim.batch_runner import BatchWorker, MANIFEST_ENV, WORKER_ENV, new_manifest_path
+
+# Worker name given by the orchestrator; also keeps parallel workers' logs apart
+worker_id = os.environ.get(WORKER_ENV, '1')
+
 # Simple file logger
 class Logger:
     def __init__(self):
         log_dir = os.path.join(os.path.dirname(__file__), "log")
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        self.log_file = os.path.join(log_dir, "streambim_checklist_batch_{}.log".format(datetime.datetime.now().strftime("%Y%m%d_%H%M%S")))
+        self.log_file = os.path.join(log_dir, "streambim_checklist_batch_{}_worker{}.log".format(
+            datetime.datetime.now().strftime("%Y%m%d_%H%M%S"), worker_id))
         with open(self.log_file, 'wb') as f:
             f.write("=== StreamBIM Checklist Batch Processing Log ===\nStarted: {}\n\n".format(datetime.datetime.now()).encode('utf-8'))
     
@@ -35,61 +54,72 @@ class Logger:
 
 # Initialize
 logger = Logger()
-logger.debug("Starting batch processing")
+logger.debug("Starting batch processing (worker {})".format(worker_id))
 
 # Get the current script's directory and resolve path to the original script
 current_dir = os.path.dirname(os.path.abspath(__file__))
 panel_dir = os.path.dirname(current_dir)
 original_script_path = os.path.join(panel_dir, "Edit.stack", "Run Everything.pushbutton", "script.py")
 logger.debug("Script path: {}".format(original_script_path))
+original_script = imp.load_source('run_everything_script', original_script_path)
+
+# Progress manifest shared with the other workers of the batch; without an
+# orchestrator every run gets its own, so all models are processed
+manifest = BatchManifest(os.environ.get(MANIFEST_ENV) or new_manifest_path('_worker{}'.format(worker_id)))
+logger.debug("Manifest: {}".format(manifest.path))
+
+
+def open_model(model):
+    uidoc = HOST_APP.uiapp.OpenAndActivateDocument(model)
+    return uidoc.Document
+
+
+def download(doc):
+    """Log in, download the checklists and plan the writes of the active model."""
+    processor = original_script.RunEverythingProcessor()
+    if not processor.try_automatic_login():
+        raise Exception("StreamBIM login failed")
+    logger.debug("Logged in to StreamBIM")
+    processing_start_time = time.time()
+    write_plan, config_plans = processor.plan_import()
+    logger.debug("Planned {} writes for {} in {:.2f} seconds".format(
+        len(write_plan), doc.Title, time.time() - processing_start_time))
+    details = {
+        'configurations': len(config_plans),
+        'planned': len(write_plan),
+        'cache': processor.api_client.get_checklist_cache().get_status_text(),
+    }
+    return (processor, write_plan, config_plans), details
+
+
+def write(doc, plan):
+    """Write the planned values; let the processor handle its own transaction."""
+    processor, write_plan, config_plans = plan
+    processing_start_time = time.time()
+    totals = processor.execute_import(write_plan, config_plans)
+    if not totals.pop('committed'):
+        raise Exception("Writing the planned values was rolled back")
+    logger.debug("Processed model: {}".format(doc.Title))
+    logger.debug("Processing time: {:.2f} seconds".format(time.time() - processing_start_time))
+    return totals
+
+
+def sync(doc):
+    if doc.IsWorkshared:
+        logger.debug("Syncing with central")
+        trans_options = TransactWithCentralOptions()
+        sync_options = SynchronizeWithCentralOptions()
+        sync_options.SetRelinquishOptions(RelinquishOptions(False))
+        doc.SynchronizeWithCentral(trans_options, sync_options)
+    else:
+        logger.debug("Saving model")
+        doc.Save()
+    logger.debug("Saved: {}".format(doc.Title))
+
+
+# Process and save models, skipping the ones a resumed manifest records as synced
+worker = BatchWorker(manifest, open_model, download, write, sync, worker_id=worker_id, log=logger)
+result = worker.process(list(__models__))
 
-# Track current open documents to avoid conflicts
-currently_open_docs = set()
-
-# Process and save models
-for model in __models__:
-    try:
-        # Open model
-        logger.debug("Opening model: {}".format(model))
-        uidoc = HOST_APP.uiapp.OpenAndActivateDocument(model)
-        doc = uidoc.Document
-        
-        # Process using original script
-        try:
-            original_script = imp.load_source('run_everything_script', original_script_path)
-            processor = original_script.RunEverythingProcessor()
-            
-            if processor.try_automatic_login():
-                logger.debug("Logged in to StreamBIM")
-                
-                # Process the model - let the processor handle its own transactions
-                processing_start_time = time.time()
-                try:
-                    processor.run_import_configurations()
-                    logger.debug("Processed model: {}".format(doc.Title))
-                    logger.debug("Processing time: {:.2f} seconds".format(time.time() - processing_start_time))
-                except Exception as proc_ex:
-                    logger.error("Error during processing: {}".format(proc_ex))
-                    logger.error("Processing error trace: {}".format(traceback.format_exc()))
-                    raise
-                
-                # Save/Sync
-                if doc.IsWorkshared:
-                    logger.debug("Syncing with central")
-                    trans_options = TransactWithCentralOptions()
-                    sync_options = SynchronizeWithCentralOptions()
-                    sync_options.SetRelinquishOptions(RelinquishOptions(False))
-                    doc.SynchronizeWithCentral(trans_options, sync_options)
-                else:
-                    logger.debug("Saving model")
-                    doc.Save()
-                logger.debug("Saved: {}".format(doc.Title))
-            else:
-                logger.error("StreamBIM login failed")
-        except Exception as e:
-            logger.error("Error: {}".format(e))
-            logger.error("Trace: {}".format(traceback.format_exc()))
-    except Exception as e:
-        logger.error("Failed to process {}: {}".format(model, e))
-
-logger.debug("Batch processing complete")
\ No newline at end of file
+logger.debug("Batch processing complete: {} synced, {} failed, {} already synced".format(
+    len(result['synced']), len(result['failed']), len(result['skipped'])))
@@ -1,2 +1,5 @@
 pyrevit run "C:\code\pyRevit Extensions\pyByggstyrning.extension\pyBS.tab\StreamBIM.panel\Batch Importer Tool\Batch Importer Tool.py" "C:\code\pyRevit Extensions\Project_2025.rvt"
+rem Several models in parallel Revit workers; add --resume <manifest> to finish a failed batch
+rem cd "C:\code\pyRevit Extensions\pyByggstyrning.extension\lib"
+rem python -m streambim.batch_runner --workers 2 --revit 2025 "C:\code\pyRevit Extensions\Project_2025.rvt" "C:\code\pyRevit Extensions\Project_B.rvt"
 pause
\ No newline at end of file
@@ -20,7 +20,6 @@ import clr
 import json
 import pickle
 import base64
-import urllib2
 from collections import namedtuple
 
 # Add the extension directory to the path - FIXED PATH RESOLUTION
@@ -62,6 +61,9 @@ from pyrevit import revit
 # Import custom modules from the extension lib
 from streambim import streambim_api
 from revit import revit_utils
+from revit import storage_registry
+from revit import guid_index
+from revit import param_writes
 
 # Import extensible storage
 from extensible_storage import BaseSchema, simple_field
@@ -140,20 +142,7 @@ class MappingSchema(BaseSchema):
 
 def get_or_create_data_storage(doc):
     """Get existing or create new data storage element."""
-    data_storage = FilteredElementCollector(doc)\
-        .OfClass(ExtensibleStorage.DataStorage)\
-        .ToElements()
-    
-    # Look for our storage with the schema
-    for ds in data_storage:
-        # Check if this storage has our schema
-        entity = ds.GetEntity(StreamBIMSettingsSchema.schema)
-        if entity.IsValid():
-            return ds
-    
-    # If not found, create a new one
-    with revit.Transaction("Create StreamBIM Storage", doc):
-        return ExtensibleStorage.DataStorage.Create(doc)
+    return get_or_create_settings_storage(doc)
 
 def get_or_create_mapping_storage(doc):
     """Get existing or create new data storage element."""
@@ -162,24 +151,16 @@ def get_or_create_mapping_storage(doc):
         return None
         
     try:
-        data_storage = FilteredElementCollector(doc)\
-            .OfClass(ExtensibleStorage.DataStorage)\
-            .ToElements()
-        
-        # Look for our storage with the schema
-        for ds in data_storage:
-            try:
-                # Check if this storage has our schema
-                entity = ds.GetEntity(MappingSchema.schema)
-                if entity.IsValid():
-                    return ds
-            except Exception as e:
-                continue
+        # Look for our storage with the schema (registry-backed, no collector scan)
+        storage = storage_registry.find_storage(doc, MappingSchema.schema.GUID)
+        if storage:
+            return storage
         
         # If not found, create a new one
         with revit.Transaction("Create StreamBIM Mapping Storage", doc):
             new_storage = ExtensibleStorage.DataStorage.Create(doc)
-            return new_storage
+        storage_registry.invalidate(doc)
+        return new_storage
             
     except Exception as e:
         logger.error("Error in get_or_create_mapping_storage: {}".format(str(e)))
@@ -207,6 +188,7 @@ class StreamBIMImporterUI(forms.WPFWindow):
         self.checklist_items = []
         self.streambim_properties = []
         self.updated_elements = []  # Store updated elements for isolation
+        self.write_summary = None  # Write counts of the last import
         self.saved_project_id = None
         
         # Initialize mapping data
@@ -281,10 +263,8 @@ class StreamBIMImporterUI(forms.WPFWindow):
             
             # Fetch regions from API
             url = "https://global.streambim.com/regions.json"
-            req = urllib2.Request(url)
-            req.add_header('Accept', 'application/json')
-            
-            response = urllib2.urlopen(req)
+            response = self.streambim_client.transport.request(
+                "GET", url, headers={'Accept': 'application/json'})
             result = json.loads(response.read())
             
             # Parse regions
@@ -867,52 +847,17 @@ class StreamBIMImporterUI(forms.WPFWindow):
         # Show busy indicator during initial loading
         self.set_busy(True, "Importing checklist, please wait...")
         
-        # Get all checklist items
-        all_checklist_items = self.streambim_client.get_checklist_items(self.selected_checklist_id, streambim_prop, limit=0)
-        if not all_checklist_items:
-            error_msg = self.streambim_client.last_error or "Failed to retrieve all checklist items"
-            self.update_status(error_msg)
-            self.importButton.IsEnabled = True
-            self.progressBar.Visibility = Visibility.Collapsed
-            self.progressText.Visibility = Visibility.Collapsed
-            # Hide busy indicator
-            self.set_busy(False)
-            return
-            
         self.progressBar.Value = 25
         self.progressText.Text = "Building element lookup dictionary..."
         self.update_status("Building IFC GUID lookup dictionary...")
         
-        ifc_guid_dict = {}
+        # Shared IFC GUID index of the document (kept current between runs)
+        ifc_guid_index = guid_index.get_index(revit.doc)
         
-        # Collect elements to update
-        elements = []
+        # Restrict matching to the active view if requested
+        visible_element_ids = None
         if self.onlyVisibleElementsCheckBox.IsChecked:
-            elements = revit_utils.get_visible_elements()
-        else:
-            # Use all elements in the document
-            elements = FilteredElementCollector(revit.doc).WhereElementIsNotElementType().ToElements()
-        
-        # Track how many elements have IFC GUIDs
-        ifc_guid_count = 0
-        
-        # Build dictionary mapping IFC GUIDs to elements
-        for element in elements:
-            try:
-                # Check for different variations of the parameter name
-                ifc_guid_param = element.LookupParameter("IFCGuid")
-                if not ifc_guid_param:
-                    ifc_guid_param = element.LookupParameter("IfcGUID")
-                if not ifc_guid_param:
-                    ifc_guid_param = element.LookupParameter("IFC GUID")
-                
-                if ifc_guid_param and ifc_guid_param.HasValue and ifc_guid_param.StorageType == StorageType.String:
-                    guid_value = ifc_guid_param.AsString()
-                    if guid_value:
-                        ifc_guid_dict[guid_value] = element
-                        ifc_guid_count += 1
-            except:
-                continue
+            visible_element_ids = revit_utils.get_visible_element_ids()
         
         self.progressBar.Value = 40
         self.progressText.Text = "Processing checklist items..."
@@ -929,74 +874,181 @@ class StreamBIMImporterUI(forms.WPFWindow):
         # Check if this is a grouped checklist
         is_grouped = self.selected_checklist_group_by and len(self.selected_checklist_group_by) > 0
         
-        if is_grouped:
-            # Grouped checklist: resolve group keys to IFC GUIDs
-            if not self.selected_checklist_building_id:
-                error_msg = "Cannot import grouped checklist: no building ID found"
-                self.update_status(error_msg)
-                logger.error(error_msg)
-                self.importButton.IsEnabled = True
-                self.progressBar.Visibility = Visibility.Collapsed
-                self.progressText.Visibility = Visibility.Collapsed
-                return
+        if is_grouped and not self.selected_checklist_building_id:
+            error_msg = "Cannot import grouped checklist: no building ID found"
+            self.update_status(error_msg)
+            logger.error(error_msg)
+            self.importButton.IsEnabled = True
+            self.progressBar.Visibility = Visibility.Collapsed
+            self.progressText.Visibility = Visibility.Collapsed
+            return
+        
+        # Stream checklist items page by page; only the GUID -> value map is kept
+        checklist_items = self.streambim_client.iter_checklist_items(self.selected_checklist_id, streambim_prop)
+        try:
+            guid_to_value, item_total = self.collect_guid_values(
+                checklist_items, streambim_prop, value_mapping, is_grouped)
+        except Exception as e:
+            logger.error("Error downloading checklist items: {}".format(str(e)))
+            guid_to_value, item_total = {}, 0
+        self.update_status_bar()
+        
+        if not item_total:
+            error_msg = self.streambim_client.last_error or "Failed to retrieve all checklist items"
+            self.update_status(error_msg)
+            self.importButton.IsEnabled = True
+            self.progressBar.Visibility = Visibility.Collapsed
+            self.progressText.Visibility = Visibility.Collapsed
+            # Hide busy indicator
+            self.set_busy(False)
+            return
+        
+        # Resolve the checklist GUIDs to elements (FAST LOOKUP)
+        ifc_guid_dict = ifc_guid_index.get_elements(guid_to_value, visible_element_ids)
+        
+        self.progressBar.Value = 50
+        self.progressText.Text = "Updating element parameters..."
+        self.update_status("Importing values...")
+        
+        # Compare before writing: only values that differ reach the transaction,
+        # so unchanged elements are neither added to the undo stack nor checked out
+        writer = param_writes.ParameterWriter(revit.doc)
+        pending_writes = []
+        total_items = len(guid_to_value)
+        item_count = 0
+        
+        for guid, revit_value in guid_to_value.items():
+            item_count += 1
             
-            self.update_status("Resolving grouped checklist items...")
+            try:
+                # Get the element directly from our dictionary (FAST LOOKUP)
+                element = ifc_guid_dict.get(guid)
+                if not element:
+                    continue
+                
+                pending = writer.check(element, revit_param, revit_value)[1]
+                if pending:
+                    pending_writes.append(pending)
+                    
+            except Exception as e:
+                logger.error("Error processing element: {}".format(str(e)))
             
-            # Build mapping from IFC GUID to property value
-            guid_to_value = {}
-            total_groups = len(all_checklist_items)
-            group_count = 0
+            # Update progress
+            if item_count % 10 == 0:  # Update progress every 10 items
+                progress = 50 + (float(item_count) / total_items * 25)
+                self.progressBar.Value = progress
+                self.progressText.Text = "Comparing values... ({}/{})".format(item_count, total_items)
+        
+        self.updated_elements = []  # Reset updated elements list
+        
+        if pending_writes:
+            # Start a group transaction for all parameter changes
+            t = Transaction(revit.doc, 'Import StreamBIM Values')
+            t.Start()
             
-            for item in all_checklist_items:
-                group_count += 1
+            try:
+                for write_count, pending in enumerate(pending_writes, 1):
+                    if writer.apply(pending) == param_writes.WRITTEN:
+                        self.updated_elements.append(pending.element)
+                    
+                    # Update progress
+                    if write_count % 10 == 0:
+                        progress = 75 + (float(write_count) / len(pending_writes) * 25)
+                        self.progressBar.Value = progress
+                        self.progressText.Text = "Writing values... ({}/{})".format(write_count, len(pending_writes))
                 
-                # Update progress
-                if group_count % 5 == 0:
-                    progress = 40 + (group_count / total_groups * 10)
-                    self.progressBar.Value = progress
-                    self.progressText.Text = "Resolving groups... ({}/{})".format(group_count, total_groups)
+                # Commit all changes
+                t.Commit()
                 
-                try:
-                    # Get group key (object value)
-                    group_key = item.get('object')
-                    if not group_key:
-                        continue
-                    
-                    # Get property value from this group
-                    if 'items' not in item or streambim_prop not in item['items']:
-                        continue
-                    
-                    property_value = item['items'][streambim_prop]
-                    if not property_value:
-                        continue
-                    
-                    # Apply value mapping if enabled
-                    if value_mapping:
-                        if property_value in value_mapping:
-                            property_value = value_mapping[property_value]
-                        else:
-                            # Skip if mapping enabled but value not in mapping
-                            continue
-                    
-                    # Resolve group key to IFC GUIDs
-                    ifc_guids = self.streambim_client.resolve_group_key_to_ifc_guids(
-                        self.selected_checklist_id,
-                        self.selected_checklist_building_id,
-                        group_key
-                    )
-                    
-                    # Map all resolved GUIDs to this property value
-                    for guid in ifc_guids:
-                        guid_to_value[guid] = property_value
-                        
-                except Exception as e:
-                    logger.error("Error resolving group key: {}".format(str(e)))
+            except Exception as e:
+                t.RollBack()
+                self.updated_elements = []
+                logger.error("Error during import: {}".format(str(e)))
+                self.update_status("Error during import: {}".format(str(e)))
+                # Hide busy indicator on error
+                self.set_busy(False)
+                return
+        
+        # Update UI
+        counts = writer.counts
+        logger.info("Import complete: {} ({} elements without a writable parameter)".format(
+            counts.get_summary_text(), counts.skipped))
+        self.write_summary = "Import: {}".format(counts.get_summary_text())
+        self.update_status_bar()
+        self.importButton.IsEnabled = True
+        self.isolateButton.IsEnabled = len(self.updated_elements) > 0  # Enable isolate button if elements were updated
+        self.progressBar.Visibility = Visibility.Collapsed
+        self.progressText.Visibility = Visibility.Collapsed
+        
+        # Hide busy indicator
+        self.set_busy(False)
+    
+    def collect_guid_values(self, checklist_items, streambim_prop, value_mapping, is_grouped):
+        """Reduce streamed checklist items to an IFC GUID -> property value map.
+        
+        Grouped checklists resolve each group key to its IFC GUIDs.
+        
+        Returns:
+            tuple: (guid_to_value dict, number of checklist items read)
+        """
+        guid_to_value = {}
+        item_count = 0
+        
+        if is_grouped:
+            self.update_status("Resolving grouped checklist items...")
+            
+            # Collect (group key, value) pairs first so the keys can be resolved together
+            group_values = []
+            for item in checklist_items:
+                item_count += 1
+                
+                # Get group key (object value)
+                group_key = item.get('object')
+                if not group_key:
                     continue
+                
+                # Get property value from this group
+                if 'items' not in item or streambim_prop not in item['items']:
+                    continue
+                
+                property_value = item['items'][streambim_prop]
+                if not property_value:
+                    continue
+                
+                # Apply value mapping if enabled
+                if value_mapping:
+                    if property_value in value_mapping:
+                        property_value = value_mapping[property_value]
+                    else:
+                        # Skip if mapping enabled but value not in mapping
+                        continue
+                
+                group_values.append((group_key, property_value))
+            
+            def report_progress(done, total):
+                self.progressText.Text = "Resolving groups... ({}/{})".format(done, total)
+            
+            # Resolve group keys to IFC GUIDs (concurrently, cached per project)
+            try:
+                resolved = self.streambim_client.get_group_resolver().resolve_many(
+                    self.selected_checklist_id,
+                    self.selected_checklist_building_id,
+                    [group_key for group_key, _ in group_values],
+                    progress_callback=report_progress
+                )
+            except Exception as e:
+                logger.error("Error resolving group keys: {}".format(str(e)))
+                resolved = {}
+            
+            # Map all resolved GUIDs to the property value of their group
+            for group_key, property_value in group_values:
+                for guid in resolved.get(group_key, []):
+                    guid_to_value[guid] = property_value
             
         else:
             # Non-grouped checklist: direct GUID matching (existing behavior)
-            guid_to_value = {}
-            for item in all_checklist_items:
+            for item in checklist_items:
+                item_count += 1
                 if 'object' not in item:
                     continue
                 
@@ -1019,85 +1071,7 @@ class StreamBIMImporterUI(forms.WPFWindow):
                 
                 guid_to_value[guid] = property_value
         
-        self.progressBar.Value = 50
-        self.progressText.Text = "Updating element parameters..."
-        self.update_status("Importing values...")
-        
-        # Track progress
-        processed = 0
-        updated = 0
-        self.updated_elements = []  # Reset updated elements list
-        
-        # Start a group transaction for all parameter changes
-        t = Transaction(revit.doc, 'Import StreamBIM Values')
-        t.Start()
-        
-        try:
-            # Process GUID to value mappings
-            total_items = len(guid_to_value)
-            item_count = 0
-            
-            for guid, revit_value in guid_to_value.items():
-                item_count += 1
-                processed += 1
-                
-                try:
-                    # Get the element directly from our dictionary (FAST LOOKUP)
-                    element = ifc_guid_dict.get(guid)
-                    if not element:
-                        continue
-                    
-                    # Get the parameter
-                    param = element.LookupParameter(revit_param)
-                    if not param:
-                        continue
-                        
-                    # Skip read-only parameters
-                    if param.IsReadOnly:
-                        continue
-                        
-                    # Set parameter value directly within the transaction
-                    try:
-                        if param.StorageType == StorageType.String:
-                            param.Set(str(revit_value))
-                        elif param.StorageType == StorageType.Double:
-                            param.Set(float(revit_value))
-                        elif param.StorageType == StorageType.Integer:
-                            param.Set(int(revit_value))
-                        updated += 1
-                        self.updated_elements.append(element)
-                    except Exception as e:
-                        logger.error("Error setting parameter value for element {}: {}".format(element.Id, str(e)))
-                        
-                except Exception as e:
-                    logger.error("Error processing element: {}".format(str(e)))
-                
-                # Update progress
-                if item_count % 10 == 0:  # Update progress every 10 items
-                    progress = 50 + (item_count / total_items * 50)
-                    self.progressBar.Value = progress
-                    self.progressText.Text = "Processing items... ({}/{})".format(item_count, total_items)
-            
-            # Commit all changes
-            t.Commit()
-            
-        except Exception as e:
-            t.RollBack()
-            logger.error("Error during import: {}".format(str(e)))
-            self.update_status("Error during import: {}".format(str(e)))
-            # Hide busy indicator on error
-            self.set_busy(False)
-            return
-        
-        # Update UI
-        self.update_status("Import complete. Updated {}/{} elements.".format(updated, processed))
-        self.importButton.IsEnabled = True
-        self.isolateButton.IsEnabled = updated > 0  # Enable isolate button if elements were updated
-        self.progressBar.Visibility = Visibility.Collapsed
-        self.progressText.Visibility = Visibility.Collapsed
-        
-        # Hide busy indicator
-        self.set_busy(False)
+        return guid_to_value, item_count
     
     def isolate_button_click(self, sender, args):
         """Handle isolate button click."""
@@ -1112,6 +1086,16 @@ class StreamBIMImporterUI(forms.WPFWindow):
         # Status bar removed from UI - method kept for compatibility but does nothing
         pass
 
+    def update_status_bar(self):
+        """Show the last import's write counts and the checklist cache counter in the status bar."""
+        try:
+            parts = [self.streambim_client.get_checklist_cache().get_status_text()]
+            if self.write_summary:
+                parts.insert(0, self.write_summary)
+            self.statusBarTextBlock.Text = " | ".join(parts)
+        except Exception as e:
+            logger.debug("Could not update status bar: {}".format(str(e)))
+    
     def projects_list_double_click(self, sender, args):
         """Handle double-click on projects list view."""
         if self.projectsListView.SelectedItem and self.selectProjectButton.IsEnabled:
@@ -1153,6 +1137,7 @@ class StreamBIMImporterUI(forms.WPFWindow):
             if current_id != project_id:
                 with StreamBIMSettingsSchema(data_storage) as entity:
                     entity.set("project_id", project_id)
+                storage_registry.invalidate(revit.doc)
                 self.update_status("Saved project ID: {}".format(project_id))
                 
             return True
@@ -1163,13 +1148,7 @@ class StreamBIMImporterUI(forms.WPFWindow):
     def load_saved_project_id(self):
         """Load the saved project ID from extensible storage."""
         try:
-            data_storage = get_or_create_data_storage(revit.doc)
-            schema = StreamBIMSettingsSchema(data_storage)
-            
-            if schema.is_valid:
-                return schema.get("project_id")            
-            
-            return None
+            return get_saved_project_id(revit.doc)
         except Exception as e:
             logger.error("Failed to load project ID: {}".format(str(e)))
             return None
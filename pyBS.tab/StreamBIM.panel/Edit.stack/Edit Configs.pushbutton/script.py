@@ -11,6 +11,7 @@ import sys
 import clr
 import json
 import imp
+import itertools
 from collections import namedtuple
 import pickle
 import base64
@@ -37,6 +38,9 @@ from streambim.streambim_api import get_or_create_settings_storage
 from streambim.streambim_api import load_configs_with_pickle
 from streambim.streambim_api import save_configs_with_pickle
 from streambim.streambim_api import get_saved_project_id
+from revit import storage_registry
+from revit import guid_index
+from revit import param_writes
 
 # Try direct import from current directory's parent path
 sys.path.append(op.dirname(op.dirname(panel_dir)))
@@ -91,6 +95,8 @@ class ConfigItem(object):
         self.elements_total = 0
         self.elements_processed = 0
         self.elements_updated = 0
+        self.elements_unchanged = 0
+        self.elements_failed = 0
         self.mapping_count = 0
         if mapping_config:
             try:
@@ -114,10 +120,12 @@ class ConfigItem(object):
         if self.elements_total == 0:
             return "Not processed"
         else:
-            return "{}/{} elements processed, {} updated".format(
+            return "{}/{} elements processed, {} updated, {} unchanged, {} failed".format(
                 self.elements_processed, 
                 self.elements_total,
-                self.elements_updated
+                self.elements_updated,
+                self.elements_unchanged,
+                self.elements_failed
             )
         
     @property 
@@ -165,6 +173,7 @@ class ConfigEditorUI(forms.WPFWindow):
         self.configs = ObservableCollection[object]()
         self.mappings = ObservableCollection[object]()
         self.current_config = None
+        self.ifc_guid_index = None
         
         # Set up event handlers
         self.configsListView.SelectionChanged += self.config_selection_changed
@@ -405,6 +414,7 @@ class ConfigEditorUI(forms.WPFWindow):
                 with revit.Transaction("Save StreamBIM Project ID", revit.doc):
                     with StreamBIMSettingsSchema(data_storage) as entity:
                         entity.set("project_id", project_id)
+                storage_registry.invalidate(revit.doc)
         except Exception as e:
             logger.error("Error saving project ID: {}".format(str(e)))
 
@@ -426,6 +436,11 @@ class ConfigEditorUI(forms.WPFWindow):
             # Track total elements processed and updated
             total_processed = 0
             total_updated = 0
+            total_unchanged = 0
+            total_failed = 0
+            
+            # One IFC GUID index serves every configuration of the batch
+            self.ifc_guid_index = guid_index.get_index(revit.doc)
             
             # Process each configuration separately
             for i, config in enumerate(configs):
@@ -434,6 +449,8 @@ class ConfigEditorUI(forms.WPFWindow):
                 
                 # Process UI events
                 self.process_ui_events()
+                config.elements_unchanged = 0
+                config.elements_failed = 0
                 
                 # Skip configurations without checklist ID
                 if not config.checklist_id:
@@ -447,14 +464,17 @@ class ConfigEditorUI(forms.WPFWindow):
                 # Update totals
                 total_processed += processed_count
                 total_updated += updated_count
+                total_unchanged += config.elements_unchanged
+                total_failed += config.elements_failed
                 
             
             # Complete the main progress bar
             self.mainProgressBar.Value = len(configs)
             
             MessageBox.Show(
-                "Batch import completed.\n\nProcessed {} configurations.\nUpdated {} out of {} elements.".format(
-                    len(configs), total_updated, total_processed),
+                "Batch import completed.\n\nProcessed {} configurations.\nUpdated {} out of {} elements "
+                "({} unchanged, {} failed).".format(
+                    len(configs), total_updated, total_processed, total_unchanged, total_failed),
                 "Batch Import Results",
                 MessageBoxButton.OK
             )
@@ -511,28 +531,9 @@ class ConfigEditorUI(forms.WPFWindow):
             pass
     
     def get_all_elements_with_ifc_guid(self):
-        """Get all elements with an IfcGUID parameter."""
-        result = []
-        
-        # Get all elements in the document
-        all_elements = FilteredElementCollector(revit.doc).WhereElementIsNotElementType().ToElements()
-        
-        # Filter for elements with IfcGUID parameter
-        for element in all_elements:
-            try:
-                # Check for different variations of the parameter name
-                ifc_guid_param = element.LookupParameter("IFCGuid")
-                if not ifc_guid_param:
-                    ifc_guid_param = element.LookupParameter("IfcGUID")
-                if not ifc_guid_param:
-                    ifc_guid_param = element.LookupParameter("IFC GUID")
-                
-                if ifc_guid_param:
-                    result.append(element)
-            except:
-                continue
-        
-        return result
+        """Get all elements with an IfcGUID value."""
+        ifc_guid_index = guid_index.get_index(revit.doc)
+        return list(ifc_guid_index.get_elements(ifc_guid_index.guid_to_id).values())
     
     
     def update_status(self, message):
@@ -558,54 +559,22 @@ class ConfigEditorUI(forms.WPFWindow):
             logger.error("Error getting property value: {}".format(str(e)))
             return None
             
-    def set_parameter_value(self, param, value, storage_type):
-        """Set parameter value based on storage type."""
-        try:
-            if param.IsReadOnly:
-                return False
-                
-            if storage_type == StorageType.String:
-                # Convert to string
-                str_value = str(value)
-                if param.AsString() != str_value:
-                    param.Set(str_value)
-                    return True
-                    
-            elif storage_type == StorageType.Integer:
-                # Try to convert to integer
-                try:
-                    int_value = int(value)
-                    if param.AsInteger() != int_value:
-                        param.Set(int_value)
-                        return True
-                except (ValueError, TypeError):
-                    return False
-                    
-            elif storage_type == StorageType.Double:
-                # Try to convert to double
-                try:
-                    double_value = float(value)
-                    if param.AsDouble() != double_value:
-                        param.Set(double_value)
-                        return True
-                except (ValueError, TypeError):
-                    return False
-                    
-            elif storage_type == StorageType.ElementId:
-                # Try to convert to ElementId
-                try:
-                    int_value = int(value)
-                    element_id = ElementId(int_value)
-                    if param.AsElementId() != element_id:
-                        param.Set(element_id)
-                        return True
-                except (ValueError, TypeError):
-                    return False
-                    
-            return False
-        except Exception as e:
-            logger.error("Error setting parameter value: {}".format(str(e)))
-            return False
+    def iter_streamed_items(self, config, first_page, pages):
+        """Yield the items of ``first_page`` and the remaining ``pages``.
+        
+        Raises if a later page fails so the caller writes nothing.
+        """
+        for page in itertools.chain([first_page], pages):
+            config.elements_total += len(page)
+            self.update_config_progress(config)
+            for item in page:
+                yield item
+
+    def set_write_counts(self, config, counts):
+        """Copy a ParameterWriter's counts onto ``config`` for the status column."""
+        config.elements_updated = counts.written
+        config.elements_unchanged = counts.unchanged
+        config.elements_failed = counts.failed
 
     def process_single_configuration(self, config, config_index, total_configs):
         """Process a single configuration with its own transaction.
@@ -614,11 +583,12 @@ class ConfigEditorUI(forms.WPFWindow):
         updated_count = 0
         
         try:
-            # Get checklist items from StreamBIM
+            # Stream checklist items from StreamBIM page by page; the first
+            # page is fetched up front so an empty or failing checklist exits early
             try:
-                # Get checklist items with proper error handling
-                checklist_items = self.api_client.get_checklist_items(config.checklist_id, config.streambim_property, limit=0)
-                if not checklist_items:
+                pages = self.api_client.iter_checklist_item_pages(config.checklist_id, config.streambim_property)
+                first_page = next(pages, None)
+                if not first_page:
                     config.elements_processed = 0
                     config.elements_updated = 0
                     return (0, 0)
@@ -642,118 +612,94 @@ class ConfigEditorUI(forms.WPFWindow):
                 except Exception as e:
                     logger.error("Error parsing mapping config: {}".format(str(e)))
             
-            # Build IFC GUID lookup dictionary once - OPTIMIZATION
-            ifc_guid_dict = {}
+            # IFC GUID index shared by all configurations of the run
+            ifc_guid_index = self.ifc_guid_index
             
-            # Get all elements in the document
-            all_elements = FilteredElementCollector(revit.doc).WhereElementIsNotElementType().ToElements()
+            # Compare values while pages stream in; only values that differ
+            # from the model are written, so unchanged elements stay untouched
+            writer = param_writes.ParameterWriter(revit.doc)
+            pending_writes = []
             
-            # Track how many elements have IFC GUIDs
-            ifc_guid_count = 0
+            # The total grows as pages arrive
+            config.elements_total = 0
             
-            # Build dictionary mapping IFC GUIDs to elements
-            for element in all_elements:
+            # Process each checklist item directly
+            for idx, item in enumerate(self.iter_streamed_items(config, first_page, pages)):
+                # Process UI events periodically
+                if idx % 10 == 0:
+                    self.process_ui_events()
+                                    
+                processed_count += 1
+                
                 try:
-                    # Check for different variations of the parameter name
-                    ifc_guid_param = element.LookupParameter("IFCGuid")
-                    if not ifc_guid_param:
-                        ifc_guid_param = element.LookupParameter("IfcGUID")
-                    if not ifc_guid_param:
-                        ifc_guid_param = element.LookupParameter("IFC GUID")
+                    # Get the element ID from the checklist item
+                    element_id = item.get('object')
+                    if not element_id:
+                        element_id = item.get('attributes', {}).get('elementId')
                     
-                    if ifc_guid_param and ifc_guid_param.HasValue and ifc_guid_param.StorageType == StorageType.String:
-                        guid_value = ifc_guid_param.AsString()
-                        if guid_value:
-                            ifc_guid_dict[guid_value] = element
-                            ifc_guid_count += 1
-                except:
-                    continue
-            
-            # Start a transaction for this configuration
-            t = Transaction(revit.doc, "Batch Import: " + config.DisplayName)
-            t.Start()
-            
-            try:
-                # Set an estimated number of elements for the progress tracking
-                config.elements_total = len(checklist_items)
-                self.update_config_progress(config)
-                
-                # Process each checklist item directly
-                for idx, item in enumerate(checklist_items):
-                    # Process UI events periodically
-                    if idx % 10 == 0:
-                        self.process_ui_events()
-                                        
-                    processed_count += 1
+                    if not element_id:
+                        continue
                     
-                    try:
-                        # Get the element ID from the checklist item
-                        element_id = item.get('object')
-                        if not element_id:
-                            element_id = item.get('attributes', {}).get('elementId')
-                        
-                        if not element_id:
-                            continue
-                        
-                        # Find the element by IFC GUID using our dictionary - MUCH FASTER
-                        element = ifc_guid_dict.get(element_id)
-                        if not element:
-                            continue
-                        
-                        # Get property value
-                        checklist_value = self.get_property_value(item, config.streambim_property)
-                        
-                        if checklist_value is None:
-                            continue
-                                                
-                        # Apply value mapping if enabled
-                        if config.mapping_enabled:
-                            if checklist_value in value_mapping:
-                                original_value = checklist_value
-                                checklist_value = value_mapping[checklist_value]
-                            else:
-                                # Skip if mapping enabled but value not in mapping
-                                continue
-                        
-                        # Get the parameter
-                        param = element.LookupParameter(config.revit_parameter)
-                        if not param:
-                            continue
-                        
-                        # Skip read-only parameters
-                        if param.IsReadOnly:
+                    # Find the element by IFC GUID using the shared index
+                    element = ifc_guid_index.get_element(element_id)
+                    if not element:
+                        continue
+                    
+                    # Get property value
+                    checklist_value = self.get_property_value(item, config.streambim_property)
+                    
+                    if checklist_value is None:
+                        continue
+                                            
+                    # Apply value mapping if enabled
+                    if config.mapping_enabled:
+                        if checklist_value in value_mapping:
+                            checklist_value = value_mapping[checklist_value]
+                        else:
+                            # Skip if mapping enabled but value not in mapping
                             continue
-                        
-                        # Set parameter value based on type
-                        param_storage_type = param.StorageType
-                        
-                        # Set the parameter value
-                        set_value_result = self.set_parameter_value(param, checklist_value, param_storage_type)
-                        if set_value_result:
-                            updated_count += 1
-                            
-                    except Exception as e:
-                        logger.error("Error processing element: {}".format(str(e)))
                     
-                    # Update progress periodically
-                    if idx % 5 == 0:
-                        config.elements_processed = processed_count
-                        config.elements_updated = updated_count
-                        self.update_config_progress(config)
-                
-                # Commit the transaction
-                t.Commit()
+                    # Compare with the current value; missing and read-only parameters are skipped
+                    pending = writer.check(element, config.revit_parameter, checklist_value)[1]
+                    if pending:
+                        pending_writes.append(pending)
+                        
+                except Exception as e:
+                    logger.error("Error processing element: {}".format(str(e)))
                 
-                # Update the final progress
-                config.elements_processed = processed_count
-                config.elements_updated = updated_count
-                self.update_config_progress(config)
+                # Update progress periodically
+                if idx % 5 == 0:
+                    config.elements_processed = processed_count
+                    self.set_write_counts(config, writer.counts)
+                    self.update_config_progress(config)
+            
+            if pending_writes:
+                # Start a transaction for the values that changed
+                t = Transaction(revit.doc, "Batch Import: " + config.DisplayName)
+                t.Start()
                 
-            except Exception as e:
-                # Roll back the transaction if there was an error
-                if t.HasStarted():
-                    t.RollBack()
-                logger.error("Error processing configuration: {}".format(str(e)))
+                try:
+                    for pending in pending_writes:
+                        writer.apply(pending)
+                    
+                    # Commit the transaction
+                    t.Commit()
+                    
+                except Exception as e:
+                    # Roll back the transaction if there was an error
+                    if t.HasStarted():
+                        t.RollBack()
+                    writer.counts.failed += writer.counts.written
+                    writer.counts.written = 0
+                    logger.error("Error processing configuration: {}".format(str(e)))
+            
+            updated_count = writer.counts.written
+            logger.debug("{}: {}".format(config.DisplayName, writer.counts.get_summary_text()))
+            
+            # Update the final progress
+            config.elements_processed = processed_count
+            self.set_write_counts(config, writer.counts)
+            self.update_config_progress(config)
                 
         except Exception as e:
             logger.error("Error in process_single_configuration: {}".format(str(e)))
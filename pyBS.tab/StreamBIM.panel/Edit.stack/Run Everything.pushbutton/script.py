@@ -10,6 +10,7 @@ import os
 import sys
 import clr
 import json
+import time
 import pickle
 import base64
 from collections import namedtuple
@@ -53,6 +54,9 @@ from streambim import streambim_api
 
 # Import revit_utils functions
 from revit.revit_utils import get_element_by_ifc_guid
+from revit import guid_index
+from revit import param_writes
+from streambim.run_plan import RunPlanner
 
 # Import StreamBIMSettingsSchema and related functions directly from the module
 from streambim.streambim_api import StreamBIMSettingsSchema
@@ -85,6 +89,8 @@ class ConfigItem(object):
         self.elements_total = 0
         self.elements_processed = 0
         self.elements_updated = 0
+        self.elements_unchanged = 0
+        self.elements_failed = 0
         self.mapping_count = 0
         if mapping_config:
             try:
@@ -102,10 +108,12 @@ class ConfigItem(object):
         if self.elements_total == 0:
             return "Not processed"
         else:
-            return "{}/{} elements processed, {} updated".format(
+            return "{}/{} elements processed, {} updated, {} unchanged, {} failed".format(
                 self.elements_processed, 
                 self.elements_total,
-                self.elements_updated
+                self.elements_updated,
+                self.elements_unchanged,
+                self.elements_failed
             )
             
     @property
@@ -126,6 +134,9 @@ class RunEverythingProcessor:
         # Cache for checklist records (runtime only, not persisted)
         self.checklist_records_cache = {}
         
+        # IFC GUID index shared by all configurations of the run
+        self.ifc_guid_index = None
+        
         # Load configurations
         self.load_configurations()
         
@@ -229,39 +240,10 @@ class RunEverythingProcessor:
         if not self.configs:
             logger.info("No configurations to process. Exiting.")
             return
-            
-        logger.info("Starting batch import process for {} configurations".format(len(self.configs)))
         
         try:
-            # Track total elements processed and updated
-            total_processed = 0
-            total_updated = 0
-            
-            # Process each configuration separately
-            for i, config in enumerate(self.configs):
-                logger.info("==== Processing configuration {}/{}: {} ====".format(
-                    i + 1, len(self.configs), config.DisplayName
-                ))
-                logger.info("Checklist: {} (ID: {})".format(config.ChecklistName, config.checklist_id))
-                logger.info("Property: {} -> Parameter: {}".format(config.streambim_property, config.revit_parameter))
-                logger.info("Mapping enabled: {}".format(config.mapping_enabled))
-                
-                # Skip configurations without checklist ID
-                if not config.checklist_id:
-                    logger.info("Skipping configuration - no checklist ID")
-                    config.elements_processed = 0
-                    config.elements_updated = 0
-                    continue
-                
-                # Process this configuration in its own transaction
-                processed_count, updated_count = self.process_single_configuration(config, i, len(self.configs))
-                
-                # Update totals
-                total_processed += processed_count
-                total_updated += updated_count
-            
-            logger.info("Batch import completed. Processed {} configurations. Updated {}/{} elements.".format(
-                len(self.configs), total_updated, total_processed))
+            write_plan, config_plans = self.plan_import()
+            self.execute_import(write_plan, config_plans)
             
         except Exception as e:
             logger.error("Error running batch import: {}".format(str(e)))
@@ -269,299 +251,128 @@ class RunEverythingProcessor:
             import traceback
             logger.error("Stack trace: {}".format(traceback.format_exc()))
     
-    def get_property_value(self, checklist_item, property_name):
-        """Get property value from checklist item.
-        Check both attributes.properties and items paths in the JSON structure."""
-        try:
-            # First try the attributes.properties path
-            props = checklist_item.get('attributes', {}).get('properties', {})
-            if props and property_name in props:
-                return props.get(property_name)
-            
-            # Then try the items path
-            if 'items' in checklist_item and property_name in checklist_item['items']:
-                return checklist_item['items'][property_name]
-                
-            return None
-        except Exception as e:
-            logger.error("Error getting property value: {}".format(str(e)))
-            return None
-            
-    def set_parameter_value(self, param, value, storage_type):
-        """Set parameter value based on storage type."""
-        try:
-            if param.IsReadOnly:
-                return False
-                
-            if storage_type == StorageType.String:
-                # Convert to string
-                str_value = str(value)
-                if param.AsString() != str_value:
-                    param.Set(str_value)
-                    return True
-                    
-            elif storage_type == StorageType.Integer:
-                # Try to convert to integer
-                try:
-                    int_value = int(value)
-                    if param.AsInteger() != int_value:
-                        param.Set(int_value)
-                        return True
-                except (ValueError, TypeError):
-                    logger.debug("Could not convert '{}' to integer".format(value))
-                    return False
-                    
-            elif storage_type == StorageType.Double:
-                # Try to convert to double
-                try:
-                    double_value = float(value)
-                    if param.AsDouble() != double_value:
-                        param.Set(double_value)
-                        return True
-                except (ValueError, TypeError):
-                    logger.debug("Could not convert '{}' to double".format(value))
-                    return False
-                    
-            elif storage_type == StorageType.ElementId:
-                # Try to convert to ElementId
-                try:
-                    int_value = int(value)
-                    element_id = ElementId(int_value)
-                    if param.AsElementId() != element_id:
-                        param.Set(element_id)
-                        return True
-                except (ValueError, TypeError):
-                    logger.debug("Could not convert '{}' to ElementId".format(value))
-                    return False
-                    
-            return False
-        except Exception as e:
-            logger.error("Error setting parameter value: {}".format(str(e)))
-            return False
-
-    def process_single_configuration(self, config, config_index, total_configs):
-        """Process a single configuration with its own transaction.
-        Returns a tuple of (processed_count, updated_count)."""
-        processed_count = 0
-        updated_count = 0
+    def plan_import(self):
+        """Download the checklists of all configurations and plan their writes.
         
-        try:
-            # Get checklist items from StreamBIM
+        Returns:
+            tuple: (WritePlan, list of ConfigPlan)
+        """
+        logger.info("Starting batch import process for {} configurations".format(len(self.configs)))
+        for i, config in enumerate(self.configs):
+            logger.info("Configuration {}/{}: {} | Checklist: {} (ID: {}) | Mapping enabled: {}".format(
+                i + 1, len(self.configs), config.DisplayName, config.ChecklistName,
+                config.checklist_id, config.mapping_enabled))
+        
+        # One IFC GUID index serves every configuration
+        self.ifc_guid_index = guid_index.get_index(revit.doc)
+        
+        # Download each checklist once and merge all writes into one plan
+        planner = RunPlanner(self.api_client, self.ifc_guid_index, self.get_checklist_metadata)
+        write_plan, config_plans = planner.plan(self.configs)
+        logger.info("Planned {} parameter writes from {} configurations".format(
+            len(write_plan), len(config_plans)))
+        return write_plan, config_plans
+    
+    def execute_import(self, write_plan, config_plans):
+        """Execute a plan from plan_import and log the results.
+        
+        Returns:
+            dict: 'committed' (False if the transaction was rolled back) and
+                the 'processed', 'updated', 'unchanged' and 'failed' totals
+        """
+        # Execute the whole plan in one transaction
+        committed = self.execute_write_plan(write_plan, config_plans)
+        
+        totals = {'committed': committed, 'processed': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        for config_plan in config_plans:
+            config = config_plan.config
+            totals['processed'] += config.elements_processed
+            totals['updated'] += config.elements_updated
+            totals['unchanged'] += config.elements_unchanged
+            totals['failed'] += config.elements_failed
+        
+        logger.info("Batch import completed. Processed {} configurations. Updated {}/{} elements "
+                    "({} unchanged, {} failed).".format(
+                        len(self.configs), totals['updated'], totals['processed'],
+                        totals['unchanged'], totals['failed']))
+        self.log_timings(config_plans)
+        logger.info(self.api_client.get_checklist_cache().get_status_text())
+        return totals
+    
+    def execute_write_plan(self, write_plan, config_plans):
+        """Write the planned values that differ from the model in a single transaction.
+        
+        Every planned value is compared with the parameter first; unchanged
+        values are not written, and when nothing changed no transaction is
+        opened. Sets elements_total/processed/updated/unchanged/failed of
+        every configuration.
+        
+        Returns:
+            bool: False if the transaction was rolled back
+        """
+        committed = True
+        writer = param_writes.ParameterWriter(revit.doc)
+        pending_writes = []
+        for element, parameter_name, value, config_plan in write_plan:
+            start_time = time.time()
             try:
-                # Get checklist items with proper error handling
-                logger.info("Retrieving checklist items for checklist ID: {}".format(config.checklist_id))
-                checklist_items = self.api_client.get_checklist_items(config.checklist_id, limit=0)
-                if not checklist_items:
-                    logger.info("No checklist items found for checklist ID: {}".format(config.checklist_id))
-                    config.elements_processed = 0
-                    config.elements_updated = 0
-                    return (0, 0)
-                    
-                logger.info("Retrieved {} checklist items for {}".format(len(checklist_items), config.ChecklistName))
-                
+                # Missing and read-only parameters are skipped
+                status, pending = writer.check(element, parameter_name, value)
+                if pending:
+                    pending_writes.append((pending, config_plan))
+                else:
+                    config_plan.write_counts.add(status)
             except Exception as e:
-                logger.error("Error retrieving checklist items: {}".format(str(e)))
-                config.elements_processed = 0
-                config.elements_updated = 0
-                return (0, 0)
-            
-            # Create value mapping dictionary if enabled
-            value_mapping = {}
-            if config.mapping_enabled and config.mapping_config:
-                try:
-                    logger.debug("Loading value mappings...")
-                    mapping_data = json.loads(config.mapping_config)
-                    for mapping in mapping_data:
-                        checklist_value = mapping.get('ChecklistValue')
-                        revit_value = mapping.get('RevitValue')
-                        if checklist_value and revit_value:
-                            value_mapping[checklist_value] = revit_value
-                    logger.debug("Loaded {} value mappings".format(len(value_mapping)))
-                except Exception as e:
-                    logger.error("Error parsing mapping config: {}".format(str(e)))
-            
-            # Check if this is a grouped checklist
-            group_by, building_id = self.get_checklist_metadata(config.checklist_id)
-            is_grouped = group_by and len(group_by) > 0
-            
-            if is_grouped:
-                # Grouped checklist: resolve group keys to IFC GUIDs
-                if not building_id:
-                    logger.warning("Cannot process grouped checklist {}: no building ID found".format(config.checklist_id))
-                    config.elements_processed = 0
-                    config.elements_updated = 0
-                    return (0, 0)
-                
-                logger.info("Processing grouped checklist with group-by: {}".format(group_by))
-                
-                # Build mapping from IFC GUID to property value
-                guid_to_value = {}
-                for item in checklist_items:
-                    try:
-                        # Get group key (object value)
-                        group_key = item.get('object')
-                        if not group_key:
-                            continue
-                        
-                        # Get property value from this group
-                        property_value = self.get_property_value(item, config.streambim_property)
-                        if property_value is None:
-                            continue
-                        
-                        # Apply value mapping if enabled
-                        if config.mapping_enabled:
-                            if property_value in value_mapping:
-                                property_value = value_mapping[property_value]
-                            else:
-                                # Skip if mapping enabled but value not in mapping
-                                continue
-                        
-                        # Resolve group key to IFC GUIDs
-                        ifc_guids = self.api_client.resolve_group_key_to_ifc_guids(
-                            config.checklist_id,
-                            building_id,
-                            group_key
-                        )
-                        
-                        # Map all resolved GUIDs to this property value
-                        for guid in ifc_guids:
-                            guid_to_value[guid] = property_value
-                            
-                    except Exception as e:
-                        logger.error("Error resolving group key: {}".format(str(e)))
-                        continue
-                
-                logger.info("Resolved groups to {} IFC GUID mappings".format(len(guid_to_value)))
-                element_ids = set(guid_to_value.keys())
-                
-            else:
-                # Non-grouped checklist: direct GUID matching (existing behavior)
-                guid_to_value = {}
-                element_ids = set()
-                
-                for item in checklist_items:
-                    element_id = item.get('object')
-                    if not element_id:
-                        element_id = item.get('attributes', {}).get('elementId')
-                    if not element_id:
-                        continue
-                    
-                    element_ids.add(element_id)
-                    
-                    # Get property value
-                    property_value = self.get_property_value(item, config.streambim_property)
-                    if property_value is None:
-                        continue
-                    
-                    # Apply value mapping if enabled
-                    if config.mapping_enabled:
-                        if property_value in value_mapping:
-                            property_value = value_mapping[property_value]
-                        else:
-                            continue
-                    
-                    guid_to_value[element_id] = property_value
-            
-            # If no elements found, skip
-            if not element_ids:
-                logger.info("No element IDs found in checklist items")
-                return (0, 0)
-                
-            logger.info("Found {} unique element IDs in checklist items".format(len(element_ids)))
-            
-            # Build a lookup dictionary for elements by IfcGUID
-            element_lookup = {}
-            logger.info("Building element lookup dictionary...")
-            
-            # Get all elements in the document
-            all_elements = FilteredElementCollector(revit.doc).WhereElementIsNotElementType().ToElements()
-            
-            # Filter for elements with IfcGUID parameter that match our IDs
-            count = 0
-            for element in all_elements:
-                try:
-                    # Check for different variations of the parameter name
-                    ifc_guid_param = element.LookupParameter("IFCGuid")
-                    if not ifc_guid_param:
-                        ifc_guid_param = element.LookupParameter("IfcGUID")
-                    if not ifc_guid_param:
-                        ifc_guid_param = element.LookupParameter("IFC GUID")
-                    
-                    if ifc_guid_param and ifc_guid_param.HasValue:
-                        guid_value = ifc_guid_param.AsString()
-                        if guid_value in element_ids:
-                            element_lookup[guid_value] = element
-                            count += 1
-                except:
-                    continue
-                    
-            logger.info("Found {} elements with matching GUIDs".format(count))
-            
-            # Start a transaction for this configuration
-            t = Transaction(revit.doc, "Batch Import: " + config.DisplayName)
+                logger.error("Error processing element: {}".format(str(e)))
+                config_plan.write_counts.add(param_writes.FAILED)
+            config_plan.timings['write'] += time.time() - start_time
+        logger.info("{} of {} planned values differ from the model".format(
+            len(pending_writes), len(write_plan)))
+        
+        if pending_writes:
+            t = Transaction(revit.doc, "Run Everything: {} configurations".format(len(config_plans)))
             t.Start()
             
             try:
-                logger.info("Starting element processing")
-                
-                # Set an estimated number of elements for the progress tracking
-                config.elements_total = len(guid_to_value)
-                
-                # Process GUID to value mappings
-                item_count = 0
-                for guid, property_value in guid_to_value.items():
-                    item_count += 1
-                    processed_count += 1
-                    
-                    try:
-                        # Find the element using our lookup dictionary
-                        element = element_lookup.get(guid)
-                        if not element:
-                            continue
-                        
-                        # Get the parameter
-                        param = element.LookupParameter(config.revit_parameter)
-                        if not param:
-                            continue
-                        
-                        # Skip read-only parameters
-                        if param.IsReadOnly:
-                            continue
-                        
-                        # Set parameter value based on type
-                        param_storage_type = param.StorageType
-                        
-                        # Set the parameter value
-                        set_value_result = self.set_parameter_value(param, property_value, param_storage_type)
-                        if set_value_result:
-                            updated_count += 1
-                            
-                    except Exception as e:
-                        logger.error("Error processing element: {}".format(str(e)))
+                for write_count, (pending, config_plan) in enumerate(pending_writes, 1):
+                    start_time = time.time()
+                    config_plan.write_counts.add(writer.apply(pending))
+                    config_plan.timings['write'] += time.time() - start_time
                     
                     # Log progress periodically
-                    if item_count % 100 == 0:
-                        logger.debug("Processed {}/{} mappings, updated {} so far".format(item_count, len(guid_to_value), updated_count))
+                    if write_count % 1000 == 0:
+                        logger.debug("Written {}/{} changed values".format(write_count, len(pending_writes)))
                 
-                # Commit the transaction
                 t.Commit()
-                
-                # Update the final progress
-                config.elements_processed = processed_count
-                config.elements_updated = updated_count
-                logger.info("Completed configuration {}/{}: {} - Processed: {}, Updated: {}".format(
-                    config_index + 1, total_configs, config.DisplayName, processed_count, updated_count))
-                
             except Exception as e:
                 # Roll back the transaction if there was an error
                 if t.HasStarted():
                     t.RollBack()
-                logger.error("Error processing configuration: {}".format(str(e)))
-                
-        except Exception as e:
-            logger.error("Error in process_single_configuration: {}".format(str(e)))
+                for config_plan in config_plans:
+                    config_plan.write_counts.failed += config_plan.write_counts.written
+                    config_plan.write_counts.written = 0
+                logger.error("Error writing planned values: {}".format(str(e)))
+                committed = False
         
-        return (processed_count, updated_count)
+        for config_plan in config_plans:
+            config = config_plan.config
+            config.elements_total = len(config_plan.guid_to_value)
+            config.elements_processed = len(config_plan.guid_to_value)
+            config.elements_updated = config_plan.write_counts.written
+            config.elements_unchanged = config_plan.write_counts.unchanged
+            config.elements_failed = config_plan.write_counts.failed
+        return committed
+    
+    def log_timings(self, config_plans):
+        """Log the per-configuration timing breakdown."""
+        logger.info("Timing per configuration (download is shared by configurations of one checklist):")
+        for i, config_plan in enumerate(config_plans):
+            timings = config_plan.timings
+            logger.info("  {}. {}: download {:.2f}s, extract {:.2f}s, resolve {:.2f}s, lookup {:.2f}s, "
+                        "write {:.2f}s - Processed: {}, {}".format(
+                            i + 1, config_plan.config.DisplayName, timings['download'], timings['extract'],
+                            timings['resolve'], timings['lookup'], timings['write'],
+                            config_plan.config.elements_processed, config_plan.write_counts.get_summary_text()))
 
 # Main execution
 if __name__ == '__main__':
@@ -106,7 +106,7 @@ HOST_APP.app.DocumentOpening += \
         doc_opening_handler
     )
 
-# Register IFC export handler for 3D Zone parameter mapping
+# Keep the shared settings storage registry in sync with DataStorage edits
 try:
     import sys
     import os.path as op
@@ -115,6 +115,20 @@ try:
     if lib_path not in sys.path:
         sys.path.insert(0, lib_path)
     
+    from revit import storage_registry
+    storage_registry.register_invalidation_handlers(HOST_APP.app)
+except Exception as e:
+    script_logger.warning("Could not register settings storage registry handlers: {}".format(str(e)))
+
+# Keep the shared IFC GUID index in sync with model edits
+try:
+    from revit import guid_index
+    guid_index.register_invalidation_handlers(HOST_APP.app)
+except Exception as e:
+    script_logger.warning("Could not register IFC GUID index handlers: {}".format(str(e)))
+
+# Register IFC export handler for 3D Zone parameter mapping
+try:
     from zone3d import ifc_export
     if ifc_export.register_ifc_export_handler():
         pass